@@ -54,6 +54,12 @@ PRIMARY_SERVER_DEFAULT_PORT = 30701
 PRIMARY_SERVER_AVAILABLE_PORTS = [
     30701, 30702, 30703, 30704, 30705, 30706, 30707, 30708, 30709, 30710, 30711]
 
+# The number of worker threads with which each of the demo's XML-RPC services
+# (Director, Primary) handles requests, and the number of accepted requests that
+# can wait for a free worker. See demo/threaded_xmlrpc.py.
+XMLRPC_WORKER_THREADS = 8
+XMLRPC_MAX_QUEUED_REQUESTS = 32
+
 
 
 
@@ -47,6 +47,7 @@ import shutil # For copying directory trees
 import sys, subprocess, time # For hosting
 import tuf.repository_tool as rt
 import demo.demo_image_repo as demo_image_repo # for the Image repo directory /:
+import demo.threaded_xmlrpc as threaded_xmlrpc # for the director services interface
 from uptane import GREEN, RED, YELLOW, ENDCOLORS
 
 from six.moves import xmlrpc_server # for the director services interface
@@ -73,6 +74,13 @@ KNOWN_VINS = ['111', '112', '113', 'democar']
 repo_server_process = None
 director_service_instance = None
 director_service_thread = None
+director_server = None
+
+# The Director services interface handles requests concurrently. Vehicle and
+# ECU Manifests only touch the inventory database, which has its own lock, but
+# the functions that create or modify Director repositories (and so TUF's
+# global key and role databases) are serialized with this lock.
+repository_lock = threading.RLock()
 
 
 def clean_slate(use_new_keys=False):
@@ -137,8 +145,8 @@ def clean_slate(use_new_keys=False):
   # Director starts off with. (Currently 3)
   # This copies the file to each vehicle repository's targets directory from
   # the Image Repository.
-  for vin in inventory.ecus_by_vin:
-    for ecu in inventory.ecus_by_vin[vin]:
+  for vin in inventory.get_registered_vins():
+    for ecu in inventory.get_ecus_in_vehicle(vin):
       add_target_to_director(
           os.path.join(demo.IMAGE_REPO_TARGETS_DIR, 'infotainment_firmware.txt'),
           'infotainment_firmware.txt',
@@ -758,17 +766,23 @@ def listen():
   """
 
   global director_service_thread
+  global director_server
 
   if director_service_thread is not None:
     print(LOG_PREFIX + 'Sorry: there is already a Director service thread '
         'listening.')
     return
 
-  # Create server
-  server = xmlrpc_server.SimpleXMLRPCServer(
+  # Create server, which handles requests with a pool of worker threads so that
+  # one slow Primary does not hold up the others.
+  server = threaded_xmlrpc.ThreadPoolXMLRPCServer(
       (demo.DIRECTOR_SERVER_HOST, demo.DIRECTOR_SERVER_PORT),
       requestHandler=RequestHandler, allow_none=True)
 
+  def register_serialized_function(function, name):
+    server.register_function(
+        threaded_xmlrpc.serialized(function, repository_lock), name)
+
   # Register function that can be called via XML-RPC, allowing a Primary to
   # submit a vehicle version manifest.
   server.register_function(
@@ -781,7 +795,7 @@ def listen():
 
 
   # Interface available for the demo website frontend.
-  server.register_function(
+  register_serialized_function(
       director_service_instance.add_new_vehicle, 'add_new_vehicle')
   # Have decided that a function to add an ecu is unnecessary.
   # Just add targets for it. It'll be registered when that ecu registers itself.
@@ -790,8 +804,9 @@ def listen():
 
   # Provide absolute path for this, or path relative to the Director's repo
   # directory.
-  server.register_function(add_target_to_director, 'add_target_to_director')
-  server.register_function(write_to_live, 'write_director_repo')
+  register_serialized_function(
+      add_target_to_director, 'add_target_to_director')
+  register_serialized_function(write_to_live, 'write_director_repo')
 
   server.register_function(
       inventory.get_last_vehicle_manifest, 'get_last_vehicle_manifest')
@@ -801,40 +816,44 @@ def listen():
   server.register_function(
       director_service_instance.register_ecu_serial, 'register_ecu_serial')
 
-  server.register_function(clear_vehicle_targets, 'clear_vehicle_targets')
+  register_serialized_function(clear_vehicle_targets, 'clear_vehicle_targets')
 
   # Attack 1: Arbitrary Package Attack on Director Repository without
   # Compromised Keys.
   # README.md section 3.1
-  server.register_function(mitm_arbitrary_package_attack,
+  register_serialized_function(mitm_arbitrary_package_attack,
       'mitm_arbitrary_package_attack')
-  server.register_function(undo_mitm_arbitrary_package_attack,
+  register_serialized_function(undo_mitm_arbitrary_package_attack,
       'undo_mitm_arbitrary_package_attack')
 
   # Attack 2: Replay Attack without Compromised Keys
   # README.md section 3.3
-  server.register_function(prepare_replay_attack_nokeys,
+  register_serialized_function(prepare_replay_attack_nokeys,
       'prepare_replay_attack_nokeys')
-  server.register_function(replay_attack_nokeys, 'replay_attack_nokeys')
-  server.register_function(undo_replay_attack_nokeys,
+  register_serialized_function(replay_attack_nokeys, 'replay_attack_nokeys')
+  register_serialized_function(undo_replay_attack_nokeys,
       'undo_replay_attack_nokeys')
 
   # Attack 3: Arbitrary Package Attack with a Compromised Director Key
   # README.md section 3.4. Recovery in section 3.6
-  server.register_function(keyed_arbitrary_package_attack,
+  register_serialized_function(keyed_arbitrary_package_attack,
       'keyed_arbitrary_package_attack')
-  server.register_function(undo_keyed_arbitrary_package_attack,
+  register_serialized_function(undo_keyed_arbitrary_package_attack,
       'undo_keyed_arbitrary_package_attack')
 
   # Attack 4: Arbitrary Package with Revoked Keys
   # (README.md section 3.7)
-  server.register_function(sign_with_compromised_keys_attack,
+  register_serialized_function(sign_with_compromised_keys_attack,
       'sign_with_compromised_keys_attack')
-  server.register_function(undo_sign_with_compromised_keys_attack,
+  register_serialized_function(undo_sign_with_compromised_keys_attack,
       'undo_sign_with_compromised_keys_attack')
 
+  # Request queue depth and worker usage, for monitoring load.
+  server.register_function(server.get_metrics, 'get_service_metrics')
+
   print(LOG_PREFIX + 'Starting Director Services Thread: will now listen on '
       'port ' + str(demo.DIRECTOR_SERVER_PORT))
+  director_server = server
   director_service_thread = threading.Thread(target=server.serve_forever)
   director_service_thread.setDaemon(True)
   director_service_thread.start()
@@ -20,6 +20,7 @@ from __future__ import unicode_literals
 from io import open
 
 import demo
+import demo.threaded_xmlrpc as threaded_xmlrpc # for the Primary listener
 import uptane # Import before TUF modules; may change tuf.conf values.
 import uptane.common # for canonical key construction and signing
 import uptane.clients.primary as primary
@@ -73,6 +74,7 @@ primary_ecu = None
 ecu_key = None
 director_proxy = None
 listener_thread = None
+primary_server = None
 most_recent_signed_vehicle_manifest = None
 
 # log
@@ -483,6 +485,38 @@ def get_image_for_ecu(ecu_serial):
 
 
 
+def get_image_chunk_for_ecu(ecu_serial, offset, length):
+  """
+  Intended to be called via XMLRPC by the Secondary client, either partial or
+  full verification.
+
+  Returns part of the image assigned to the requesting Secondary, so that a
+  large image can be sent in pieces rather than all at once (see
+  uptane.clients.primary.Primary.get_image_chunk_for_ecu()), or None if there
+  is no update for that ECU. The data is in xmlrpc.Binary format.
+  """
+
+  # Ensure serial is correct format & registered
+  primary_ecu._check_ecu_serial(ecu_serial)
+
+  image_chunk = primary_ecu.get_image_chunk_for_ecu(ecu_serial, offset, length)
+
+  if image_chunk is None:
+    print('ECU Serial ' + repr(ecu_serial) + ' requested an image, but this '
+        'Primary has no update for that ECU.')
+    return None
+
+  if offset == 0:
+    print('Distributing image to ECU ' + repr(ecu_serial))
+    log.debug('Distributing image to ECU ' + repr(ecu_serial))
+
+  image_chunk['data'] = xmlrpc_client.Binary(image_chunk['data'])
+  return image_chunk
+
+
+
+
+
 def get_metadata_for_ecu(ecu_serial, force_partial_verification=False):
   """
   Provides the current metadata a Secondary will need to validate updates.
@@ -600,7 +634,12 @@ def listen():
   """
   Listens on an available port from list PRIMARY_SERVER_AVAILABLE_PORTS, for
   XML-RPC calls from demo Secondaries for Primary interface calls.
+
+  Requests are handled concurrently by a pool of worker threads, so that one
+  Secondary fetching a large image does not hold up the others. The Primary
+  object locks its ECU Manifests and nonces itself.
   """
+  global primary_server
 
   # Create server to listen for messages from Secondaries. In this
   # demonstration, an XMLRPC server is used and communications are sent in the
@@ -615,7 +654,7 @@ def listen():
   last_error = None
   for port in demo.PRIMARY_SERVER_AVAILABLE_PORTS:
     try:
-      server = xmlrpc_server.SimpleXMLRPCServer(
+      server = threaded_xmlrpc.ThreadPoolXMLRPCServer(
           (demo.PRIMARY_SERVER_HOST, port),
           requestHandler=RequestHandler, allow_none=True)
     except socket.error as e:
@@ -667,6 +706,10 @@ def listen():
   # Deployment Considerations document.
   server.register_function(get_image_for_ecu, 'get_image')
 
+  # Large images can instead be sent in pieces, so that neither ECU has to
+  # hold all of an image in memory at once.
+  server.register_function(get_image_chunk_for_ecu, 'get_image_chunk')
+
   server.register_function(get_metadata_for_ecu, 'get_metadata')
 
   # This again is for convenience in the demo. While I don't see an obvious
@@ -679,6 +722,10 @@ def listen():
   # server.register_function(compromise_primary_and_deliver_arbitrary,
   #     'compromise_primary_and_deliver_arbitrary')
 
+  # Request queue depth and worker usage, for monitoring load.
+  server.register_function(server.get_metrics, 'get_service_metrics')
+
+  primary_server = server
 
   print('Primary will now listen on port ' + str(successful_port))
   server.serve_forever()
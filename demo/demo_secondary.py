@@ -59,6 +59,12 @@ uptane.DEMO_MODE = True
 # Globals
 CLIENT_DIRECTORY_PREFIX = 'temp_secondary' # name for this secondary's directory
 CLIENT_DIRECTORY = None
+
+# The number of bytes of an image to request from the Primary at once.
+IMAGE_CHUNK_SIZE = 65536
+# How many times to request a chunk that does not match the hashes sent with
+# it before giving up on the image.
+IMAGE_CHUNK_ATTEMPTS = 3
 _vin = 'democar'
 _ecu_serial = 'TCUdemocar'
 _primary_host = demo.PRIMARY_SERVER_HOST
@@ -399,10 +405,12 @@ def update_cycle():
     return
 
   log.debug('Submitting a request for a image to the Primary.')
-  # Download the image for this ECU from the Primary.
-  (image_fname, image) = pserver.get_image(secondary_ecu.ecu_serial)
+  # Find out which image the Primary has for this ECU, without downloading any
+  # of it yet.
+  image_chunk = pserver.get_image_chunk(secondary_ecu.ecu_serial, 0, 0)
+  image_fname = None if image_chunk is None else image_chunk['filepath']
 
-  if image is None:
+  if image_chunk is None:
     print(YELLOW + 'Requested image from Primary but received none. Update '
         'terminated.' + ENDCOLORS)
     attacks_detected += 'Requested image from Primary but received none.\n'
@@ -437,17 +445,41 @@ def update_cycle():
     submit_ecu_manifest_to_primary()
     return
 
-  # Write the downloaded image binary data to disk.
-  unverified_targets_dir = os.path.join(CLIENT_DIRECTORY, 'unverified_targets')
-  if not os.path.exists(unverified_targets_dir):
-    os.mkdir(unverified_targets_dir)
-  with open(os.path.join(unverified_targets_dir, image_fname), 'wb') as fobj:
-    fobj.write(image.data)
-
-
-  # Validate the image against the metadata.
+  # Download the image for this ECU from the Primary one piece at a time,
+  # writing it to disk and validating it against the metadata as it arrives,
+  # so that it never has to be held in memory. If an earlier download of the
+  # image was interrupted, this picks up where it left off.
   try:
-    secondary_ecu.validate_image(image_fname)
+    offset = secondary_ecu.begin_image_transfer(image_fname)
+    failed_attempts = 0
+
+    while offset < image_chunk['length']:
+      image_chunk = pserver.get_image_chunk(
+          secondary_ecu.ecu_serial, offset, IMAGE_CHUNK_SIZE)
+      if image_chunk is None or not image_chunk['data'].data:
+        # The Primary has stopped providing the image; validation below will
+        # fail on the image's length.
+        break
+      image_chunk['data'] = image_chunk['data'].data
+
+      # A chunk that does not match the hashes sent with it is not written,
+      # and is requested again, in case it was only corrupted in transit.
+      try:
+        offset = secondary_ecu.receive_image_chunk(image_chunk)
+
+      except tuf.BadHashError:
+        failed_attempts += 1
+        if failed_attempts >= IMAGE_CHUNK_ATTEMPTS:
+          raise
+        log.warning('Part of image ' + repr(image_fname) + ' at offset ' +
+            repr(offset) + ' did not match its hashes. Requesting it again.')
+
+      else:
+        failed_attempts = 0
+
+    # Validate the image against the metadata.
+    secondary_ecu.finish_image_transfer()
+
   except tuf.DownloadLengthMismatchError:
     print_banner(
         BANNER_DEFENDED, color=WHITE+DARK_BLUE_BG,
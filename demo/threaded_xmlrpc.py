@@ -0,0 +1,172 @@
+"""
+threaded_xmlrpc.py
+
+An XML-RPC server for the demo services (Director, Primary) that handles
+requests concurrently, using a fixed pool of worker threads, so that one slow
+client (e.g. a Primary uploading a large DER Vehicle Manifest over a slow link)
+does not hold up every other client.
+
+Accepted connections wait in a bounded queue until a worker is free. When the
+queue is full, the listening thread stops accepting connections until there is
+room, and further clients wait in the socket's listen backlog.
+
+The functions registered with the server are called from the worker threads,
+so they must be safe to call concurrently. The inventory database
+(uptane.services.inventorydb) and the Primary's ECU Manifests and nonces are
+protected by locks; functions that modify shared state that is not can be
+wrapped with serialized().
+"""
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import threading
+import functools
+
+from six.moves import queue
+from six.moves import xmlrpc_server
+
+import demo
+
+
+class ThreadPoolXMLRPCServer(xmlrpc_server.SimpleXMLRPCServer):
+  """
+  A SimpleXMLRPCServer that handles requests with a pool of worker threads,
+  started when the server is created. Run serve_forever() (in any one thread)
+  to accept connections, as with SimpleXMLRPCServer.
+
+  Arguments beyond those of SimpleXMLRPCServer:
+
+    num_workers
+      The number of requests that can be handled at once.
+
+    max_queued_requests
+      The number of accepted connections that can wait for a free worker.
+
+  get_metrics() reports on the request queue and the workers; it may be
+  registered as an XML-RPC function itself.
+  """
+
+  # Let the listen backlog absorb bursts of connections while the queue is
+  # full.
+  request_queue_size = 64
+
+  def __init__(self, addr, num_workers=demo.XMLRPC_WORKER_THREADS,
+      max_queued_requests=demo.XMLRPC_MAX_QUEUED_REQUESTS, **kwargs):
+
+    self.num_workers = num_workers
+    self._requests = queue.Queue(max_queued_requests)
+    self._workers = []
+
+    # This binds the socket, calling server_close() if that fails.
+    xmlrpc_server.SimpleXMLRPCServer.__init__(self, addr, **kwargs)
+
+    self._metrics_lock = threading.Lock()
+    self._max_queue_depth = 0
+    self._active_workers = 0
+    self._requests_handled = 0
+    self._requests_failed = 0
+
+    for i in range(num_workers):
+      worker = threading.Thread(target=self._handle_queued_requests)
+      worker.daemon = True
+      worker.start()
+      self._workers.append(worker)
+
+
+
+  def process_request(self, request, client_address):
+    """
+    Called by serve_forever() for each accepted connection. Rather than
+    handling the request in the listening thread, queue it for a worker,
+    blocking if the queue is full.
+    """
+    self._requests.put((request, client_address))
+
+    with self._metrics_lock:
+      self._max_queue_depth = max(
+          self._max_queue_depth, self._requests.qsize())
+
+
+
+  def _handle_queued_requests(self):
+    while True:
+      queued_request = self._requests.get()
+
+      # server_close() queues None to stop each worker.
+      if queued_request is None:
+        return
+
+      request, client_address = queued_request
+
+      with self._metrics_lock:
+        self._active_workers += 1
+
+      failed = False
+      try:
+        self.finish_request(request, client_address)
+      except Exception:
+        failed = True
+        self.handle_error(request, client_address)
+      finally:
+        self.shutdown_request(request)
+
+        with self._metrics_lock:
+          self._active_workers -= 1
+          self._requests_handled += 1
+          if failed:
+            self._requests_failed += 1
+
+
+
+  def server_close(self):
+    """
+    Close the listening socket and stop the workers once they have handled the
+    requests already queued.
+    """
+    xmlrpc_server.SimpleXMLRPCServer.server_close(self)
+
+    for worker in self._workers:
+      self._requests.put(None)
+
+    self._workers = []
+
+
+
+  def get_metrics(self):
+    """
+    Returns a dictionary describing the load on the server:
+
+      queue_depth: the number of requests waiting for a free worker
+      max_queue_depth: the largest queue_depth seen
+      active_workers: the number of requests being handled
+      num_workers: the size of the worker pool
+      requests_handled: the number of requests handled so far
+      requests_failed: how many of those could not be handled (e.g. because the
+          client disconnected); errors raised by the registered functions
+          themselves are returned to the client as XML-RPC faults instead.
+    """
+    with self._metrics_lock:
+      return {
+          'queue_depth': self._requests.qsize(),
+          'max_queue_depth': self._max_queue_depth,
+          'active_workers': self._active_workers,
+          'num_workers': self.num_workers,
+          'requests_handled': self._requests_handled,
+          'requests_failed': self._requests_failed}
+
+
+
+
+
+def serialized(function, lock):
+  """
+  Returns a function that calls the given function while holding the given
+  lock, for registering functions with a ThreadPoolXMLRPCServer that must not
+  run concurrently with one another (e.g. those that modify a TUF repository).
+  """
+  @functools.wraps(function)
+  def serialized_function(*args, **kwargs):
+    with lock:
+      return function(*args, **kwargs)
+
+  return serialized_function
@@ -17,7 +17,9 @@ import tuf.encoding.metadata_asn1_definitions as metadata_asn1_spec
 from tuf.encoding import hex_from_octetstring
 
 import tuf.keys
+import tuf.sig
 import hashlib
+import copy
 
 class TestASN1Conversion(unittest.TestCase):
 
@@ -45,6 +47,109 @@ class TestASN1Conversion(unittest.TestCase):
 
 
 
+  def test_split_der_sequence(self):
+
+    # A SEQUENCE containing an INTEGER and an OCTET STRING.
+    der_data = b'\x30\x07\x02\x01\x05\x04\x02\xab\xcd'
+    self.assertEqual([b'\x02\x01\x05', b'\x04\x02\xab\xcd'],
+        asn1_codec.split_der_sequence(der_data))
+
+    # A long-form length, and an empty SEQUENCE.
+    long_octet_string = b'\x04\x81\x80' + b'\x00' * 128
+    self.assertEqual([long_octet_string], asn1_codec.split_der_sequence(
+        b'\x30\x81\x83' + long_octet_string))
+    self.assertEqual([], asn1_codec.split_der_sequence(b'\x30\x00'))
+
+    # Not a SEQUENCE, or truncated.
+    self.assertRaises(tuf.Error, asn1_codec.split_der_sequence, b'')
+    self.assertRaises(tuf.Error, asn1_codec.split_der_sequence, der_data[2:])
+    self.assertRaises(tuf.Error, asn1_codec.split_der_sequence, der_data[:-1])
+    self.assertRaises(tuf.Error, asn1_codec.split_der_sequence,
+        b'\x30\x03\x04\x02\xab')
+
+
+
+  def test_signed_digest_cache(self):
+
+    signable = tuf.util.load_file('repository_data/uptane_director_root.json')
+    signable_der = asn1_codec.convert_signed_metadata_to_der(
+        signable, resign=True, private_key=self.test_signing_key)
+    pydict = asn1_codec.convert_signed_der_to_dersigned_json(signable_der)
+    signature = pydict['signatures'][0]
+
+    self.assertTrue(tuf.sig.verify_signature_over_metadata(
+        self.test_signing_key, signature, pydict['signed'], 'der'))
+
+    # An equal object that was not itself decoded from DER is not in the
+    # cache, but its signature is still checked (over a new encoding).
+    signed_copy = copy.deepcopy(pydict['signed'])
+    self.assertIsNone(asn1_codec.get_cached_signed_digest(signed_copy))
+    self.assertTrue(tuf.sig.verify_signature_over_metadata(
+        self.test_signing_key, signature, signed_copy, 'der'))
+
+    # If the decoded object is modified, the cached digest is not used.
+    pydict['signed']['version'] += 1
+    self.assertIsNone(asn1_codec.get_cached_signed_digest(pydict['signed']))
+    self.assertFalse(tuf.sig.verify_signature_over_metadata(
+        self.test_signing_key, signature, pydict['signed'], 'der'))
+
+
+
+  def test_der_coder_matches_pyasn1(self):
+
+    # The hand-written DER codec in tuf.encoding.der_coder must produce exactly
+    # the same DER as the pyasn1-based coders, and decode it to the same data.
+    for json_fname in [
+        'uptane_director_root.json', 'uptane_mainrepo_root.json',
+        'uptane_director_targets.json', 'uptane_mainrepo_targets.json',
+        'uptane_mainrepo_targets_minimal.json', 'uptane_mainrepo_role1.json',
+        'targets_simpler.json', 'uptane_mainrepo_snapshot.json',
+        'uptane_director_timestamp.json']:
+
+      signable = tuf.util.load_file(os.path.join('repository_data', json_fname))
+
+      try:
+        asn1_codec.USE_PYASN1 = True
+        expected_der = asn1_codec.convert_signed_metadata_to_der(signable)
+        expected_pydict = asn1_codec.convert_signed_der_to_dersigned_json(
+            expected_der)
+
+      finally:
+        asn1_codec.USE_PYASN1 = False
+
+      signable_der = asn1_codec.convert_signed_metadata_to_der(signable)
+      self.assertEqual(expected_der, signable_der, json_fname)
+      self.assertEqual(expected_pydict,
+          asn1_codec.convert_signed_der_to_dersigned_json(signable_der))
+
+
+
+  def test_der_coder_errors(self):
+
+    signable = tuf.util.load_file(
+        'repository_data/uptane_director_targets.json')
+    signable_der = asn1_codec.convert_signed_metadata_to_der(signable)
+
+    # Truncated data.
+    self.assertRaises(tuf.Error,
+        asn1_codec.convert_signed_der_to_dersigned_json, signable_der[:-1])
+
+    # Metadata that the ASN.1 definitions cannot represent.
+    for field, value in [('version', -1), ('expires', 'tomorrow')]:
+      bad_signable = copy.deepcopy(signable)
+      bad_signable['signed'][field] = value
+      self.assertRaises(tuf.Error,
+          asn1_codec.convert_signed_metadata_to_der, bad_signable)
+
+    bad_signable = copy.deepcopy(signable)
+    bad_signable['signed']['targets'][
+        'a_filename_longer_than_thirty_two_characters'] = \
+        list(signable['signed']['targets'].values())[0]
+    self.assertRaises(tuf.Error,
+        asn1_codec.convert_signed_metadata_to_der, bad_signable)
+
+
+
   # THIS NEXT TEST fails because the TUF root.json test file in question here
   # uses an RSA key, which the ASN1 conversion does not yet support.
   # TODO: FIX.
@@ -267,10 +372,6 @@ class TestASN1Conversion(unittest.TestCase):
 
 
 
-  @unittest.expectedFailure
-  # THIS NEXT TEST FAILS because the provided targets role includes delegations,
-  # and the current ASN.1 conversion code does not support delegations (and
-  # must be updated to do so).
   def test_10asn_convert_targets(self):
     """
     Test ASN.1-only conversion for a Targets role containing delegations and
@@ -282,10 +383,6 @@ class TestASN1Conversion(unittest.TestCase):
 
 
 
-  @unittest.expectedFailure
-  # THIS NEXT TEST FAILS because the provided targets role includes delegations,
-  # and the current ASN.1 conversion code does not support delegations (and
-  # must be updated to do so).
   def test_10der_convert_targets(self):
     """
     Test ASN.1 conversions with DER encoding for a Targets role containing
@@ -498,6 +595,11 @@ def der_conversion_tester(json_fname, cls):
 
   cls.assertEqual(role_signable_pydict, pydict_again)
 
+  # The digest of the original DER encoding of the 'signed' portion has been
+  # remembered, and is the same as the digest of a new encoding of it.
+  cls.assertEqual(der_signed_hash,
+      asn1_codec.get_cached_signed_digest(pydict_again['signed']))
+
 
   # Test type 3: full conversion with re-signing
   # Convert the full signable ('signed' and 'signatures'), but discarding the
@@ -32,12 +32,15 @@ import hashlib
 import logging
 import os
 import random
+import socket
 import subprocess
+import threading
 import time
 import unittest
 
 import tuf
 import tuf.conf
+import tuf.formats
 import tuf.download as download
 import tuf.log
 import tuf.unittest_toolbox as unittest_toolbox
@@ -252,6 +255,283 @@ class TestDownload(unittest_toolbox.Modified_TestCase):
     self.assertEqual(content_length, None)
 
 
+
+  def test__adapt_chunk_size(self):
+    # Fast, full reads double the chunk size.
+    chunk_size = download._adapt_chunk_size(tuf.conf.CHUNK_SIZE, True, 0)
+    self.assertEqual(chunk_size, tuf.conf.CHUNK_SIZE * 2)
+
+    # The chunk size never exceeds 'tuf.conf.MAX_CHUNK_SIZE'.
+    chunk_size = download._adapt_chunk_size(tuf.conf.MAX_CHUNK_SIZE, True, 0)
+    self.assertEqual(chunk_size, tuf.conf.MAX_CHUNK_SIZE)
+
+    # Slow reads halve the chunk size, but never below 'tuf.conf.CHUNK_SIZE'.
+    slow = download._TARGET_SECONDS_PER_CHUNK * 2
+    chunk_size = download._adapt_chunk_size(tuf.conf.CHUNK_SIZE * 4, True, slow)
+    self.assertEqual(chunk_size, tuf.conf.CHUNK_SIZE * 2)
+    chunk_size = download._adapt_chunk_size(tuf.conf.CHUNK_SIZE, False, slow)
+    self.assertEqual(chunk_size, tuf.conf.CHUNK_SIZE)
+
+    # A fast read that did not fill the chunk leaves its size unchanged.
+    chunk_size = download._adapt_chunk_size(tuf.conf.CHUNK_SIZE * 4, False, 0)
+    self.assertEqual(chunk_size, tuf.conf.CHUNK_SIZE * 4)
+
+
+
+  def test_download_large_file(self):
+    # A file spanning many chunks downloads in full, with no per-chunk delay.
+    current_dir = os.getcwd()
+    large_data = self.random_string(tuf.conf.CHUNK_SIZE) * 64
+    target_filepath = self.make_temp_data_file(directory=current_dir,
+                                               data=large_data)
+    junk, rel_target_filepath = os.path.split(target_filepath)
+    url = 'http://localhost:' + str(self.PORT) + '/' + rel_target_filepath
+
+    temp_fileobj = download.safe_download(url, len(large_data))
+    self.assertEqual(large_data, temp_fileobj.read().decode('utf-8'))
+    temp_fileobj.close_temp_file()
+
+
+
+
+  def test_unsafe_download_if_modified(self):
+    temp_fileobj, validators = download.unsafe_download_if_modified(self.url,
+        self.target_data_length, {})
+    self.assertEqual(self.target_data, temp_fileobj.read().decode('utf-8'))
+    temp_fileobj.close_temp_file()
+    self.assertTrue(tuf.formats.HTTP_VALIDATORS_SCHEMA.matches(validators))
+    self.assertTrue('last_modified' in validators)
+
+    # The file is not downloaded again while it is unchanged.
+    self.assertEqual((None, validators), download.unsafe_download_if_modified(
+        self.url, self.target_data_length, validators))
+
+    # It is if it changed after the copy the validators were sent with.
+    temp_fileobj, new_validators = download.unsafe_download_if_modified(
+        self.url, self.target_data_length,
+        {'last_modified': 'Thu, 01 Jan 1970 00:00:00 GMT'})
+    self.assertEqual(self.target_data, temp_fileobj.read().decode('utf-8'))
+    temp_fileobj.close_temp_file()
+    self.assertEqual(validators, new_validators)
+
+    self.assertRaises(tuf.FormatError, download.unsafe_download_if_modified,
+                      self.url, self.target_data_length, {'etag': 123})
+
+
+
+  def test_download_from_stalled_server(self):
+    # Serve the first half of a file, then stop sending.
+    stop_stalling = threading.Event()
+    data = b'x' * 1000
+
+    class StallingHandler(six.moves.BaseHTTPServer.BaseHTTPRequestHandler):
+      def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data[:len(data) // 2])
+        self.wfile.flush()
+        stop_stalling.wait(30)
+
+      def log_message(self, format, *args):
+        pass
+
+    class ThreadingServer(six.moves.socketserver.ThreadingMixIn,
+        six.moves.BaseHTTPServer.HTTPServer):
+      daemon_threads = True
+
+    server = ThreadingServer(('localhost', 0), StallingHandler)
+    server_thread = threading.Thread(target=server.serve_forever)
+    server_thread.daemon = True
+    server_thread.start()
+
+    url = 'http://localhost:' + str(server.server_address[1]) + '/file'
+
+    # Count the reads made from the connection.
+    class CountingConnection(object):
+      def __init__(self, connection):
+        self.connection = connection
+        self.reads = 0
+        if hasattr(connection, 'read1'):
+          self.read1 = self._read1
+
+      def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+      def read(self, amount=None):
+        self.reads += 1
+        return self.connection.read(amount)
+
+      def _read1(self, amount):
+        self.reads += 1
+        return self.connection.read1(amount)
+
+    grace_period = tuf.conf.SLOW_START_GRACE_PERIOD
+    socket_timeout = tuf.conf.SOCKET_TIMEOUT
+
+    try:
+      # The slow retrieval deadline is far away, but a read that times out
+      # ends the download at once, rather than being retried until then.
+      tuf.conf.SLOW_START_GRACE_PERIOD = 30
+      tuf.conf.SOCKET_TIMEOUT = 0.5
+      connection = CountingConnection(download._open_connection(url))
+      start_time = time.time()
+      self.assertRaises(tuf.DownloadLengthMismatchError,
+                        download._download_file, url, len(data),
+                        connection=connection)
+      self.assertTrue(time.time() - start_time < 5)
+      self.assertTrue(connection.reads < 10)
+
+    finally:
+      tuf.conf.SLOW_START_GRACE_PERIOD = grace_period
+      tuf.conf.SOCKET_TIMEOUT = socket_timeout
+      stop_stalling.set()
+      download.close_idle_connections()
+      server.shutdown()
+      server.server_close()
+
+
+
+  def test_connection_pool(self):
+    # Serve the current directory over HTTP/1.1, counting the connections made.
+    connections = []
+
+    class KeepAliveHandler(six.moves.SimpleHTTPServer.SimpleHTTPRequestHandler):
+      protocol_version = 'HTTP/1.1'
+
+      def setup(self):
+        connections.append(self.request)
+        six.moves.SimpleHTTPServer.SimpleHTTPRequestHandler.setup(self)
+
+      def log_message(self, format, *args):
+        pass
+
+    class ThreadingServer(six.moves.socketserver.ThreadingMixIn,
+        six.moves.BaseHTTPServer.HTTPServer):
+      daemon_threads = True
+
+    server = ThreadingServer(('localhost', 0), KeepAliveHandler)
+    server_thread = threading.Thread(target=server.serve_forever)
+    server_thread.daemon = True
+    server_thread.start()
+
+    junk, rel_target_filepath = os.path.split(self.target_fileobj.name)
+    url = 'http://localhost:' + str(server.server_address[1]) + '/' + \
+        rel_target_filepath
+
+    idle_timeout = tuf.conf.CONNECTION_IDLE_TIMEOUT
+    max_connections = tuf.conf.MAX_CONNECTIONS_PER_HOST
+
+    try:
+      # Later downloads from the same host reuse the first connection.
+      for i in range(3):
+        temp_fileobj = download.safe_download(url, self.target_data_length)
+        self.assertEqual(self.target_data,
+                         temp_fileobj.read().decode('utf-8'))
+        temp_fileobj.close_temp_file()
+      self.assertEqual(1, len(connections))
+
+      # A connection that was idle for too long is not reused.
+      tuf.conf.CONNECTION_IDLE_TIMEOUT = 0
+      download.safe_download(url, self.target_data_length).close_temp_file()
+      self.assertEqual(2, len(connections))
+      tuf.conf.CONNECTION_IDLE_TIMEOUT = idle_timeout
+
+      # A connection closed by the server is replaced.
+      download.close_idle_connections()
+      download.safe_download(url, self.target_data_length).close_temp_file()
+      connections[-1].shutdown(socket.SHUT_RDWR)
+      download.safe_download(url, self.target_data_length).close_temp_file()
+      self.assertEqual(4, len(connections))
+
+      # Errors are reported as by urllib.
+      self.assertRaises(six.moves.urllib.error.HTTPError,
+                        download.safe_download, url + '.missing', 1)
+
+      # Downloads beyond the maximum number of connections to a host do not
+      # wait for one, but use temporary connections that are not reused.
+      tuf.conf.MAX_CONNECTIONS_PER_HOST = 1
+      download.close_idle_connections()
+      first_connection = download._open_connection(url)
+      second_connection = download._open_connection(url)
+      for connection in (first_connection, second_connection):
+        connection.read()
+        connection.close()
+      self.assertEqual(6, len(connections))
+      download.safe_download(url, self.target_data_length).close_temp_file()
+      self.assertEqual(6, len(connections))
+
+    finally:
+      tuf.conf.CONNECTION_IDLE_TIMEOUT = idle_timeout
+      tuf.conf.MAX_CONNECTIONS_PER_HOST = max_connections
+      download.close_idle_connections()
+      server.shutdown()
+      server.server_close()
+
+
+
+  def test_https_redirection(self):
+    # Redirect requests for files in the current directory to
+    # '/redirected/<file>' over plain HTTP, where they are served.
+    class RedirectingHandler(
+        six.moves.SimpleHTTPServer.SimpleHTTPRequestHandler):
+      protocol_version = 'HTTP/1.1'
+
+      def do_GET(self):
+        if self.path.startswith('/redirected/'):
+          self.path = self.path[len('/redirected'):]
+          six.moves.SimpleHTTPServer.SimpleHTTPRequestHandler.do_GET(self)
+          return
+
+        self.send_response(302)
+        self.send_header('Location', 'http://localhost:' +
+            str(self.server.server_address[1]) + '/redirected' + self.path)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+      def log_message(self, format, *args):
+        pass
+
+    class ThreadingServer(six.moves.socketserver.ThreadingMixIn,
+        six.moves.BaseHTTPServer.HTTPServer):
+      daemon_threads = True
+
+    server = ThreadingServer(('localhost', 0), RedirectingHandler)
+    server_thread = threading.Thread(target=server.serve_forever)
+    server_thread.daemon = True
+    server_thread.start()
+
+    junk, rel_target_filepath = os.path.split(self.target_fileobj.name)
+    url = 'localhost:' + str(server.server_address[1]) + '/' + \
+        rel_target_filepath
+
+    # The server speaks plain HTTP even to 'https' URLs, so that only the
+    # handling of the redirection is tested here (see test_https_connection()).
+    verified_https_connection = download.VerifiedHTTPSConnection
+    download.VerifiedHTTPSConnection = six.moves.http_client.HTTPConnection
+    ssl_certificates = tuf.conf.ssl_certificates
+    tuf.conf.ssl_certificates = 'ssl_cert.crt'
+
+    try:
+      # An 'https' URL is not redirected to an 'http' one.
+      self.assertRaises(tuf.DownloadError, download.safe_download,
+                        'https://' + url, self.target_data_length)
+
+      # An 'http' URL may be.
+      temp_fileobj = download.safe_download('http://' + url,
+                                            self.target_data_length)
+      self.assertEqual(self.target_data, temp_fileobj.read().decode('utf-8'))
+      temp_fileobj.close_temp_file()
+
+    finally:
+      download.VerifiedHTTPSConnection = verified_https_connection
+      tuf.conf.ssl_certificates = ssl_certificates
+      download.close_idle_connections()
+      server.shutdown()
+      server.server_close()
+
+
+
 # Run unit test.
 if __name__ == '__main__':
   unittest.main()
@@ -140,6 +140,105 @@ class TestEd25519_keys(unittest.TestCase):
 
 
 
+  def test_verification_backends(self):
+    global public
+    global private
+    data = b'The quick brown fox jumps over the lazy dog'
+    signature, method = ed25519_keys.create_signature(public, private, data)
+
+    # PyNaCl is always installed prior to running the unit tests, so it must
+    # be preferred over the pure Python fallback.
+    available_backends = ed25519_keys.get_available_verification_backends()
+    self.assertEqual('pynacl', ed25519_keys.get_verification_backend())
+    self.assertEqual('ed25519', available_backends[-1])
+
+    # Every available backend agrees on valid and invalid signatures.
+    try:
+      for backend in available_backends:
+        ed25519_keys.set_verification_backend(backend)
+        self.assertEqual(backend, ed25519_keys.get_verification_backend())
+        self.assertEqual(True, ed25519_keys.verify_signature(public, method,
+                                                             signature, data))
+        self.assertEqual(False, ed25519_keys.verify_signature(public, method,
+                                                  signature, b'bad data'))
+
+    finally:
+      ed25519_keys.set_verification_backend(None)
+
+    self.assertEqual('pynacl', ed25519_keys.get_verification_backend())
+
+    # Selecting an unregistered backend is not allowed.
+    self.assertRaises(tuf.UnsupportedLibraryError,
+                      ed25519_keys.set_verification_backend, 'unknown')
+    self.assertRaises(tuf.FormatError,
+                      ed25519_keys.set_verification_backend, 123)
+
+    # A newly registered backend is preferred, except over the fallback.
+    calls = []
+    def verify_function(public, signature, data):
+      calls.append(data)
+      return True
+
+    try:
+      ed25519_keys.register_verification_backend('test', verify_function)
+      self.assertEqual('test', ed25519_keys.get_verification_backend())
+      self.assertEqual(True, ed25519_keys.verify_signature(public, method,
+                                                           signature, b'data'))
+      self.assertEqual([b'data'], calls)
+
+    finally:
+      ed25519_keys._verification_backends.remove(('test', verify_function))
+
+    self.assertEqual(available_backends,
+                     ed25519_keys.get_available_verification_backends())
+
+
+
+  def test_verify_signatures(self):
+    global public
+    global private
+    data = b'The quick brown fox jumps over the lazy dog'
+    signature, method = ed25519_keys.create_signature(public, private, data)
+
+    signatures_to_verify = [(public, method, signature, data),
+                            (public, method, signature, b'bad data'),
+                            (public, method, b'a'*64, data)]
+
+    self.assertEqual([True, False, False],
+                     ed25519_keys.verify_signatures(signatures_to_verify))
+    self.assertEqual([], ed25519_keys.verify_signatures([]))
+
+    # Arguments are checked as in verify_signature().
+    self.assertRaises(tuf.FormatError, ed25519_keys.verify_signatures,
+                      [(123, method, signature, data)])
+    self.assertRaises(tuf.UnknownMethodError, ed25519_keys.verify_signatures,
+                      [(public, 'unsupported_method', signature, data)])
+
+    # A backend's batch verification function, if any, receives the whole
+    # batch at once.
+    batches = []
+    def batch_verify_function(verifications):
+      batches.append(verifications)
+      return [True] * len(verifications)
+
+    def verify_function(public, signature, data):
+      return True
+
+    try:
+      ed25519_keys.register_verification_backend('test', verify_function,
+                                                 batch_verify_function)
+      self.assertEqual([True, True, True],
+                       ed25519_keys.verify_signatures(signatures_to_verify))
+      self.assertEqual([[(public, signature, data),
+                         (public, signature, b'bad data'),
+                         (public, b'a'*64, data)]], batches)
+
+    finally:
+      ed25519_keys._verification_backends.remove(('test', verify_function))
+      del ed25519_keys._batch_verification_functions['test']
+
+
+
 # Run the unit tests.
 if __name__ == '__main__':
   unittest.main()
@@ -237,6 +237,62 @@ class TestHash(unittest.TestCase):
       self.assertEqual(digest_object_truth.digest(), digest_object.digest())
 
 
+  def test_multi_digest(self):
+    self._run_with_all_hash_libraries(self._do_multi_digest)
+
+
+  def _do_multi_digest(self, library):
+    algorithms = ['md5', 'sha1', 'sha224', 'sha256', 'sha384', 'sha512']
+    # Longer than a chunk, and not a multiple of its size.
+    data = b'abcdefgh' * 10000 + b'xyz'
+    fd, filename = tempfile.mkstemp()
+    try:
+      os.write(fd, data)
+      os.close(fd)
+
+      with open(filename, 'rb') as file_obj:
+        file_obj.read(10)
+        fileobject_results = [
+            tuf.hash.multi_digest_fileobject(file_obj, algorithms, library),
+            tuf.hash.multi_digest_fileobject(six.BytesIO(data), algorithms,
+                                             library)]
+
+        # The length of a regular file is determined without reading it.
+        self.assertEqual((len(data), {}),
+                         tuf.hash.multi_digest_fileobject(file_obj, []))
+        self.assertEqual(10, file_obj.tell())
+
+      for length, digest_objects in fileobject_results + [
+          tuf.hash.multi_digest_filename(filename, algorithms, library)]:
+        self.assertEqual(len(data), length)
+        self.assertEqual(sorted(algorithms), sorted(digest_objects))
+        for algorithm in algorithms:
+          digest_object = tuf.hash.digest(algorithm, library)
+          digest_object.update(data)
+          self.assertEqual(digest_object.digest(),
+                           digest_objects[algorithm].digest())
+
+      # An empty file cannot be memory-mapped, but is still digested.
+      with open(filename, 'wb'):
+        pass
+      length, digest_objects = tuf.hash.multi_digest_filename(filename,
+          ['sha256'], library)
+      self.assertEqual(0, length)
+      self.assertEqual(tuf.hash.digest('sha256', library).digest(),
+                       digest_objects['sha256'].digest())
+
+      # The default algorithm is used if none are given.
+      self.assertEqual(['sha256'],
+                       list(tuf.hash.multi_digest_filename(filename)[1]))
+
+    finally:
+      os.remove(filename)
+
+    self.assertRaises(tuf.UnsupportedAlgorithmError,
+                      tuf.hash.multi_digest_fileobject, six.BytesIO(data),
+                      ['sha256', 'sha123'], library)
+
+
   def test_unsupported_digest_algorithm_and_library(self):
     self.assertRaises(tuf.UnsupportedAlgorithmError, tuf.hash.digest,
                       'sha123', 'hashlib')
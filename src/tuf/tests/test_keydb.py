@@ -155,6 +155,14 @@ class TestKeydb(unittest.TestCase):
     self.assertNotEqual(rsakey2, tuf.keydb.get_key(keyid))
     self.assertNotEqual(rsakey, tuf.keydb.get_key(keyid2))
 
+    # Keys added with add_key() are returned read-only.
+    tuf.keydb.remove_key(keyid)
+    tuf.keydb.add_key(rsakey)
+    key = tuf.keydb.get_key(keyid)
+    self.assertEqual(rsakey, key)
+    self.assertRaises(TypeError, key.__setitem__, 'keyid', keyid2)
+    self.assertRaises(TypeError, key['keyval'].__setitem__, 'public', '')
+
     # Test conditions using invalid arguments.
     self.assertRaises(tuf.FormatError, tuf.keydb.get_key, None)
     self.assertRaises(tuf.FormatError, tuf.keydb.get_key, 123)
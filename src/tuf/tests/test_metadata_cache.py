@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+
+"""
+<Program>
+  test_metadata_cache.py
+
+<Copyright>
+  See LICENSE for licensing information.
+
+<Purpose>
+  Unit test for 'metadata_cache.py'.
+"""
+
+# Help with Python 3 compatibility, where the print statement is a function, an
+# implicit relative import is invalid, and the '/' operator performs true
+# division.  Example:  print 'hello world' raises a 'SyntaxError' exception.
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import tuf
+import tuf.conf
+import tuf.client.metadata_cache as metadata_cache
+
+
+class TestMetadataCache(unittest.TestCase):
+
+  def setUp(self):
+    self.temporary_directory = tempfile.mkdtemp(dir=os.getcwd())
+    self.cache_filepath = os.path.join(self.temporary_directory,
+        'metadata.cache')
+
+    self.root_data = b'root metadata file'
+    self.root_signable = {'signed': {'_type': 'Root', 'version': 1,
+        'keys': {'abc': {'keytype': 'ed25519'}}}, 'signatures': []}
+    self.targets_data = b'targets metadata file'
+    self.targets_signable = {'signed': {'_type': 'Targets', 'version': 3},
+        'signatures': [{'keyid': 'abc', 'sig': 'def'}]}
+
+
+
+  def tearDown(self):
+    shutil.rmtree(self.temporary_directory)
+
+
+
+  def test_get_after_save(self):
+    cache = metadata_cache.MetadataCache(self.cache_filepath)
+    self.assertEqual(None, cache.get('current/root.json', self.root_data))
+
+    cache.add('current/root.json', self.root_data, self.root_signable)
+    cache.add('current/targets.json', self.targets_data, self.targets_signable)
+    cache.save()
+    self.assertTrue(os.path.exists(self.cache_filepath))
+
+    cache = metadata_cache.MetadataCache(self.cache_filepath)
+    self.assertEqual(self.root_signable,
+        cache.get('current/root.json', self.root_data))
+    self.assertEqual(self.targets_signable,
+        cache.get('current/targets.json', self.targets_data))
+
+    # Each lookup returns a new copy, which the caller may modify.
+    root_signable = cache.get('current/root.json', self.root_data)
+    root_signable['signed']['version'] = 2
+    self.assertEqual(self.root_signable,
+        cache.get('current/root.json', self.root_data))
+
+    # Metadata with different contents is not served from the cache.
+    self.assertEqual(None,
+        cache.get('current/root.json', self.root_data + b' modified'))
+
+
+
+  def test_save_keeps_only_entries_in_use(self):
+    cache = metadata_cache.MetadataCache(self.cache_filepath)
+    cache.add('current/root.json', self.root_data, self.root_signable)
+    cache.add('current/targets.json', self.targets_data, self.targets_signable)
+    cache.save()
+
+    # The targets file is replaced, and the root file not looked up.
+    cache = metadata_cache.MetadataCache(self.cache_filepath)
+    new_targets_data = b'new targets metadata file'
+    self.assertEqual(None, cache.get('current/targets.json', new_targets_data))
+    cache.add('current/targets.json', new_targets_data, self.targets_signable)
+    cache.save()
+
+    # Entries are kept across saves by the same cache.
+    cache.add('previous/targets.json', self.targets_data, self.targets_signable)
+    cache.save()
+    self.assertEqual(self.targets_signable,
+        cache.get('current/targets.json', new_targets_data))
+
+    cache = metadata_cache.MetadataCache(self.cache_filepath)
+    self.assertEqual(None, cache.get('current/root.json', self.root_data))
+    self.assertEqual(self.targets_signable,
+        cache.get('current/targets.json', new_targets_data))
+    self.assertEqual(self.targets_signable,
+        cache.get('previous/targets.json', self.targets_data))
+
+
+
+  def test_unusable_cache_files(self):
+    # A corrupt cache file is ignored, and replaced when the cache is saved.
+    with open(self.cache_filepath, 'wb') as file_object:
+      file_object.write(b'not a metadata cache')
+
+    cache = metadata_cache.MetadataCache(self.cache_filepath)
+    self.assertEqual(None, cache.get('current/root.json', self.root_data))
+    cache.add('current/root.json', self.root_data, self.root_signable)
+    cache.save()
+
+    cache = metadata_cache.MetadataCache(self.cache_filepath)
+    self.assertEqual(self.root_signable,
+        cache.get('current/root.json', self.root_data))
+
+    # So is a cache file written for another metadata format.
+    original_metadata_format = tuf.conf.METADATA_FORMAT
+    tuf.conf.METADATA_FORMAT = 'der' \
+        if original_metadata_format == 'json' else 'json'
+
+    try:
+      cache = metadata_cache.MetadataCache(self.cache_filepath)
+      self.assertEqual(None, cache.get('current/root.json', self.root_data))
+
+    finally:
+      tuf.conf.METADATA_FORMAT = original_metadata_format
+
+    # An empty cache file cannot be mapped, and is ignored too.
+    open(self.cache_filepath, 'wb').close()
+    cache = metadata_cache.MetadataCache(self.cache_filepath)
+    self.assertEqual(None, cache.get('current/root.json', self.root_data))
+
+    # Metadata that cannot be serialized is not cached.
+    cache.add('current/root.json', self.root_data, {'signed': object()})
+    cache.save()
+    cache = metadata_cache.MetadataCache(self.cache_filepath)
+    self.assertEqual(None, cache.get('current/root.json', self.root_data))
+
+
+
+  def test_invalid_arguments(self):
+    self.assertRaises(tuf.FormatError, metadata_cache.MetadataCache, 3)
+
+
+
+# Run the unittests
+if __name__ == '__main__':
+  unittest.main()
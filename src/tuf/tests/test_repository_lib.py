@@ -661,7 +661,7 @@ class TestRepositoryToolFunctions(unittest.TestCase):
     
     tuf.keydb.create_keydb_from_root_metadata(root_metadata)
     tuf.roledb.create_roledb_from_root_metadata(root_metadata)
-    root_keyids = tuf.roledb.get_role_keyids('root')
+    root_keyids = list(tuf.roledb.get_role_keyids('root'))
 
     root_private_keypath = os.path.join(keystore_path, 'root_key')
     root_private_key = \
@@ -819,7 +819,7 @@ class TestRepositoryToolFunctions(unittest.TestCase):
     # Verify that obsolete metadata (a metadata file exists on disk, but the
     # role is unavailable in 'tuf.roledb').  First add the obsolete
     # role to 'tuf.roledb' so that its metadata file can be written to disk.
-    targets_roleinfo = tuf.roledb.get_roleinfo('targets')
+    targets_roleinfo = tuf.roledb.get_roleinfo_mutable('targets')
     targets_roleinfo['version'] = 1
     expiration = \
       tuf.formats.unix_timestamp_to_datetime(int(time.time() + 86400))
@@ -247,10 +247,10 @@ class TestRepository(unittest.TestCase):
     
     # Verify status() does not raise 'tuf.InsufficientKeysError' if a top-level
     # role does and 'role1' do not contain a threshold of keys.
-    root_roleinfo = tuf.roledb.get_roleinfo('root')
+    root_roleinfo = tuf.roledb.get_roleinfo_mutable('root')
     old_threshold = root_roleinfo['threshold']
     root_roleinfo['threshold'] = 10
-    role1_roleinfo = tuf.roledb.get_roleinfo('role1')
+    role1_roleinfo = tuf.roledb.get_roleinfo_mutable('role1')
     old_role1_threshold = role1_roleinfo['threshold']
     role1_roleinfo['threshold'] = 10
     tuf.roledb.update_roleinfo('root', root_roleinfo)
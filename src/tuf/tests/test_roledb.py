@@ -340,6 +340,44 @@ class TestRoledb(unittest.TestCase):
     self.assertRaises(tuf.FormatError, tuf.roledb.get_roleinfo, rolename, 123)
     self.assertRaises(tuf.FormatError, tuf.roledb.get_roleinfo, 123)
 
+
+
+  def test_get_roleinfo_mutable(self):
+    rolename = 'targets'
+    roleinfo = {'keyids': ['123'], 'threshold': 1}
+    tuf.roledb.add_role(rolename, roleinfo)
+
+    # Modifying the argument passed to add_role() does not affect the role
+    # database.
+    roleinfo['keyids'].append('456')
+    self.assertEqual(['123'], tuf.roledb.get_role_keyids(rolename))
+
+    # The roleinfo returned by get_roleinfo() is read-only, and not a copy.
+    frozen_roleinfo = tuf.roledb.get_roleinfo(rolename)
+    self.assertTrue(frozen_roleinfo is tuf.roledb.get_roleinfo(rolename))
+    self.assertRaises(TypeError, frozen_roleinfo.__setitem__, 'threshold', 2)
+    self.assertRaises(TypeError, frozen_roleinfo['keyids'].append, '456')
+    self.assertRaises(TypeError, tuf.roledb.get_role_keyids(rolename).append,
+                      '456')
+
+    # get_roleinfo_mutable() returns a copy that may be modified and stored
+    # with update_roleinfo().
+    mutable_roleinfo = tuf.roledb.get_roleinfo_mutable(rolename)
+    self.assertEqual(frozen_roleinfo, mutable_roleinfo)
+    mutable_roleinfo['keyids'].append('456')
+    mutable_roleinfo['threshold'] = 2
+    self.assertEqual(['123'], tuf.roledb.get_role_keyids(rolename))
+
+    tuf.roledb.update_roleinfo(rolename, mutable_roleinfo)
+    self.assertEqual(['123', '456'], tuf.roledb.get_role_keyids(rolename))
+    self.assertEqual(2, tuf.roledb.get_role_threshold(rolename))
+
+    # Test conditions where the arguments are improperly formatted, contain
+    # invalid names, or haven't been added to the role database.
+    self._test_rolename(tuf.roledb.get_roleinfo_mutable)
+    self.assertRaises(tuf.FormatError, tuf.roledb.get_roleinfo_mutable,
+                      rolename, 123)
+
     
 
   def test_get_role_keyids(self):
@@ -422,6 +422,77 @@ class TestSchema(unittest.TestCase):
     self.assertFalse(anybytes_schema.matches({'a': 'string'}))
 
 
+
+
+  def test_compile(self):
+    # A schema is compiled once, the first time it is used.
+    list_schema = tuf.schema.ListOf(tuf.schema.Object(object_name='pair',
+        a=tuf.schema.AnyString(), b=tuf.schema.Optional(tuf.schema.Integer())),
+        list_name='pairs')
+    validator = list_schema.compile()
+    self.assertTrue(validator is list_schema.compile())
+
+    validator([{'a': 'x'}, {'a': 'y', 'b': 1}])
+    self.assertTrue(list_schema.matches([{'a': 'x', 'b': 2}]))
+
+    # The messages of errors in nested schemas are built as by the schemas
+    # themselves.
+    for bad_object, message in [
+        ({'a': 'x'}, "Expected 'pairs' but got {'a': 'x'}"),
+        ([{'b': 1}], "Missing key 'a' in 'pair' in 'pairs'"),
+        ([{'a': 'x', 'b': 'y'}],
+         "Got 'y' instead of an integer. in pair.b in 'pairs'")]:
+      with self.assertRaises(tuf.FormatError) as context:
+        list_schema.check_match(bad_object)
+      self.assertEqual(message, str(context.exception))
+
+    # A schema that overrides check_match() is validated with it, also inside
+    # compiled schemas.
+    class EvenInteger(tuf.schema.Integer):
+      def check_match(self, object):
+        tuf.schema.Integer.check_match(self, object)
+        if object % 2:
+          raise tuf.FormatError('Odd integer')
+
+    struct_schema = tuf.schema.Struct([tuf.schema.String('n'), EvenInteger()])
+    self.assertTrue(struct_schema.matches(['n', 2]))
+    self.assertFalse(struct_schema.matches(['n', 3]))
+    self.assertFalse(struct_schema.matches(['n', 'x']))
+
+
+
+  def test_ValidationScope(self):
+    item_schema = tuf.schema.Object(a=tuf.schema.Integer())
+    list_schema = tuf.schema.ListOf(item_schema)
+    item = {'a': 1}
+    items = [item]
+
+    with tuf.schema.ValidationScope():
+      list_schema.check_match(items)
+
+      # Objects that matched a schema, directly or nested in another object,
+      # are not checked against it again within the scope, even if they have
+      # since been modified.
+      item['a'] = 'not an integer'
+      list_schema.check_match(items)
+      item_schema.check_match(item)
+
+      # They are still checked against other schemas.
+      self.assertFalse(tuf.schema.Object(a=tuf.schema.Integer()).matches(item))
+
+      # Objects that did not match are checked again.
+      bad_item = {'a': 'b'}
+      self.assertFalse(item_schema.matches(bad_item))
+      self.assertRaises(tuf.FormatError, item_schema.check_match, bad_item)
+
+      # The objects are recorded until the outermost scope ends.
+      with tuf.schema.ValidationScope():
+        item_schema.check_match(item)
+      item_schema.check_match(item)
+
+    self.assertRaises(tuf.FormatError, item_schema.check_match, item)
+    self.assertRaises(tuf.FormatError, list_schema.check_match, items)
+
 # Run the unit tests.
 if __name__ == '__main__':
   unittest.main()
@@ -50,6 +50,7 @@ import os
 import time
 import shutil
 import copy
+import fnmatch
 import tempfile
 import logging
 import random
@@ -67,6 +68,7 @@ import tuf
 import tuf.util
 import tuf.conf
 import tuf.log
+import tuf.download
 import tuf.formats
 import tuf.keydb
 import tuf.roledb
@@ -880,6 +882,88 @@ class TestUpdater(unittest_toolbox.Modified_TestCase):
 
 
 
+  def test_4__refresh_targets_metadata_prefetch(self):
+    # Add several delegated roles to the remote repository, so that there are
+    # many changed roles to refresh.
+    repository = repo_tool.load_repository(self.repository_directory)
+    rolenames = ['bin' + str(i) for i in range(10)]
+    for rolename in rolenames:
+      repository.targets.delegate(rolename,
+          [self.role_keys['targets']['public']], [])
+      repository.targets(rolename).load_signing_key(
+          self.role_keys['targets']['private'])
+
+    repository.targets.load_signing_key(self.role_keys['targets']['private'])
+    repository.snapshot.load_signing_key(self.role_keys['snapshot']['private'])
+    repository.timestamp.load_signing_key(self.role_keys['timestamp']['private'])
+    repository.write()
+
+    # Move the staged metadata to the "live" metadata.
+    shutil.rmtree(os.path.join(self.repository_directory, 'metadata'))
+    shutil.copytree(os.path.join(self.repository_directory, 'metadata.staged'),
+                    os.path.join(self.repository_directory, 'metadata'))
+
+    self.repository_updater.refresh()
+    repository_updater = self.repository_updater.repositories['defaultrepo']
+    unsafe_download = tuf.download.unsafe_download
+
+    # A role whose prefetched file could not be downloaded is not updated, and
+    # the files prefetched for the roles after it are discarded.
+    def bad_unsafe_download(url, required_length):
+      if url.endswith('bin5.' + tuf.conf.METADATA_FORMAT):
+        raise tuf.DownloadLengthMismatchError(required_length, 0)
+
+      return unsafe_download(url, required_length)
+
+    tuf.download.unsafe_download = bad_unsafe_download
+    try:
+      self.assertRaises(tuf.NoWorkingMirrorError,
+          repository_updater._refresh_targets_metadata,
+          refresh_all_delegated_roles=True)
+
+    finally:
+      tuf.download.unsafe_download = unsafe_download
+
+    self.assertEqual({}, repository_updater._prefetched_metadata)
+    self.assertFalse('bin5' in repository_updater.metadata['current'])
+
+    # Record the metadata downloads and how many are made at once.
+    downloaded_urls = []
+    active_downloads = [0, 0]
+
+    def recording_unsafe_download(url, required_length):
+      active_downloads[0] += 1
+      active_downloads[1] = max(active_downloads)
+      try:
+        time.sleep(0.05)
+        downloaded_urls.append(url)
+        return unsafe_download(url, required_length)
+
+      finally:
+        active_downloads[0] -= 1
+
+    tuf.download.unsafe_download = recording_unsafe_download
+    try:
+      repository_updater._refresh_targets_metadata(
+          refresh_all_delegated_roles=True)
+
+    finally:
+      tuf.download.unsafe_download = unsafe_download
+
+    # Every role not yet updated was downloaded once, several at a time, and
+    # then verified and installed.
+    self.assertTrue(downloaded_urls)
+    self.assertEqual(len(set(downloaded_urls)), len(downloaded_urls))
+    self.assertTrue(1 < active_downloads[1] <=
+        tuf.conf.MAX_CONCURRENT_METADATA_DOWNLOADS_PER_MIRROR)
+
+    for rolename in rolenames + ['role1']:
+      self.assertTrue(rolename in repository_updater.metadata['current'])
+
+    self.assertEqual({}, repository_updater._prefetched_metadata)
+
+
+
 
 
   def test_5_all_targets(self):
@@ -1445,6 +1529,46 @@ class TestUpdater(unittest_toolbox.Modified_TestCase):
 
 
 
+  def test_9__get_target_from_targets_role(self):
+    repository = self.repository_updater.repositories['defaultrepo']
+    fileinfo = {'length': 8, 'hashes': {'sha256': 'ab' * 32}}
+    targets = {'/file1.txt': fileinfo, 'file2.txt': fileinfo}
+
+    self.assertEqual({'filepath': '/file1.txt', 'fileinfo': fileinfo},
+        repository._get_target_from_targets_role(
+        'targets', targets, '/file1.txt'))
+    self.assertIsNone(repository._get_target_from_targets_role(
+        'targets', targets, '/file3.txt'))
+
+    # A leading '/' must match exactly unless target paths are normalized.
+    self.assertIsNone(repository._get_target_from_targets_role(
+        'targets', targets, '/file2.txt'))
+
+    original_normalize_target_paths = tuf.conf.NORMALIZE_TARGET_PATHS
+    tuf.conf.NORMALIZE_TARGET_PATHS = True
+    try:
+      self.assertEqual({'filepath': 'file2.txt', 'fileinfo': fileinfo},
+          repository._get_target_from_targets_role(
+          'targets', targets, '/file2.txt'))
+      self.assertEqual({'filepath': '/file1.txt', 'fileinfo': fileinfo},
+          repository._get_target_from_targets_role(
+          'targets', targets, 'file1.txt'))
+
+      # The index of normalized paths is rebuilt when the targets change.
+      targets['file3.txt'] = fileinfo
+      self.assertEqual({'filepath': 'file3.txt', 'fileinfo': fileinfo},
+          repository._get_target_from_targets_role(
+          'targets', targets, '/file3.txt'))
+      self.assertIsNone(repository._get_target_from_targets_role(
+          'targets', {'/file1.txt': fileinfo}, '/file2.txt'))
+
+    finally:
+      tuf.conf.NORMALIZE_TARGET_PATHS = original_normalize_target_paths
+
+
+
+
+
   def test_10_hard_check_file_length(self):
     # Test for exception if file object is not equal to trusted file length.
     temp_file_object = tuf.util.TempFile()
@@ -1511,7 +1635,64 @@ class TestUpdater(unittest_toolbox.Modified_TestCase):
         self.repository_updater.repositories['defaultrepo']._is_delegation_relevant_to_target, child_role,
         '/file3.txt')
 
-    
+
+
+  def test_10__is_delegation_relevant_to_target_compiled(self):
+    # The paths and path hash prefixes of delegations are compiled into a
+    # _DelegationMatcher, which must agree with fnmatch and str.startswith.
+    repository = self.repository_updater.repositories['defaultrepo']
+
+    paths = ['/file3.txt', '/dir/*.txt', '/dir/file?.img', '/[ab]*.bin']
+    delegation = {'name': 'role', 'paths': paths}
+    for target_filepath in ['/file3.txt', '/file4.txt', '/dir/a.txt',
+        '/dir/sub/a.txt', '/dir/file1.img', '/dir/file10.img', '/a.bin',
+        '/c.bin']:
+      self.assertEqual(
+          repository._is_delegation_relevant_to_target(
+          delegation, target_filepath),
+          any(fnmatch.fnmatch(target_filepath, path) for path in paths))
+
+    # Prefixes of different lengths.
+    target_filepath_hash = repository._get_target_hash('/file3.txt')
+    delegation = {'name': 'role', 'path_hash_prefixes':
+        ['0000', target_filepath_hash[:1]]}
+    self.assertTrue(repository._is_delegation_relevant_to_target(
+        delegation, '/file3.txt'))
+    delegation['path_hash_prefixes'] = ['0000', 'f' * 2]
+    self.assertEqual(repository._is_delegation_relevant_to_target(
+        delegation, '/file3.txt'), target_filepath_hash.startswith('ff'))
+
+    # Matchers compiled when the delegations are imported are reused until the
+    # delegation's paths change.
+    targets_role = self.repository_updater.get_metadata(
+        'defaultrepo', 'current')['targets']
+    child_role = targets_role['delegations']['roles'][0]
+    repository._import_delegations('targets')
+    matcher = repository._get_delegation_matcher('targets', child_role)
+    self.assertTrue(
+        matcher is repository._get_delegation_matcher('targets', child_role))
+    self.assertTrue(repository._is_delegation_relevant_to_target(
+        child_role, '/file3.txt', 'targets'))
+
+    child_role['paths'].append('/file4.txt')
+    matcher = repository._get_delegation_matcher('targets', child_role)
+    self.assertFalse(matcher.is_compiled_from({'paths': ['/file3.txt']}))
+    self.assertTrue(
+        matcher is repository._get_delegation_matcher('targets', child_role))
+    self.assertTrue(repository._is_delegation_relevant_to_target(
+        child_role, '/file4.txt', 'targets'))
+
+    # Including when a path is replaced in place.
+    index = child_role['paths'].index('/file3.txt')
+    child_role['paths'][index] = '/file5.txt'
+    self.assertFalse(
+        matcher is repository._get_delegation_matcher('targets', child_role))
+    self.assertFalse(repository._is_delegation_relevant_to_target(
+        child_role, '/file3.txt', 'targets'))
+    self.assertTrue(repository._is_delegation_relevant_to_target(
+        child_role, '/file5.txt', 'targets'))
+
+
 
 
 
@@ -33,10 +33,15 @@ import logging
 import tempfile
 import unittest
 import timeit
+import copy
+import time
+import threading
 
 import tuf
 import tuf.log
+import tuf.conf
 import tuf.hash
+import tuf.formats
 import tuf.util
 import tuf.unittest_toolbox as unittest_toolbox
 
@@ -250,6 +255,57 @@ class TestUtil(unittest_toolbox.Modified_TestCase):
 
 
 
+  def test_A7_tempfile_decompress_with_limits_and_digests(self):
+    # Data spanning several chunks, compressed in memory.
+    data = self.random_string(tuf.conf.FILE_CHUNK_SIZE // 4).encode('utf-8') * 9
+    compressed_data = six.BytesIO()
+    gzip_file_object = gzip.GzipFile(fileobj=compressed_data, mode='wb')
+    gzip_file_object.write(data)
+    gzip_file_object.close()
+
+    def expected_digest(algorithm, data):
+      digest_object = tuf.hash.digest(algorithm)
+      digest_object.update(data)
+      return digest_object.hexdigest()
+
+    # The digests of the decompressed data are computed while decompressing.
+    self.temp_fileobj.write(compressed_data.getvalue())
+    self.assertEqual({'sha256': expected_digest('sha256',
+                      compressed_data.getvalue())},
+                     self.temp_fileobj.get_digests(['sha256']))
+    self.temp_fileobj.decompress_temp_file_object('gzip', len(data),
+                                                  ['sha256', 'sha512'])
+    self.assertEqual(data, self.temp_fileobj.read())
+    self.assertEqual({'sha256': expected_digest('sha256', data),
+                      'sha512': expected_digest('sha512', data)},
+                     self.temp_fileobj._digests)
+
+    # Other digests are computed on request, in a single pass.
+    self.assertEqual({'md5': expected_digest('md5', data),
+                      'sha256': expected_digest('sha256', data)},
+                     self.temp_fileobj.get_digests(['md5', 'sha256']))
+    self.assertRaises(tuf.UnsupportedAlgorithmError,
+                      self.temp_fileobj.get_digests, ['bogus'])
+
+    # Decompression stops once the maximum length is exceeded.
+    temp_file = tuf.util.TempFile()
+    temp_file.write(compressed_data.getvalue())
+    self.assertRaises(tuf.DecompressionError,
+                      temp_file.decompress_temp_file_object, 'gzip',
+                      len(data) - 1)
+    temp_file.close_temp_file()
+
+    # Writing to a TempFile discards the digests of its previous contents.
+    temp_file = tuf.util.TempFile()
+    temp_file.write(data)
+    temp_file.get_digests(['sha256'])
+    temp_file.write(data)
+    self.assertEqual({'sha256': expected_digest('sha256', data + data)},
+                     temp_file.get_digests(['sha256']))
+    temp_file.close_temp_file()
+
+
+
   def test_B1_get_file_details(self):
     # Goal: Verify proper output given certain expected/unexpected input.
 
@@ -587,6 +643,46 @@ class TestUtil(unittest_toolbox.Modified_TestCase):
 
 
 
+  def test_freeze_and_thaw(self):
+    record = {'keyids': ['123'], 'threshold': 1,
+              'delegations': {'keys': {}, 'roles': [{'name': 'role1'}]}}
+
+    frozen = tuf.util.freeze(record)
+    self.assertEqual(record, frozen)
+
+    # Frozen records still match the schemas that ordinary ones do.
+    self.assertTrue(tuf.formats.ROLEDB_SCHEMA.matches(
+        tuf.util.freeze({'keyids': ['123'], 'threshold': 1})))
+
+    # The frozen record is a copy: modifying the original does not affect it.
+    record['keyids'].append('456')
+    self.assertEqual(['123'], frozen['keyids'])
+
+    # Neither the record nor anything in it may be modified.
+    self.assertRaises(TypeError, frozen.__setitem__, 'threshold', 2)
+    self.assertRaises(TypeError, frozen.update, {'threshold': 2})
+    self.assertRaises(TypeError, frozen.pop, 'threshold')
+    self.assertRaises(TypeError, frozen['keyids'].append, '456')
+    self.assertRaises(TypeError, frozen['keyids'].__setitem__, 0, '456')
+    self.assertRaises(TypeError,
+        frozen['delegations']['roles'][0].__setitem__, 'name', 'role2')
+
+    # Freezing a frozen object does not copy it.
+    self.assertTrue(frozen is tuf.util.freeze(frozen))
+
+    # Thawing, or deep copying, returns ordinary, mutable objects.
+    for mutable in [tuf.util.thaw(frozen), copy.deepcopy(frozen)]:
+      self.assertEqual(frozen, mutable)
+      self.assertEqual(dict, type(mutable))
+      self.assertEqual(list, type(mutable['keyids']))
+      self.assertEqual(dict, type(mutable['delegations']['roles'][0]))
+      mutable['keyids'].append('456')
+      self.assertEqual(['123'], frozen['keyids'])
+
+    self.assertEqual(dict, type(copy.copy(frozen)))
+
+
+
   def test_digests_are_equal(self):
     digest = 'e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855'
 
@@ -626,6 +722,47 @@ class TestUtil(unittest_toolbox.Modified_TestCase):
 
 
 
+  def test_call_concurrently(self):
+    lock = threading.Lock()
+    state = {'running': 0, 'most_running': 0}
+    calling_threads = set()
+
+    def square(number):
+      with lock:
+        state['running'] += 1
+        state['most_running'] = max(state['most_running'], state['running'])
+        calling_threads.add(threading.current_thread())
+      time.sleep(0.01)
+      with lock:
+        state['running'] -= 1
+      if number < 0:
+        raise tuf.Error('Negative number: ' + repr(number))
+      return number * number
+
+    # Results (and exceptions) are returned in the order of the arguments, and
+    # no more than the maximum number of calls run at once.
+    outcomes = tuf.util.call_concurrently(square, [1, 2, -3, 4, 5, 6], 3)
+    self.assertEqual([(1, None), (4, None)], outcomes[:2])
+    self.assertEqual([(16, None), (25, None), (36, None)], outcomes[3:])
+    self.assertEqual(None, outcomes[2][0])
+    self.assertTrue(isinstance(outcomes[2][1], tuf.Error))
+    self.assertTrue(1 < state['most_running'] <= 3)
+    self.assertTrue(threading.current_thread() not in calling_threads)
+
+    # With one thread, the calls are made in turn in the calling thread.
+    calling_threads.clear()
+    state['most_running'] = 0
+    self.assertEqual([(1, None), (4, None)],
+                     tuf.util.call_concurrently(square, [1, 2], 1))
+    self.assertEqual(1, state['most_running'])
+    self.assertEqual(set([threading.current_thread()]), calling_threads)
+
+    self.assertEqual([], tuf.util.call_concurrently(square, [], 2))
+    self.assertRaises(tuf.FormatError, tuf.util.call_concurrently, square,
+                      [1], 0)
+
+
+
 # Run unit test.
 if __name__ == '__main__':
   unittest.main()
@@ -4,6 +4,12 @@
 
 <Purpose>
   Provides functions to allow use of ASN.1/DER-encoded metadata with TUF.
+
+  Signatures over DER metadata are over the SHA256 digest of the DER encoding
+  of the 'signed' portion of the metadata. When DER metadata is decoded, the
+  digest of the original bytes of that portion is remembered for the decoded
+  'signed' object (see get_cached_signed_digest()), so that the signatures
+  over it can be checked without re-building and re-encoding the ASN.1.
 """
 from __future__ import print_function
 from __future__ import unicode_literals
@@ -11,8 +17,12 @@ from __future__ import unicode_literals
 import tuf
 import tuf.conf
 import tuf.formats
+import tuf.encoding.der_coder
 import logging
 import hashlib
+import copy
+import collections
+import threading
 
 from tuf.encoding import hex_from_octetstring
 
@@ -49,6 +59,24 @@ else:
   PYASN1_EXISTS = True
 
 
+# If True, metadata is converted using pyasn1 and the *_asn1_coder modules
+# rather than the faster, hand-written tuf.encoding.der_coder module.  Both
+# produce the same DER.  This exists mainly so that the tests can check the one
+# against the other.
+USE_PYASN1 = False
+
+# The maximum number of decoded 'signed' objects for which the digest of the
+# DER encoding is remembered. The oldest entries are discarded first.
+SIGNED_DIGEST_CACHE_SIZE = 1024
+
+# Maps id(json_signed) to a (json_signed, snapshot of json_signed, digest)
+# tuple. Keeping a reference to json_signed itself ensures that its id is not
+# reused while it is in the cache, and the snapshot lets us notice if it has
+# been modified since it was decoded.
+_signed_digest_cache = collections.OrderedDict()
+_signed_digest_cache_lock = threading.Lock()
+
+
 
 
 
@@ -78,6 +106,11 @@ def convert_signed_der_to_dersigned_json(der_data):
 
   """
 
+  if not USE_PYASN1:
+    signable, der_signed = tuf.encoding.der_coder.decode_metadata(der_data)
+    cache_signed_digest(signable['signed'], der_signed)
+    return signable
+
   if not PYASN1_EXISTS:
     raise tuf.Error('Request was made to load a DER file, but the required '
         'pyasn1 library failed to import.')
@@ -101,13 +134,10 @@ def convert_signed_der_to_dersigned_json(der_data):
 
   asn_signed_metadata = asn_metadata[0]
 
-  # TODO: The 'signed' component here should probably already be DER, since
-  # that is what the signature is over. Because this would entail some changes
-  # changes to the ASN.1 data specifications in metadata_asn1_definitions.py,
-  # I'm not doing this yet (though I expect to).
-  # So, for the time being, if we wanted to check the signature, we'd have to
-  # encode this thing into DER again.
-  # der_signed_metadata = p_der_encoder.encode(asn_signed)
+  # The signatures are over the DER encoding of the 'signed' component, which
+  # is the first element of the Metadata SEQUENCE in der_data. Rather than
+  # encoding the 'signed' component into DER again whenever a signature over
+  # it is checked, we remember the digest of those original bytes below.
 
 
   # Now we have to figure out what type of metadata the ASN.1 metadata is
@@ -148,11 +178,168 @@ def convert_signed_der_to_dersigned_json(der_data):
         'method': asn_signature['method'].namedValues[asn_signature['method']._value],
         'sig': hex_from_octetstring(asn_signature['value'])})
 
+  cache_signed_digest(json_signed, split_der_sequence(der_data)[0])
+
   return {'signatures': json_signatures, 'signed': json_signed}
 
 
 
 
+
+def split_der_sequence(der_data):
+  """
+  <Purpose>
+    Return the DER encodings of the elements of the DER-encoded SEQUENCE (or
+    SEQUENCE OF) in der_data, as they appear in der_data, without decoding
+    them. Any tag on the SEQUENCE itself is ignored, as is anything after it.
+
+  <Arguments>
+    der_data
+      The DER encoding of a SEQUENCE, as bytes.
+
+  <Exceptions>
+    tuf.Error, if der_data is truncated or is not a constructed DER element.
+
+  <Side Effects>
+    None.
+
+  <Returns>
+    A list of bytes objects, one per element, each including the element's
+    tag and length octets.
+  """
+  der_bytes = bytearray(der_data)
+
+  if not der_bytes or not der_bytes[0] & 0x20:
+    raise tuf.Error('Expected the DER encoding of a SEQUENCE.')
+
+  header_length, content_length = _read_der_tag_and_length(der_bytes, 0)
+  end = header_length + content_length
+
+  elements = []
+  index = header_length
+  while index < end:
+    element_header_length, element_content_length = _read_der_tag_and_length(
+        der_bytes, index)
+    element_end = index + element_header_length + element_content_length
+    if element_end > end:
+      raise tuf.Error('DER element extends past the end of its SEQUENCE.')
+    elements.append(bytes(der_bytes[index:element_end]))
+    index = element_end
+
+  return elements
+
+
+
+
+
+def _read_der_tag_and_length(der_bytes, index):
+  """
+  Return (number of tag and length octets, number of content octets) for the
+  DER element that starts at der_bytes[index], der_bytes being a bytearray.
+  """
+  try:
+    position = index + 1
+
+    # High tag numbers continue in following octets while bit 8 is set.
+    if der_bytes[index] & 0x1f == 0x1f:
+      while der_bytes[position] & 0x80:
+        position += 1
+      position += 1
+
+    length = der_bytes[position]
+    position += 1
+
+    # In the long form, the low bits give the number of length octets.
+    if length & 0x80:
+      number_of_length_octets = length & 0x7f
+      if position + number_of_length_octets > len(der_bytes):
+        raise IndexError()
+      length = 0
+      for octet in der_bytes[position:position + number_of_length_octets]:
+        length = (length << 8) | octet
+      position += number_of_length_octets
+
+  except IndexError:
+    raise tuf.Error('Truncated DER element at offset ' + repr(index))
+
+  if position + length > len(der_bytes):
+    raise tuf.Error('Truncated DER element at offset ' + repr(index))
+
+  return position - index, length
+
+
+
+
+
+def cache_signed_digest(json_signed, der_signed):
+  """
+  <Purpose>
+    Remember the SHA256 digest of der_signed, the original DER encoding from
+    which json_signed was decoded, so that get_cached_signed_digest() can
+    return it instead of json_signed being converted to ASN.1 and encoded as
+    DER again.
+
+  <Arguments>
+    json_signed
+      The decoded 'signed' portion of metadata: a dictionary.
+
+    der_signed
+      The DER encoding of that 'signed' portion, exactly as it appeared in the
+      DER data that was decoded.
+
+  <Exceptions>
+    None.
+
+  <Side Effects>
+    Adds an entry to the cache, possibly discarding the oldest entry.
+
+  <Returns>
+    None.
+  """
+  entry = (json_signed, copy.deepcopy(json_signed),
+      hashlib.sha256(der_signed).digest())
+
+  with _signed_digest_cache_lock:
+    _signed_digest_cache.pop(id(json_signed), None)
+    _signed_digest_cache[id(json_signed)] = entry
+    while len(_signed_digest_cache) > SIGNED_DIGEST_CACHE_SIZE:
+      _signed_digest_cache.popitem(last=False)
+
+
+
+
+
+def get_cached_signed_digest(json_signed):
+  """
+  <Purpose>
+    Return the SHA256 digest of the original DER encoding of json_signed, if
+    json_signed was produced by decoding DER data and has not been modified
+    since.
+
+  <Arguments>
+    json_signed
+      The 'signed' portion of metadata: a dictionary.
+
+  <Exceptions>
+    None.
+
+  <Side Effects>
+    None.
+
+  <Returns>
+    The digest, as bytes, or None if it is not known.
+  """
+  with _signed_digest_cache_lock:
+    entry = _signed_digest_cache.get(id(json_signed))
+
+  if entry is None or entry[0] is not json_signed or entry[1] != json_signed:
+    return None
+
+  return entry[2]
+
+
+
+
 def convert_signed_metadata_to_der(
     signed_metadata, private_key=None, resign=False, only_signed=False):
   """
@@ -250,6 +437,21 @@ def convert_signed_metadata_to_der(
   # a module exists that translates it to and from an ASN.1 format.
   _ensure_valid_metadata_type_for_asn1(metadata_type)
 
+  if not USE_PYASN1:
+    der_signed = tuf.encoding.der_coder.encode_signed(json_signed)
+
+    if only_signed:
+      return der_signed
+
+    if resign:
+      # As below, sign a hash of the DER encoding of the 'signed' portion.
+      signatures = [tuf.keys.create_signature(
+          private_key, hashlib.sha256(der_signed).digest())]
+    else:
+      signatures = signed_metadata['signatures']
+
+    return tuf.encoding.der_coder.encode_metadata(der_signed, signatures)
+
   # Handle for the corresponding module.
   relevant_asn_module = SUPPORTED_ASN1_METADATA_MODULES[metadata_type]
   asn_signed = relevant_asn_module.get_asn_signed(json_signed)
@@ -0,0 +1,240 @@
+"""
+<Program Name>
+  metadata_cache.py
+
+<Copyright>
+  See LICENSE for licensing information.
+
+<Purpose>
+  Keep the metadata that an updater loads from its local metadata files in a
+  compact cache file, so that an updater created later (e.g., after the
+  client restarts) can use it without parsing those files again.  Parsing DER
+  metadata in particular is slow, and every updater otherwise re-parses every
+  current and previous metadata file when it is created.
+
+  Entries are indexed by the hash of the metadata file they were parsed from,
+  and are only used for a file whose contents have that hash, so a metadata
+  file that has been replaced or modified since is parsed again.  Only
+  metadata that the updater has already accepted from the file is added to the
+  cache.
+
+  The cache file holds an index of the entries followed by the entries
+  themselves, each serialized with marshal (which is fast and compact, and,
+  unlike pickle, cannot construct arbitrary objects).  It is memory-mapped,
+  and only the entries that are looked up are deserialized.  A cache file
+  written by a different version of Python, or for a different
+  tuf.conf.METADATA_FORMAT, is ignored.
+
+<Classes>
+  MetadataCache(cache_filepath)
+"""
+
+# Help with Python 3 compatibility, where the print statement is a function, an
+# implicit relative import is invalid, and the '/' operator performs true
+# division.  Example:  print 'hello world' raises a 'SyntaxError' exception.
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import os
+import sys
+import mmap
+import struct
+import marshal
+import logging
+
+import tuf
+import tuf.conf
+import tuf.hash
+import tuf.util
+import tuf.formats
+import six
+
+# See 'log.py' to learn how logging is handled in TUF.
+logger = logging.getLogger('tuf.client.metadata_cache')
+
+# The cache file begins with this, followed by the length of the index.
+_MAGIC = b'TUFMDC01'
+_HEADER = struct.Struct('>8sI')
+
+
+class MetadataCache(object):
+  """
+  <Purpose>
+    A cache of parsed metadata, stored in the file 'cache_filepath' (which
+    need not exist yet).  Look up the metadata parsed from a metadata file
+    with get(), add newly parsed metadata with add(), and write the cache file
+    with save().  Metadata files are named (e.g., 'current/root.der') so that
+    the entry for a file that is replaced is replaced too.
+
+    Only the entries looked up or added since the cache was created are
+    written by save(), so that entries for metadata files that no longer exist
+    do not accumulate.
+  """
+
+  def __init__(self, cache_filepath):
+
+    tuf.formats.PATH_SCHEMA.check_match(cache_filepath)
+
+    self.cache_filepath = cache_filepath
+
+    # The memory-mapped cache file, and the offset and length in it of each
+    # entry, indexed by the hash of the metadata file.
+    self._mapped_file = None
+    self._index = {}
+
+    # A (hash, serialized entry) tuple for each metadata file looked up or
+    # added, by name.
+    self._entries_in_use = {}
+    self._modified = False
+
+    self._load()
+
+
+
+  def get(self, name, metadata_data):
+    """
+    Return the metadata (a signable dictionary) parsed from the metadata file
+    'name', with the contents 'metadata_data' (bytes), or None if it is not
+    cached.  A new copy is returned each time.
+    """
+    digest = self._get_digest(metadata_data)
+    entry = self._entries_in_use.get(name)
+
+    if entry is None or entry[0] != digest:
+      if digest not in self._index:
+        return None
+
+      offset, length = self._index[digest]
+      entry = (digest, self._mapped_file[offset:offset + length])
+      self._entries_in_use[name] = entry
+
+    try:
+      return marshal.loads(entry[1])
+
+    except (EOFError, ValueError, TypeError) as e:
+      logger.warning('Ignoring corrupt entry in metadata cache ' +
+          repr(self.cache_filepath) + ': ' + repr(e))
+      del self._entries_in_use[name]
+      del self._index[digest]
+      self._modified = True
+      return None
+
+
+
+  def add(self, name, metadata_data, metadata_signable):
+    """
+    Cache 'metadata_signable', the metadata parsed from the metadata file
+    'name', with the contents 'metadata_data' (bytes).  Metadata containing
+    values that cannot be serialized is not cached.
+    """
+    digest = self._get_digest(metadata_data)
+
+    try:
+      self._entries_in_use[name] = (digest, marshal.dumps(metadata_signable))
+
+    except ValueError as e:
+      logger.debug('Not caching unserializable metadata ' + repr(name) + ': ' +
+          repr(e))
+      self._entries_in_use.pop(name, None)
+
+    self._modified = True
+
+
+
+  def save(self):
+    """
+    Write the cache file with the entries looked up or added so far, if any
+    have been added since it was last written.
+    """
+    if not self._modified:
+      return
+
+    entries = sorted(set(six.itervalues(self._entries_in_use)))
+
+    index = {}
+    offset = 0
+    for digest, serialized_entry in entries:
+      index[digest] = (offset, len(serialized_entry))
+      offset += len(serialized_entry)
+
+    serialized_index = marshal.dumps({
+        'python_version': list(sys.version_info[:2]),
+        'metadata_format': tuf.conf.METADATA_FORMAT,
+        'entries': index})
+
+    file_object = tuf.util.TempFile()
+    file_object.write(
+        _HEADER.pack(_MAGIC, len(serialized_index)), auto_flush=False)
+    file_object.write(serialized_index, auto_flush=False)
+    for digest, serialized_entry in entries:
+      file_object.write(serialized_entry, auto_flush=False)
+
+    # The entries in use have been copied out of the mapped file already.
+    self._close()
+    file_object.move(self.cache_filepath)
+    self._load()
+
+
+
+  def _load(self):
+    """
+    Map the cache file and read its index, if it exists and is usable.
+    """
+    self._modified = False
+
+    if not os.path.exists(self.cache_filepath):
+      return
+
+    try:
+      with open(self.cache_filepath, 'rb') as file_object:
+        mapped_file = mmap.mmap(
+            file_object.fileno(), 0, access=mmap.ACCESS_READ)
+
+      magic, index_length = _HEADER.unpack(mapped_file[:_HEADER.size])
+      if magic != _MAGIC:
+        raise ValueError('Not a metadata cache file.')
+
+      index_start = _HEADER.size
+      index = marshal.loads(mapped_file[index_start:index_start + index_length])
+
+      if index['python_version'] != list(sys.version_info[:2]) or \
+          index['metadata_format'] != tuf.conf.METADATA_FORMAT:
+        logger.debug('Ignoring metadata cache written for another Python'
+            ' version or metadata format.')
+        mapped_file.close()
+        return
+
+      entries_start = index_start + index_length
+      self._index = dict(
+          (digest, (entries_start + offset, length))
+          for digest, (offset, length) in six.iteritems(index['entries']))
+
+    # mmap refuses to map an empty file, and marshal raises EOFError,
+    # ValueError, or TypeError for bad data.
+    except (EnvironmentError, EOFError, ValueError, TypeError, KeyError,
+        AttributeError, struct.error) as e:
+      logger.warning('Ignoring unreadable metadata cache ' +
+          repr(self.cache_filepath) + ': ' + repr(e))
+      self._index = {}
+      return
+
+    self._mapped_file = mapped_file
+
+
+
+  def _close(self):
+    if self._mapped_file is not None:
+      self._mapped_file.close()
+
+    self._mapped_file = None
+    self._index = {}
+
+
+
+  @staticmethod
+  def _get_digest(metadata_data):
+    digest_object = tuf.hash.digest('sha256')
+    digest_object.update(metadata_data)
+    return digest_object.hexdigest()
@@ -109,12 +109,15 @@ from __future__ import division
 from __future__ import unicode_literals
 
 import errno
+import json
 import logging
 import os
 import shutil
 import time
 import random
 import fnmatch
+import re
+import threading
 
 import tuf
 import tuf.conf
@@ -128,6 +131,7 @@ import tuf.mirrors
 import tuf.roledb
 import tuf.sig
 import tuf.util
+import tuf.client.metadata_cache
 
 import six
 import iso8601
@@ -255,6 +259,33 @@ class Updater(object):
       self.repositories[repo_name] = SingleRepoUpdater(
           repo_name, this_repo['mirrors'])
 
+    # download_target() may be called from several threads at once, but
+    # downloads no more than tuf.conf.MAX_CONCURRENT_DOWNLOADS_PER_REPOSITORY
+    # target files from each repository at a time.
+    self._download_semaphores = dict(
+        (repo_name, threading.BoundedSemaphore(
+        tuf.conf.MAX_CONCURRENT_DOWNLOADS_PER_REPOSITORY))
+        for repo_name in self.repositories)
+
+    # The repositories in a multi-repository pinning are asked for target info
+    # at the same time, each in its own thread (see target()). Only one thread
+    # at a time may update the metadata of any one repository.
+    self._metadata_locks = dict(
+        (repo_name, threading.Lock()) for repo_name in self.repositories)
+
+    # The pinnings relevant to each target filepath looked up so far, from
+    # _get_pinnings_for_target(). pinned.json is only read at initialization,
+    # so these do not change.
+    self._pinnings_for_targets = {}
+
+    # Target info validated by targets(), indexed by target filepath, and the
+    # repositories' snapshot metadata that it was validated against. Target
+    # info for a target filepath is None if the target could not be validated.
+    # The cache is emptied when the snapshot metadata of any repository is
+    # replaced (by a new version, or by metadata loaded anew from disk).
+    self._validated_targets = {}
+    self._validated_targets_snapshots = None
+
 
 
 
@@ -324,12 +355,15 @@ class Updater(object):
     """
     if repo_name is not None:
       self._validate_repo_name(repo_name)
-      self.repositories[repo_name].refresh()
+      with self._metadata_locks[repo_name]:
+        self.repositories[repo_name].refresh()
 
     else:
       for repo_name in self.repositories:
-        self.repositories[repo_name].refresh(unsafely_update_root_if_necessary=
-          unsafely_update_root_if_necessary)
+        with self._metadata_locks[repo_name]:
+          self.repositories[repo_name].refresh(
+              unsafely_update_root_if_necessary=
+              unsafely_update_root_if_necessary)
 
 
 
@@ -398,6 +432,9 @@ class Updater(object):
     """
     tuf.formats.RELPATH_SCHEMA.check_match(target_filepath)
 
+    if target_filepath in self._pinnings_for_targets:
+      return self._pinnings_for_targets[target_filepath]
+
     pinnings_for_target = []
     debug__terminating_pinning_encountered = False
 
@@ -424,6 +461,8 @@ class Updater(object):
         ' target ' + repr(target_filepath) + ': ' + repr(pinnings_for_target) +
         debug__terminating_pinning_encountered * 'The last pinning encountered'
         ' was flagged as terminating, so no further pinnings were inspected.')
+
+    self._pinnings_for_targets[target_filepath] = pinnings_for_target
     return pinnings_for_target
 
 
@@ -439,6 +478,10 @@ class Updater(object):
     must be provided. (If only one repository is listed in this updater, then
     that repository is used.)
 
+    The repositories required by a multi-repository pinning are asked for the
+    target at the same time, and the pinning is abandoned as soon as any of
+    them does not know the target (see _get_matching_tentative_targets()).
+
     <Arguments>
 
       target_filepath
@@ -523,7 +566,8 @@ class Updater(object):
     """
     if repo_name is not None:
       self._validate_repo_name(repo_name)
-      return self.repositories[repo_name].target(target_filepath)
+      with self._metadata_locks[repo_name]:
+        return self.repositories[repo_name].target(target_filepath)
 
     # Else, no repo_name was specified.
     # Employ metadata from pinned.json to determine which repository to use.
@@ -548,48 +592,104 @@ class Updater(object):
       assert 0 != len(repo_list), 'Programming error. ' + \
           '(Should be impossible due to _get_pinnings_for_target() checks'
 
-      matching_tentative_targets = dict()
+      matching_tentative_targets = self._get_matching_tentative_targets(
+          target_filepath, repo_list)
+
+      # We've now checked every repository in this particular pinning.
+      # Check result of looking for target info in the delegated-to roles.
+      if matching_tentative_targets:
+        if multi_custom:
+          # If optional parameter multi_custom is True, we return the full dict
+          # of matching fileinfos from all required repositories, so that the
+          # client can pick through potentially differing 'custom' fields in
+          # the fileinfo from different sources.
+          return matching_tentative_targets
+        else:
+          # Else, by default, we just return an arbitrary matching fileinfo
+          # in a Python2/3 compatible way. (The order *within* a specific
+          # delegation is not guaranteed. These must be identical in all
+          # regards except for 'custom' fileinfo.)
+          return next(six.itervalues(matching_tentative_targets))
+
+      else:
+        logger.debug('Failed to find target ' + repr(target_filepath) + ' in '
+            'this pinning (repos: ' + repr(repo_list) + '). Moving on to next'
+            ' pinning.')
+
+    # We should only get here in the code if we have tried every pinning and
+    # have not successfully derived target info.
+    assert target_info is None, 'Programming error.'
+
+    raise tuf.UnknownTargetError(target_filepath + ' not found.')
+
+
+
+
+
 
+  def _get_matching_tentative_targets(self, target_filepath, repo_list):
+    """
+    Asks every repository in repo_list, the repositories required by a single
+    pinning, for target info for target_filepath, and returns the target info
+    they provide as a dict indexed by repository name, if they all provide
+    target info and agree on it (see target_info_is_equal()). Otherwise,
+    returns an empty dict, meaning that this pinning cannot validate the
+    target.
+
+    The repositories are independent of each other, so if there are several,
+    each is asked in its own thread, and their answers are considered as they
+    arrive. As soon as one repository does not know the target, or provides
+    target info that differs from another's, the empty dict is returned
+    without waiting for the remaining repositories: lookups that have not
+    yet started are skipped, and those underway are left to finish in the
+    background.
+
+    Exceptions other than tuf.UnknownTargetError raised by a repository's
+    updater are re-raised.
+    """
+    tentative_targets = six.moves.queue.Queue()
+    cancelled = threading.Event()
+
+    if len(repo_list) == 1:
+      self._look_up_tentative_target(
+          target_filepath, repo_list[0], tentative_targets, cancelled)
+
+    else:
       for repo_name in repo_list:
-        logger.debug('Checking for target ' + repr(target_filepath) + ' in '
-            'repository (' + repr(repo_name) + '), listed in a relevant '
-            'pinning.')
+        thread = threading.Thread(target=self._look_up_tentative_target,
+            args=(target_filepath, repo_name, tentative_targets, cancelled))
+        thread.daemon = True
+        thread.start()
+
+    matching_tentative_targets = dict()
 
-        new_tentative_target = None
+    try:
+      for i in range(len(repo_list)):
+        repo_name, new_tentative_target, exception = tentative_targets.get()
 
-        try: # Try to get the target from this repository.
-          new_tentative_target = self.repositories[repo_name].target(
-              target_filepath)
+        if exception is not None:
+          if not isinstance(exception, tuf.UnknownTargetError):
+            raise exception
 
-        except tuf.UnknownTargetError as e:
           logger.debug('Checking for target ' + repr(target_filepath) + ' in'
               ' repository (' + repr(repo_name) + ') yielded no target. '
-              ' Exception from attempt was: ' + repr(e))
+              ' Exception from attempt was: ' + repr(exception))
 
         if new_tentative_target is None:
           # If any of the required repos don't yield target info, then this
           # pinning delegation cannot validate the file.
-          matching_tentative_targets = dict()
-          break
-
-        elif not matching_tentative_targets:
-          # If we got target info, and we didn't already have target info from
-          # a previous repository in this delegation, then this was the first
-          # repository in this pinning, and we save the target info.
-          matching_tentative_targets[repo_name] = [new_tentative_target]
+          return dict()
 
-        elif not target_info_is_equal(
+        elif matching_tentative_targets and not target_info_is_equal(
             next(six.itervalues(matching_tentative_targets))['fileinfo'],
             new_tentative_target['fileinfo']):
           # That compared an arbitrary item from the matching_tentative_targets
-          # dict to the new tentative target fileinfo (in a way that works in
-          # both Python2 and Python3). Note that we only had to compare the
-          # first target info dict in matching_tentative_targets, since they
-          # all have to be "equal" per target_info_is_equal in order to get
-          # into that list in the first place.
-
-          # If we already have target info from a previous repository and it's
-          # not equal to the target info we just fetched, then this multi-repo
+          # dict to the new tentative target fileinfo. We only had to compare
+          # one, since they all have to be "equal" per target_info_is_equal in
+          # order to get into the dict in the first place.
+
+          # If we already have target info from another repository and it's
+          # not equal to the target info we just received, then this multi-repo
           # delegation cannot validate the file.
           # We proceed as if this multi-repo delegation had not specified the
           # target info (allowing the backtrack setting to determine whether
@@ -598,46 +698,238 @@ class Updater(object):
               'different specified file infos for the same target. Because '
               'all repositories must agree on file info for a target in a '
               'multi-repository delegation, we proceed as if the delegation '
-              'has not provided target info for this file. Skipping this'
+              'has not provided target info for this file. Skipping this '
               'multi-repository pinning delegation.')
-          matching_tentative_targets = dict()
-          break # moves to the next pinning
-
-        # Else, we are working with a multi-repository delegation and the new
-        # tentative target and previous tentative targets both exist and and
-        # are equivalent (except for the custom field, which is permitted to
-        # differ), so we add the new target info to the list and proceed
-        # happily to the next repository in the multi-repository pinning
-        # delegation.
+          return dict()
+
+        # Else, this is the first target info received for this pinning, or
+        # it is equivalent to the target info received before (except for the
+        # custom field, which is permitted to differ), so we add it to the
+        # dict and wait for the next repository in the pinning.
         matching_tentative_targets[repo_name] = new_tentative_target
 
+    finally:
+      # Lookups for this pinning that have not started yet are no longer
+      # needed.
+      cancelled.set()
 
-      # We've now checked every repository in this particular pinning.
-      # Check result of looking for target info in the delegated-to roles.
-      if matching_tentative_targets:
-        if multi_custom:
-          # If optional parameter multi_custom is True, we return the full dict
-          # of matching fileinfos from all required repositories, so that the
-          # client can pick through potentially differing 'custom' fields in
-          # the fileinfo from different sources.
-          return matching_tentative_targets
-        else:
-          # Else, by default, we just return an arbitrary matching fileinfo
-          # in a Python2/3 compatible way. (The order *within* a specific
-          # delegation is not guaranteed. These must be identical in all
-          # regards except for 'custom' fileinfo.)
-          return next(six.itervalues(matching_tentative_targets))
+    return matching_tentative_targets
+
+
+
+
+
+
+  def _look_up_tentative_target(
+      self, target_filepath, repo_name, tentative_targets, cancelled):
+    """
+    Gets target info for target_filepath from the given repository and puts a
+    (repo_name, target info, exception) tuple into the tentative_targets
+    queue. Exactly one of the target info and the exception is None. If the
+    cancelled event has been set by the time this repository can be used, the
+    lookup is skipped.
+    """
+    with self._metadata_locks[repo_name]:
+      if cancelled.is_set():
+        return
+
+      logger.debug('Checking for target ' + repr(target_filepath) + ' in '
+          'repository (' + repr(repo_name) + '), listed in a relevant '
+          'pinning.')
+
+      try:
+        tentative_targets.put((repo_name,
+            self.repositories[repo_name].target(target_filepath), None))
+
+      except Exception as e:
+        tentative_targets.put((repo_name, None, e))
+
+
+
+
+
+  def targets(self, target_filepaths, multi_custom=False):
+    """
+    Returns target info for each of the given target filepaths, as target()
+    would for each of them, in a dict indexed by target filepath. Target
+    filepaths for which target() would raise tuf.UnknownTargetError are left
+    out of the dict.
+
+    Rather than walking pinned.json and asking the repositories about each
+    target in turn, the targets are looked up together: each repository's
+    metadata is refreshed and searched once for all of the targets that a
+    pinning requires it for, and the repositories required by a
+    multi-repository pinning are asked at the same time.
+
+    The results are remembered until the snapshot metadata of any repository
+    is updated (see refresh()), so looking up the same targets again with
+    unchanged metadata does not search the repositories' metadata again.
+
+    <Arguments>
+
+      target_filepaths
+        a list of filenames of sought targets, relative to the root of the
+        targets namespace
+
+      multi_custom (optional)
+        As for target().
+
+    <Returns>
+      A dict mapping each target filepath that could be validated to the
+      value target() would return for it.
+
+    <Exceptions>
+      tuf.FormatError if there is a pinning delegation that has no repositories
+      listed, or if a target filepath is improperly formatted.
+
+      Exceptions other than tuf.UnknownTargetError raised by a repository's
+      updater are re-raised.
+    """
+    tuf.formats.RELPATHS_SCHEMA.check_match(target_filepaths)
+
+    # The metadata is compared by identity: it is only replaced when it is
+    # updated or reloaded.
+    snapshots = dict(
+        (repo_name, repository.metadata['current'].get('snapshot'))
+        for repo_name, repository in six.iteritems(self.repositories))
+
+    if self._validated_targets_snapshots is None or any(
+        snapshots[repo_name] is not self._validated_targets_snapshots[
+        repo_name] for repo_name in snapshots):
+      logger.debug('Snapshot metadata has changed. Forgetting previously '
+          'validated target info.')
+      self._validated_targets = {}
+      self._validated_targets_snapshots = snapshots
+
+    # The pinnings not yet tried for each target filepath not yet resolved.
+    remaining_pinnings = {}
+
+    for target_filepath in target_filepaths:
+      if target_filepath not in self._validated_targets and \
+          target_filepath not in remaining_pinnings:
+        remaining_pinnings[target_filepath] = list(
+            self._get_pinnings_for_target(target_filepath))
+
+    # Target info from each repository for the target filepaths it has been
+    # asked about, indexed by repository name and then target filepath. Target
+    # info is None if the repository does not know the target.
+    tentative_targets = dict(
+        (repo_name, {}) for repo_name in self.repositories)
+
+    # Try the first of the remaining pinnings of every target filepath at
+    # once, then the next pinning of those target filepaths that it did not
+    # validate, and so on.
+    while remaining_pinnings:
+      filepaths_by_repo = {}
+      for target_filepath, pinnings in six.iteritems(remaining_pinnings):
+        if pinnings:
+          for repo_name in pinnings[0]:
+            if target_filepath not in tentative_targets[repo_name]:
+              filepaths_by_repo.setdefault(repo_name, []).append(
+                  target_filepath)
+
+      self._look_up_tentative_targets(filepaths_by_repo, tentative_targets)
+
+      for target_filepath in list(remaining_pinnings):
+        pinnings = remaining_pinnings[target_filepath]
+        matching_tentative_targets = dict()
+
+        if pinnings:
+          matching_tentative_targets = self._match_tentative_targets(
+              target_filepath, pinnings.pop(0), tentative_targets)
+
+        if matching_tentative_targets:
+          self._validated_targets[target_filepath] = matching_tentative_targets
+          del remaining_pinnings[target_filepath]
+
+        elif not pinnings:
+          logger.debug('Failed to find target ' + repr(target_filepath) +
+              ' in any relevant pinning.')
+          self._validated_targets[target_filepath] = None
+          del remaining_pinnings[target_filepath]
+
+    validated_targets = dict()
+
+    for target_filepath in target_filepaths:
+      matching_tentative_targets = self._validated_targets[target_filepath]
+
+      if matching_tentative_targets is None:
+        continue
+
+      elif multi_custom:
+        validated_targets[target_filepath] = matching_tentative_targets
 
       else:
-        logger.debug('Failed to find target ' + repr(target_filepath) + ' in '
-            'this pinning (repos: ' + repr(repo_list) + '). Moving on to next'
-            ' pinning.')
+        validated_targets[target_filepath] = \
+            next(six.itervalues(matching_tentative_targets))
 
-    # We should only get here in the code if we have tried every pinning and
-    # have not successfully derived target info.
-    assert target_info is None, 'Programming error.'
+    return validated_targets
 
-    raise tuf.UnknownTargetError(target_filepath + ' not found.')
+
+
+
+
+  def _look_up_tentative_targets(self, filepaths_by_repo, tentative_targets):
+    """
+    Gets target info for the target filepaths listed for each repository in
+    filepaths_by_repo from that repository, adding it to tentative_targets
+    (see targets()). If there are several repositories, each is asked in its
+    own thread (see tuf.util.call_concurrently()). The first exception raised
+    by a repository's updater is re-raised once all of the repositories have
+    answered.
+    """
+    def look_up(repo_name_and_target_filepaths):
+      repo_name, target_filepaths = repo_name_and_target_filepaths
+
+      with self._metadata_locks[repo_name]:
+        found_targets = self.repositories[repo_name].targets(target_filepaths)
+
+      for target_filepath in target_filepaths:
+        tentative_targets[repo_name][target_filepath] = \
+            found_targets.get(target_filepath)
+
+    outcomes = tuf.util.call_concurrently(look_up,
+        list(six.iteritems(filepaths_by_repo)),
+        max(len(filepaths_by_repo), 1))
+
+    for result, exception in outcomes:
+      if exception is not None:
+        raise exception
+
+
+
+
+
+  def _match_tentative_targets(
+      self, target_filepath, repo_list, tentative_targets):
+    """
+    Returns the target info for target_filepath from every repository in
+    repo_list, the repositories required by a single pinning, as a dict
+    indexed by repository name, if they all provide target info and agree on
+    it (see target_info_is_equal()). Otherwise, returns an empty dict, as
+    _get_matching_tentative_targets() does.
+    """
+    matching_tentative_targets = dict()
+
+    for repo_name in repo_list:
+      new_tentative_target = tentative_targets[repo_name][target_filepath]
+
+      if new_tentative_target is None:
+        logger.debug('Repository ' + repr(repo_name) + ' yielded no target '
+            'info for ' + repr(target_filepath) + '.')
+        return dict()
+
+      elif matching_tentative_targets and not target_info_is_equal(
+          next(six.itervalues(matching_tentative_targets))['fileinfo'],
+          new_tentative_target['fileinfo']):
+        logger.debug('A multi-repository pinning delegation had multiple '
+            'different specified file infos for target ' +
+            repr(target_filepath) + '. Skipping this pinning delegation.')
+        return dict()
+
+      matching_tentative_targets[repo_name] = new_tentative_target
+
+    return matching_tentative_targets
 
 
 
@@ -723,6 +1015,10 @@ class Updater(object):
     still be used to validate this download, regardless of where the file ended
     up coming from.
 
+    This may be called from several threads at once to download different
+    targets. No more than tuf.conf.MAX_CONCURRENT_DOWNLOADS_PER_REPOSITORY
+    downloads from any one repository happen at the same time; others wait.
+
     """
 
     # Check arguments.
@@ -731,8 +1027,9 @@ class Updater(object):
 
     if repo_name is not None:
       self._validate_repo_name(repo_name)
-      return self.repositories[repo_name].download_target(target,
-          destination_directory)
+      with self._download_semaphores[repo_name]:
+        return self.repositories[repo_name].download_target(target,
+            destination_directory)
 
     # If we have not been specifically instructed by the client to use a
     # particular repository, then we process pinned.json metadata in order to
@@ -775,8 +1072,9 @@ class Updater(object):
         list_of_noworkingmirror_exceptions = []
 
         try:
-          self.repositories[repo_name].download_target(
-              target, destination_directory)
+          with self._download_semaphores[repo_name]:
+            self.repositories[repo_name].download_target(
+                target, destination_directory)
 
         except tuf.NoWorkingMirrorError as e:
           exceptions_from_all_delegations.append(e)
@@ -1042,6 +1340,28 @@ class SingleRepoUpdater(object):
     # determines if metadata and target files downloaded from remote
     # repositories include the digest.
     self.consistent_snapshot = False
+
+    # Map the name of each Targets role for which a target has been looked up
+    # with tuf.conf.NORMALIZE_TARGET_PATHS set to a tuple (targets,
+    # number_of_targets, index), where 'index' maps each target path in the
+    # role's 'targets' dictionary, with a leading '/', to the path as listed.
+    # The index is rebuilt if the role's 'targets' dictionary is replaced (as
+    # when its metadata is updated) or changes size.
+    self._normalized_target_paths = {}
+
+    # Map the name of each Targets role whose delegations have been imported
+    # to a dictionary mapping id(delegation) to a tuple (delegation, matcher)
+    # for each of its delegations (normal and multi-role), where 'matcher' is
+    # a _DelegationMatcher compiled from the delegation's 'paths' or
+    # 'path_hash_prefixes'.  See _get_delegation_matcher().
+    self._delegation_matchers = {}
+
+    # Delegated Targets metadata files downloaded by _prefetch_metadata() but
+    # not yet verified, as a (file_object, exception) tuple indexed by the URL
+    # the file was downloaded from.  Only one of file_object and exception is
+    # not None.  _get_metadata_file() takes files from here rather than
+    # downloading them again.
+    self._prefetched_metadata = {}
     
     # Ensure the repository metadata directory has been set.
     if tuf.conf.repository_directory is None:
@@ -1072,11 +1392,39 @@ class SingleRepoUpdater(object):
         '  This path MUST exist.')
 
     self.metadata_directory['previous'] = previous_path
+
+    # Load the validators (ETag and Last-Modified) that mirrors sent with the
+    # current timestamp metadata, used to make conditional requests for it in
+    # refresh().  They are kept by the URL of the file on each mirror.
+    self.http_validators_filepath = os.path.join(client_repositories_directory,
+        'metadata', repository_name, 'http_validators.json')
+    self.http_validators = {}
+
+    if os.path.exists(self.http_validators_filepath):
+      try:
+        http_validators = tuf.util.load_json_file(self.http_validators_filepath)
+        tuf.formats.HTTP_VALIDATORS_DICT_SCHEMA.check_match(http_validators)
+
+      except (tuf.Error, ValueError) as e:
+        logger.warning('Ignoring unreadable HTTP validators file ' +
+            repr(self.http_validators_filepath) + ': ' + repr(e))
+
+      else:
+        self.http_validators = http_validators
+
+    # Metadata parsed from the metadata files, kept from one updater to the
+    # next so that files that have not changed are not parsed again.  See
+    # _load_metadata_from_file().
+    self._metadata_cache = tuf.client.metadata_cache.MetadataCache(
+        os.path.join(client_repositories_directory, 'metadata',
+        repository_name, 'metadata.cache'))
     
     # Load current and previous metadata.
     for metadata_set in ['current', 'previous']:
       for metadata_role in ['root', 'targets', 'snapshot', 'timestamp']:
         self._load_metadata_from_file(metadata_set, metadata_role)
+
+    self._metadata_cache.save()
       
     # Raise an exception if the repository is missing the required 'root'
     # metadata.
@@ -1147,11 +1495,21 @@ class SingleRepoUpdater(object):
     
     # Ensure the metadata path is valid/exists, else ignore the call. 
     if os.path.exists(metadata_filepath):
-      # Load the file.  The loaded object should conform to
-      # 'tuf.formats.SIGNABLE_SCHEMA'.
-      metadata_signable = tuf.util.load_file(metadata_filepath)
+      with open(metadata_filepath, 'rb') as file_object:
+        metadata_data = file_object.read()
+
+      # Use the metadata cached when this file was last loaded, if it has not
+      # changed since.  Otherwise, load the file.  The loaded object should
+      # conform to 'tuf.formats.SIGNABLE_SCHEMA'.
+      cache_name = os.path.join(metadata_set, metadata_filename)
+      metadata_signable = self._metadata_cache.get(cache_name, metadata_data)
+
+      if metadata_signable is None:
+        metadata_signable = tuf.util.load_string(metadata_data)
 
-      tuf.formats.check_signable_object_format(metadata_signable)
+        tuf.formats.check_signable_object_format(metadata_signable)
+
+        self._metadata_cache.add(cache_name, metadata_data, metadata_signable)
 
       # Extract the 'signed' role object from 'metadata_signable'.
       metadata_object = metadata_signable['signed']
@@ -1251,6 +1609,15 @@ class SingleRepoUpdater(object):
     # This could be quite slow with a large number of delegations.
     keys_info = current_parent_metadata['delegations'].get('keys', {})
     roles_info = current_parent_metadata['delegations'].get('roles', [])
+    multi_role_delegations = \
+        current_parent_metadata['delegations'].get('multiroledelegations', [])
+
+    # Compile the paths (or path hash prefixes) of each delegation once, for
+    # _is_delegation_relevant_to_target(), replacing those compiled for any
+    # previous version of the parent role's metadata.
+    self._delegation_matchers[parent_role] = dict(
+        (id(delegation), (delegation, _DelegationMatcher(delegation)))
+        for delegation in list(roles_info) + list(multi_role_delegations))
 
     logger.debug('Adding roles delegated from ' + repr(parent_role) + '.')
    
@@ -1431,11 +1798,18 @@ class SingleRepoUpdater(object):
     # Use default but sane information for timestamp metadata, and do not
     # require strict checks on its required length.
     try: 
-      self._update_metadata('timestamp', DEFAULT_TIMESTAMP_UPPERLENGTH)
+      # The timestamp metadata is requested conditionally: if the mirror's copy
+      # has not changed since we last downloaded it, the currently trusted
+      # copy is kept (after checking that it has not expired).
+      self._update_metadata('timestamp', DEFAULT_TIMESTAMP_UPPERLENGTH,
+          conditional=True)
       self._update_metadata_if_changed('snapshot',
                                        referenced_metadata='timestamp')
       self._update_metadata_if_changed('root')
       self._update_metadata_if_changed('targets')
+
+      # Keep any newly installed metadata for the next updater.
+      self._metadata_cache.save()
     
     # There are two distinct error scenarios that can rise from the
     # _update_metadata_if_changed calls in the try block above:
@@ -1700,7 +2074,8 @@ class SingleRepoUpdater(object):
                           unsafely_verify_uncompressed_metadata_file, 'meta',
                           download_file_length, compression,
                           unsafely_verify_compressed_metadata_file,
-                          download_safely=False)
+                          download_safely=False,
+                          uncompressed_fileinfo=uncompressed_fileinfo)
 
 
 
@@ -1708,7 +2083,7 @@ class SingleRepoUpdater(object):
 
   def _get_metadata_file(self, metadata_role, remote_filename,
                          upperbound_filelength, expected_version,
-                         compression_algorithm):
+                         compression_algorithm, conditional=False):
     """
     <Purpose>
       Non-public method that tries downloading, up to a certain length, a
@@ -1735,6 +2110,12 @@ class SingleRepoUpdater(object):
         The name of the compression algorithm (e.g., 'gzip').  The algorithm is
         needed if the remote metadata file is compressed. 
 
+      conditional:
+        Whether to make conditional requests (see
+        tuf.download.unsafe_download_if_modified()), using the validators
+        stored for each mirror in 'self.http_validators', if there is a
+        currently trusted copy of 'metadata_role'.
+
     <Exceptions>
       tuf.NoWorkingMirrorError:
         The metadata could not be fetched. This is raised only when all known
@@ -1747,6 +2128,11 @@ class SingleRepoUpdater(object):
 
     <Returns>
       A 'tuf.util.TempFile' file-like object containing the metadata.
+
+      If 'conditional' is True, a (file_object, http_validators) tuple
+      instead, where 'file_object' is None if a mirror reported that its copy
+      has not been modified, and 'http_validators' holds the validators of the
+      new copy (if any), by the URL it was downloaded from.
     """
 
     file_mirrors = tuf.mirrors.get_list_of_mirrors('meta', remote_filename,
@@ -1754,11 +2140,33 @@ class SingleRepoUpdater(object):
     # file_mirror (URL): error (Exception)
     file_mirror_errors = {}
     file_object = None
+    validators = None
 
     for file_mirror in file_mirrors:
       try:
-        file_object = tuf.download.unsafe_download(file_mirror,
-                                                   upperbound_filelength)
+        if conditional:
+          if metadata_role in self.metadata['current']:
+            validators = self.http_validators.get(file_mirror, {})
+
+          else:
+            validators = {}
+
+          file_object, validators = tuf.download.unsafe_download_if_modified(
+              file_mirror, upperbound_filelength, validators)
+
+          # The mirror's copy is the one that we already trust.
+          if file_object is None:
+            return None, {}
+
+        elif file_mirror in self._prefetched_metadata:
+          # Downloaded already by _prefetch_metadata(), but not verified.
+          file_object, exception = self._prefetched_metadata.pop(file_mirror)
+          if exception is not None:
+            raise exception
+
+        else:
+          file_object = tuf.download.unsafe_download(file_mirror,
+                                                     upperbound_filelength)
 
         if compression_algorithm is not None:
           logger.info('Decompressing ' + str(file_mirror))
@@ -1816,7 +2224,10 @@ class SingleRepoUpdater(object):
       else:
         break
 
-    if file_object:
+    if file_object and conditional:
+      return file_object, {file_mirror: validators}
+
+    elif file_object:
       return file_object
     
     else:
@@ -1902,7 +2313,8 @@ class SingleRepoUpdater(object):
                           safely_verify_uncompressed_metadata_file, 'meta',
                           download_file_length, compression,
                           safely_verify_compressed_metadata_file,
-                          download_safely=True)
+                          download_safely=True,
+                          uncompressed_fileinfo=uncompressed_fileinfo)
 
 
 
@@ -1913,7 +2325,8 @@ class SingleRepoUpdater(object):
   # for "unsafe" download? This should induce safer and more readable code.
   def _get_file(self, filepath, verify_file_function, file_type,
                 file_length, compression=None,
-                verify_compressed_file_function=None, download_safely=True):
+                verify_compressed_file_function=None, download_safely=True,
+                uncompressed_fileinfo=None):
     """
     <Purpose>
       Non-public method that tries downloading, up to a certain length, a
@@ -1952,6 +2365,12 @@ class SingleRepoUpdater(object):
       download_safely:
         A boolean switch to toggle safe or unsafe download of the file.
 
+      uncompressed_fileinfo:
+        If compression is specified, the trusted fileinfo of the decompressed
+        file, if known.  Decompression then stops as soon as the trusted length
+        is exceeded, and computes the trusted hashes as it goes, for
+        'verify_file_function' to check without reading the file again.
+
     <Exceptions>
       tuf.NoWorkingMirrorError:
         The metadata could not be fetched. This is raised only when all known
@@ -1985,7 +2404,14 @@ class SingleRepoUpdater(object):
           if verify_compressed_file_function is not None: 
             verify_compressed_file_function(file_object)  
           logger.info('Decompressing ' + str(file_mirror))
-          file_object.decompress_temp_file_object(compression)
+
+          if uncompressed_fileinfo is not None:
+            file_object.decompress_temp_file_object(compression,
+                max_length=uncompressed_fileinfo['length'],
+                hash_algorithms=list(uncompressed_fileinfo['hashes']))
+
+          else:
+            file_object.decompress_temp_file_object(compression)
         
         else:
           logger.info('Not decompressing ' + str(file_mirror))
@@ -2027,7 +2453,7 @@ class SingleRepoUpdater(object):
 
 
   def _update_metadata(self, metadata_role, upperbound_filelength, version=None,
-                       compression_algorithm=None):
+                       compression_algorithm=None, conditional=False):
     """
     <Purpose>
       Non-public method that downloads, verifies, and 'installs' the metadata
@@ -2055,12 +2481,21 @@ class SingleRepoUpdater(object):
         compressed form.  Currently, only metadata files compressed with 'gzip'
         are considered.  Any other string is ignored.
 
+      conditional:
+        Whether to request the metadata conditionally.  If a mirror reports
+        that its copy has not been modified since it was last downloaded, the
+        currently trusted metadata is kept, and only its expiration is checked.
+
     <Exceptions>
       tuf.NoWorkingMirrorError:
         The metadata cannot be updated. This is not specific to a single
         failure but rather indicates that all possible ways to update the
         metadata have been tried and failed.
 
+      tuf.ExpiredMetadataError:
+        If 'conditional' is True and the metadata has not been modified, but
+        the currently trusted metadata has expired.
+
     <Side Effects>
       The metadata file belonging to 'metadata_role' is downloaded from a
       repository mirror.  If the metadata is valid, it is stored in the 
@@ -2109,10 +2544,25 @@ class SingleRepoUpdater(object):
       remote_filename = os.path.join(dirname, str(filename_version) + '.' + basename)
    
     logger.info('Verifying ' + repr(metadata_role) + '.  Requesting version: ' + repr(version))
-    metadata_file_object = \
-      self._get_metadata_file(metadata_role, remote_filename,
-                              upperbound_filelength, version,
-                              compression_algorithm)
+
+    if conditional:
+      metadata_file_object, http_validators = \
+        self._get_metadata_file(metadata_role, remote_filename,
+                                upperbound_filelength, version,
+                                compression_algorithm, conditional=True)
+
+      if metadata_file_object is None:
+        logger.info(repr(metadata_role) + ' has not been modified.  Keeping'
+            ' the currently trusted version.')
+        self._ensure_not_expired(self.metadata['current'][metadata_role],
+            metadata_role)
+        return
+
+    else:
+      metadata_file_object = \
+        self._get_metadata_file(metadata_role, remote_filename,
+                                upperbound_filelength, version,
+                                compression_algorithm)
 
     # The metadata has been verified. Move the metadata file into place.
     # First, move the 'current' metadata file to the 'previous' directory
@@ -2134,7 +2584,10 @@ class SingleRepoUpdater(object):
     # Next, move the verified updated metadata file to the 'current' directory.
     # Note that the 'move' method comes from tuf.util's TempFile class.
     # 'metadata_file_object' is an instance of tuf.util.TempFile.
-    metadata_signable = tuf.util.load_string(metadata_file_object.read())
+    metadata_data = metadata_file_object.read()
+    metadata_signable = tuf.util.load_string(metadata_data)
+    self._metadata_cache.add(os.path.join('current',
+        uncompressed_metadata_filename), metadata_data, metadata_signable)
 
     if compression_algorithm == 'gzip':
       current_uncompressed_filepath = \
@@ -2162,6 +2615,54 @@ class SingleRepoUpdater(object):
     self.metadata['current'][metadata_role] = updated_metadata_object
     self._update_versioninfo(uncompressed_metadata_filename)
 
+    if conditional:
+      self._update_http_validators(http_validators)
+
+
+
+
+
+  def _update_http_validators(self, http_validators):
+    """
+    <Purpose>
+      Non-public method that stores the validators of newly installed metadata
+      (see _get_metadata_file()), replacing those previously stored for the
+      same URLs, and saves them to disk.  An empty set of validators for a URL
+      removes that URL's entry.
+
+    <Arguments>
+      http_validators:
+        A dict conformant to 'tuf.formats.HTTP_VALIDATORS_DICT_SCHEMA'.
+
+    <Exceptions>
+      None.
+
+    <Side Effects>
+      The validators file in the repository's metadata directory is written.
+
+    <Returns>
+      None.
+    """
+
+    updated_http_validators = dict(self.http_validators)
+
+    for url, validators in six.iteritems(http_validators):
+      if validators:
+        updated_http_validators[url] = validators
+
+      else:
+        updated_http_validators.pop(url, None)
+
+    if updated_http_validators == self.http_validators:
+      return
+
+    file_object = tuf.util.TempFile()
+    file_object.write(json.dumps(updated_http_validators, indent=1,
+        sort_keys=True).encode('utf-8'))
+    file_object.move(self.http_validators_filepath)
+
+    self.http_validators = updated_http_validators
+
 
 
 
@@ -2298,7 +2799,10 @@ class SingleRepoUpdater(object):
       # Next, move the verified updated metadata file to the 'current' directory.
       # Note that the 'move' method comes from tuf.util's TempFile class.
       # 'metadata_file_object' is an instance of tuf.util.TempFile.
-      metadata_signable = tuf.util.load_string(metadata_file_object.read())
+      metadata_data = metadata_file_object.read()
+      metadata_signable = tuf.util.load_string(metadata_data)
+      self._metadata_cache.add(os.path.join('current',
+          uncompressed_metadata_filename), metadata_data, metadata_signable)
       if compression == 'gzip':
         current_uncompressed_filepath = \
           os.path.join(self.metadata_directory['current'],
@@ -3063,13 +3567,103 @@ class SingleRepoUpdater(object):
 
     logger.debug('Roles to update: ' + repr(roles_to_update) + '.')
 
-    # Iterate 'roles_to_update', and load and update its metadata file if it
-    # has changed.
-    for rolename in roles_to_update:
-      self._load_metadata_from_file('previous', rolename)
-      self._load_metadata_from_file('current', rolename)
+    # Download the metadata files of all the roles that have changed at once,
+    # so that updating each role in turn below only has to verify them.
+    if len(roles_to_update) > 1:
+      self._prefetch_metadata(roles_to_update)
+
+    try:
+      # Iterate 'roles_to_update', and load and update its metadata file if it
+      # has changed.
+      for rolename in roles_to_update:
+        self._load_metadata_from_file('previous', rolename)
+        self._load_metadata_from_file('current', rolename)
+
+        self._update_metadata_if_changed(rolename)
+
+      self._metadata_cache.save()
+
+    finally:
+      # Discard the files of any roles that were not updated (e.g., because the
+      # update of an earlier role failed).
+      for file_object, exception in six.itervalues(self._prefetched_metadata):
+        if file_object is not None:
+          file_object.close_temp_file()
+
+      self._prefetched_metadata = {}
+
 
-      self._update_metadata_if_changed(rolename)
+
+
+
+  def _prefetch_metadata(self, rolenames):
+    """
+    <Purpose>
+      Non-public method that downloads the metadata files of those of the
+      given Targets roles that snapshot lists with a newer version than the
+      one currently trusted, several at a time (see
+      tuf.conf.MAX_CONCURRENT_METADATA_DOWNLOADS_PER_MIRROR), from the first
+      mirror.  The downloaded files are stored in self._prefetched_metadata
+      for _get_metadata_file() to verify, when the roles are updated in order
+      by _update_metadata_if_changed().  Nothing is verified here.
+
+    <Arguments>
+      rolenames:
+        The names of Targets roles (e.g., 'targets', 'unclaimed').
+
+    <Exceptions>
+      None.  An error downloading a file is stored in place of the file, to be
+      raised by _get_metadata_file().
+
+    <Side Effects>
+      Metadata files are downloaded to temporary files.
+
+    <Returns>
+      None.
+    """
+
+    file_mirrors = []
+
+    for rolename in rolenames:
+      metadata_filename = rolename + '.' + tuf.conf.METADATA_FORMAT
+      versioninfo = \
+          self.metadata['current']['snapshot']['meta'].get(metadata_filename)
+
+      if versioninfo is None or not self._versioninfo_has_been_updated(
+          metadata_filename, versioninfo):
+        continue
+
+      # Request the same file that _update_metadata() will, as it is called by
+      # _update_metadata_if_changed().
+      remote_filename = metadata_filename
+      if rolename.startswith('targets') and \
+          'gzip' in self.metadata['current']['root']['compression_algorithms']:
+        remote_filename = remote_filename + '.gz'
+
+      if self.consistent_snapshot:
+        dirname, basename = os.path.split(remote_filename)
+        remote_filename = os.path.join(
+            dirname, str(versioninfo['version']) + '.' + basename)
+
+      # _get_metadata_file() tries the mirrors in order, so the first mirror
+      # is the one it will try first.
+      file_mirrors.extend(tuf.mirrors.get_list_of_mirrors(
+          'meta', remote_filename, self.mirrors)[:1])
+
+    if not file_mirrors:
+      return
+
+    logger.debug('Prefetching ' + repr(len(file_mirrors)) + ' metadata files.')
+
+    def download(file_mirror):
+      return tuf.download.unsafe_download(
+          file_mirror, tuf.conf.DEFAULT_TARGETS_REQUIRED_LENGTH)
+
+    outcomes = tuf.util.call_concurrently(download, file_mirrors,
+        tuf.conf.MAX_CONCURRENT_METADATA_DOWNLOADS_PER_MIRROR)
+
+    for file_mirror, outcome in zip(file_mirrors, outcomes):
+      self._prefetched_metadata[file_mirror] = outcome
 
 
 
@@ -3277,8 +3871,70 @@ class SingleRepoUpdater(object):
 
 
 
+  def targets(self, target_filepaths):
+    """
+    <Purpose>
+      Return the target file information of each of 'target_filepaths', as
+      target() does for one target, updating the metadata only once for all
+      of them.
+
+    <Arguments>
+      target_filepaths:
+        A list of paths to target files on the repository, relative to the
+        'targets' (or equivalent) directory on a given mirror.
+
+    <Exceptions>
+      tuf.FormatError:
+        If 'target_filepaths' is improperly formatted.
+
+      Any other unforeseen runtime exception.
+
+    <Side Effects>
+      The metadata for updated delegated roles are downloaded and stored.
+
+    <Returns>
+      A dictionary mapping each of 'target_filepaths' that was found to its
+      target information, conformant to 'tuf.formats.TARGETFILE_SCHEMA'.
+      Target filepaths that were not found are left out.
+    """
+
+    # Does 'target_filepaths' have the correct format?
+    # Raise 'tuf.FormatError' if there is a mismatch.
+    tuf.formats.RELPATHS_SCHEMA.check_match(target_filepaths)
+
+    # As in target(), make sure that the metadata of the 'targets' role and
+    # all delegated roles is up to date, but only once for all the targets.
+    self._update_metadata_if_changed('targets')
+    self._refresh_targets_metadata('targets', refresh_all_delegated_roles=True)
+
+    # The hash of each target filepath, for hashed-bin delegations.
+    target_filepath_hashes = {}
+    targets = {}
+
+    for target_filepath in target_filepaths:
+      # 'target_filepath' might contain URL encoding escapes.
+      normalized_filepath = six.moves.urllib.parse.unquote(target_filepath)
+
+      if not normalized_filepath.startswith('/'):
+        normalized_filepath = '/' + normalized_filepath
+
+      target = self._target(
+          'targets', normalized_filepath, target_filepath_hashes)
+
+      if target is None:
+        logger.debug(target_filepath + ' not found.')
+
+      else:
+        targets[target_filepath] = target
+
+    return targets
+
+
+
+
+
   def _is_delegation_relevant_to_target(self, delegation_info,
-      target_filepath):
+      target_filepath, parent_role=None, target_filepath_hashes=None):
     """
     <Purpose>
       Non-public method. Returns True if the given delegation includes
@@ -3301,16 +3957,26 @@ class SingleRepoUpdater(object):
 
     <Arguments>
       delegation_info:
-        An object matching either tuf.formats.ROLE_SCHEMA or
-        tuf.formats.MULTI_ROLE_DELEGATION_SCHEMA; that is, either a normal
-        delegation (i.e. a role) or a multi-role delegation.
+        The delegation: the 'roles' or 'multiroledelegations' entry of the
+        delegating role's 'delegations'.
 
       target_filepath:
         The path to the target file on the repository. This will be relative to
         the 'targets' (or equivalent) directory on a given mirror.
 
+      parent_role: (optional)
+        The name of the delegating role.  If given, the delegation's paths are
+        matched using the matcher compiled for it when the delegating role's
+        delegations were imported (see _get_delegation_matcher()).
+
+      target_filepath_hashes: (optional)
+        A dictionary in which to remember the hash of each target filepath,
+        so that it is computed only once while looking up a target through
+        many hashed-bin delegations.
+
     <Exceptions>
-      None.
+      tuf.FormatError, if the delegation has neither 'paths' nor
+      'path_hash_prefixes'.
    
     <Side Effects>
       None.
@@ -3324,36 +3990,28 @@ class SingleRepoUpdater(object):
     # TODO: check argument delegation_info against tuf.formats.ROLE_SCHEMA or
     # tuf.formats.MULTI_ROLE_DELEGATION_SCHEMA
 
-    delegation_paths = delegation_info.get('paths')
-    delegation_path_hash_prefixes = delegation_info.get('path_hash_prefixes')
-    # A boolean indicator that tell us whether this delegation includeas the
-    # target with the name 'target_filepath'.
-    delegation_is_relevant = False
-
-    if delegation_path_hash_prefixes is not None:
-      target_filepath_hash = self._get_target_hash(target_filepath)
-      for delegation_path_hash_prefix in delegation_path_hash_prefixes:
-        if target_filepath_hash.startswith(delegation_path_hash_prefix):
-          delegation_is_relevant = True
-        
-        else:
-          continue
-
-    elif delegation_paths is not None:
-      for delegation_path in delegation_paths:
-        # A child role path may be an explicit path or pattern (Unix
-        # shell-style wildcards).  The child role 'delegation_name' is added if
-        # 'target_filepath' is equal or matches 'delegation_path'.  Explicit
-        # filepaths are also added.
-        if fnmatch.fnmatch(target_filepath, delegation_path):
-          delegation_is_relevant = True
+    matcher = self._get_delegation_matcher(parent_role, delegation_info)
 
-    else:
+    if matcher.paths is None and matcher.path_hash_prefixes is None:
       # The 'paths' or 'path_hash_prefixes' fields should not be missing,
       # so we raise a format error here in case they are both missing.
       raise tuf.FormatError('Delegation has neither "paths" nor '
           '"path_hash_prefixes". Delegation info: ' + repr(delegation_info))
 
+    target_filepath_hash = None
+
+    if matcher.path_hash_prefixes is not None:
+      if target_filepath_hashes is None:
+        target_filepath_hashes = {}
+
+      if target_filepath not in target_filepath_hashes:
+        target_filepath_hashes[target_filepath] = \
+            self._get_target_hash(target_filepath)
+
+      target_filepath_hash = target_filepath_hashes[target_filepath]
+
+    delegation_is_relevant = matcher.matches(
+        target_filepath, target_filepath_hash)
 
     if delegation_is_relevant:
       logger.debug('Delegation has restricted path matching target filepath: '
@@ -3365,9 +4023,9 @@ class SingleRepoUpdater(object):
       # path I used to validate it. Was that OK?" Else raise error.
 
     else:
-      logger.debug('Delegation does not have restricted path matching the ' +
-          'target filepath: ' + repr(target_filepath) +
-          '; delegation info follows: ' + str(delegation_info))
+      logger.debug('Delegation ' + repr(delegation_info.get('name')) +
+          ' does not have restricted path matching the target filepath: ' +
+          repr(target_filepath))
 
     return delegation_is_relevant
 
@@ -3375,7 +4033,49 @@ class SingleRepoUpdater(object):
 
 
 
-  def _target(self, rolename, target_filepath):
+  def _get_delegation_matcher(self, parent_role, delegation_info):
+    """
+    <Purpose>
+      Non-public method that returns the _DelegationMatcher for the given
+      delegation, reusing the one compiled when the delegations of
+      'parent_role' were imported if the delegation's paths have not changed
+      since.
+
+    <Arguments>
+      parent_role:
+        The name of the delegating role, or None if not known.
+
+      delegation_info:
+        The delegation.
+
+    <Exceptions>
+      None.
+
+    <Side Effects>
+      None.
+
+    <Returns>
+      A _DelegationMatcher.
+    """
+
+    matchers = self._delegation_matchers.get(parent_role, {})
+    entry = matchers.get(id(delegation_info))
+
+    if entry is None or entry[0] is not delegation_info:
+      return _DelegationMatcher(delegation_info)
+
+    # Recompile the matcher if the delegation's paths have changed.
+    if not entry[1].is_compiled_from(delegation_info):
+      entry = (delegation_info, _DelegationMatcher(delegation_info))
+      matchers[id(delegation_info)] = entry
+
+    return entry[1]
+
+
+
+
+
+  def _target(self, rolename, target_filepath, target_filepath_hashes=None):
     """
     TODO: Docstring
     <Purpose>
@@ -3392,6 +4092,12 @@ class SingleRepoUpdater(object):
     target = None
     role_metadata = self.metadata['current'][rolename]
     targets = role_metadata['targets']
+
+    # The hash of target_filepath, for hashed-bin delegations, is computed at
+    # most once for the whole lookup.
+    if target_filepath_hashes is None:
+      target_filepath_hashes = {}
+
     delegations = role_metadata.get('delegations', {})
     child_roles = delegations.get('roles', [])
     multi_role_delegations = delegations.get('multiroledelegations', {})
@@ -3416,7 +4122,7 @@ class SingleRepoUpdater(object):
     for mrdelegation in multi_role_delegations:
 
       if not self._is_delegation_relevant_to_target(mrdelegation,
-          target_filepath):
+          target_filepath, rolename, target_filepath_hashes):
         # Delegation does not include paths that match target_filepath.
         logger.debug('Skipping delegation: '+repr(mrdelegation)) # check repr
         continue
@@ -3429,7 +4135,8 @@ class SingleRepoUpdater(object):
       required_roles = mrdelegation.get('required_roles', [])
       for child_role_name in required_roles:
         logger.debug('Exploring child role '+repr(child_role_name))
-        new_tentative_target = self._target(child_role_name, target_filepath)
+        new_tentative_target = self._target(child_role_name, target_filepath,
+            target_filepath_hashes)
 
         if new_tentative_target is None:
           # If any of the required roles don't yield target info, then this
@@ -3472,11 +4179,12 @@ class SingleRepoUpdater(object):
     # delegation from this role, check the normal delegations.
     for child_role in child_roles:
       if not self._is_delegation_relevant_to_target(child_role,
-          target_filepath):
+          target_filepath, rolename, target_filepath_hashes):
         logger.debug('Skipping delegation: '+repr(child_role)) # kinda long
         continue
 
-      target = self._target(child_role['name'], target_filepath)
+      target = self._target(child_role['name'], target_filepath,
+          target_filepath_hashes)
 
       if not child_role['backtrack']: # if cutting, return what we have, even if None
         return target
@@ -3495,6 +4203,11 @@ class SingleRepoUpdater(object):
       Non-public method that determines whether the targets role with the given
       'role_name' has the target with the name 'target_filepath'.
 
+      The target is looked up directly in 'targets'.  If it is not there and
+      tuf.conf.NORMALIZE_TARGET_PATHS is set, it is looked up again ignoring
+      any leading '/', using an index of the role's target paths (see
+      _get_normalized_target_paths()).
+
     <Arguments>
       role_name:
         The name of the targets role that we are inspecting.
@@ -3510,29 +4223,79 @@ class SingleRepoUpdater(object):
       None.
    
     <Side Effects>
-      None.
+      May build and store an index of the role's target paths.
     
     <Returns>
       The target information for 'target_filepath', conformant to
-      'tuf.formats.TARGETFILE_SCHEMA'.
+      'tuf.formats.TARGETFILE_SCHEMA', or None if the role does not have the
+      target.
     """
 
-    target = None
+    filepath = target_filepath
+    fileinfo = targets.get(filepath)
 
-    # Does the current role name have our target?
-    logger.debug('Asking role ' + repr(role_name) + ' about target ' +\
-      repr(target_filepath))
-    
-    for filepath, fileinfo in six.iteritems(targets):
-      if filepath == target_filepath:
-        logger.debug('Found target ' + target_filepath + ' in role ' + role_name)
-        target = {'filepath': filepath, 'fileinfo': fileinfo}
-        break
-      
-      else:
-        logger.debug('No target ' + target_filepath + ' in role ' + role_name)
+    if fileinfo is None and tuf.conf.NORMALIZE_TARGET_PATHS:
+      filepath = self._get_normalized_target_paths(role_name, targets).get(
+          _normalize_target_path(target_filepath))
+      if filepath is not None:
+        fileinfo = targets[filepath]
 
-    return target
+    if fileinfo is None:
+      logger.debug('No target ' + repr(target_filepath) + ' in role ' +
+          repr(role_name))
+      return None
+
+    logger.debug('Found target ' + repr(target_filepath) + ' in role ' +
+        repr(role_name))
+
+    return {'filepath': filepath, 'fileinfo': fileinfo}
+
+
+
+
+
+  def _get_normalized_target_paths(self, role_name, targets):
+    """
+    <Purpose>
+      Non-public method that returns an index of the target paths of the
+      Targets role 'role_name', mapping each path with a leading '/' to the path
+      as listed in 'targets'.  The index is built once for each version of the
+      role's metadata, and rebuilt if 'targets' is not the dictionary it was
+      built from or has changed size.
+
+    <Arguments>
+      role_name:
+        The name of the targets role.
+
+      targets:
+        The targets of the Targets role with the name 'role_name'.
+
+    <Exceptions>
+      None.
+
+    <Side Effects>
+      Stores the index in self._normalized_target_paths.
+
+    <Returns>
+      A dictionary mapping normalized target paths to target paths.
+    """
+
+    cached = self._normalized_target_paths.get(role_name)
+
+    if cached is not None and cached[0] is targets and \
+        cached[1] == len(targets):
+      return cached[2]
+
+    index = {}
+    for filepath in targets:
+      normalized_filepath = _normalize_target_path(filepath)
+      # If a role lists both 'file.txt' and '/file.txt', prefer the latter.
+      if normalized_filepath == filepath or normalized_filepath not in index:
+        index[normalized_filepath] = filepath
+
+    self._normalized_target_paths[role_name] = (targets, len(targets), index)
+
+    return index
 
 
 
@@ -3826,6 +4589,120 @@ def validate_metadata_set(metadata_set):
 
 
 
+def _normalize_target_path(target_filepath):
+  """
+  Return target_filepath with a single leading '/', as Updater.target() looks
+  targets up.
+  """
+  return '/' + target_filepath.lstrip('/')
+
+
+
+
+
+class _DelegationMatcher(object):
+  """
+  The 'paths' or 'path_hash_prefixes' of a delegation, compiled so that
+  checking whether the delegation includes a target does not try each of them
+  in turn:
+
+    - Paths without wildcards are kept in a set, and those with wildcards (Unix
+      shell-style, as for fnmatch) combined into a single regular expression.
+
+    - Path hash prefixes are kept in a set if they are all of the same length
+      (as for hashed bins), and otherwise in a tuple for str.startswith().
+  """
+
+  def __init__(self, delegation_info):
+
+    # Copies of the paths and path hash prefixes compiled, so that changes to
+    # the delegation's lists, even in place, are detected (see
+    # is_compiled_from()).
+    self.paths = _tuple_or_none(delegation_info.get('paths'))
+    self.path_hash_prefixes = _tuple_or_none(
+        delegation_info.get('path_hash_prefixes'))
+
+    # As in _is_delegation_relevant_to_target(), path hash prefixes take
+    # precedence over paths.
+    if self.path_hash_prefixes is not None:
+      prefix_lengths = set(len(prefix) for prefix in self.path_hash_prefixes)
+
+      if len(prefix_lengths) == 1:
+        self._prefix_length = prefix_lengths.pop()
+        self._prefix_set = frozenset(self.path_hash_prefixes)
+
+      else:
+        self._prefix_length = None
+        self._prefix_tuple = self.path_hash_prefixes
+
+    elif self.paths is not None:
+      literal_paths = []
+      patterns = []
+
+      for path in self.paths:
+        # fnmatch.fnmatch() normalizes the case of both path and pattern.
+        path = os.path.normcase(path)
+        if '*' in path or '?' in path or '[' in path:
+          patterns.append(fnmatch.translate(path))
+
+        else:
+          literal_paths.append(path)
+
+      self._literal_paths = frozenset(literal_paths)
+      self._pattern = None
+      if patterns:
+        self._pattern = re.compile('|'.join(
+            '(?:' + pattern + ')' for pattern in patterns))
+
+
+
+  def is_compiled_from(self, delegation_info):
+    """
+    Return True if this matcher was compiled from the current 'paths' or
+    'path_hash_prefixes' of delegation_info.
+    """
+    return _tuple_or_none(delegation_info.get('paths')) == self.paths and \
+        _tuple_or_none(delegation_info.get('path_hash_prefixes')) == \
+        self.path_hash_prefixes
+
+
+
+  def matches(self, target_filepath, target_filepath_hash=None):
+    """
+    Return True if the delegation includes target_filepath, whose hash (if
+    the delegation has path hash prefixes) is target_filepath_hash.  Raises
+    tuf.FormatError if the delegation has neither paths nor path hash
+    prefixes.
+    """
+    if self.path_hash_prefixes is not None:
+      if self._prefix_length is not None:
+        return target_filepath_hash[:self._prefix_length] in self._prefix_set
+
+      return target_filepath_hash.startswith(self._prefix_tuple)
+
+    elif self.paths is not None:
+      target_filepath = os.path.normcase(target_filepath)
+      return target_filepath in self._literal_paths or (
+          self._pattern is not None and
+          self._pattern.match(target_filepath) is not None)
+
+    else:
+      # The 'paths' or 'path_hash_prefixes' fields should not be missing,
+      # so we raise a format error here in case they are both missing.
+      raise tuf.FormatError('Delegation has neither "paths" nor '
+          '"path_hash_prefixes".')
+
+
+
+
+
+def _tuple_or_none(values):
+  return None if values is None else tuple(values)
+
+
+
+
+
 def target_info_is_equal(info1, info2):
   """
   TODO: Docstring.
@@ -3888,12 +4765,10 @@ def check_hashes(file_object, trusted_hashes, reset_fpointer=False):
       read() without a size argument properly reads the entire file.
 
     reset_fpointer:
-      If True, every time the file is read, its pointer will be reset to the
-      start of the file. This is of use when calculating multiple hashes and
-      using file objects whose read() functions are not overridden to always
-      reset the file pointer after read has read the full file. (This is done
-      for tuf.util.TempFile, but tuf.util.TempFile need not always be used,
-      if this optional parameter is set to True.)
+      If True, the pointer of a file object other than a tuf.util.TempFile
+      is reset to the start of the file after its hashes are computed.  (All
+      of the hashes are computed in a single pass, starting from the start of
+      the file, whether or not this is set.)
 
     trusted_hashes:
       A dictionary with hash-algorithm names as keys and hashes as dict values.
@@ -3910,12 +4785,24 @@ def check_hashes(file_object, trusted_hashes, reset_fpointer=False):
     None.
   """
 
+  # All of the digests are computed in a single pass over the file.  A
+  # 'tuf.util.TempFile' may have computed them already while decompressing it.
+  if isinstance(file_object, tuf.util.TempFile):
+    computed_hashes = file_object.get_digests(list(trusted_hashes))
+
+  else:
+    length, digest_objects = \
+      tuf.hash.multi_digest_fileobject(file_object, list(trusted_hashes))
+    computed_hashes = dict((algorithm, digest_object.hexdigest())
+        for algorithm, digest_object in six.iteritems(digest_objects))
+
+    if reset_fpointer:
+      file_object.seek(0)
+
   # Verify each trusted hash of 'trusted_hashes'.  If all are valid, simply
   # return.
   for algorithm, trusted_hash in six.iteritems(trusted_hashes):
-    digest_object = tuf.hash.digest(algorithm)
-    digest_object.update(file_object.read())
-    computed_hash = digest_object.hexdigest()
+    computed_hash = computed_hashes[algorithm]
 
     # Raise an exception if any of the hashes are incorrect.
     if trusted_hash != computed_hash:
@@ -3924,9 +4811,6 @@ def check_hashes(file_object, trusted_hashes, reset_fpointer=False):
       logger.info('The file\'s ' + repr(algorithm) + ' hash is correct: ' +
           repr(trusted_hash))
 
-    if reset_fpointer:
-      file_object.seek(0)
-
 
 
 
@@ -3951,16 +4835,14 @@ def hard_check_file_length(file_object, trusted_file_length):
     tuf.DownloadLengthMismatchError, if the lengths do not match.
 
   <Side Effects>
-    Reads the contents of 'file_object' and logs a message if 'file_object'
-    matches the trusted length.
+    May read the contents of 'file_object' (see _get_file_length()), and logs
+    a message if 'file_object' matches the trusted length.
 
   <Returns>
     None.
   """
 
-  # Read the entire contents of 'file_object', a 'tuf.util.TempFile' file-like
-  # object that ensures the entire file is read.
-  observed_length = len(file_object.read())
+  observed_length = _get_file_length(file_object)
 
   # Return and log a message if the length 'file_object' is equal to
   # 'trusted_file_length', otherwise raise an exception.  A hard check
@@ -3998,16 +4880,14 @@ def soft_check_file_length(file_object, trusted_file_length):
     tuf.DownloadLengthMismatchError, if the lengths do not match.
 
   <Side Effects>
-    Reads the contents of 'file_object' and logs a message if 'file_object'
-    is less than or equal to the trusted length.
+    May read the contents of 'file_object' (see _get_file_length()), and logs
+    a message if 'file_object' is less than or equal to the trusted length.
 
   <Returns>
     None.
   """
 
-  # Read the entire contents of 'file_object', a 'tuf.util.TempFile' file-like
-  # object that ensures the entire file is read.
-  observed_length = len(file_object.read())
+  observed_length = _get_file_length(file_object)
 
   # Return and log a message if 'file_object' is less than or equal to
   # 'trusted_file_length', otherwise raise an exception.  A soft check
@@ -4021,3 +4901,23 @@ def soft_check_file_length(file_object, trusted_file_length):
 
 
 
+
+
+
+def _get_file_length(file_object):
+  """
+  Return the length of the whole of 'file_object', a 'tuf.util.TempFile' or
+  other file object.  The length of a regular file is taken from its memory
+  map (see tuf.hash.multi_digest_fileobject()), without reading it; other file
+  objects are read, once, from the start.
+  """
+
+  if isinstance(file_object, tuf.util.TempFile):
+    file_object = file_object.temporary_file
+
+  length, digest_objects = tuf.hash.multi_digest_fileobject(file_object, [])
+
+  return length
+
+
+
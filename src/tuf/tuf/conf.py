@@ -80,9 +80,18 @@ DEFAULT_TARGETS_REQUIRED_LENGTH = 5000000 #bytes
 # Set a timeout value in seconds (float) for non-blocking socket operations.
 SOCKET_TIMEOUT = 2 #seconds
 
-# The maximum chunk of data, in bytes, we would download in every round.
+# The initial (and smallest) chunk of data, in bytes, we would download in
+# every round.  The chunk size grows with the observed download speed, up to
+# MAX_CHUNK_SIZE.
 CHUNK_SIZE = 8192 #bytes
 
+# The maximum chunk of data, in bytes, we would download in every round.
+MAX_CHUNK_SIZE = 1048576 #bytes
+
+# The chunk of data, in bytes, read at a time when files are decompressed or
+# hashed.
+FILE_CHUNK_SIZE = 65536 #bytes
+
 # The minimum average of download speed (bytes/second) that must be met to
 # avoid being considered as a slow retrieval attack.
 MIN_AVERAGE_DOWNLOAD_SPEED = CHUNK_SIZE #bytes/second
@@ -90,6 +99,26 @@ MIN_AVERAGE_DOWNLOAD_SPEED = CHUNK_SIZE #bytes/second
 # The time (in seconds) we ignore a server with a slow initial retrieval speed.
 SLOW_START_GRACE_PERIOD = 3 #seconds
 
+# HTTP and HTTPS connections are kept open (HTTP/1.1 keep-alive) and reused
+# for later downloads from the same host.  No more than
+# MAX_CONNECTIONS_PER_HOST connections to any one host are kept for reuse
+# (downloads beyond that use connections that are closed afterwards), and a
+# connection that has been idle for longer than CONNECTION_IDLE_TIMEOUT is
+# closed instead of being reused.
+MAX_CONNECTIONS_PER_HOST = 4
+CONNECTION_IDLE_TIMEOUT = 30 #seconds
+
+# The maximum number of target files that an updater downloads from any one
+# repository at the same time, when target files are downloaded in several
+# threads at once (e.g., by an Uptane Primary).
+MAX_CONCURRENT_DOWNLOADS_PER_REPOSITORY = 2
+
+# The maximum number of delegated Targets metadata files that an updater
+# downloads from a mirror at the same time, when it refreshes the metadata of
+# all of a repository's delegated roles (e.g., the hashed bins of an Image
+# Repository).  The files are still verified one at a time, in order.
+MAX_CONCURRENT_METADATA_DOWNLOADS_PER_MIRROR = 4
+
 # The current "good enough" number of PBKDF2 passphrase iterations.
 # We recommend that important keys, such as root, be kept offline.
 # 'tuf.conf.PBKDF2_ITERATIONS' should increase as CPU speeds increase, set here
@@ -150,6 +179,12 @@ SUPPORTED_URI_SCHEMES = ['http', 'https', 'file']
 # By default, limit number of delegatees we visit for any target.
 MAX_NUMBER_OF_DELEGATIONS = 2**5
 
+# Updater.target() always looks up target paths with a leading '/'.  If
+# NORMALIZE_TARGET_PATHS is True, a target listed in metadata without one (e.g.
+# 'file.txt' rather than '/file.txt') is also found.  An exact match is always
+# preferred.
+NORMALIZE_TARGET_PATHS = False
+
 
 # To override use of the system clock and use a fixed, trusted time value,
 # manually updated, alter CLOCK_OVERRIDE from None to an integer time
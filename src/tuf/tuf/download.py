@@ -18,6 +18,9 @@
   metadata of that file.  The downloaded file is technically a  file-like object
   that will automatically destroys itself once closed.  Note that the file-like
   object, 'tuf.util.TempFile', is returned by the '_download_file()' function.
+  HTTP and HTTPS connections are kept alive and reused from a pool, so that
+  repeated downloads from the same host do not each pay for a new TCP (and
+  TLS) handshake.
 """
 
 # Help with Python 3 compatibility, where the print statement is a function, an
@@ -31,10 +34,9 @@ from __future__ import unicode_literals
 import os
 import socket
 import logging
-import time
 import timeit
 import ssl
-import time
+import threading
 
 import tuf
 import tuf.conf
@@ -54,6 +56,14 @@ except ImportError: # pragma: no cover
 # See 'log.py' to learn how logging is handled in TUF.
 logger = logging.getLogger('tuf.download')
 
+# The time, in seconds, that reading a single chunk should take.  The chunk
+# size grows while reads complete faster than this and shrinks otherwise.
+_TARGET_SECONDS_PER_CHUNK = 0.25
+
+# The most redirections followed for a single pooled HTTP(S) request, as in
+# urllib.
+_MAX_REDIRECTIONS = 10
+
 
 
 def safe_download(url, required_length):
@@ -184,7 +194,106 @@ def unsafe_download(url, required_length):
 
 
 
-def _download_file(url, required_length, STRICT_REQUIRED_LENGTH=True):
+def unsafe_download_if_modified(url, required_length, validators):
+  """
+  <Purpose>
+    Like tuf.download.unsafe_download(), but make a conditional request, so
+    that the file is downloaded only if it has changed since the copy that
+    the caller already has.  The 'validators' that the server sent with that
+    copy are sent back as 'If-None-Match' (ETag) and 'If-Modified-Since'
+    (Last-Modified) request headers, and a '304 Not Modified' response means
+    that nothing is downloaded.  Conditional requests are only made to 'http'
+    and 'https' URLs.
+
+  <Arguments>
+    url:
+      A URL string that represents the location of the file.  The URI scheme
+      component must be one of 'tuf.conf.SUPPORTED_URI_SCHEMES'.
+
+    required_length:
+      An integer value representing the length of the file.  This is an upper
+      limit.
+
+    validators:
+      The validators of the copy of the file that the caller already has,
+      conformant to 'tuf.formats.HTTP_VALIDATORS_SCHEMA', or an empty dict to
+      download the file unconditionally.
+
+  <Side Effects>
+    A 'tuf.util.TempFile' object is created on disk to store the contents of
+    'url', if it has changed.
+
+  <Exceptions>
+    tuf.DownloadLengthMismatchError, if there was a mismatch of observed vs
+    expected lengths while downloading the file.
+
+    tuf.FormatError, if any of the arguments are improperly formatted.
+
+    Any other unforeseen runtime exception.
+
+  <Returns>
+    A (file_object, validators) tuple.  If the file has not been modified,
+    'file_object' is None and 'validators' are those given.  Otherwise,
+    'file_object' is a 'tuf.util.TempFile' file-like object that points to the
+    contents of 'url', and 'validators' are the validators that the server sent
+    with it (possibly none), to be used in the next conditional request.
+  """
+
+  # Do all of the arguments have the appropriate format?
+  # Raise 'tuf.FormatError' if there is a mismatch.
+  tuf.formats.URL_SCHEMA.check_match(url)
+  tuf.formats.LENGTH_SCHEMA.check_match(required_length)
+  tuf.formats.HTTP_VALIDATORS_SCHEMA.check_match(validators)
+
+  parsed_url = six.moves.urllib.parse.urlparse(url)
+
+  if parsed_url.scheme not in tuf.conf.SUPPORTED_URI_SCHEMES:
+    message = \
+      repr(url) + ' specifies an unsupported URI scheme.  Supported ' + \
+      ' URI Schemes: ' + repr(tuf.conf.SUPPORTED_URI_SCHEMES)
+    raise tuf.FormatError(message)
+
+  if parsed_url.scheme not in ('http', 'https'):
+    return _download_file(url, required_length,
+        STRICT_REQUIRED_LENGTH=False), {}
+
+  request_headers = {}
+  if 'etag' in validators:
+    request_headers['If-None-Match'] = validators['etag']
+  if 'last_modified' in validators:
+    request_headers['If-Modified-Since'] = validators['last_modified']
+
+  url = url.replace('\\', '/')
+  logger.info('Conditional request: ' + repr(url))
+
+  try:
+    connection = _open_connection(url, request_headers)
+
+  except six.moves.urllib.error.HTTPError as e:
+    # A server must not respond 304 to an unconditional request.
+    if e.code == 304 and request_headers:
+      logger.info('Not modified: ' + repr(url))
+      return None, validators
+
+    raise
+
+  # Remember the validators of the new copy of the file.
+  headers = connection.info()
+  new_validators = {}
+  if headers.get('ETag'):
+    new_validators['etag'] = headers.get('ETag')
+  if headers.get('Last-Modified'):
+    new_validators['last_modified'] = headers.get('Last-Modified')
+
+  return _download_file(url, required_length, STRICT_REQUIRED_LENGTH=False,
+      connection=connection), new_validators
+
+
+
+
+
+def _download_file(url, required_length, STRICT_REQUIRED_LENGTH=True,
+    connection=None):
   """
   <Purpose>
     Given the url, hashes and length of the desired file, this function 
@@ -207,6 +316,10 @@ def _download_file(url, required_length, STRICT_REQUIRED_LENGTH=True):
       False when we know that we want to turn this off for downloading the
       timestamp metadata, which has no signed required_length.
 
+    connection:
+      The connection to 'url', if it has already been opened with
+      _open_connection().  By default, a new connection is opened.
+
   <Side Effects>
     A 'tuf.util.TempFile' object is created on disk to store the contents of
     'url'.
@@ -241,7 +354,8 @@ def _download_file(url, required_length, STRICT_REQUIRED_LENGTH=True):
   try:
     logger.info('Downloading: ' + repr(url))
     # Open the connection to the remote file.
-    connection = _open_connection(url)
+    if connection is None:
+      connection = _open_connection(url)
 
     # We ask the server about how big it thinks this file should be.
     reported_length = _get_content_length(connection)
@@ -276,8 +390,11 @@ def _download_fixed_amount_of_data(connection, temp_file, required_length):
   """
   <Purpose>
     This is a helper function, where the download really happens. While-block
-    reads data from connection a fixed chunk of data at a time, or less, until
-    'required_length' is reached.
+    reads data from connection a chunk of data at a time, or less, until
+    'required_length' is reached.  The chunk size adapts to the observed
+    throughput, and every read is bounded by a deadline derived from
+    'tuf.conf.MIN_AVERAGE_DOWNLOAD_SPEED' and
+    'tuf.conf.SLOW_START_GRACE_PERIOD', so that no time is spent sleeping.
   
   <Arguments>
     connection:
@@ -306,78 +423,95 @@ def _download_fixed_amount_of_data(connection, temp_file, required_length):
   """
   
   # Tolerate servers with a slow start by ignoring their delivery speed for
-  # 'tuf.conf.SLOW_START_GRACE_PERIOD' seconds.  Set 'seconds_spent_receiving'
-  # to negative SLOW_START_GRACE_PERIOD seconds, and begin checking the average
-  # download speed once it is positive.
-  grace_period = -tuf.conf.SLOW_START_GRACE_PERIOD
+  # 'tuf.conf.SLOW_START_GRACE_PERIOD' seconds.  After the grace period, the
+  # average download speed must never fall below
+  # 'tuf.conf.MIN_AVERAGE_DOWNLOAD_SPEED'.  Rather than sleeping between reads
+  # and measuring the speed afterwards, we compute the deadline by which the
+  # bytes received so far must have arrived and bound every socket read by it.
+  # A server that trickles data therefore causes a socket timeout instead of
+  # keeping us busy in this loop.
+  grace_period = tuf.conf.SLOW_START_GRACE_PERIOD
 
   # Keep track of total bytes downloaded.
   number_of_bytes_received = 0
-  
+
+  # The chunk size adapts to the observed throughput, starting at
+  # 'tuf.conf.CHUNK_SIZE' and never exceeding 'tuf.conf.MAX_CHUNK_SIZE'.
+  chunk_size = tuf.conf.CHUNK_SIZE
+
+  sock = _get_connection_socket(connection)
+
+  # Prefer 'read1()' (Python 3.5+), which returns as soon as some data is
+  # available, so that a server trickling bytes cannot hold a single read open
+  # past the deadline.
+  read = getattr(connection, 'read1', connection.read)
+
   start_time = timeit.default_timer()
 
   try:
     while True:
-      # We download a fixed chunk of data in every round. This is so that we
-      # can defend against slow retrieval attacks. Furthermore, we do not wish
-      # to download an extremely large file in one shot.  Before beginning the
-      # round, sleep for a short amount of time so that the CPU is not hogged
-      # in the while loop.
-      time.sleep(0.05)
-      data = b'' 
-      read_amount = min(tuf.conf.CHUNK_SIZE,
-                        required_length - number_of_bytes_received)
-      
-      try: 
-        data = connection.read(read_amount)
-     
-      # Python 3.2 returns 'IOError' if the remote file object has timed out. 
-      except (socket.error, IOError):
-        pass
-    
+      # We download a chunk of data in every round so that we can defend
+      # against slow retrieval attacks.  Furthermore, we do not wish to
+      # download an extremely large file in one shot.
+      seconds_spent_receiving = timeit.default_timer() - start_time
+      seconds_until_deadline = max(grace_period,
+          number_of_bytes_received / tuf.conf.MIN_AVERAGE_DOWNLOAD_SPEED) - \
+          seconds_spent_receiving
+
+      # If the average download speed is below a certain threshold, we flag
+      # this as a possible slow-retrieval attack.
+      if seconds_until_deadline <= 0:
+        logger.debug('Average download speed fell below ' +
+            repr(tuf.conf.MIN_AVERAGE_DOWNLOAD_SPEED) + ' bytes per second'
+            ' after ' + repr(number_of_bytes_received) + ' bytes.')
+        break
+
+      if sock is not None:
+        sock.settimeout(min(tuf.conf.SOCKET_TIMEOUT, seconds_until_deadline))
+
+      read_amount = min(chunk_size, required_length - number_of_bytes_received)
+      read_start_time = timeit.default_timer()
+
+      try:
+        data = read(read_amount)
+
+      # Python 3.2 returns 'IOError' if the remote file object has timed out.
+      # The connection cannot be read from after a timeout, so the download
+      # ends here, and _check_downloaded_length() reports it as incomplete.
+      except (socket.error, IOError) as e:
+        logger.debug('Read timed out after ' + repr(number_of_bytes_received) +
+            '/' + repr(required_length) + ' bytes: ' + repr(e))
+        break
+
+      seconds_spent_reading = timeit.default_timer() - read_start_time
       number_of_bytes_received = number_of_bytes_received + len(data)
-      
-      # Data successfully read from the connection.  Store it. 
+
+      # Data successfully read from the connection.  Store it.
       temp_file.write(data)
 
       if number_of_bytes_received == required_length:
-        break        
-
-      stop_time = timeit.default_timer()
-      seconds_spent_receiving = stop_time - start_time
-      
-      if (seconds_spent_receiving + grace_period) < 0:
-        continue 
-      
-      # Measure the average download speed.
-      average_download_speed = number_of_bytes_received / seconds_spent_receiving
-  
-      # If the average download speed is below a certain threshold, we flag
-      # this as a possible slow-retrieval attack.
-      if average_download_speed < tuf.conf.MIN_AVERAGE_DOWNLOAD_SPEED:
         break
 
-      else:
-        logger.debug('Good average download speed: ' +
-                     repr(average_download_speed) + ' bytes per second')
-      
-      # We might have no more data to read. Check number of bytes downloaded. 
+      # We might have no more data to read.
       if not data:
         logger.debug('Downloaded ' + repr(number_of_bytes_received) + '/' +
           repr(required_length) + ' bytes.')
 
         # Finally, we signal that the download is complete.
         break
-  
+
+      chunk_size = _adapt_chunk_size(chunk_size, len(data) == read_amount,
+                                     seconds_spent_reading)
+
   except:
     raise
-  
+
   else:
     # This else block returns and skips closing the connection in the finally
     # block, so close the connection here.
     connection.close()
     return number_of_bytes_received
-  
+
   finally:
     # Whatever happens, make sure that we always close the connection.
     connection.close()
@@ -386,7 +520,89 @@ def _download_fixed_amount_of_data(connection, temp_file, required_length):
 
 
 
-def _get_request(url):
+def _adapt_chunk_size(chunk_size, chunk_was_filled, seconds_spent_reading):
+  """
+  <Purpose>
+    A helper function that picks the size of the next chunk to read.  The
+    chunk size is doubled while full chunks arrive faster than
+    '_TARGET_SECONDS_PER_CHUNK', and halved when a chunk takes longer, staying
+    between 'tuf.conf.CHUNK_SIZE' and 'tuf.conf.MAX_CHUNK_SIZE'.
+
+  <Arguments>
+    chunk_size:
+      The number of bytes requested in the last read.
+
+    chunk_was_filled:
+      Whether the last read returned all of the requested bytes.
+
+    seconds_spent_reading:
+      The time, in seconds, taken by the last read.
+
+  <Side Effects>
+    None.
+
+  <Exceptions>
+    None.
+
+  <Returns>
+    The number of bytes to request in the next read.
+  """
+
+  if chunk_was_filled and seconds_spent_reading < _TARGET_SECONDS_PER_CHUNK:
+    chunk_size = chunk_size * 2
+
+  elif seconds_spent_reading > _TARGET_SECONDS_PER_CHUNK:
+    chunk_size = chunk_size // 2
+
+  return max(tuf.conf.CHUNK_SIZE, min(chunk_size, tuf.conf.MAX_CHUNK_SIZE))
+
+
+
+
+
+def _get_connection_socket(connection):
+  """
+  <Purpose>
+    A helper function that finds the socket underlying the file-like object
+    returned by _open_connection(), so that the timeout of each read can be
+    bounded by the slow retrieval deadline.
+
+  <Arguments>
+    connection:
+      The object that the _open_connection function returns for communicating
+      with the server about the contents of a URL.
+
+  <Side Effects>
+    None.
+
+  <Exceptions>
+    None.
+
+  <Returns>
+    The socket object, or None if 'connection' is not backed by a socket
+    (e.g., 'file' URLs).
+  """
+
+  file_object = getattr(connection, 'fp', None)
+
+  # Python 3: 'http.client.HTTPResponse.fp' is a buffered 'socket.SocketIO'.
+  sock = getattr(getattr(file_object, 'raw', None), '_sock', None)
+
+  # Python 2: 'socket._fileobject' keeps the socket in '_sock'.
+  if sock is None:
+    sock = getattr(file_object, '_sock', None)
+
+  if hasattr(sock, 'settimeout'):
+    return sock
+
+  else:
+    return None
+
+
+
+
+
+def _get_request(url, request_headers=None):
   """
   Wraps the URL to retrieve to protects against "creative"
   interpretation of the RFC: http://bugs.python.org/issue8732
@@ -394,7 +610,10 @@ def _get_request(url):
   https://github.com/pypa/pip/blob/d0fa66ecc03ab20b7411b35f7c7b423f31f77761/pip/download.py#L147
   """
 
-  return six.moves.urllib.request.Request(url, headers={'Accept-encoding': 'identity'})
+  headers = {'Accept-encoding': 'identity'}
+  headers.update(request_headers or {})
+
+  return six.moves.urllib.request.Request(url, headers=headers)
 
 
 
@@ -430,20 +649,22 @@ def _get_opener(scheme=None):
 
 
 
-def _open_connection(url):
+def _open_connection(url, request_headers=None):
   """
   <Purpose>
     Helper function that opens a connection to the url. urllib2 supports http, 
     ftp, and file. In python (2.6+) where the ssl module is available, urllib2 
-    also supports https.
+    also supports https.  HTTP and HTTPS urls are requested over keep-alive
+    connections reused from a pool (see _open_pooled_connection()).
 
-    TODO: Determine whether this follows http redirects and decide if we like
-    that. For example, would we not want to allow redirection from ssl to
-     non-ssl urls?
+    Redirections are followed, except from an 'https' url to an 'http' one.
   
   <Arguments>
     url:
       URL string (e.g., 'http://...' or 'ftp://...' or 'file://...') 
+
+    request_headers:
+      A dict of additional HTTP request headers, if any.
     
   <Exceptions>
     None.
@@ -464,8 +685,15 @@ def _open_connection(url):
   # Python-urllib/x.y.
 
   parsed_url = six.moves.urllib.parse.urlparse(url)
+
+  # HTTP and HTTPS connections are reused from the connection pool, unless a
+  # proxy is configured for the scheme, in which case urllib handles it.
+  if parsed_url.scheme in ('http', 'https') and \
+      parsed_url.scheme not in six.moves.urllib.request.getproxies():
+    return _open_pooled_connection(url, request_headers)
+
   opener = _get_opener(scheme=parsed_url.scheme)
-  request = _get_request(url)
+  request = _get_request(url, request_headers)
   
   return opener.open(request, timeout = tuf.conf.SOCKET_TIMEOUT)
 
@@ -473,6 +701,117 @@ def _open_connection(url):
 
 
 
+def _open_pooled_connection(url, request_headers=None, redirections=0):
+  """
+  <Purpose>
+    Helper function for _open_connection() that requests an 'http' or 'https'
+    url over a keep-alive connection from the connection pool.  A reused
+    connection that turns out to have been closed by the server is replaced
+    by a new one, and redirections are followed, as urllib would.
+
+  <Arguments>
+    url:
+      URL string (e.g., 'http://...' or 'https://...')
+
+    request_headers:
+      A dict of additional HTTP request headers, if any.
+
+    redirections:
+      The number of redirections already followed to reach 'url'.
+
+  <Exceptions>
+    six.moves.urllib.error.URLError, if the server cannot be reached.
+
+    six.moves.urllib.error.HTTPError, if the server responds with an error.
+
+    tuf.DownloadError, if there are too many redirections, or a redirection
+    from an 'https' url to one with another scheme.
+
+    Any other exception raised while making the request.
+
+  <Side Effects>
+    Opens a connection to a remote server, or reuses one.
+
+  <Returns>
+    File-like object.  The connection returns to the pool when it is closed.
+  """
+
+  parsed_url = six.moves.urllib.parse.urlparse(url)
+  selector = parsed_url.path or '/'
+  if parsed_url.query:
+    selector = selector + '?' + parsed_url.query
+
+  headers = {'Accept-encoding': 'identity'}
+  headers.update(request_headers or {})
+
+  while True:
+    connection, reused = _connection_pool.get_connection(parsed_url.scheme,
+        parsed_url.netloc)
+
+    try:
+      connection.request('GET', selector, headers=headers)
+      response = connection.getresponse()
+
+    except (socket.error, six.moves.http_client.HTTPException) as e:
+      _connection_pool.release_connection(parsed_url.scheme, parsed_url.netloc,
+          connection, reusable=False)
+
+      # The server may have closed a connection while it was idle in the pool.
+      # Try again with another connection.
+      if reused:
+        logger.debug('Reused connection to ' + repr(parsed_url.netloc) +
+            ' failed.  Retrying.')
+        continue
+
+      # Report socket errors as urllib does.
+      if isinstance(e, socket.error):
+        raise six.moves.urllib.error.URLError(e)
+
+      raise
+
+    else:
+      break
+
+  pooled_response = _PooledResponse(response, parsed_url.scheme,
+      parsed_url.netloc, connection)
+
+  if response.status in (301, 302, 303, 307, 308) and \
+      response.getheader('Location'):
+    location = six.moves.urllib.parse.urljoin(url,
+        response.getheader('Location'))
+    response.read()
+    pooled_response.close()
+
+    if redirections >= _MAX_REDIRECTIONS:
+      raise tuf.DownloadError('Too many redirections when downloading ' +
+          repr(url) + '.')
+
+    location_scheme = six.moves.urllib.parse.urlparse(location).scheme
+    if location_scheme not in ('http', 'https'):
+      raise tuf.DownloadError('Redirected to a URL with an unsupported'
+          ' scheme: ' + repr(location))
+
+    # As with the HTTPHandler stripped from the opener in _get_opener(), an
+    # 'https' URL must not lead to a plain 'http' one (MITM spoof).
+    if parsed_url.scheme == 'https' and location_scheme != 'https':
+      raise tuf.DownloadError('Refusing redirection from ' + repr(url) +
+          ' to the insecure URL ' + repr(location))
+
+    logger.debug('Redirected from ' + repr(url) + ' to ' + repr(location))
+    return _open_pooled_connection(location, request_headers,
+        redirections + 1)
+
+  if not 200 <= response.status < 300:
+    pooled_response.close()
+    raise six.moves.urllib.error.HTTPError(url, response.status,
+        response.reason, response.msg, None)
+
+  return pooled_response
+
+
+
+
+
 def _get_content_length(connection):
   """
   <Purpose>
@@ -694,3 +1033,216 @@ class VerifiedHTTPSHandler(six.moves.urllib.request.HTTPSHandler):
 
   def https_open(self, req):
     return self.do_open(self.specialized_conn_class, req)
+
+
+
+
+
+class _PooledResponse(object):
+  """
+  The file-like object returned by _open_connection() for a pooled HTTP(S)
+  request.  It wraps the HTTP response, and returns the connection to the pool
+  when closed; the connection is reused only if the whole response was read
+  and the server did not ask to close it.
+  """
+
+  def __init__(self, response, scheme, netloc, connection):
+    self._response = response
+    self._scheme = scheme
+    self._netloc = netloc
+    self._connection = connection
+
+    # Python 3.5+ (see _download_fixed_amount_of_data()).
+    if hasattr(response, 'read1'):
+      self.read1 = response.read1
+
+
+
+  @property
+  def fp(self):
+    return self._response.fp
+
+
+
+  def info(self):
+    return self._response.msg
+
+
+
+  def read(self, amount=None):
+    return self._response.read(amount)
+
+
+
+  def close(self):
+    # Closing more than once is harmless.
+    if self._connection is None:
+      return
+
+    # 'read1()' does not mark a response as complete when its last byte is
+    # read, but a final 'read()' does so without touching the socket.
+    if not self._response.isclosed() and self._response.length == 0:
+      self._response.read()
+
+    reusable = self._response.isclosed() and not self._response.will_close
+
+    if not reusable:
+      self._response.close()
+
+    _connection_pool.release_connection(self._scheme, self._netloc,
+        self._connection, reusable)
+    self._connection = None
+
+
+
+
+
+class _ConnectionPool(object):
+  """
+  Keep-alive HTTP and HTTPS connections, per host (scheme and network
+  location).  Safe for use by several threads at once.  At most
+  'tuf.conf.MAX_CONNECTIONS_PER_HOST' connections to a host, idle or in use,
+  are kept for reuse at a time; when all of them are in use, further requests
+  get temporary connections that are closed rather than pooled.  Connections
+  idle for longer than 'tuf.conf.CONNECTION_IDLE_TIMEOUT' seconds are closed
+  rather than reused.
+  HTTPS connections are VerifiedHTTPSConnection objects, so every new
+  connection has its certificate checked.
+  """
+
+  def __init__(self):
+    self._lock = threading.Lock()
+
+    # (scheme, netloc) -> list of (connection, time it became idle), most
+    # recently used last.
+    self._idle_connections = {}
+
+    # (scheme, netloc) -> number of open connections, idle or in use.
+    self._connection_counts = {}
+
+    # Connections opened beyond the limit, closed when released.
+    self._temporary_connections = set()
+
+
+
+  def get_connection(self, scheme, netloc):
+    """
+    Return a (connection, reused) tuple, where 'reused' indicates whether the
+    connection was idle in the pool (rather than new).  If the host already
+    has as many connections as permitted, all of them in use, the new
+    connection is a temporary one, closed when it is released.  (A connection
+    stays in use for a whole download, so waiting for one could make
+    concurrent downloads from a slow host fail.)
+    """
+
+    key = (scheme, netloc)
+
+    with self._lock:
+      self._close_expired_connections()
+      idle_connections = self._idle_connections.get(key)
+
+      if idle_connections:
+        connection = idle_connections.pop()[0]
+        if connection.sock is not None:
+          connection.sock.settimeout(tuf.conf.SOCKET_TIMEOUT)
+        return connection, True
+
+      pooled = self._connection_counts.get(key, 0) < \
+          tuf.conf.MAX_CONNECTIONS_PER_HOST
+      if pooled:
+        self._connection_counts[key] = self._connection_counts.get(key, 0) + 1
+
+    if scheme == 'https':
+      assert os.path.isfile(tuf.conf.ssl_certificates)
+      connection_class = VerifiedHTTPSConnection
+
+    else:
+      connection_class = six.moves.http_client.HTTPConnection
+
+    connection = connection_class(netloc, timeout=tuf.conf.SOCKET_TIMEOUT)
+
+    if not pooled:
+      with self._lock:
+        self._temporary_connections.add(connection)
+
+    return connection, False
+
+
+
+  def release_connection(self, scheme, netloc, connection, reusable):
+    """
+    Return a connection obtained from get_connection() to the pool, to be
+    reused if 'reusable' is True, and closed otherwise.
+    """
+
+    key = (scheme, netloc)
+
+    with self._lock:
+      if connection in self._temporary_connections:
+        self._temporary_connections.remove(connection)
+        connection.close()
+
+      elif reusable:
+        self._idle_connections.setdefault(key, []).append(
+            (connection, timeit.default_timer()))
+
+      else:
+        connection.close()
+        self._connection_counts[key] -= 1
+
+
+
+  def close_idle_connections(self):
+    """
+    Close every idle connection in the pool.
+    """
+
+    with self._lock:
+      for key, idle_connections in six.iteritems(self._idle_connections):
+        for connection, idle_since in idle_connections:
+          connection.close()
+        self._connection_counts[key] -= len(idle_connections)
+
+      self._idle_connections = {}
+
+
+
+  def _close_expired_connections(self):
+    # Called with self._lock held.
+    oldest_permitted = timeit.default_timer() - tuf.conf.CONNECTION_IDLE_TIMEOUT
+
+    for key, idle_connections in six.iteritems(self._idle_connections):
+      while idle_connections and idle_connections[0][1] < oldest_permitted:
+        idle_connections.pop(0)[0].close()
+        self._connection_counts[key] -= 1
+
+
+
+# The connections reused by _open_connection().
+_connection_pool = _ConnectionPool()
+
+
+
+
+
+def close_idle_connections():
+  """
+  <Purpose>
+    Close all of the idle keep-alive connections kept for reuse by later
+    downloads, e.g., before a long pause between update cycles.  Connections
+    currently in use are unaffected.
+
+  <Arguments>
+    None.
+
+  <Exceptions>
+    None.
+
+  <Side Effects>
+    Closes network connections.
+
+  <Returns>
+    None.
+  """
+
+  _connection_pool.close_idle_connections()
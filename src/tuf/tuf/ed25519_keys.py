@@ -37,6 +37,11 @@
   http://nacl.cr.yp.to/
   https://github.com/pyca/ed25519
   
+  Signatures are verified by a pluggable backend: PyNaCl or pyca/cryptography
+  when available, with the pure Python implementation kept as a fallback.
+  get_verification_backend() reports the backend in use, so that a fallback to
+  the slow implementation can be detected.
+
   The ed25519-related functions included here are generate(), create_signature()
   and verify_signature().  The 'ed25519' and PyNaCl (i.e., 'nacl') modules used 
   by ed25519_keys.py perform the actual ed25519 computations and the functions
@@ -68,6 +73,8 @@ import warnings
 # http://docs.python.org/2/library/os.html#miscellaneous-functions
 import os
 
+import logging
+
 # Import the python implementation of the ed25519 algorithm provided by pyca,
 # which is an optimized version of the one provided by ed25519's authors.
 # Note: The pure Python version does not include protection against side-channel
@@ -100,6 +107,17 @@ with warnings.catch_warnings():
   except (ImportError, IOError): # pragma: no cover
     pass
 
+# Ed25519 support in pyca/cryptography (version 2.6 and later), used to verify
+# signatures if PyNaCl is unavailable.
+# https://cryptography.io/en/latest/hazmat/primitives/asymmetric/ed25519/
+try:
+  import cryptography.exceptions
+  from cryptography.hazmat.primitives.asymmetric.ed25519 import \
+      Ed25519PublicKey
+
+except ImportError: # pragma: no cover
+  pass
+
 # The optimized pure Python implementation of ed25519 provided by TUF.  If
 # PyNaCl cannot be imported and an attempt to use is made in this module, a
 # 'tuf.UnsupportedLibraryError' exception is raised.  
@@ -120,6 +138,28 @@ import tuf.formats
 # implementation and PyNaCl. 
 _SUPPORTED_ED25519_SIGNING_METHODS = ['ed25519']
 
+# See 'log.py' to learn how logging is handled in TUF.
+logger = logging.getLogger('tuf.ed25519_keys')
+
+# The name of the backend used by the vendored, pure Python implementation of
+# ed25519.  It is always available and is only used as a last resort.
+_FALLBACK_VERIFICATION_BACKEND = 'ed25519'
+
+# The backends available to verify ed25519 signatures, in order of preference.
+# Each entry is a (name, function) tuple, where function(public, signature,
+# data) returns True if 'signature' is valid and False otherwise.  The list is
+# populated below and may be extended by register_verification_backend().
+_verification_backends = []
+
+# Batch verification functions, indexed by backend name, for the backends
+# that can verify many signatures at once.  Each function accepts a list of
+# (public, signature, data) tuples and returns a list of Booleans.
+_batch_verification_functions = {}
+
+# The backend explicitly chosen with set_verification_backend(), or None to
+# use the most preferred backend available.
+_selected_verification_backend = None
+
 
 def generate_public_and_private():
   """
@@ -276,6 +316,10 @@ def verify_signature(public_key, method, signature, data, use_pynacl=False):
     'signature'.  verify_signature() will use the public key, the 'method' and
     'sig', and 'data' arguments to complete the verification.
 
+    The signature is verified by the active verification backend (see
+    get_verification_backend()), which is PyNaCl or pyca/cryptography when
+    available, and the pure Python implementation of ed25519 otherwise.
+
     >>> public, private = generate_public_and_private()
     >>> data = b'The quick brown fox jumps over the lazy dog'
     >>> signature, method = \
@@ -289,7 +333,7 @@ def verify_signature(public_key, method, signature, data, use_pynacl=False):
         create_signature(public, private, bad_data)
     >>> verify_signature(public, method, bad_signature, data, use_pynacl=False)
     False
-  
+
   <Arguments>
     public_key:
       The public key is a 32-byte string.
@@ -297,34 +341,35 @@ def verify_signature(public_key, method, signature, data, use_pynacl=False):
     method:
       'ed25519' signature method generated by either the pure python
       implementation (i.e., ed25519.py) or PyNacl (i.e., 'nacl').
-      
+
     signature:
-      The signature is a 64-byte string. 
-      
+      The signature is a 64-byte string.
+
     data:
       Data object used by tuf.ed25519_keys.create_signature() to generate
       'signature'.  'data' is needed here to verify the signature.
-    
+
     use_pynacl:
-      True, if the ed25519 signature should be verified by PyNaCl.  False,
-      if the signature should be verified with the pure Python implementation
-      of ed25519 (slower).
+      True, if the ed25519 signature must be verified by PyNaCl.  False, if
+      the signature should be verified by the active verification backend.
 
   <Exceptions>
     tuf.UnknownMethodError.  Raised if the signing method used by
     'signature' is not one supported by tuf.ed25519_keys.create_signature().
-    
-    tuf.FormatError. Raised if the arguments are improperly formatted. 
+
+    tuf.FormatError. Raised if the arguments are improperly formatted.
+
+    tuf.UnsupportedLibraryError, if 'use_pynacl' is True but PyNaCl is
+    unavailable.
 
   <Side Effects>
-    tuf._vendor.ed25519.ed25519.checkvalid() called to do the actual
-    verification.  nacl.signing.VerifyKey.verify() called if 'use_pynacl' is
-    True.
+    The verification function of the selected backend is called to do the
+    actual verification.
 
   <Returns>
     Boolean.  True if the signature is valid, False otherwise.
   """
-  
+
   # Does 'public_key' have the correct format?
   # This check will ensure 'public_key' conforms to
   # 'tuf.formats.ED25519PUBLIC_SCHEMA', which must have length 32 bytes.
@@ -333,51 +378,327 @@ def verify_signature(public_key, method, signature, data, use_pynacl=False):
 
   # Is 'method' properly formatted?
   tuf.formats.NAME_SCHEMA.check_match(method)
-  
+
   # Is 'signature' properly formatted?
   tuf.formats.ED25519SIGNATURE_SCHEMA.check_match(signature)
-  
+
   # Is 'use_pynacl' properly formatted?
   tuf.formats.BOOLEAN_SCHEMA.check_match(use_pynacl)
 
   # Verify 'signature'.  Before returning the Boolean result,
   # ensure 'ed25519' was used as the signing method.
-  # Raise 'tuf.UnsupportedLibraryError' if 'use_pynacl' is True but 'nacl' is
-  # unavailable.
-  public = public_key
-  valid_signature = False
-
-  if method in _SUPPORTED_ED25519_SIGNING_METHODS:
-    if use_pynacl: 
-      try:
-        nacl_verify_key = nacl.signing.VerifyKey(public)
-        nacl_message = nacl_verify_key.verify(data, signature) 
-        valid_signature = True
-      
-      except NameError: # pragma: no cover
-        message = 'The PyNaCl library and/or its dependencies unavailable.'
-        raise tuf.UnsupportedLibraryError(message)
-      
-      except nacl.exceptions.BadSignatureError:
-        pass 
-    
-    # Verify 'ed25519' signature with the pure Python implementation. 
-    else:
-      try:
-        tuf._vendor.ed25519.ed25519.checkvalid(signature, data, public)
-        valid_signature = True
-      
-      # The pure Python implementation raises 'Exception' if 'signature' is
-      # invalid.
-      except Exception as e:
-        pass
-  
-  else:
+  if method not in _SUPPORTED_ED25519_SIGNING_METHODS:
     message = 'Unsupported ed25519 signing method: '+repr(method)+'.\n'+ \
       'Supported methods: '+repr(_SUPPORTED_ED25519_SIGNING_METHODS)+'.'
     raise tuf.UnknownMethodError(message)
 
-  return valid_signature 
+  # Raise 'tuf.UnsupportedLibraryError' if 'use_pynacl' is True but 'nacl' is
+  # unavailable.
+  if use_pynacl:
+    verify_function = _get_verification_function('pynacl')
+
+  else:
+    verify_function = _get_verification_function(get_verification_backend())
+
+  return verify_function(public_key, signature, data)
+
+
+
+
+
+def verify_signatures(signatures_to_verify):
+  """
+  <Purpose>
+    Verify many ed25519 signatures in one pass.  The arguments of each
+    signature are checked as in verify_signature(), after which all of the
+    signatures are handed to the active verification backend at once if it
+    supports batch verification, or verified one at a time otherwise.
+
+    >>> public, private = generate_public_and_private()
+    >>> data = b'The quick brown fox jumps over the lazy dog'
+    >>> signature, method = create_signature(public, private, data)
+    >>> verify_signatures([(public, method, signature, data),
+    ...     (public, method, signature, b'The sly brown fox')])
+    [True, False]
+
+  <Arguments>
+    signatures_to_verify:
+      A list of (public_key, method, signature, data) tuples, with the same
+      meaning as the arguments of verify_signature().
+
+  <Exceptions>
+    tuf.UnknownMethodError, if the signing method of any signature is not one
+    supported by tuf.ed25519_keys.create_signature().
+
+    tuf.FormatError, if any of the arguments are improperly formatted.
+
+  <Side Effects>
+    The verification functions of the active backend are called to do the
+    actual verification.
+
+  <Returns>
+    A list of Booleans, one per signature in 'signatures_to_verify', in the
+    same order.  True if the signature is valid, False otherwise.
+  """
+
+  verifications = []
+
+  for public_key, method, signature, data in signatures_to_verify:
+    tuf.formats.ED25519PUBLIC_SCHEMA.check_match(public_key)
+    tuf.formats.NAME_SCHEMA.check_match(method)
+    tuf.formats.ED25519SIGNATURE_SCHEMA.check_match(signature)
+
+    if method not in _SUPPORTED_ED25519_SIGNING_METHODS:
+      message = 'Unsupported ed25519 signing method: '+repr(method)+'.\n'+ \
+        'Supported methods: '+repr(_SUPPORTED_ED25519_SIGNING_METHODS)+'.'
+      raise tuf.UnknownMethodError(message)
+
+    verifications.append((public_key, signature, data))
+
+  backend = get_verification_backend()
+
+  if backend in _batch_verification_functions:
+    return _batch_verification_functions[backend](verifications)
+
+  verify_function = _get_verification_function(backend)
+
+  return [verify_function(public, signature, data)
+      for public, signature, data in verifications]
+
+
+
+
+
+def get_verification_backend():
+  """
+  <Purpose>
+    Return the name of the backend currently used to verify ed25519
+    signatures, e.g., 'pynacl', 'pyca-cryptography', or 'ed25519' (the
+    vendored, pure Python implementation).  Integrators may compare the result
+    against 'ed25519' to detect a silent fallback to the slow implementation.
+
+    >>> get_verification_backend() in get_available_verification_backends()
+    True
+
+  <Arguments>
+    None.
+
+  <Exceptions>
+    None.
+
+  <Side Effects>
+    None.
+
+  <Returns>
+    The name of the active verification backend.
+  """
+
+  if _selected_verification_backend is not None:
+    return _selected_verification_backend
+
+  return _verification_backends[0][0]
+
+
+
+
+
+def get_available_verification_backends():
+  """
+  <Purpose>
+    Return the names of the registered ed25519 verification backends, in order
+    of preference.
+
+  <Arguments>
+    None.
+
+  <Exceptions>
+    None.
+
+  <Side Effects>
+    None.
+
+  <Returns>
+    A list of backend names.
+  """
+
+  return [name for name, function in _verification_backends]
+
+
+
+
+
+def set_verification_backend(name):
+  """
+  <Purpose>
+    Select the backend used to verify ed25519 signatures.  If 'name' is None,
+    the most preferred available backend is used.
+
+  <Arguments>
+    name:
+      The name of a registered backend (see
+      get_available_verification_backends()), or None.
+
+  <Exceptions>
+    tuf.FormatError, if 'name' is improperly formatted.
+
+    tuf.UnsupportedLibraryError, if no backend named 'name' is registered.
+
+  <Side Effects>
+    Changes the backend used by verify_signature().
+
+  <Returns>
+    None.
+  """
+
+  global _selected_verification_backend
+
+  if name is not None:
+    tuf.formats.NAME_SCHEMA.check_match(name)
+
+    # Raise 'tuf.UnsupportedLibraryError' if 'name' is not registered.
+    _get_verification_function(name)
+
+  _selected_verification_backend = name
+
+
+
+
+
+def register_verification_backend(name, verify_function,
+    batch_verify_function=None):
+  """
+  <Purpose>
+    Register a backend that can verify ed25519 signatures.  Newly registered
+    backends are preferred over the ones already registered, except that the
+    vendored, pure Python implementation always remains the last resort.
+
+  <Arguments>
+    name:
+      The name of the backend, e.g., 'pynacl'.  An existing backend with the
+      same name is replaced.
+
+    verify_function:
+      A function that accepts (public, signature, data) arguments, where
+      'public' is a 32-byte public key and 'signature' a 64-byte signature,
+      and returns True if 'signature' is valid over 'data', and False
+      otherwise.
+
+    batch_verify_function:
+      Optional.  A function that accepts a list of (public, signature, data)
+      tuples and returns a list of Booleans, one per tuple, used by
+      verify_signatures() if the backend can verify signatures in batches.
+
+  <Exceptions>
+    tuf.FormatError, if 'name' is improperly formatted.
+
+  <Side Effects>
+    The backend is added to the registry and may become the active backend.
+
+  <Returns>
+    None.
+  """
+
+  tuf.formats.NAME_SCHEMA.check_match(name)
+
+  for index, (registered_name, function) in enumerate(_verification_backends):
+    if registered_name == name:
+      del _verification_backends[index]
+      break
+
+  _batch_verification_functions.pop(name, None)
+
+  if batch_verify_function is not None:
+    _batch_verification_functions[name] = batch_verify_function
+
+  if name == _FALLBACK_VERIFICATION_BACKEND:
+    _verification_backends.append((name, verify_function))
+
+  else:
+    _verification_backends.insert(0, (name, verify_function))
+
+
+
+
+
+def _get_verification_function(name):
+  """
+  Return the verification function registered as 'name', or raise
+  'tuf.UnsupportedLibraryError' if the backend is unavailable.
+  """
+
+  for registered_name, function in _verification_backends:
+    if registered_name == name:
+      return function
+
+  raise tuf.UnsupportedLibraryError('The ' + repr(name) + ' ed25519'
+      ' verification backend is unavailable.  Available backends: ' +
+      repr(get_available_verification_backends()))
+
+
+
+
+
+def _verify_with_pynacl(public, signature, data):
+  """Verify an ed25519 signature with PyNaCl (libsodium)."""
+
+  try:
+    nacl.signing.VerifyKey(public).verify(data, signature)
+    return True
+
+  # PyNaCl raises 'TypeError' if 'data' is not a byte string.
+  except (nacl.exceptions.BadSignatureError, TypeError):
+    return False
+
+
+
+
+
+def _verify_with_pyca_cryptography(public, signature, data):
+  """Verify an ed25519 signature with pyca/cryptography."""
+
+  try:
+    Ed25519PublicKey.from_public_bytes(public).verify(signature, data)
+    return True
+
+  # pyca/cryptography raises 'TypeError' if 'data' is not a byte string.
+  except (cryptography.exceptions.InvalidSignature, TypeError):
+    return False
+
+
+
+
+
+def _verify_with_pure_python(public, signature, data):
+  """Verify an ed25519 signature with the vendored pure Python ed25519."""
+
+  try:
+    tuf._vendor.ed25519.ed25519.checkvalid(signature, data, public)
+    return True
+
+  # The pure Python implementation raises 'Exception' if 'signature' is
+  # invalid.
+  except Exception:
+    return False
+
+
+
+
+
+# Register the available backends, so that the fastest one is preferred: the
+# vendored implementation first, then pyca/cryptography, then PyNaCl.
+register_verification_backend(_FALLBACK_VERIFICATION_BACKEND,
+                              _verify_with_pure_python)
+
+if 'Ed25519PublicKey' in globals():
+  register_verification_backend('pyca-cryptography',
+                                _verify_with_pyca_cryptography)
+
+if 'nacl' in globals():
+  register_verification_backend('pynacl', _verify_with_pynacl)
+
+if get_verification_backend() == _FALLBACK_VERIFICATION_BACKEND: # pragma: no cover
+  logger.warning('Neither PyNaCl nor pyca/cryptography provide ed25519'
+      ' verification; falling back to the slow, pure Python implementation.')
 
 
 
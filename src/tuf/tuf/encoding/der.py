@@ -0,0 +1,478 @@
+"""
+<Program Name>
+  der.py  (for tuf/encoding)
+
+<Copyright>
+  See LICENSE for licensing information.
+
+<Purpose>
+  Provide the DER (Distinguished Encoding Rules) primitives used by the
+  hand-written ASN.1/DER coders for fixed metadata formats, which encode and
+  decode bytes directly instead of building pyasn1 objects.
+
+  Only low tag numbers (0 to 30) and definite lengths are supported, which is
+  all that those formats use.  Decoding functions take a bytearray and offsets
+  into it, and raise tuf.Error if the data is not what was expected.
+"""
+
+# Help with Python 3 compatibility, where the print statement is a function, an
+# implicit relative import is invalid, and the '/' operator performs true
+# division.  Example:  print 'hello world' raises a 'SyntaxError' exception.
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import struct
+import binascii
+import calendar
+from datetime import datetime
+
+import tuf
+
+# Universal tags of the ASN.1 types used, with the constructed bit set for
+# SEQUENCE (and SEQUENCE OF).
+TAG_BOOLEAN = 0x01
+TAG_INTEGER = 0x02
+TAG_OCTET_STRING = 0x04
+TAG_ENUMERATED = 0x0a
+TAG_VISIBLE_STRING = 0x1a
+TAG_SEQUENCE = 0x30
+
+# Context-specific tags, used for implicitly and explicitly tagged elements, are
+# these plus the tag number: TAG_CONTEXT for primitive elements (e.g. INTEGER)
+# and TAG_CONTEXT_CONSTRUCTED for constructed ones (e.g. SEQUENCE).
+TAG_CONTEXT = 0x80
+TAG_CONTEXT_CONSTRUCTED = 0xa0
+
+# The largest value of the Natural and Positive types of the ASN.1 definitions,
+# including UTCDateTime, a Positive number of seconds since the epoch.
+MAX = 2**32-1
+
+TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+# The encodings of small non-negative INTEGERs, which are most of them.
+_SMALL_INTEGER_CONTENTS = [struct.pack(str('B'), value) for value in range(128)]
+
+
+
+
+
+def encode_element(tag, content):
+  """
+  Return the DER encoding of an element with the given tag and content octets.
+  """
+
+  length = len(content)
+
+  if length < 0x80:
+    return struct.pack(str('BB'), tag, length) + content
+
+  length_octets = bytearray()
+  while length:
+    length_octets.insert(0, length & 0xff)
+    length >>= 8
+
+  return struct.pack(str('BB'), tag, 0x80 | len(length_octets)) + \
+      bytes(length_octets) + content
+
+
+
+
+
+def encode_sequence(elements):
+  """
+  Return the DER encoding of a SEQUENCE (or SEQUENCE OF), given the DER
+  encodings of its elements.
+  """
+
+  return encode_element(TAG_SEQUENCE, b''.join(elements))
+
+
+
+
+
+def encode_integer(value, tag=TAG_INTEGER):
+  """
+  Return the DER encoding of an INTEGER (or, given TAG_ENUMERATED, an
+  ENUMERATED value): the minimal two's complement encoding of value.
+  """
+
+  if 0 <= value < 128:
+    return encode_element(tag, _SMALL_INTEGER_CONTENTS[value])
+
+  octets = bytearray()
+
+  while True:
+    octets.insert(0, value & 0xff)
+    value >>= 8
+    # Stop once the remaining value is just the sign of the octets so far.
+    if value == 0 and not octets[0] & 0x80 or \
+        value == -1 and octets[0] & 0x80:
+      break
+
+  return encode_element(tag, bytes(octets))
+
+
+
+
+
+def encode_boolean(value, tag=TAG_BOOLEAN):
+  """
+  Return the DER encoding of a BOOLEAN.
+  """
+
+  return encode_element(tag, b'\xff' if value else b'\x00')
+
+
+
+
+
+def encode_octet_string_from_hex(hex_string, tag=TAG_OCTET_STRING,
+    max_length=None):
+  """
+  Return the DER encoding of the OCTET STRING whose octets are given as a hex
+  string.  Raises tuf.Error if hex_string is not valid hex, or if there are
+  no octets or more than max_length of them.
+  """
+
+  try:
+    octets = binascii.unhexlify(hex_string.encode('ascii'))
+
+  except (TypeError, ValueError, UnicodeError):
+    raise tuf.Error('Expected a hex string but got ' + repr(hex_string))
+
+  check_size(len(octets), 1, max_length, 'OCTET STRING')
+
+  return encode_element(tag, octets)
+
+
+
+
+
+def encode_visible_string(string, tag=TAG_VISIBLE_STRING, max_length=None):
+  """
+  Return the DER encoding of a VisibleString.  Raises tuf.Error if string is
+  not ASCII, or is empty or longer than max_length.
+  """
+
+  try:
+    octets = string.encode('ascii')
+
+  except (UnicodeError, AttributeError):
+    raise tuf.Error('Expected an ASCII string but got ' + repr(string))
+
+  check_size(len(octets), 1, max_length, 'string')
+
+  return encode_element(tag, octets)
+
+
+
+
+
+def encode_natural(value, tag=TAG_INTEGER, minimum=0, maximum=MAX):
+  """
+  Return the DER encoding of an INTEGER that must be in the range [minimum,
+  maximum], which by default is that of the Natural type of the ASN.1
+  definitions.  Raises tuf.Error if it is not.
+  """
+
+  if not minimum <= value <= maximum:
+    raise tuf.Error('Expected an integer from ' + repr(minimum) + ' to ' +
+        repr(maximum) + ', but got ' + repr(value))
+
+  return encode_integer(value, tag)
+
+
+
+
+
+def encode_time(time_string, tag=TAG_INTEGER):
+  """
+  Return the DER encoding of the given time (e.g. '2017-05-18T16:23:13Z') as a
+  UTCDateTime: an INTEGER number of seconds since the epoch.
+  """
+
+  try:
+    value = calendar.timegm(
+        datetime.strptime(time_string, TIME_FORMAT).timetuple())
+
+  except (TypeError, ValueError) as e:
+    raise tuf.Error('Unable to parse time ' + repr(time_string) + ': ' +
+        str(e))
+
+  return encode_natural(value, tag, minimum=1)
+
+
+
+
+
+def encode_enumerated(names, name, tag=TAG_ENUMERATED):
+  """
+  Return the DER encoding of the ENUMERATED value whose name is 'name', given
+  the list of names of the values in order of value.  Raises tuf.Error if
+  'name' is not one of them.
+  """
+
+  if name not in names:
+    raise tuf.Error('Expected one of ' + repr(names) + ', but got ' +
+        repr(name))
+
+  return encode_integer(names.index(name), tag)
+
+
+
+
+
+def check_size(size, minimum, maximum, description):
+  """
+  Raise tuf.Error if size, the size of an element (e.g. of a string), is not
+  in the range [minimum, maximum].  maximum may be None, for no maximum.
+  """
+
+  if size < minimum or maximum is not None and size > maximum:
+    raise tuf.Error('Expected a ' + description + ' of size ' + repr(minimum) +
+        ' to ' + repr(maximum) + ', but got one of size ' + repr(size))
+
+
+
+
+
+def read_element(der_bytes, index, end, expected_tag):
+  """
+  <Purpose>
+    Read the header of the DER element that starts at der_bytes[index] and
+    must end by der_bytes[end].
+
+  <Arguments>
+    der_bytes:
+      A bytearray.
+
+    index, end:
+      Offsets into der_bytes.
+
+    expected_tag:
+      The tag the element must have.
+
+  <Exceptions>
+    tuf.Error, if the element does not have the expected tag, is truncated,
+    extends past 'end', or has an indefinite length.
+
+  <Returns>
+    A tuple (content_start, content_end) of the offsets of the element's
+    content octets.
+  """
+
+  if index + 2 > end:
+    raise tuf.Error('Truncated DER element at offset ' + repr(index))
+
+  if der_bytes[index] != expected_tag:
+    raise tuf.Error('Expected DER tag ' + repr(expected_tag) + ' but got ' +
+        repr(der_bytes[index]) + ' at offset ' + repr(index))
+
+  length = der_bytes[index + 1]
+  position = index + 2
+
+  # In the long form, the low bits give the number of length octets.
+  if length & 0x80:
+    number_of_length_octets = length & 0x7f
+    if not number_of_length_octets:
+      raise tuf.Error('Indefinite length DER element at offset ' + repr(index))
+
+    if position + number_of_length_octets > end:
+      raise tuf.Error('Truncated DER element at offset ' + repr(index))
+
+    length = 0
+    for octet in der_bytes[position:position + number_of_length_octets]:
+      length = (length << 8) | octet
+    position += number_of_length_octets
+
+  if position + length > end:
+    raise tuf.Error('Truncated DER element at offset ' + repr(index))
+
+  return position, position + length
+
+
+
+
+
+def peek_tag(der_bytes, index, end):
+  """
+  Return the tag of the DER element that starts at der_bytes[index], or None if
+  there is no element before 'end'.
+  """
+
+  if index < end:
+    return der_bytes[index]
+
+  return None
+
+
+
+
+
+def read_sequence_elements(der_bytes, index, end, expected_tag):
+  """
+  Return the offsets (content_start, content_end) of the contents of each of
+  the elements of the SEQUENCE OF whose content spans der_bytes[index:end].
+  Every element must have the tag 'expected_tag'.  Raises tuf.Error as
+  read_element() does.
+  """
+
+  elements = []
+
+  while index < end:
+    start, index = read_element(der_bytes, index, end, expected_tag)
+    elements.append((start, index))
+
+  return elements
+
+
+
+
+
+def decode_integer(der_bytes, start, end):
+  """
+  Return the value of the INTEGER (or ENUMERATED) whose content octets span
+  der_bytes[start:end].  Raises tuf.Error if there are none.
+  """
+
+  if start >= end:
+    raise tuf.Error('Empty DER INTEGER at offset ' + repr(start))
+
+  value = 0
+  for octet in der_bytes[start:end]:
+    value = (value << 8) | octet
+
+  # Negative values are in two's complement.
+  if der_bytes[start] & 0x80:
+    value -= 1 << (8 * (end - start))
+
+  return value
+
+
+
+
+
+def decode_natural(der_bytes, start, end, minimum=0, maximum=MAX):
+  """
+  Return the value of the INTEGER whose content octets span
+  der_bytes[start:end].  Raises tuf.Error if it is not in the range [minimum,
+  maximum], which by default is that of the Natural type.
+  """
+
+  value = decode_integer(der_bytes, start, end)
+
+  if not minimum <= value <= maximum:
+    raise tuf.Error('Expected an integer from ' + repr(minimum) + ' to ' +
+        repr(maximum) + ' at offset ' + repr(start))
+
+  return value
+
+
+
+
+
+def decode_boolean(der_bytes, start, end):
+  """
+  Return the value of the BOOLEAN whose content octets span
+  der_bytes[start:end].
+  """
+
+  if end - start != 1 or der_bytes[start] not in (0x00, 0xff):
+    raise tuf.Error('Invalid DER BOOLEAN at offset ' + repr(start))
+
+  return der_bytes[start] == 0xff
+
+
+
+
+
+def decode_time(der_bytes, start, end):
+  """
+  Return the time (e.g. '2017-05-18T16:23:13Z') given by the UTCDateTime whose
+  content octets span der_bytes[start:end].
+  """
+
+  value = decode_natural(der_bytes, start, end, minimum=1)
+
+  return datetime.utcfromtimestamp(value).isoformat() + 'Z'
+
+
+
+
+
+def decode_enumerated(names, der_bytes, start, end):
+  """
+  Return the name of the ENUMERATED value whose content octets span
+  der_bytes[start:end], given the list of names of the values in order of
+  value.
+  """
+
+  value = decode_integer(der_bytes, start, end)
+
+  if not 0 <= value < len(names):
+    raise tuf.Error('Unknown enumerated value ' + repr(value) + ' at offset ' +
+        repr(start))
+
+  return names[value]
+
+
+
+
+
+def decode_hex(der_bytes, start, end, max_length=None):
+  """
+  Return the octets in der_bytes[start:end] (e.g., of an OCTET STRING), as a
+  hex string.  Raises tuf.Error if there are none, or more than max_length.
+  """
+
+  check_size(end - start, 1, max_length, 'OCTET STRING')
+
+  return binascii.hexlify(bytes(der_bytes[start:end])).decode('ascii')
+
+
+
+
+
+def decode_visible_string(der_bytes, start, end, max_length=None):
+  """
+  Return the string in der_bytes[start:end] (e.g., of a VisibleString).
+  Raises tuf.Error if it is not ASCII, or is empty or longer than max_length.
+  """
+
+  check_size(end - start, 1, max_length, 'string')
+
+  try:
+    return bytes(der_bytes[start:end]).decode('ascii')
+
+  except UnicodeError:
+    raise tuf.Error('Non-ASCII DER VisibleString at offset ' + repr(start))
+
+
+
+
+
+def first_elements(elements, number):
+  """
+  Return the first 'number' elements, where 'number' is the value of a count
+  field (e.g. numberOfHashes) preceding a SEQUENCE OF the elements.  Raises
+  tuf.Error if there are fewer elements.
+  """
+
+  if number > len(elements):
+    raise tuf.Error('Expected at least ' + repr(number) + ' elements, but '
+        'there are only ' + repr(len(elements)))
+
+  return elements[:number]
+
+
+
+
+
+def expect_end(index, end):
+  """
+  Raise tuf.Error unless index is 'end', e.g. unless all of the elements of a
+  SEQUENCE whose content ends at 'end' have been read.
+  """
+
+  if index != end:
+    raise tuf.Error('Unexpected DER data at offset ' + repr(index))
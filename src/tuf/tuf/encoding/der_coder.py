@@ -0,0 +1,833 @@
+"""
+<Program Name>
+  der_coder.py  (for tuf/encoding)
+
+<Copyright>
+  See LICENSE for licensing information.
+
+<Purpose>
+  Provide hand-written DER encoding and decoding of signed role metadata (Root,
+  Targets, Snapshot, and Timestamp) in the ASN.1 format defined in
+  metadata_asn1_definitions.py.  This converts directly between TUF's standard
+  Python dictionary metadata format and DER bytes, without building pyasn1
+  objects in between, which is much faster.
+
+  The DER produced is identical to that produced by pyasn1 from the
+  corresponding *_asn1_coder module, and the same constraints on sizes and
+  values are enforced.  tuf.asn1_codec uses this module unless
+  tuf.asn1_codec.USE_PYASN1 is set.
+
+<Functions>
+  encode_signed(json_signed)
+  encode_metadata(der_signed, signatures)
+  decode_metadata(der_data)
+"""
+
+# Help with Python 3 compatibility, where the print statement is a function, an
+# implicit relative import is invalid, and the '/' operator performs true
+# division.  Example:  print 'hello world' raises a 'SyntaxError' exception.
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import tuf
+import tuf.conf
+import tuf.encoding.der as der
+
+# Tags of implicitly (and explicitly) tagged elements, by tag number.
+_PRIMITIVE = [der.TAG_CONTEXT | number for number in range(6)]
+_CONSTRUCTED = [der.TAG_CONTEXT_CONSTRUCTED | number for number in range(6)]
+
+# The names of the values of the enumerations, indexed by value.
+ROLE_TYPES = ['root', 'targets', 'snapshot', 'timestamp']
+HASH_FUNCTIONS = [
+    'sha224', 'sha256', 'sha384', 'sha512', 'sha512-224', 'sha512-256']
+SIGNATURE_METHODS = ['rsassa-pss', 'ed25519']
+PUBLIC_KEY_TYPES = ['rsa', 'ed25519']
+
+# The maximum sizes of the constrained types.  OctetString (and Keyid) limit
+# the number of octets, the others the number of characters.
+_MAX_OCTET_STRING = 1024
+_MAX_FILENAME = 32
+
+# The key types and hash algorithms of keyids are not in the ASN.1 format.
+_KEYID_HASH_ALGORITHMS = ['sha256', 'sha512']
+
+
+
+
+
+def encode_signed(json_signed):
+  """
+  <Purpose>
+    Encode the 'signed' portion of role metadata as DER: the (implicitly
+    tagged) Signed element of the Metadata.  Signatures over DER metadata are
+    over these bytes.
+
+  <Arguments>
+    json_signed:
+      A dictionary conforming to tuf.formats.ANYROLE_SCHEMA, other than
+      Mirrors metadata.
+
+  <Exceptions>
+    tuf.Error, if json_signed cannot be encoded.
+
+  <Side Effects>
+    None.
+
+  <Returns>
+    The DER encoding, as bytes.
+  """
+
+  role_type = json_signed['_type'].lower()
+
+  if role_type not in _BODY_ENCODERS:
+    raise tuf.Error('Unable to encode metadata of type ' +
+        repr(json_signed['_type']) + ' as DER.')
+
+  body_tag = _CONSTRUCTED[ROLE_TYPES.index(role_type)]
+
+  return der.encode_element(_CONSTRUCTED[0], b''.join([
+      der.encode_enumerated(ROLE_TYPES, role_type, _PRIMITIVE[0]),
+      der.encode_time(json_signed['expires'], _PRIMITIVE[1]),
+      der.encode_natural(json_signed['version'], _PRIMITIVE[2]),
+      # The body is a CHOICE, explicitly tagged.
+      der.encode_element(_CONSTRUCTED[3], der.encode_element(
+          body_tag, _BODY_ENCODERS[role_type](json_signed)))]))
+
+
+
+
+
+def encode_metadata(der_signed, signatures):
+  """
+  <Purpose>
+    Encode the full Metadata, given the DER encoding of its 'signed' portion
+    (from encode_signed()) and its signatures.
+
+  <Arguments>
+    der_signed:
+      The DER encoding of the 'signed' portion, as bytes.
+
+    signatures:
+      A list of signatures conforming to tuf.formats.SIGNATURES_SCHEMA.
+
+  <Exceptions>
+    tuf.Error, if the signatures cannot be encoded.
+
+  <Side Effects>
+    None.
+
+  <Returns>
+    The DER encoding, as bytes.
+  """
+
+  return der.encode_sequence([
+      der_signed,
+      der.encode_integer(len(signatures), _PRIMITIVE[1]),
+      der.encode_element(_CONSTRUCTED[2], b''.join([der.encode_sequence([
+          _encode_octet_string(signature['keyid']),
+          der.encode_enumerated(SIGNATURE_METHODS, signature['method']),
+          _encode_octet_string(signature['sig'])])
+          for signature in signatures]))])
+
+
+
+
+
+def decode_metadata(der_data):
+  """
+  <Purpose>
+    Decode DER-encoded Metadata.  Anything after the Metadata is ignored.
+
+  <Arguments>
+    der_data:
+      The DER encoding of the Metadata, as bytes.
+
+  <Exceptions>
+    tuf.Error, if der_data cannot be decoded.
+
+  <Side Effects>
+    None.
+
+  <Returns>
+    A tuple (signable, der_signed): the metadata as a dictionary conforming to
+    tuf.formats.SIGNABLE_SCHEMA, and the DER encoding of its 'signed' portion,
+    as it appears in der_data.
+  """
+
+  der_bytes = bytearray(der_data)
+
+  index, end = der.read_element(
+      der_bytes, 0, len(der_bytes), der.TAG_SEQUENCE)
+
+  signed_start = index
+  index, signed_end = der.read_element(
+      der_bytes, signed_start, end, _CONSTRUCTED[0])
+  json_signed = _decode_signed(der_bytes, index, signed_end)
+
+  # numberOfSignatures is not needed: all of the signatures are used.
+  start, index = der.read_element(der_bytes, signed_end, end, _PRIMITIVE[1])
+  der.decode_natural(der_bytes, start, index)
+
+  start, index = der.read_element(der_bytes, index, end, _CONSTRUCTED[2])
+  der.expect_end(index, end)
+
+  json_signatures = []
+
+  for start, signature_end in der.read_sequence_elements(
+      der_bytes, start, index, der.TAG_SEQUENCE):
+    start, index = der.read_element(
+        der_bytes, start, signature_end, der.TAG_OCTET_STRING)
+    keyid = _decode_octet_string(der_bytes, start, index)
+    start, index = der.read_element(
+        der_bytes, index, signature_end, der.TAG_ENUMERATED)
+    method = der.decode_enumerated(SIGNATURE_METHODS, der_bytes, start, index)
+    start, index = der.read_element(
+        der_bytes, index, signature_end, der.TAG_OCTET_STRING)
+    value = _decode_octet_string(der_bytes, start, index)
+    der.expect_end(index, signature_end)
+
+    json_signatures.append({'keyid': keyid, 'method': method, 'sig': value})
+
+  signable = {'signatures': json_signatures, 'signed': json_signed}
+
+  return signable, bytes(der_bytes[signed_start:signed_end])
+
+
+
+
+
+def _decode_signed(der_bytes, index, end):
+  """
+  Decode the content of the Signed element in der_bytes[index:end].
+  """
+
+  start, index = der.read_element(der_bytes, index, end, _PRIMITIVE[0])
+  role_type = der.decode_enumerated(ROLE_TYPES, der_bytes, start, index)
+  start, index = der.read_element(der_bytes, index, end, _PRIMITIVE[1])
+  expires = der.decode_time(der_bytes, start, index)
+  start, index = der.read_element(der_bytes, index, end, _PRIMITIVE[2])
+  version = der.decode_natural(der_bytes, start, index)
+
+  # The body is a CHOICE, explicitly tagged.
+  start, index = der.read_element(der_bytes, index, end, _CONSTRUCTED[3])
+  der.expect_end(index, end)
+  start, index = der.read_element(
+      der_bytes, start, end, _CONSTRUCTED[ROLE_TYPES.index(role_type)])
+  der.expect_end(index, end)
+
+  json_signed = _BODY_DECODERS[role_type](der_bytes, start, index)
+  json_signed['expires'] = expires
+  json_signed['version'] = version
+
+  return json_signed
+
+
+
+
+
+def _encode_root(json_signed):
+  """
+  Return the content of the RootMetadata for json_signed.  Only the first
+  keyid of each top-level role is included, with a threshold of 1, as by
+  root_asn1_coder.
+  """
+
+  keyids = dict((rolename, json_signed['roles'][rolename]['keyids'][0])
+      for rolename in ROLE_TYPES)
+
+  keys = [_encode_public_key(keyids[rolename],
+      json_signed['keys'][keyids[rolename]])
+      for rolename in ['root', 'timestamp', 'snapshot', 'targets']]
+
+  roles = [der.encode_sequence([
+      der.encode_enumerated(ROLE_TYPES, rolename, _PRIMITIVE[0]),
+      der.encode_integer(1, _PRIMITIVE[3]),
+      der.encode_element(
+          _CONSTRUCTED[4], _encode_octet_string(keyids[rolename])),
+      der.encode_integer(1, _PRIMITIVE[5])])
+      for rolename in ['root', 'snapshot', 'targets', 'timestamp']]
+
+  return b''.join([
+      der.encode_integer(len(keys), _PRIMITIVE[0]),
+      der.encode_element(_CONSTRUCTED[1], b''.join(keys)),
+      der.encode_integer(len(roles), _PRIMITIVE[2]),
+      der.encode_element(_CONSTRUCTED[3], b''.join(roles))])
+
+
+
+
+
+def _decode_root(der_bytes, index, end):
+  start, index = der.read_element(der_bytes, index, end, _PRIMITIVE[0])
+  number_of_keys = der.decode_natural(der_bytes, start, index)
+  start, index = der.read_element(der_bytes, index, end, _CONSTRUCTED[1])
+  json_keys = _decode_public_keys(der_bytes, start, index, number_of_keys)
+
+  start, index = der.read_element(der_bytes, index, end, _PRIMITIVE[2])
+  number_of_roles = der.decode_natural(der_bytes, start, index)
+  start, index = der.read_element(der_bytes, index, end, _CONSTRUCTED[3])
+  der.expect_end(index, end)
+
+  if number_of_keys != 4 or number_of_roles != 4:
+    raise tuf.Error('Expected Root metadata to list 4 keys and 4 roles, but '
+        'it lists ' + repr(number_of_keys) + ' and ' + repr(number_of_roles))
+
+  json_roles = {}
+
+  for role_start, role_end in der.first_elements(der.read_sequence_elements(
+      der_bytes, start, index, der.TAG_SEQUENCE), number_of_roles):
+    start, index = der.read_element(
+        der_bytes, role_start, role_end, _PRIMITIVE[0])
+    rolename = der.decode_enumerated(ROLE_TYPES, der_bytes, start, index)
+
+    # The optional URLs are not part of the dictionary format.
+    if der.peek_tag(der_bytes, index, role_end) == _PRIMITIVE[1]:
+      index = der.read_element(der_bytes, index, role_end, _PRIMITIVE[1])[1]
+      index = der.read_element(der_bytes, index, role_end, _CONSTRUCTED[2])[1]
+
+    start, index = der.read_element(der_bytes, index, role_end, _PRIMITIVE[3])
+    number_of_keyids = der.decode_natural(der_bytes, start, index)
+    start, index = der.read_element(
+        der_bytes, index, role_end, _CONSTRUCTED[4])
+    keyids = _decode_keyids(der_bytes, start, index, number_of_keyids)
+    start, index = der.read_element(der_bytes, index, role_end, _PRIMITIVE[5])
+    threshold = der.decode_natural(der_bytes, start, index, minimum=1)
+    der.expect_end(index, role_end)
+
+    if number_of_keyids != 1 or threshold != 1:
+      raise tuf.Error('Expected each top-level role in Root metadata to have '
+          'one keyid and a threshold of 1.')
+
+    json_roles[rolename] = {'keyids': keyids, 'threshold': threshold}
+
+  return {
+      '_type': 'Root',
+      'compression_algorithms': ['gz'],
+      'consistent_snapshot': False,
+      'keys': json_keys,
+      'roles': json_roles}
+
+
+
+
+
+def _encode_targets(json_signed):
+  """
+  Return the content of the TargetsMetadata for json_signed.
+  """
+
+  targets = []
+
+  for filename in sorted(json_signed['targets']):
+    filemeta = json_signed['targets'][filename]
+    target_and_custom = [der.encode_element(_CONSTRUCTED[0], b''.join([
+        der.encode_visible_string(filename, _PRIMITIVE[0], _MAX_FILENAME),
+        der.encode_natural(filemeta['length'], _PRIMITIVE[1]),
+        der.encode_integer(len(filemeta['hashes']), _PRIMITIVE[2]),
+        der.encode_element(
+            _CONSTRUCTED[3], _encode_hashes(filemeta['hashes']))]))]
+
+    # Of the custom target info, only the ECU identifier is supported.  Empty
+    # custom target info is omitted, as it is by pyasn1.
+    custom = filemeta.get('custom', {})
+    for key in custom:
+      if key != 'ecu_serial':
+        raise tuf.Error('Unable to encode custom target info ' + repr(key) +
+            ' of target ' + repr(filename) + ' as DER.')
+
+    if custom:
+      target_and_custom.append(der.encode_element(_CONSTRUCTED[1],
+          der.encode_visible_string(
+          custom['ecu_serial'], _PRIMITIVE[2], _MAX_FILENAME)))
+
+    targets.append(der.encode_sequence(target_and_custom))
+
+  elements = [
+      der.encode_integer(len(targets), _PRIMITIVE[0]),
+      der.encode_element(_CONSTRUCTED[1], b''.join(targets))]
+
+  delegations = json_signed.get('delegations', {})
+  if delegations.get('keys') or delegations.get('roles'):
+    elements.append(
+        der.encode_element(_CONSTRUCTED[2], _encode_delegations(delegations)))
+
+  return b''.join(elements)
+
+
+
+
+
+def _encode_delegations(delegations):
+  """
+  Return the content of the TargetsDelegations for the given 'delegations'
+  of Targets metadata.  The delegated roles keep their order, which is their
+  priority.
+  """
+
+  keys = [_encode_public_key(keyid, delegations['keys'][keyid])
+      for keyid in sorted(delegations['keys'])]
+
+  paths_to_roles = []
+
+  for role in delegations['roles']:
+    paths = sorted(role['paths'])
+    keyids = sorted(role['keyids'])
+    elements = [
+        der.encode_integer(len(paths), _PRIMITIVE[0]),
+        der.encode_element(_CONSTRUCTED[1], b''.join([
+            der.encode_visible_string(path, max_length=_MAX_FILENAME)
+            for path in paths])),
+        der.encode_integer(1, _PRIMITIVE[2]),
+        der.encode_element(_CONSTRUCTED[3], der.encode_sequence([
+            der.encode_visible_string(
+                role['name'], _PRIMITIVE[0], _MAX_FILENAME),
+            der.encode_integer(len(keyids), _PRIMITIVE[1]),
+            der.encode_element(_CONSTRUCTED[2],
+                b''.join([_encode_octet_string(keyid) for keyid in keyids])),
+            der.encode_natural(role['threshold'], _PRIMITIVE[3], minimum=1)]))]
+
+    # 'terminating' is omitted when it has its default value, False.
+    if role['backtrack']:
+      elements.append(der.encode_boolean(True, _PRIMITIVE[4]))
+
+    paths_to_roles.append(der.encode_sequence(elements))
+
+  return b''.join([
+      der.encode_integer(len(keys), _PRIMITIVE[0]),
+      der.encode_element(_CONSTRUCTED[1], b''.join(keys)),
+      der.encode_integer(len(paths_to_roles), _PRIMITIVE[2]),
+      der.encode_element(_CONSTRUCTED[3], b''.join(paths_to_roles))])
+
+
+
+
+
+def _decode_targets(der_bytes, index, end):
+  start, index = der.read_element(der_bytes, index, end, _PRIMITIVE[0])
+  number_of_targets = der.decode_natural(der_bytes, start, index)
+  start, index = der.read_element(der_bytes, index, end, _CONSTRUCTED[1])
+
+  json_targets = dict(decode_target_and_custom(der_bytes, target_start,
+      target_end) for target_start, target_end in der.first_elements(
+      der.read_sequence_elements(der_bytes, start, index, der.TAG_SEQUENCE),
+      number_of_targets))
+
+  json_delegations = {'keys': {}, 'roles': []}
+
+  if der.peek_tag(der_bytes, index, end) is not None:
+    start, index = der.read_element(der_bytes, index, end, _CONSTRUCTED[2])
+    json_delegations = _decode_delegations(der_bytes, start, index)
+
+  der.expect_end(index, end)
+
+  return {
+      '_type': 'Targets',
+      'delegations': json_delegations,
+      'targets': json_targets}
+
+
+
+
+
+def decode_target_and_custom(der_bytes, index, end):
+  """
+  <Purpose>
+    Decode the content of a TargetAndCustom element of Targets metadata: the
+    information about a single target.
+
+  <Arguments>
+    der_bytes:
+      A bytearray.
+
+    index, end:
+      The offsets in der_bytes of the content of the element.
+
+  <Exceptions>
+    tuf.Error, if the element cannot be decoded.
+
+  <Side Effects>
+    None.
+
+  <Returns>
+    A tuple (filename, fileinfo), fileinfo conforming to
+    tuf.formats.FILEINFO_SCHEMA.
+  """
+
+  index, target_end = der.read_element(der_bytes, index, end, _CONSTRUCTED[0])
+
+  start, index = der.read_element(
+      der_bytes, index, target_end, _PRIMITIVE[0])
+  filename = der.decode_visible_string(der_bytes, start, index, _MAX_FILENAME)
+  start, index = der.read_element(
+      der_bytes, index, target_end, _PRIMITIVE[1])
+  fileinfo = {'length': der.decode_natural(der_bytes, start, index)}
+  start, index = der.read_element(
+      der_bytes, index, target_end, _PRIMITIVE[2])
+  number_of_hashes = der.decode_natural(der_bytes, start, index)
+  start, index = der.read_element(
+      der_bytes, index, target_end, _CONSTRUCTED[3])
+  der.expect_end(index, target_end)
+  fileinfo['hashes'] = _decode_hashes(
+      der_bytes, start, index, number_of_hashes)
+
+  # Of the custom target info, only the ECU identifier is part of the
+  # dictionary format.
+  if der.peek_tag(der_bytes, target_end, end) is not None:
+    index, custom_end = der.read_element(
+        der_bytes, target_end, end, _CONSTRUCTED[1])
+    der.expect_end(custom_end, end)
+
+    while index < custom_end:
+      tag = der.peek_tag(der_bytes, index, custom_end)
+      start, index = der.read_element(der_bytes, index, custom_end, tag)
+      if tag == _PRIMITIVE[2]:
+        fileinfo['custom'] = {'ecu_serial': der.decode_visible_string(
+            der_bytes, start, index, _MAX_FILENAME)}
+
+  return filename, fileinfo
+
+
+
+
+
+def _decode_delegations(der_bytes, index, end):
+  start, index = der.read_element(der_bytes, index, end, _PRIMITIVE[0])
+  number_of_keys = der.decode_natural(der_bytes, start, index)
+  start, index = der.read_element(der_bytes, index, end, _CONSTRUCTED[1])
+  json_keys = _decode_public_keys(der_bytes, start, index, number_of_keys)
+
+  start, index = der.read_element(der_bytes, index, end, _PRIMITIVE[2])
+  number_of_delegations = der.decode_natural(der_bytes, start, index)
+  start, index = der.read_element(der_bytes, index, end, _CONSTRUCTED[3])
+  der.expect_end(index, end)
+
+  json_roles = []
+
+  for role_start, role_end in der.first_elements(der.read_sequence_elements(
+      der_bytes, start, index, der.TAG_SEQUENCE), number_of_delegations):
+    start, index = der.read_element(
+        der_bytes, role_start, role_end, _PRIMITIVE[0])
+    number_of_paths = der.decode_natural(der_bytes, start, index)
+    start, index = der.read_element(
+        der_bytes, index, role_end, _CONSTRUCTED[1])
+    paths = [der.decode_visible_string(der_bytes, path_start, path_end,
+        _MAX_FILENAME) for path_start, path_end in der.first_elements(
+        der.read_sequence_elements(
+        der_bytes, start, index, der.TAG_VISIBLE_STRING), number_of_paths)]
+
+    start, index = der.read_element(
+        der_bytes, index, role_end, _PRIMITIVE[2])
+    number_of_roles = der.decode_natural(der_bytes, start, index)
+    roles_start, index = der.read_element(
+        der_bytes, index, role_end, _CONSTRUCTED[3])
+
+    if number_of_roles != 1:
+      raise tuf.Error('Expected each delegation to be to one role, but one is '
+          'to ' + repr(number_of_roles))
+
+    terminating = False
+    if der.peek_tag(der_bytes, index, role_end) is not None:
+      start, index = der.read_element(
+          der_bytes, index, role_end, _PRIMITIVE[4])
+      terminating = der.decode_boolean(der_bytes, start, index)
+    der.expect_end(index, role_end)
+
+    # The one MultiRole
+    index, multi_role_end = der.read_element(
+        der_bytes, roles_start, role_end, der.TAG_SEQUENCE)
+    start, index = der.read_element(
+        der_bytes, index, multi_role_end, _PRIMITIVE[0])
+    name = der.decode_visible_string(der_bytes, start, index, _MAX_FILENAME)
+    start, index = der.read_element(
+        der_bytes, index, multi_role_end, _PRIMITIVE[1])
+    number_of_keyids = der.decode_natural(der_bytes, start, index)
+    start, index = der.read_element(
+        der_bytes, index, multi_role_end, _CONSTRUCTED[2])
+    keyids = _decode_keyids(der_bytes, start, index, number_of_keyids)
+    start, index = der.read_element(
+        der_bytes, index, multi_role_end, _PRIMITIVE[3])
+    threshold = der.decode_natural(der_bytes, start, index, minimum=1)
+    der.expect_end(index, multi_role_end)
+
+    json_roles.append({
+        'backtrack': terminating,
+        'keyids': keyids,
+        'name': name,
+        'paths': paths,
+        'threshold': threshold})
+
+  return {'keys': json_keys, 'roles': json_roles}
+
+
+
+
+
+def _encode_snapshot(json_signed):
+  """
+  Return the content of the SnapshotMetadata for json_signed.  The fileinfo
+  for the Root metadata file must include its length and hashes, and that for
+  the other (Targets role) metadata files must not, as for
+  snapshot_asn1_coder.
+  """
+
+  target_role_fileinfos = []
+  root_fileinfo = None
+
+  for filename in sorted(json_signed['meta']):
+    fileinfo = json_signed['meta'][filename]
+
+    if filename == 'root.' + tuf.conf.METADATA_FORMAT:
+      if 'length' not in fileinfo or 'hashes' not in fileinfo:
+        raise tuf.Error('ASN1 Conversion failure for Snapshot role: given '
+            'fileinfo for assumed root metadata file (filename: ' +
+            repr(filename) + '), found either hashes or length missing.')
+
+      root_fileinfo = der.encode_element(_CONSTRUCTED[2], b''.join([
+          der.encode_visible_string(filename, _PRIMITIVE[0], _MAX_FILENAME),
+          der.encode_natural(fileinfo['version'], _PRIMITIVE[1]),
+          der.encode_natural(fileinfo['length'], _PRIMITIVE[2]),
+          der.encode_integer(len(fileinfo['hashes']), _PRIMITIVE[3]),
+          der.encode_element(
+              _CONSTRUCTED[4], _encode_hashes(fileinfo['hashes']))]))
+
+    else:
+      if 'length' in fileinfo or 'hashes' in fileinfo:
+        raise tuf.Error('ASN1 Conversion failure for Snapshot role: given '
+            'fileinfo for assumed Targets or delegated metadata file '
+            '(filename: ' + repr(filename) + '), found either hashes or '
+            'length, which are not expected in Snapshot for a Targets role '
+            'file.')
+
+      target_role_fileinfos.append(der.encode_sequence([
+          der.encode_visible_string(filename, _PRIMITIVE[0], _MAX_FILENAME),
+          der.encode_natural(fileinfo['version'], _PRIMITIVE[1])]))
+
+  if not target_role_fileinfos:
+    raise tuf.Error('ASN1 Conversion failure for Snapshot role: Found no '
+        'Targets role file info entries.')
+
+  if root_fileinfo is None:
+    raise tuf.Error('ASN1 Conversion failure for Snapshot role: Found no '
+        'Root role file info entry.')
+
+  return b''.join([
+      der.encode_integer(len(target_role_fileinfos), _PRIMITIVE[0]),
+      der.encode_element(_CONSTRUCTED[1], b''.join(target_role_fileinfos)),
+      root_fileinfo])
+
+
+
+
+
+def _decode_snapshot(der_bytes, index, end):
+  start, index = der.read_element(der_bytes, index, end, _PRIMITIVE[0])
+  number_of_files = der.decode_natural(der_bytes, start, index)
+  start, index = der.read_element(der_bytes, index, end, _CONSTRUCTED[1])
+
+  json_fileinfos = {}
+
+  for file_start, file_end in der.first_elements(der.read_sequence_elements(
+      der_bytes, start, index, der.TAG_SEQUENCE), number_of_files):
+    start, file_index = der.read_element(
+        der_bytes, file_start, file_end, _PRIMITIVE[0])
+    filename = der.decode_visible_string(
+        der_bytes, start, file_index, _MAX_FILENAME)
+    start, file_index = der.read_element(
+        der_bytes, file_index, file_end, _PRIMITIVE[1])
+    json_fileinfos[filename] = {
+        'version': der.decode_natural(der_bytes, start, file_index)}
+    der.expect_end(file_index, file_end)
+
+  index, root_end = der.read_element(der_bytes, index, end, _CONSTRUCTED[2])
+  der.expect_end(root_end, end)
+  filename, fileinfo = _decode_metadata_fileinfo(der_bytes, index, root_end)
+
+  if filename in json_fileinfos:
+    raise tuf.Error('ASN1 Conversion failure for Snapshot role: duplicate '
+        'fileinfo entries detected: filename ' + str(filename) + ' identified '
+        'both as Root role and Targets role in Snapshot metadata.')
+
+  json_fileinfos[filename] = fileinfo
+
+  return {'_type': 'Snapshot', 'meta': json_fileinfos}
+
+
+
+
+
+def _encode_timestamp(json_signed):
+  """
+  Return the content of the TimestampMetadata for json_signed, which must list
+  only the Snapshot metadata file, with its SHA256 hash, as for
+  timestamp_asn1_coder.
+  """
+
+  if len(json_signed['meta']) != 1:
+    raise tuf.Error('Expecting only one file to be identified in timestamp '
+        'metadata: snapshot. Contents of timestamp metadata: ' +
+        repr(json_signed['meta']))
+
+  filename, fileinfo = list(json_signed['meta'].items())[0]
+  hashes = {'sha256': fileinfo['hashes']['sha256']}
+
+  return b''.join([
+      der.encode_visible_string(filename, _PRIMITIVE[0], _MAX_FILENAME),
+      der.encode_natural(fileinfo['version'], _PRIMITIVE[1]),
+      der.encode_natural(fileinfo['length'], _PRIMITIVE[2]),
+      der.encode_integer(len(hashes), _PRIMITIVE[3]),
+      der.encode_element(_CONSTRUCTED[4], _encode_hashes(hashes))])
+
+
+
+
+
+def _decode_timestamp(der_bytes, index, end):
+  filename, fileinfo = _decode_metadata_fileinfo(der_bytes, index, end)
+
+  return {'_type': 'Timestamp', 'meta': {filename: fileinfo}}
+
+
+
+
+
+def _decode_metadata_fileinfo(der_bytes, index, end):
+  """
+  Decode the content of a RootRoleFileInfo or TimestampMetadata element, which
+  are laid out the same way.  Returns (filename, fileinfo).
+  """
+
+  start, index = der.read_element(der_bytes, index, end, _PRIMITIVE[0])
+  filename = der.decode_visible_string(der_bytes, start, index, _MAX_FILENAME)
+  start, index = der.read_element(der_bytes, index, end, _PRIMITIVE[1])
+  version = der.decode_natural(der_bytes, start, index)
+  start, index = der.read_element(der_bytes, index, end, _PRIMITIVE[2])
+  length = der.decode_natural(der_bytes, start, index)
+  start, index = der.read_element(der_bytes, index, end, _PRIMITIVE[3])
+  number_of_hashes = der.decode_natural(der_bytes, start, index)
+  start, index = der.read_element(der_bytes, index, end, _CONSTRUCTED[4])
+  der.expect_end(index, end)
+
+  return filename, {
+      'version': version,
+      'length': length,
+      'hashes': _decode_hashes(der_bytes, start, index, number_of_hashes)}
+
+
+
+
+
+def _encode_hashes(hashes):
+  """
+  Return the content of a Hashes element for the given dictionary of hashes,
+  ordered by hash function name.
+  """
+
+  return b''.join([der.encode_sequence([
+      der.encode_enumerated(HASH_FUNCTIONS, hash_function),
+      _encode_octet_string(hashes[hash_function])])
+      for hash_function in sorted(hashes)])
+
+
+
+
+
+def _decode_hashes(der_bytes, index, end, number_of_hashes):
+  json_hashes = {}
+
+  for hash_start, hash_end in der.first_elements(der.read_sequence_elements(
+      der_bytes, index, end, der.TAG_SEQUENCE), number_of_hashes):
+    start, index = der.read_element(
+        der_bytes, hash_start, hash_end, der.TAG_ENUMERATED)
+    hash_function = der.decode_enumerated(
+        HASH_FUNCTIONS, der_bytes, start, index)
+    start, index = der.read_element(
+        der_bytes, index, hash_end, der.TAG_OCTET_STRING)
+    der.expect_end(index, hash_end)
+    json_hashes[hash_function] = _decode_octet_string(der_bytes, start, index)
+
+  return json_hashes
+
+
+
+
+
+def _encode_public_key(keyid, key):
+  return der.encode_sequence([
+      _encode_octet_string(keyid),
+      der.encode_enumerated(PUBLIC_KEY_TYPES, key['keytype']),
+      _encode_octet_string(key['keyval']['public'])])
+
+
+
+
+
+def _decode_public_keys(der_bytes, index, end, number_of_keys):
+  """
+  Decode the content of a PublicKeys element, returning a dictionary mapping
+  keyid to key, each conforming to tuf.formats.KEY_SCHEMA.
+  """
+
+  json_keys = {}
+
+  for key_start, key_end in der.first_elements(der.read_sequence_elements(
+      der_bytes, index, end, der.TAG_SEQUENCE), number_of_keys):
+    start, index = der.read_element(
+        der_bytes, key_start, key_end, der.TAG_OCTET_STRING)
+    keyid = _decode_octet_string(der_bytes, start, index)
+    start, index = der.read_element(
+        der_bytes, index, key_end, der.TAG_ENUMERATED)
+    keytype = der.decode_enumerated(PUBLIC_KEY_TYPES, der_bytes, start, index)
+    start, index = der.read_element(
+        der_bytes, index, key_end, der.TAG_OCTET_STRING)
+    public = _decode_octet_string(der_bytes, start, index)
+    der.expect_end(index, key_end)
+
+    json_keys[keyid] = {
+        'keyid_hash_algorithms': list(_KEYID_HASH_ALGORITHMS),
+        'keytype': keytype,
+        'keyval': {'public': public}}
+
+  return json_keys
+
+
+
+
+
+def _decode_keyids(der_bytes, index, end, number_of_keyids):
+  return [_decode_octet_string(der_bytes, start, keyid_end)
+      for start, keyid_end in der.first_elements(der.read_sequence_elements(
+      der_bytes, index, end, der.TAG_OCTET_STRING), number_of_keyids)]
+
+
+
+
+
+def _encode_octet_string(hex_string):
+  return der.encode_octet_string_from_hex(
+      hex_string, max_length=_MAX_OCTET_STRING)
+
+
+
+
+
+def _decode_octet_string(der_bytes, start, end):
+  return der.decode_hex(der_bytes, start, end, _MAX_OCTET_STRING)
+
+
+
+
+
+# The functions that encode and decode the content of the body of the Signed
+# element, by role type.
+_BODY_ENCODERS = {
+    'root': _encode_root,
+    'targets': _encode_targets,
+    'snapshot': _encode_snapshot,
+    'timestamp': _encode_timestamp}
+
+_BODY_DECODERS = {
+    'root': _decode_root,
+    'targets': _decode_targets,
+    'snapshot': _decode_snapshot,
+    'timestamp': _decode_timestamp}
@@ -114,8 +114,8 @@ def set_asn_roles(json_signed, delegations):
   numberOfDelegations = 0
 
   # Sort first to ensure a deterministic list in ASN.1.
-  sorted_json_roles = sorted(json_signed['delegations']['roles'])
-  for json_role in sorted_json_roles:
+  # The order of the delegated roles is their priority, so it is kept.
+  for json_role in json_signed['delegations']['roles']:
     pathsToRoles = PathsToRoles()
 
     paths = Paths().subtype(implicitTag=tag.Tag(tag.tagClassContext,
@@ -130,7 +130,7 @@ def set_asn_roles(json_signed, delegations):
       paths.setComponentByPosition(numberOfPaths, path, False)
       numberOfPaths += 1
 
-    pathsToRoles['numberOfPaths'] = 1
+    pathsToRoles['numberOfPaths'] = numberOfPaths
     pathsToRoles['paths'] = paths
 
     roles = MultiRoles().subtype(implicitTag=tag.Tag(tag.tagClassContext,
@@ -312,7 +312,7 @@ def set_json_roles(json_signed, delegations):
     json_keyids = []
     for j in range(numberOfKeyids):
       keyid = keyids[j]
-      json_keyids.append(str(keyid))
+      json_keyids.append(hex_from_octetstring(keyid))
 
     threshold = int(role['threshold'])
 
@@ -345,8 +345,12 @@ def set_json_targets(json_signed, targetsMetadata):
     numberOfHashes = int(target['numberOfHashes'])
     # Quick workaround for now.
     hashenum_to_hashfunction = {
+      0: 'sha224',
       1: 'sha256',
-      3: 'sha512'
+      2: 'sha384',
+      3: 'sha512',
+      4: 'sha512-224',
+      5: 'sha512-256'
     }
     hashes = target['hashes']
     json_hashes = {}
@@ -129,6 +129,19 @@ VERSION_SCHEMA = SCHEMA.Object(
 # Must be 1, or greater.
 METADATAVERSION_SCHEMA = SCHEMA.Integer(lo=0)
 
+# The validators that a server sent with a file, for use in a later
+# conditional request for the same file.  See
+# tuf.download.unsafe_download_if_modified().
+HTTP_VALIDATORS_SCHEMA = SCHEMA.Object(
+  object_name = 'HTTP_VALIDATORS_SCHEMA',
+  etag = SCHEMA.Optional(SCHEMA.AnyString()),
+  last_modified = SCHEMA.Optional(SCHEMA.AnyString()))
+
+# The validators of each metadata file, by the URL it was downloaded from.
+HTTP_VALIDATORS_DICT_SCHEMA = SCHEMA.DictOf(
+  key_schema = URL_SCHEMA,
+  value_schema = HTTP_VALIDATORS_SCHEMA)
+
 # An integer representing length.  Must be 0, or greater.
 LENGTH_SCHEMA = SCHEMA.Integer(lo=0)
 
@@ -161,6 +174,10 @@ BOOLEAN_SCHEMA = SCHEMA.Boolean()
 # Must be 1 and greater.
 THRESHOLD_SCHEMA = SCHEMA.Integer(lo=1)
 
+# The maximum number of threads to use at once for some task (e.g., see
+# call_concurrently() in 'util.py').  Must be 1 and greater.
+THREAD_COUNT_SCHEMA = SCHEMA.Integer(lo=1)
+
 # A string representing a role's name. 
 ROLENAME_SCHEMA = SCHEMA.AnyString()
 
@@ -31,9 +31,11 @@ from __future__ import division
 from __future__ import unicode_literals
 
 import logging
+import mmap
 
 # Import tuf Exceptions.
 import tuf
+import tuf.conf
 import tuf.log
 import six
 
@@ -115,6 +117,10 @@ def digest(algorithm=_DEFAULT_HASH_ALGORITHM,
     # Added hash routines by this module.
     digest_object = tuf.hash.digest_fileobject(file_object)
     digest_object = tuf.hash.digest_filename(filename)
+    length, digest_objects = tuf.hash.multi_digest_fileobject(file_object,
+                                                              algorithms)
+    length, digest_objects = tuf.hash.multi_digest_filename(filename,
+                                                            algorithms)
   
   <Arguments>
     algorithm:
@@ -217,12 +223,11 @@ def digest_fileobject(file_object, algorithm=_DEFAULT_HASH_ALGORITHM,
   # intend to start from the beginning of the file.
   file_object.seek(0)
 
-  # Read the contents of the file object in at most 4096-byte chunks.
-  # Update the hash with the data read from each chunk and return after
-  # the entire file is processed. 
+  # Read the contents of the file object in chunks of at most
+  # 'tuf.conf.FILE_CHUNK_SIZE' bytes.  Update the hash with the data read from
+  # each chunk and return after the entire file is processed. 
   while True:
-    chunksize = 4096
-    data = file_object.read(chunksize)
+    data = file_object.read(tuf.conf.FILE_CHUNK_SIZE)
     if not data:
       break
     
@@ -281,3 +286,157 @@ def digest_filename(filename, algorithm=_DEFAULT_HASH_ALGORITHM,
   file_object.close()
   
   return digest_object
+
+
+
+
+
+
+def multi_digest_fileobject(file_object, algorithms=None,
+                            hash_library=_DEFAULT_HASH_LIBRARY):
+  """
+  <Purpose>
+    Generate a digest object for each of 'algorithms' given a file object, and
+    determine the length of the file.  The contents of 'file_object' are read
+    exactly once, and each chunk read updates all of the digest objects.  If
+    'file_object' is a regular file opened in binary mode, it is memory-mapped
+    rather than read into intermediate buffers, and no part of it is read at
+    all if 'algorithms' is empty.
+
+  <Arguments>
+    file_object:
+      File object whose contents will be used as the data to update the hash
+      of the digest objects to be returned.
+
+    algorithms:
+      A list of hash algorithms (e.g., md5, sha1, sha256).  If None, the
+      default algorithm ('sha256') is used.
+
+    hash_library:
+      The library providing the hash algorithms
+      (e.g., pycrypto, hashlib).
+
+  <Exceptions>
+    tuf.UnsupportedAlgorithmError
+
+    tuf.Error
+
+  <Side Effects>
+    Calls tuf.hash.digest() to create the actual digest objects.
+
+  <Returns>
+    A tuple (length, digest_objects), where 'digest_objects' is a dict of
+    digest objects (e.g., hashlib.new(algorithm)) by hash algorithm.
+  """
+
+  if algorithms is None:
+    algorithms = [_DEFAULT_HASH_ALGORITHM]
+
+  # digest() raises:
+  # tuf.UnsupportedAlgorithmError
+  # tuf.Error
+  digest_objects = {}
+  for algorithm in algorithms:
+    digest_objects[algorithm] = digest(algorithm, hash_library)
+
+  mapped_file = _map_fileobject(file_object)
+
+  if mapped_file is not None:
+    try:
+      length = len(mapped_file)
+
+      # Update all of the hashes with each chunk in turn, so that each part of
+      # the file is read into memory only once.
+      if digest_objects:
+        for offset in six.moves.range(0, length, tuf.conf.FILE_CHUNK_SIZE):
+          data = mapped_file[offset:offset + tuf.conf.FILE_CHUNK_SIZE]
+          for digest_object in six.itervalues(digest_objects):
+            digest_object.update(data)
+
+    finally:
+      mapped_file.close()
+
+    return length, digest_objects
+
+  # As in digest_fileobject(), start from the beginning of the file.
+  file_object.seek(0)
+  length = 0
+
+  while True:
+    data = file_object.read(tuf.conf.FILE_CHUNK_SIZE)
+    if not data:
+      break
+
+    if not isinstance(data, six.binary_type):
+      data = data.encode('utf-8')
+
+    length += len(data)
+    for digest_object in six.itervalues(digest_objects):
+      digest_object.update(data)
+
+  return length, digest_objects
+
+
+
+
+
+def multi_digest_filename(filename, algorithms=None,
+                          hash_library=_DEFAULT_HASH_LIBRARY):
+  """
+  <Purpose>
+    Generate a digest object for each of 'algorithms', update their hashes
+    using the file specified by filename, and return them to the caller
+    together with the length of the file.  The file is read only once; see
+    multi_digest_fileobject().
+
+  <Arguments>
+    filename:
+      The filename belonging to the file object to be used.
+
+    algorithms:
+      A list of hash algorithms (e.g., md5, sha1, sha256).  If None, the
+      default algorithm ('sha256') is used.
+
+    hash_library:
+      The library providing the hash algorithms
+      (e.g., pycrypto, hashlib).
+
+  <Exceptions>
+    tuf.UnsupportedAlgorithmError
+    tuf.Error
+
+  <Side Effects>
+    Calls tuf.hash.multi_digest_fileobject() after opening 'filename'.
+    File closed before returning.
+
+  <Returns>
+    A tuple (length, digest_objects), where 'digest_objects' is a dict of
+    digest objects (e.g., hashlib.new(algorithm)) by hash algorithm.
+  """
+
+  with open(filename, 'rb') as file_object:
+    return multi_digest_fileobject(file_object, algorithms, hash_library)
+
+
+
+
+
+def _map_fileobject(file_object):
+  """
+  Return a read-only memory map of the whole of 'file_object', or None if it
+  cannot be mapped (e.g., an in-memory or text-mode file object, or an empty
+  file, which mmap refuses to map).
+  """
+
+  if 'b' not in getattr(file_object, 'mode', ''):
+    return None
+
+  try:
+    # Data written through 'file_object' may still be buffered.
+    file_object.flush()
+    return mmap.mmap(file_object.fileno(), 0, access=mmap.ACCESS_READ)
+
+  # io.UnsupportedOperation is a subclass of both exceptions below.  Mapping
+  # may also fail for files too large for the address space.
+  except (AttributeError, EnvironmentError, ValueError, OverflowError):
+    return None
@@ -26,6 +26,10 @@
   'rsa_key.py' and the '_get_keyid()' function to learn precisely how keyids
   are generated.  One may get the keyid of a key object by simply accessing the
   dictionary's 'keyid' key (i.e., rsakey['keyid']).
+
+  Keys are stored as frozen (read-only) records, copied once by add_key(), and
+  get_key() returns them without copying (see tuf.util.freeze()).  A caller
+  that needs to modify a key may take a mutable copy with copy.deepcopy().
 """
 
 # Help with Python 3 compatibility, where the print statement is a function, an
@@ -37,11 +41,11 @@ from __future__ import division
 from __future__ import unicode_literals
 
 import logging
-import copy
 
 import tuf
 import tuf.formats
 import tuf.keys
+import tuf.util
 import six
 
 # List of strings representing the key types supported by TUF.
@@ -285,7 +289,7 @@ def add_key(key_dict, keyid=None, repository_name='default'):
   if keyid in _keydb_dict[repository_name]:
     raise tuf.KeyAlreadyExistsError('Key: ' + keyid)
  
-  _keydb_dict[repository_name][keyid] = copy.deepcopy(key_dict)
+  _keydb_dict[repository_name][keyid] = tuf.util.freeze(key_dict)
 
 
 
@@ -318,7 +322,9 @@ def get_key(keyid, repository_name='default'):
 
   <Returns>
     The key matching 'keyid'.  In the case of RSA keys, a dictionary conformant
-    to 'tuf.formats.RSAKEY_SCHEMA' is returned.
+    to 'tuf.formats.RSAKEY_SCHEMA' is returned.  The key is a read-only
+    tuf.util.FrozenDict; it is not copied, and any attempt to modify it raises
+    a TypeError.
   """
 
   # Does 'keyid' have the correct format?
@@ -336,7 +342,7 @@ def get_key(keyid, repository_name='default'):
   
   # Return the key belonging to 'keyid', if found in the key database.
   try:
-    return copy.deepcopy(_keydb_dict[repository_name][keyid])
+    return _keydb_dict[repository_name][keyid]
   
   except KeyError:
     raise tuf.UnknownKeyError('Key: ' + keyid)
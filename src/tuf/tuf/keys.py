@@ -911,18 +911,13 @@ def verify_signature(key_dict, signature, data):
   
   elif keytype == 'ed25519':
     public = binascii.unhexlify(public.encode('utf-8'))
-    if _ED25519_CRYPTO_LIBRARY == 'pynacl' or \
-                              'pynacl' in _available_crypto_libraries:
-      valid_signature = tuf.ed25519_keys.verify_signature(public,
-                                                          method, sig, data,
-                                                          use_pynacl=True)
-    
-    # Fall back to the optimized pure python implementation of ed25519. 
-    else: # pragma: no cover
-      valid_signature = tuf.ed25519_keys.verify_signature(public,
-                                                          method, sig, data,
-                                                          use_pynacl=False)
-  
+
+    # The active ed25519 verification backend (PyNaCl or pyca/cryptography if
+    # available, otherwise the optimized pure python implementation of
+    # ed25519) is selected by 'tuf.ed25519_keys'.
+    valid_signature = tuf.ed25519_keys.verify_signature(public, method, sig,
+                                                        data)
+
   # 'tuf.formats.ANYKEY_SCHEMA' should detect invalid key types. 
   else: # pragma: no cover
     raise TypeError('Unsupported key type.')
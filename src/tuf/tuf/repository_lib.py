@@ -127,7 +127,7 @@ def _generate_and_write_metadata(rolename, metadata_filename, write_partial,
 
   # Retrieve the roleinfo of 'rolename' to extract the needed metadata
   # attributes, such as version number, expiration, etc.
-  roleinfo = tuf.roledb.get_roleinfo(rolename, repository_name)
+  roleinfo = tuf.roledb.get_roleinfo_mutable(rolename, repository_name)
 
   # Generate the appropriate role metadata for 'rolename'. 
   if rolename == 'root':
@@ -188,7 +188,7 @@ def _generate_and_write_metadata(rolename, metadata_filename, write_partial,
         temp_signable, rolename, repository_name)
     if len(status['good_sigs']) == 0:
       metadata['version'] = metadata['version'] + 1
-      roleinfo = tuf.roledb.get_roleinfo(rolename, repository_name)
+      roleinfo = tuf.roledb.get_roleinfo_mutable(rolename, repository_name)
       roleinfo['version'] = roleinfo['version'] + 1
       tuf.roledb.update_roleinfo(
           rolename, roleinfo, repository_name=repository_name)
@@ -202,7 +202,7 @@ def _generate_and_write_metadata(rolename, metadata_filename, write_partial,
     if tuf.sig.verify(signable, rolename, repository_name) and not \
         roleinfo['partial_loaded']:
       metadata['version'] = metadata['version'] + 1
-      roleinfo = tuf.roledb.get_roleinfo(rolename, repository_name)
+      roleinfo = tuf.roledb.get_roleinfo_mutable(rolename, repository_name)
       roleinfo['version'] = roleinfo['version'] + 1
       tuf.roledb.update_roleinfo(
           rolename, roleinfo, repository_name=repository_name)
@@ -574,7 +574,7 @@ def _load_top_level_metadata(
     tuf.roledb.create_roledb_from_root_metadata(root_metadata, repository_name)
 
     # Load Root's roleinfo and update 'tuf.roledb'.
-    roleinfo = tuf.roledb.get_roleinfo('root', repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable('root', repository_name)
     roleinfo['signatures'] = []
     for signature in signable['signatures']:
       if signature not in roleinfo['signatures']: 
@@ -612,7 +612,7 @@ def _load_top_level_metadata(
       repository.timestamp.add_signature(signature, mark_role_as_dirty=False)
 
     # Load Timestamp's roleinfo and update 'tuf.roledb'.
-    roleinfo = tuf.roledb.get_roleinfo('timestamp', repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable('timestamp', repository_name)
     roleinfo['expires'] = timestamp_metadata['expires']
     roleinfo['version'] = timestamp_metadata['version']
     if os.path.exists(timestamp_filename + '.gz'):
@@ -652,7 +652,7 @@ def _load_top_level_metadata(
       repository.snapshot.add_signature(signature, mark_role_as_dirty=False)
 
     # Load Snapshot's roleinfo and update 'tuf.roledb'.
-    roleinfo = tuf.roledb.get_roleinfo('snapshot', repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable('snapshot', repository_name)
     roleinfo['expires'] = snapshot_metadata['expires']
     roleinfo['version'] = snapshot_metadata['version']
     if os.path.exists(snapshot_filename + '.gz'):
@@ -687,7 +687,7 @@ def _load_top_level_metadata(
       repository.targets.add_signature(signature, mark_role_as_dirty=False)
    
     # Update 'targets.json' in 'tuf.roledb.py'
-    roleinfo = tuf.roledb.get_roleinfo('targets', repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable('targets', repository_name)
     for filepath, fileinfo in six.iteritems(targets_metadata['targets']):
       roleinfo['paths'].update({filepath: fileinfo.get('custom', {})})
     roleinfo['version'] = targets_metadata['version']
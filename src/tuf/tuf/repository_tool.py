@@ -672,7 +672,8 @@ class Metadata(object):
       logger.warning('Adding a verification key that has already been used.')
 
     keyid = key['keyid']
-    roleinfo = tuf.roledb.get_roleinfo(self.rolename, self.repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable(
+        self.rolename, self.repository_name)
 
     # Add 'key' to the role's entry in 'tuf.roledb.py' and avoid duplicates.
     if keyid not in roleinfo['keyids']: 
@@ -719,7 +720,8 @@ class Metadata(object):
     tuf.formats.ANYKEY_SCHEMA.check_match(key)
     
     keyid = key['keyid']
-    roleinfo = tuf.roledb.get_roleinfo(self.rolename, self.repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable(
+        self.rolename, self.repository_name)
 
     if keyid in roleinfo['keyids']:
       roleinfo['keyids'].remove(keyid)
@@ -783,7 +785,8 @@ class Metadata(object):
       tuf.keydb.add_key(key, repository_name=self.repository_name)
 
     # Update the role's 'signing_keys' field in 'tuf.roledb.py'.
-    roleinfo = tuf.roledb.get_roleinfo(self.rolename, self.repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable(
+        self.rolename, self.repository_name)
     if key['keyid'] not in roleinfo['signing_keyids']:
       roleinfo['signing_keyids'].append(key['keyid'])
 
@@ -826,7 +829,8 @@ class Metadata(object):
     tuf.formats.ANYKEY_SCHEMA.check_match(key)
     
     # Update the role's 'signing_keys' field in 'tuf.roledb.py'.
-    roleinfo = tuf.roledb.get_roleinfo(self.rolename, self.repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable(
+        self.rolename, self.repository_name)
 
     if key['keyid'] in roleinfo['signing_keyids']:
       roleinfo['signing_keyids'].remove(key['keyid'])
@@ -884,7 +888,8 @@ class Metadata(object):
     tuf.formats.SIGNATURE_SCHEMA.check_match(signature)
     tuf.formats.BOOLEAN_SCHEMA.check_match(mark_role_as_dirty) 
 
-    roleinfo = tuf.roledb.get_roleinfo(self.rolename, self.repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable(
+        self.rolename, self.repository_name)
 
     # Ensure the roleinfo contains a 'signatures' field.
     if 'signatures' not in roleinfo:
@@ -932,7 +937,8 @@ class Metadata(object):
     # Raise 'tuf.FormatError' if any are improperly formatted.
     tuf.formats.SIGNATURE_SCHEMA.check_match(signature)
 
-    roleinfo = tuf.roledb.get_roleinfo(self.rolename, self.repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable(
+        self.rolename, self.repository_name)
 
     if signature in roleinfo['signatures']:
       roleinfo['signatures'].remove(signature)
@@ -967,7 +973,8 @@ class Metadata(object):
       A list of signatures, conformant to 'tuf.formats.SIGNATURES_SCHEMA'.
     """
 
-    roleinfo = tuf.roledb.get_roleinfo(self.rolename, self.repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable(
+        self.rolename, self.repository_name)
     signatures = roleinfo['signatures']
   
     return signatures
@@ -995,7 +1002,8 @@ class Metadata(object):
       A list of the role's keyids (i.e., keyids of the keys). 
     """
 
-    roleinfo = tuf.roledb.get_roleinfo(self.rolename, self.repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable(
+        self.rolename, self.repository_name)
     keyids = roleinfo['keyids']
 
     return keyids
@@ -1106,7 +1114,8 @@ class Metadata(object):
     # Raise 'tuf.FormatError' if any are improperly formatted.
     tuf.formats.METADATAVERSION_SCHEMA.check_match(version)
 
-    roleinfo = tuf.roledb.get_roleinfo(self.rolename, self.repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable(
+        self.rolename, self.repository_name)
     roleinfo['version'] = version
 
     tuf.roledb.update_roleinfo(
@@ -1176,7 +1185,8 @@ class Metadata(object):
     # Raise 'tuf.FormatError' if any are improperly formatted.
     tuf.formats.THRESHOLD_SCHEMA.check_match(threshold)
 
-    roleinfo = tuf.roledb.get_roleinfo(self.rolename, self.repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable(
+        self.rolename, self.repository_name)
     roleinfo['threshold'] = threshold
 
     tuf.roledb.update_roleinfo(
@@ -1262,7 +1272,8 @@ class Metadata(object):
       raise tuf.Error(repr(self.rolename) + ' has already expired.')
    
     # Update the role's 'expires' entry in 'tuf.roledb.py'.
-    roleinfo = tuf.roledb.get_roleinfo(self.rolename, self.repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable(
+        self.rolename, self.repository_name)
     expires = datetime_object.isoformat() + 'Z'
     roleinfo['expires'] = expires
 
@@ -1295,7 +1306,8 @@ class Metadata(object):
       'tuf.formats.KEYIDS_SCHEMA'.
     """
 
-    roleinfo = tuf.roledb.get_roleinfo(self.rolename, self.repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable(
+        self.rolename, self.repository_name)
     signing_keyids = roleinfo['signing_keyids']
 
     return signing_keyids
@@ -1329,7 +1341,8 @@ class Metadata(object):
       'tuf.formats.COMPRESSIONS_SCHEMA'.
     """
 
-    roleinfo = tuf.roledb.get_roleinfo(self.rolename, self.repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable(
+        self.rolename, self.repository_name)
     compressions = roleinfo['compressions']
 
     return compressions
@@ -1369,7 +1382,8 @@ class Metadata(object):
     # Raise 'tuf.FormatError' if any are improperly formatted.
     tuf.formats.COMPRESSIONS_SCHEMA.check_match(compression_list)
 
-    roleinfo = tuf.roledb.get_roleinfo(self.rolename, self.repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable(
+        self.rolename, self.repository_name)
 
     # Add the compression algorithms of 'compression_list' to the role's
     # entry in 'tuf.roledb.py'.
@@ -1784,7 +1798,7 @@ class Targets(Metadata):
       None.
     """
 
-    target_files = tuf.roledb.get_roleinfo(
+    target_files = tuf.roledb.get_roleinfo_mutable(
         self.rolename, self.repository_name)['paths']
 
     return target_files
@@ -1853,7 +1867,8 @@ class Targets(Metadata):
 
     # Get the current role's roleinfo, so that its delegations field can be
     # updated.
-    roleinfo = tuf.roledb.get_roleinfo(self.rolename, self.repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable(
+        self.rolename, self.repository_name)
 
     # Update the restricted paths of 'child_rolename' to add relative paths. 
     for role in roleinfo['delegations']['roles']:
@@ -1931,7 +1946,8 @@ class Targets(Metadata):
       
       # Update the role's 'tuf.roledb.py' entry and avoid duplicates.
       targets_directory_length = len(self._targets_directory) 
-      roleinfo = tuf.roledb.get_roleinfo(self.rolename, self.repository_name)
+      roleinfo = tuf.roledb.get_roleinfo_mutable(
+          self.rolename, self.repository_name)
       relative_path = filepath[targets_directory_length:]
       if relative_path not in roleinfo['paths']:
         roleinfo['paths'].update({relative_path: custom})
@@ -2002,7 +2018,8 @@ class Targets(Metadata):
         raise tuf.Error(repr(filepath) + ' is not a valid file.')
 
     # Update this Targets 'tuf.roledb.py' entry.
-    roleinfo = tuf.roledb.get_roleinfo(self.rolename, self.repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable(
+        self.rolename, self.repository_name)
     for relative_target in relative_list_of_targets:
       if relative_target not in roleinfo['paths']:
         roleinfo['paths'].update({relative_target: {}})
@@ -2061,7 +2078,8 @@ class Targets(Metadata):
     relative_filepath = filepath[targets_directory_length:]
    
     # Remove 'relative_filepath', if found, and update this Targets roleinfo.  
-    fileinfo = tuf.roledb.get_roleinfo(self.rolename, self.repository_name)
+    fileinfo = tuf.roledb.get_roleinfo_mutable(
+        self.rolename, self.repository_name)
     if relative_filepath in fileinfo['paths']:
       del fileinfo['paths'][relative_filepath]
       tuf.roledb.update_roleinfo(
@@ -2094,7 +2112,8 @@ class Targets(Metadata):
       None.
     """
 
-    roleinfo = tuf.roledb.get_roleinfo(self.rolename, self.repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable(
+        self.rolename, self.repository_name)
     roleinfo['paths'] = {}
 
     tuf.roledb.update_roleinfo(
@@ -2271,7 +2290,7 @@ class Targets(Metadata):
                                  roleinfo, parent_targets_object=self)
     
     # Update the 'delegations' field of the current role.
-    current_roleinfo = tuf.roledb.get_roleinfo(
+    current_roleinfo = tuf.roledb.get_roleinfo_mutable(
         self.rolename, self.repository_name)
     current_roleinfo['delegations']['keys'].update(keydict)
 
@@ -2341,7 +2360,8 @@ class Targets(Metadata):
 
     # Now we need to save this info somehow in the roledb.
     # We need to modify the parent's roleinfo....
-    roleinfo = tuf.roledb.get_roleinfo(self.rolename, self.repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable(
+        self.rolename, self.repository_name)
     #roleinfo['delegations']['keys'].update(keydict) # TODO: What would this do?
 
     # Create a new multi-role delegation object.
@@ -2442,7 +2462,8 @@ class Targets(Metadata):
     tuf.formats.ROLENAME_SCHEMA.check_match(rolename) 
 
     # Remove 'rolename' from this Target's delegations dict.
-    roleinfo = tuf.roledb.get_roleinfo(self.rolename, self.repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable(
+        self.rolename, self.repository_name)
 
     for role in roleinfo['delegations']['roles']:
       if role['name'] == rolename:
@@ -2744,7 +2765,8 @@ class Targets(Metadata):
     # Determine the prefix length of any one of the hashed bins.  The prefix
     # length is not stored in the roledb, so it must be determined here by
     # inspecting one of path hash prefixes listed.
-    roleinfo = tuf.roledb.get_roleinfo(self.rolename, self.repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable(
+        self.rolename, self.repository_name)
     prefix_length = 0
     delegation = None
    
@@ -3038,7 +3060,7 @@ def load_repository(repository_directory, repository_name='default'):
  
     # Extract the metadata attributes of 'metadata_name' and update its
     # corresponding roleinfo.
-    roleinfo = tuf.roledb.get_roleinfo(metadata_name, repository_name)
+    roleinfo = tuf.roledb.get_roleinfo_mutable(metadata_name, repository_name)
     roleinfo['signatures'].extend(signable['signatures'])
     roleinfo['version'] = metadata_object['version']
     roleinfo['expires'] = metadata_object['expires']
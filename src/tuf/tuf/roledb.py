@@ -34,6 +34,14 @@
   
   The 'name', 'paths', 'path_hash_prefixes', and 'delegations' dict keys are
   optional.
+
+  Roleinfo is stored as frozen (read-only) records, copied once when a role is
+  added or updated (see tuf.util.freeze()).  get_roleinfo(), get_role_keyids(),
+  and similar functions return these records without copying them, so that
+  the frequent lookups made while verifying signatures and walking delegations
+  are cheap.  Callers that wish to modify a role's information should request
+  a mutable copy with get_roleinfo_mutable(), and store it back with
+  update_roleinfo().
 """
 
 # Help with Python 3 compatibility, where the print statement is a function, an
@@ -45,11 +53,11 @@ from __future__ import division
 from __future__ import unicode_literals
 
 import logging
-import copy
 
 import tuf
 import tuf.formats
 import tuf.log
+import tuf.util
 import six
 
 # See 'tuf.log' to learn how logging is handled in TUF.
@@ -115,12 +123,13 @@ def create_roledb_from_root_metadata(root_metadata, repository_name='default'):
   _roledb_dict[repository_name] = {}
   _dirty_roles[repository_name] = set()
 
-  # Do not modify the contents of the 'root_metadata' argument.
-  root_metadata = copy.deepcopy(root_metadata)
-  
   # Iterate through the roles found in 'root_metadata'
   # and add them to '_roledb_dict'.  Duplicates are avoided.
   for rolename, roleinfo in six.iteritems(root_metadata['roles']):
+    # Do not modify the contents of the 'root_metadata' argument.  add_role()
+    # stores a (frozen) copy of everything else in 'roleinfo'.
+    roleinfo = dict(roleinfo)
+
     if rolename == 'root':
       roleinfo['version'] = root_metadata['version']
       roleinfo['expires'] = root_metadata['expires']
@@ -292,7 +301,10 @@ def add_role(rolename, roleinfo, repository_name='default'):
   if rolename in _roledb_dict[repository_name]:
     raise tuf.RoleAlreadyExistsError('Role already exists: ' + rolename)
 
-  _roledb_dict[repository_name][rolename] = copy.deepcopy(roleinfo)
+  # Store a frozen copy of 'roleinfo', so that neither the caller nor the
+  # readers of the record can modify it.  Any parts of 'roleinfo' that are
+  # already frozen are shared rather than copied.
+  _roledb_dict[repository_name][rolename] = tuf.util.freeze(roleinfo)
 
 
 
@@ -378,8 +390,9 @@ def update_roleinfo(rolename, roleinfo, mark_role_as_dirty=True, repository_name
 
   # Update the global _roledb_dict and _dirty_roles structures so that
   # the latest 'roleinfo' is available to other modules, and the repository
-  # tools know which roles should be saved to disk.
-  _roledb_dict[repository_name][rolename] = copy.deepcopy(roleinfo)
+  # tools know which roles should be saved to disk.  As in add_role(), a frozen
+  # copy of 'roleinfo' is stored.
+  _roledb_dict[repository_name][rolename] = tuf.util.freeze(roleinfo)
   
   if mark_role_as_dirty: 
     _dirty_roles[repository_name].add(rolename)
@@ -646,7 +659,9 @@ def get_roleinfo(rolename, repository_name='default'):
     None.
   
   <Returns>
-    The roleinfo of 'rolename'.
+    The roleinfo of 'rolename', as a read-only tuf.util.FrozenDict.  It is not
+    copied, and any attempt to modify it raises a TypeError.  See
+    get_roleinfo_mutable().
   """
  
   # Is 'repository_name' properly formatted?  If not, raise 'tuf.FormatError'.
@@ -658,7 +673,45 @@ def get_roleinfo(rolename, repository_name='default'):
   global _roledb_dict
   global _dirty_roles
   
-  return copy.deepcopy(_roledb_dict[repository_name][rolename])
+  return _roledb_dict[repository_name][rolename]
+
+
+
+
+
+def get_roleinfo_mutable(rolename, repository_name='default'):
+  """
+  <Purpose>
+    Return a mutable copy of the roleinfo of 'rolename', for callers that
+    modify it (e.g., before calling update_roleinfo()).  Changes made to the
+    copy do not affect the role database.
+
+  <Arguments>
+    rolename:
+      An object representing the role's name, conformant to 'ROLENAME_SCHEMA'
+      (e.g., 'root', 'snapshot', 'timestamp').
+
+    repository_name:
+      The name of the repository to get the role info.  If not supplied, the
+      'default' repository is searched.
+
+  <Exceptions>
+    tuf.FormatError, if the arguments are improperly formatted.
+    
+    tuf.UnknownRoleError, if 'rolename' does not exist.
+
+    tuf.InvalidNameError, if 'rolename' is incorrectly formatted, or
+    'repository_name' does not exist in the role database.
+
+  <Side Effects>
+    None.
+  
+  <Returns>
+    A deep copy of the roleinfo of 'rolename', made of ordinary dictionaries
+    and lists.
+  """
+
+  return tuf.util.thaw(get_roleinfo(rolename, repository_name))
 
 
 
@@ -694,7 +747,7 @@ def get_role_keyids(rolename, repository_name='default'):
     None.
 
   <Returns>
-    A list of keyids.
+    A read-only list (tuf.util.FrozenList) of keyids.
   """
   
   # Raise 'tuf.FormatError' if 'repository_name' is improperly formatted.
@@ -703,7 +756,7 @@ def get_role_keyids(rolename, repository_name='default'):
   # Raises tuf.FormatError, tuf.UnknownRoleError, or tuf.InvalidNameError.
   _check_rolename(rolename, repository_name)
   
-  global _roledb_dit
+  global _roledb_dict
   global _dirty_roles
 
   roleinfo = _roledb_dict[repository_name][rolename]
@@ -786,7 +839,7 @@ def get_role_paths(rolename, repository_name='default'):
     None.
 
   <Returns>
-    A list of paths.
+    The read-only paths of the role.
   """
 
   # Raise 'tuf.FormatError' if 'repository_name' is improperly formatted.
@@ -36,6 +36,17 @@
   In the case of the 'bad' dict, a 'first' dict key could not be found.
   As a result, 'bad' was flagged a mismatch.
   
+  Each schema is compiled, the first time it is used, into a validator
+  function that checks objects against the whole tree of schemas without
+  dispatching through the schema objects.  The validator is cached by the
+  schema, so schemas should not be modified once they are in use.
+
+  Within a ValidationScope, an object that has matched a dict or list schema
+  (Object, DictOf, ListOf or Struct), whether directly or nested in a larger
+  object, is not checked against that schema again.  Objects received at a
+  trust boundary can then be checked once there, and the layers beneath can
+  keep their own checks without repeating the work.
+
   'schema.py' provides additional schemas for testing objects based on other
   criteria.  See 'tuf.formats.py' and the rest of this module for extensive
   examples.  Anything related to the checking of TUF objects and their formats
@@ -52,17 +63,29 @@ from __future__ import unicode_literals
 
 import re
 import sys
+import threading
 
 import tuf
 import six
 
+# The objects that have matched dict and list schemas in the current
+# ValidationScope of each thread, by (id(schema), id(object)).  The objects
+# are kept alive until the scope ends, so that their ids are not reused.
+_validation_scopes = threading.local()
+
+# The number of threads in a ValidationScope, so that validators need not look
+# up the current thread's scope while no thread is in one.
+_active_scope_count = 0
+_active_scope_count_lock = threading.Lock()
+
 class Schema:
   """
   <Purpose>
     A schema matches a set of possible Python objects, of types
     that are encodable in JSON.  'Schema' is the base class for
     the other classes defined in this module.  All derived classes
-    should implement check_match().
+    should implement either _compile(), as the classes of this module do, or
+    check_match().
   """
 
   def matches(self, object):
@@ -74,7 +97,7 @@ class Schema:
     """
     
     try:
-      self.check_match(object)
+      self.compile()(object)
     except tuf.FormatError:
       return False
     else:
@@ -84,12 +107,57 @@ class Schema:
   def check_match(self, object):
     """
     <Purpose> 
-      Abstract method.  Classes that inherit from 'Schema' must
-      implement check_match().  If 'object' matches the schema, check_match()
-      should simply return.  If 'object' does not match the schema,
-      'tuf.FormatError' should be raised.
+      If 'object' matches the schema, check_match() simply returns.  If
+      'object' does not match the schema, 'tuf.FormatError' is raised.
+      Classes that inherit from 'Schema' and do not implement _compile() must
+      override check_match().
     """
-    
+
+    try:
+      validator = self._validator
+
+    except AttributeError:
+      validator = self._validator = self._compile()
+
+    validator(object)
+
+
+  def compile(self):
+    """
+    <Purpose>
+      Return the validator of this schema: a function that, given an object,
+      behaves exactly like check_match().  The validator is built the first
+      time it is needed, and cached.
+    """
+
+    try:
+      return self._compiled
+
+    except AttributeError:
+      # A class that overrides check_match() is validated with it, even if it
+      # inherits a _compile().
+      if six.get_unbound_function(self.__class__.check_match) is \
+          six.get_unbound_function(Schema.check_match):
+        try:
+          self._compiled = self._validator
+
+        except AttributeError:
+          self._compiled = self._validator = self._compile()
+
+      else:
+        self._compiled = self.check_match
+
+      return self._compiled
+
+
+  def _compile(self):
+    """
+    <Purpose>
+      Abstract method.  Build the validator returned by compile().  The classes
+      of this module build a closure over the validators of their sub-schemas,
+      so that validating an object does not dispatch through the schemas.
+    """
+
     raise NotImplementedError()
 
 
@@ -121,8 +189,11 @@ class Any(Schema):
     pass
 
 
-  def check_match(self, object):
-    pass
+  def _compile(self):
+    def validate(object):
+      pass
+
+    return validate
 
 
 
@@ -156,9 +227,14 @@ class String(Schema):
     self._string = string
 
 
-  def check_match(self, object):
-    if self._string != object:
-      raise tuf.FormatError('Expected '+repr(self._string)+' got '+repr(object))
+  def _compile(self):
+    string = self._string
+
+    def validate(object):
+      if string != object:
+        raise tuf.FormatError('Expected '+repr(string)+' got '+repr(object))
+
+    return validate
 
 
 
@@ -196,9 +272,14 @@ class AnyString(Schema):
     pass
 
 
-  def check_match(self, object):
-    if not isinstance(object, six.string_types):
-      raise tuf.FormatError('Expected a string but got '+repr(object))
+  def _compile(self):
+    string_types = six.string_types
+
+    def validate(object):
+      if not isinstance(object, string_types):
+        raise tuf.FormatError('Expected a string but got '+repr(object))
+
+    return validate
 
 
 
@@ -234,9 +315,14 @@ class AnyBytes(Schema):
     pass
 
 
-  def check_match(self, object):
-    if not isinstance(object, six.binary_type):
-      raise tuf.FormatError('Expected a byte string but got '+repr(object))
+  def _compile(self):
+    binary_type = six.binary_type
+
+    def validate(object):
+      if not isinstance(object, binary_type):
+        raise tuf.FormatError('Expected a byte string but got '+repr(object))
+
+    return validate
 
 
 
@@ -272,13 +358,19 @@ class LengthString(Schema):
     self._string_length = length 
 
 
-  def check_match(self, object):
-    if not isinstance(object, six.string_types):
-      raise tuf.FormatError('Expected a string but got ' + repr(object))
+  def _compile(self):
+    string_types = six.string_types
+    string_length = self._string_length
+
+    def validate(object):
+      if not isinstance(object, string_types):
+        raise tuf.FormatError('Expected a string but got ' + repr(object))
 
-    if len(object) != self._string_length:
-      raise tuf.FormatError('Expected a string of length ' + \
-                            repr(self._string_length))
+      if len(object) != string_length:
+        raise tuf.FormatError('Expected a string of length ' + \
+                              repr(string_length))
+
+    return validate
 
 
 
@@ -314,13 +406,19 @@ class LengthBytes(Schema):
     self._bytes_length = length 
 
 
-  def check_match(self, object):
-    if not isinstance(object, six.binary_type):
-      raise tuf.FormatError('Expected a byte but got ' + repr(object))
+  def _compile(self):
+    binary_type = six.binary_type
+    bytes_length = self._bytes_length
 
-    if len(object) != self._bytes_length:
-      raise tuf.FormatError('Expected a byte of length ' + \
-                            repr(self._bytes_length))
+    def validate(object):
+      if not isinstance(object, binary_type):
+        raise tuf.FormatError('Expected a byte but got ' + repr(object))
+
+      if len(object) != bytes_length:
+        raise tuf.FormatError('Expected a byte of length ' + \
+                              repr(bytes_length))
+
+    return validate
 
 
 
@@ -366,13 +464,21 @@ class OneOf(Schema):
     self._alternatives = alternatives
 
 
-  def check_match(self, object):
-    # Simply return as soon as we find a match.
-    # Raise 'tuf.FormatError' if no matches are found.
-    for alternative in self._alternatives:
-      if alternative.matches(object):
+  def _compile(self):
+    validators = [alternative.compile() for alternative in self._alternatives]
+
+    def validate(object):
+      # Simply return as soon as we find a match.
+      # Raise 'tuf.FormatError' if no matches are found.
+      for validator in validators:
+        try:
+          validator(object)
+        except tuf.FormatError:
+          continue
         return
-    raise tuf.FormatError('Object did not match a recognized alternative.')
+      raise tuf.FormatError('Object did not match a recognized alternative.')
+
+    return validate
 
 
 
@@ -411,9 +517,15 @@ class AllOf(Schema):
     self._required_schemas = required_schemas[:]
 
 
-  def check_match(self, object):
-    for required_schema in self._required_schemas:
-      required_schema.check_match(object)
+  def _compile(self):
+    validators = [required_schema.compile()
+                  for required_schema in self._required_schemas]
+
+    def validate(object):
+      for validator in validators:
+        validator(object)
+
+    return validate
 
 
 
@@ -442,9 +554,12 @@ class Boolean(Schema):
     pass
 
 
-  def check_match(self, object):
-    if not isinstance(object, bool):
-      raise tuf.FormatError('Got ' + repr(object) + ' instead of a boolean.')
+  def _compile(self):
+    def validate(object):
+      if not isinstance(object, bool):
+        raise tuf.FormatError('Got ' + repr(object) + ' instead of a boolean.')
+
+    return validate
 
 
 
@@ -512,23 +627,31 @@ class ListOf(Schema):
     self._list_name = list_name
 
   
-  def check_match(self, object):
-    if not isinstance(object, (list, tuple)):
-      message = 'Expected '+repr(self._list_name)+' but got '+repr(object)
-      raise tuf.FormatError(message)
+  def _compile(self):
+    validate_item = self._schema.compile()
+    min_count = self._min_count
+    max_count = self._max_count
+    list_name = self._list_name
+
+    def validate(object):
+      if not isinstance(object, (list, tuple)):
+        message = 'Expected '+repr(list_name)+' but got '+repr(object)
+        raise tuf.FormatError(message)
+
+      # Check if all the items in the 'object' list
+      # match 'schema'.
+      for item in object:
+        try:
+          validate_item(item)
+        except tuf.FormatError as e:
+          raise tuf.FormatError(str(e)+' in '+repr(list_name))
 
-    # Check if all the items in the 'object' list
-    # match 'schema'.
-    for item in object:
-      try:
-        self._schema.check_match(item)
-      except tuf.FormatError as e:
-        raise tuf.FormatError(str(e)+' in '+repr(self._list_name))
+      # Raise exception if the number of items in the list is
+      # not within the expected range.
+      if not (min_count <= len(object) <= max_count):
+          raise tuf.FormatError('Length of '+repr(list_name)+' out of range')
 
-    # Raise exception if the number of items in the list is
-    # not within the expected range.
-    if not (self._min_count <= len(object) <= self._max_count):
-        raise tuf.FormatError('Length of '+repr(self._list_name)+' out of range')
+    return _validate_in_scope(self, validate)
 
 
 
@@ -576,15 +699,22 @@ class Integer(Schema):
     self._hi = hi
 
 
-  def check_match(self, object):
-    if isinstance(object, bool) or not isinstance(object, six.integer_types):
-      # We need to check for bool as a special case, since bool
-      # is for historical reasons a subtype of int.
-      raise tuf.FormatError('Got '+repr(object)+' instead of an integer.')
-    
-    elif not (self._lo <= object <= self._hi):
-      int_range = '['+repr(self._lo)+', '+repr(self._hi)+'].'
-      raise tuf.FormatError(repr(object)+' not in range '+int_range)
+  def _compile(self):
+    integer_types = six.integer_types
+    lo = self._lo
+    hi = self._hi
+
+    def validate(object):
+      if isinstance(object, bool) or not isinstance(object, integer_types):
+        # We need to check for bool as a special case, since bool
+        # is for historical reasons a subtype of int.
+        raise tuf.FormatError('Got '+repr(object)+' instead of an integer.')
+
+      elif not (lo <= object <= hi):
+        int_range = '['+repr(lo)+', '+repr(hi)+'].'
+        raise tuf.FormatError(repr(object)+' not in range '+int_range)
+
+    return validate
 
 
 
@@ -639,13 +769,20 @@ class DictOf(Schema):
     self._value_schema = value_schema
 
 
-  def check_match(self, object):
-    if not isinstance(object, dict): 
-      raise tuf.FormatError('Expected a dict but got '+repr(object))
+  def _compile(self):
+    validate_key = self._key_schema.compile()
+    validate_value = self._value_schema.compile()
+    iteritems = six.iteritems
+
+    def validate(object):
+      if not isinstance(object, dict): 
+        raise tuf.FormatError('Expected a dict but got '+repr(object))
 
-    for key, value in six.iteritems(object):
-      self._key_schema.check_match(key)
-      self._value_schema.check_match(value)
+      for key, value in iteritems(object):
+        validate_key(key)
+        validate_value(value)
+
+    return _validate_in_scope(self, validate)
 
 
 
@@ -685,8 +822,8 @@ class Optional(Schema):
     self._schema = schema
 
   
-  def check_match(self, object):
-    self._schema.check_match(object)
+  def _compile(self):
+    return self._schema.compile()
 
 
 
@@ -738,29 +875,37 @@ class Object(Schema):
     self._required = list(required.items())
 
 
-  def check_match(self, object):
-    if not isinstance(object, dict):
-      message = 'Wanted a '+repr(self._object_name)+'.'
-      raise tuf.FormatError(message)
-    
-    # (key, schema) = (a, AnyString()) = (a=AnyString())
-    for key, schema in self._required:
-      # Check if 'object' has all the required dict keys.
-      # If not one of the required keys, check if it is an Optional().
-      try:
-        item = object[key]
-      except KeyError:
-        # If not an Optional schema, raise an exception.
-        if not isinstance(schema, Optional):
-          message = 'Missing key ' + repr(key) + ' in ' + repr(self._object_name)
-          raise tuf.FormatError(message)
-      # Check that 'object's schema matches Object()'s schema for this
-      # particular 'key'.
-      else:
+  def _compile(self):
+    object_name = self._object_name
+
+    # (key, validator, optional) = (a, AnyString().compile(), False)
+    fields = [(key, schema.compile(), isinstance(schema, Optional))
+              for key, schema in self._required]
+
+    def validate(object):
+      if not isinstance(object, dict):
+        message = 'Wanted a '+repr(object_name)+'.'
+        raise tuf.FormatError(message)
+
+      for key, validator, optional in fields:
+        # Check if 'object' has all the required dict keys.
+        # If not one of the required keys, check if it is an Optional().
         try:
-          schema.check_match(item)
-        except tuf.FormatError as e:
-          raise tuf.FormatError(str(e) + ' in ' + self._object_name + '.' + key)
+          item = object[key]
+        except KeyError:
+          # If not an Optional schema, raise an exception.
+          if not optional:
+            message = 'Missing key ' + repr(key) + ' in ' + repr(object_name)
+            raise tuf.FormatError(message)
+        # Check that 'object's schema matches Object()'s schema for this
+        # particular 'key'.
+        else:
+          try:
+            validator(item)
+          except tuf.FormatError as e:
+            raise tuf.FormatError(str(e) + ' in ' + object_name + '.' + key)
+
+    return _validate_in_scope(self, validate)
 
 
 
@@ -852,26 +997,31 @@ class Struct(Schema):
     self._struct_name = struct_name
 
 
-  def check_match(self, object):
-    if not isinstance(object, (list, tuple)):
-      raise tuf.FormatError('Expected ' + repr(self._struct_name) + '; got ' + repr(object))
-    elif len(object) < self._min:
-      raise tuf.FormatError('Too few fields in ' + self._struct_name)
-    elif len(object) > len(self._sub_schemas) and not self._allow_more:
-      raise tuf.FormatError('Too many fields in ' + self._struct_name)
-    
-    # Iterate through the items of 'object', checking against each schema
-    # in the list of schemas allowed (i.e., the sub-schemas and also
-    # any optional schemas.  The lenth of 'object' must be less than
-    # the length of the required schemas + the optional schemas.  However,
-    # 'object' is allowed to be only as large as the length of the required
-    # schemas.  In the while loop below, we check against these two cases.
-    index = 0
-    while index < len(object) and index < len(self._sub_schemas):
-      item = object[index]
-      schema = self._sub_schemas[index]
-      schema.check_match(item)
-      index = index + 1
+  def _compile(self):
+    validators = [schema.compile() for schema in self._sub_schemas]
+    min_count = self._min
+    max_count = len(validators)
+    allow_more = self._allow_more
+    struct_name = self._struct_name
+
+    def validate(object):
+      if not isinstance(object, (list, tuple)):
+        raise tuf.FormatError('Expected ' + repr(struct_name) + '; got ' + repr(object))
+      elif len(object) < min_count:
+        raise tuf.FormatError('Too few fields in ' + struct_name)
+      elif len(object) > max_count and not allow_more:
+        raise tuf.FormatError('Too many fields in ' + struct_name)
+
+      # Iterate through the items of 'object', checking against each schema
+      # in the list of schemas allowed (i.e., the sub-schemas and also
+      # any optional schemas.  The lenth of 'object' must be less than
+      # the length of the required schemas + the optional schemas.  However,
+      # 'object' is allowed to be only as large as the length of the required
+      # schemas.  zip() stops at the shorter of the two.
+      for item, validator in zip(object, validators):
+        validator(item)
+
+    return _validate_in_scope(self, validate)
 
 
 
@@ -935,9 +1085,99 @@ class RegularExpression(Schema):
     self._re_name = re_name
 
 
-  def check_match(self, object):
-    if not isinstance(object, six.string_types) or not self._re_object.match(object):
-      raise tuf.FormatError(repr(object) + ' did not match ' + repr(self._re_name))
+  def _compile(self):
+    string_types = six.string_types
+    match = self._re_object.match
+    re_name = self._re_name
+
+    def validate(object):
+      if not isinstance(object, string_types) or not match(object):
+        raise tuf.FormatError(repr(object) + ' did not match ' + repr(re_name))
+
+    return validate
+
+
+
+class ValidationScope(object):
+  """
+  <Purpose>
+    A context manager within which each object is checked only once against
+    each dict or list schema (Object, DictOf, ListOf or Struct), per thread.
+    Objects that match such a schema, directly or nested in a larger object,
+    are recorded, and later checks of the same object against the same schema
+    return immediately.  Scopes may be nested; the objects are recorded until
+    the outermost scope ends.
+
+    Objects are recognized by identity, so objects that are modified within a
+    scope should not be checked in it.
+
+  <Example Use>
+
+    >>> item_schema = Object(a=Integer())
+    >>> schema = ListOf(item_schema)
+    >>> item = {'a': 1}
+    >>> with ValidationScope():
+    ...   schema.check_match([item])
+    ...   item['a'] = 'not an integer'
+    ...   item_schema.matches(item), Object(a=Integer()).matches(item)
+    (True, False)
+  """
+
+  def __enter__(self):
+    global _active_scope_count
+
+    depth = getattr(_validation_scopes, 'depth', 0)
+
+    if not depth:
+      _validation_scopes.validated_objects = {}
+      with _active_scope_count_lock:
+        _active_scope_count += 1
+
+    _validation_scopes.depth = depth + 1
+
+    return self
+
+
+  def __exit__(self, exception_type, exception_value, traceback):
+    global _active_scope_count
+
+    _validation_scopes.depth -= 1
+
+    if not _validation_scopes.depth:
+      _validation_scopes.validated_objects = None
+      with _active_scope_count_lock:
+        _active_scope_count -= 1
+
+    return False
+
+
+
+
+
+def _validate_in_scope(schema, validate):
+  """
+  Return a validator that calls 'validate', the validator of 'schema', unless
+  the object has already matched 'schema' in the current ValidationScope.
+  """
+
+  schema_id = id(schema)
+
+  def validate_in_scope(object):
+    if _active_scope_count:
+      validated_objects = getattr(_validation_scopes, 'validated_objects', None)
+
+      if validated_objects is not None:
+        key = (schema_id, id(object))
+        if key not in validated_objects:
+          validate(object)
+          validated_objects[key] = object
+        return
+
+    validate(object)
+
+  return validate_in_scope
+
+
 
 
 
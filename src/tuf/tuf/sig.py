@@ -157,12 +157,9 @@ def get_signature_status(signable, role=None, repository_name='default'):
 
     # Identify key using an unknown key signing method.
     try:
-      # TODO: Consider more efficient measures. If the metadata format is
-      # ASN.1/DER ('der'), this line performs a conversion of the data into
-      # ASN.1/DER once per signature. It would be more efficient to do the
-      # conversion once before the loop, and manually use lower-level
-      # signature verification, but that would also be less clean.
-      # If we're using JSON, then this is equally efficient and still cleaner.
+      # If the metadata format is ASN.1/DER ('der') and 'signed' was decoded
+      # from DER, this reuses the digest of its original DER encoding rather
+      # than converting it into ASN.1/DER once per signature.
       valid_sig = verify_signature_over_metadata(key, signature, signed)
 
     except tuf.UnknownMethodError:
@@ -540,7 +537,9 @@ def verify_signature_over_metadata(
       dictionary).
 
       If 'der', the data will be converted into ASN.1, encoded as DER,
-      and hashed. The signature is then checked against that hash.
+      and hashed. The signature is then checked against that hash. If data
+      was decoded from DER by tuf.asn1_codec and has not been modified since,
+      the hash of its original DER encoding is used instead.
 
   <Exceptions>
     tuf.FormatError, raised if either 'key_dict' or 'signature' are improperly
@@ -555,7 +554,8 @@ def verify_signature_over_metadata(
   <Side Effects>
     The cryptography library specified in 'tuf.conf' is called to do the actual
     verification. When in 'der' mode, argument data is converted into ASN.1/DER
-    in order to verify it. (Argument object is unchanged.)
+    in order to verify it, unless its DER encoding is already known.
+    (Argument object is unchanged.)
 
   <Returns>
     Boolean.  True if the signature is valid, False otherwise.
@@ -571,11 +571,18 @@ def verify_signature_over_metadata(
 
   elif metadata_format == 'der':
 
-    # TODO: Have convert_signed_metadata_to_der take just the 'signed' element
-    # so we don't have to do this silly wrapping in an empty signable.
-    data = asn1_codec.convert_signed_metadata_to_der(
-        {'signed': data, 'signatures': []}, only_signed=True)
-    data = hashlib.sha256(data).digest()
+    # If data was decoded from DER, use the digest of its original encoding
+    # rather than converting it to ASN.1 and encoding it as DER again.
+    digest = asn1_codec.get_cached_signed_digest(data)
+
+    if digest is None:
+      # TODO: Have convert_signed_metadata_to_der take just the 'signed'
+      # element so we don't have to do this silly wrapping in an empty
+      # signable.
+      digest = hashlib.sha256(asn1_codec.convert_signed_metadata_to_der(
+          {'signed': data, 'signatures': []}, only_signed=True)).digest()
+
+    data = digest
 
   else:
     raise tuf.Error('Unsupported metadata format: ' + repr(metadata_format))
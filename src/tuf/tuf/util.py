@@ -14,8 +14,11 @@
 <Purpose>
   Provides utility services.  This module supplies utility functions such as:
   get_file_details() that computes the length and hash of a file, import_json
-  that tries to import a working json module, load_json_* functions, and a
-  TempFile class that generates a file-like object for temporary storage, etc.
+  that tries to import a working json module, load_json_* functions, a
+  TempFile class that generates a file-like object for temporary storage,
+  freeze() and thaw(), which convert records to and from a read-only form, and
+  call_concurrently(), which runs a function over many arguments in a bounded
+  number of threads.
 """
 
 # Help with Python 3 compatibility, where the print statement is a function, an
@@ -34,6 +37,7 @@ import logging
 import tempfile
 import fnmatch
 import time
+import threading
 
 import tuf
 import tuf.hash
@@ -95,6 +99,10 @@ class TempFile(object):
     
     # If compression is set then the original file is saved in 'self._orig_file'.
     self._orig_file = None
+
+    # The hex digests of the file's contents, by hash algorithm, computed so
+    # far (see get_digests()).
+    self._digests = {}
     temp_dir = tuf.conf.temporary_directory
     if temp_dir is not None and tuf.formats.PATH_SCHEMA.matches(temp_dir):
       try:
@@ -209,6 +217,7 @@ class TempFile(object):
       None.
     """
 
+    self._digests = {}
     self.temporary_file.write(data)
     if auto_flush:
       self.flush()
@@ -270,7 +279,8 @@ class TempFile(object):
 
 
 
-  def decompress_temp_file_object(self, compression):
+  def decompress_temp_file_object(self, compression, max_length=None,
+                                  hash_algorithms=None):
     """
     <Purpose>
       To decompress a compressed temp file object.  Decompression is performed
@@ -288,17 +298,33 @@ class TempFile(object):
           containing meta.json          containing meta.json.gz
           (decompressed data)
 
+      The data is decompressed a chunk of 'tuf.conf.FILE_CHUNK_SIZE' bytes at
+      a time, so that memory use is bounded however large the file is, and
+      the digests of the decompressed data are computed in the same pass.
+
     <Arguments>
       compression:
         A string indicating the type of compression that was used to compress
         a file.  Only gzip is allowed.
 
+      max_length:
+        The maximum length of the decompressed data, if any.  Decompression
+        stops as soon as it is exceeded.
+
+      hash_algorithms:
+        The hash algorithms (e.g., 'sha256'), if any, with which to hash the
+        decompressed data.  Their digests are later returned by get_digests()
+        without reading the file again.
+
     <Exceptions>
-      tuf.FormatError: If 'compression' is improperly formatted.
+      tuf.FormatError: If any of the arguments are improperly formatted.
 
       tuf.Error: If an invalid compression is given.
 
-      tuf.DecompressionError: If the compression failed for any reason.
+      tuf.UnsupportedAlgorithmError: If a hash algorithm is not supported.
+
+      tuf.DecompressionError: If the compression failed for any reason,
+      including the decompressed data exceeding 'max_length'.
 
     <Side Effects>
       'self._orig_file' is used to store the original data of 'temporary_file'.
@@ -307,9 +333,15 @@ class TempFile(object):
       None.
     """
 
-    # Does 'compression' have the correct format?
+    if hash_algorithms is None:
+      hash_algorithms = []
+
+    # Do the arguments have the correct format?
     # Raise 'tuf.FormatError' if there is a mismatch.
     tuf.formats.NAME_SCHEMA.check_match(compression)
+    if max_length is not None:
+      tuf.formats.LENGTH_SCHEMA.check_match(max_length)
+    tuf.formats.NAMES_SCHEMA.check_match(hash_algorithms)
     
     if self._orig_file is not None:
       raise tuf.Error('Can only set compression on a TempFile once.')
@@ -321,16 +353,79 @@ class TempFile(object):
     self._compression = compression
     self._orig_file = self.temporary_file
 
+    digest_objects = dict((algorithm, tuf.hash.digest(algorithm))
+        for algorithm in hash_algorithms)
+    decompressed_length = 0
+
     try:
       gzip_file_object = gzip.GzipFile(fileobj=self.temporary_file, mode='rb')
-      uncompressed_content = gzip_file_object.read()
       self.temporary_file = tempfile.NamedTemporaryFile()
-      self.temporary_file.write(uncompressed_content)
+
+      while True:
+        data = gzip_file_object.read(tuf.conf.FILE_CHUNK_SIZE)
+        if not data:
+          break
+
+        decompressed_length = decompressed_length + len(data)
+        if max_length is not None and decompressed_length > max_length:
+          raise tuf.Error('The decompressed data exceeds the maximum length'
+              ' of ' + repr(max_length) + ' bytes.')
+
+        for digest_object in six.itervalues(digest_objects):
+          digest_object.update(data)
+
+        self.temporary_file.write(data)
+
       self.flush() 
     
     except Exception as exception:
       raise tuf.DecompressionError(exception)
 
+    self._digests = dict((algorithm, digest_object.hexdigest())
+        for algorithm, digest_object in six.iteritems(digest_objects))
+
+
+
+
+
+  def get_digests(self, hash_algorithms):
+    """
+    <Purpose>
+      Return the hex digests of the contents of the file (the decompressed
+      contents, if it has been decompressed).  Digests computed while the
+      file was decompressed are reused; any others are computed together, in
+      a single pass over the file.
+
+    <Arguments>
+      hash_algorithms:
+        The hash algorithms (e.g., 'sha256') of the digests to return.
+
+    <Exceptions>
+      tuf.FormatError: If 'hash_algorithms' is improperly formatted.
+
+      tuf.UnsupportedAlgorithmError: If a hash algorithm is not supported.
+
+    <Return>
+      A dict of hex digests, by hash algorithm.
+    """
+
+    tuf.formats.NAMES_SCHEMA.check_match(hash_algorithms)
+
+    missing_algorithms = [algorithm for algorithm in hash_algorithms
+        if algorithm not in self._digests]
+
+    if missing_algorithms:
+      position = self.temporary_file.tell()
+      length, digest_objects = tuf.hash.multi_digest_fileobject(
+          self.temporary_file, missing_algorithms)
+      self.seek(position)
+
+      for algorithm, digest_object in six.iteritems(digest_objects):
+        self._digests[algorithm] = digest_object.hexdigest()
+
+    return dict((algorithm, self._digests[algorithm])
+        for algorithm in hash_algorithms)
+
 
 
 
@@ -402,12 +497,11 @@ def get_file_details(filepath, hash_algorithms=['sha256']):
     raise tuf.Error('Path ' + repr(filepath) + ' doest not exist.')
   filepath = os.path.abspath(filepath)
 
-  # Obtaining length of the file.
-  file_length = os.path.getsize(filepath)
+  # Obtaining the length and all of the hashes of the file, in a single pass.
+  file_length, digest_objects = \
+    tuf.hash.multi_digest_filename(filepath, hash_algorithms)
 
-  # Obtaining hash of the file.
-  for algorithm in hash_algorithms:
-    digest_object = tuf.hash.digest_filename(filepath, algorithm)
+  for algorithm, digest_object in six.iteritems(digest_objects):
     file_hashes.update({algorithm: digest_object.hexdigest()})
 
   # Performing a format check to ensure 'file_hash' corresponds HASHDICT_SCHEMA.
@@ -1186,3 +1280,215 @@ def get_current_time():
 
   else:
     return int(time.time())
+
+
+
+
+
+def _raise_frozen_error(*args, **kwargs):
+  raise TypeError('Frozen records cannot be modified.  Use a mutable copy'
+      ' (e.g., copy.deepcopy()) instead.')
+
+
+
+
+
+class FrozenDict(dict):
+  """
+  <Purpose>
+    A read-only dictionary, returned by freeze().  It is a 'dict' so that it
+    matches the schemas in 'tuf.formats' and can be encoded like any other
+    metadata, but any attempt to modify it raises a TypeError.
+
+    copy.copy() and copy.deepcopy() return ordinary (mutable) dictionaries, so
+    a caller that needs to modify a frozen record may simply copy it.
+  """
+
+  __setitem__ = __delitem__ = _raise_frozen_error
+  clear = pop = popitem = setdefault = update = _raise_frozen_error
+  __ior__ = _raise_frozen_error
+
+  def __copy__(self):
+    return dict(self)
+
+  def __deepcopy__(self, memo):
+    return thaw(self)
+
+  def __reduce__(self):
+    return (self.__class__, (dict(self),))
+
+
+
+
+
+class FrozenList(list):
+  """
+  <Purpose>
+    A read-only list, returned by freeze().  See FrozenDict.
+  """
+
+  __setitem__ = __delitem__ = _raise_frozen_error
+  append = extend = insert = pop = remove = _raise_frozen_error
+  reverse = sort = _raise_frozen_error
+  __iadd__ = __imul__ = _raise_frozen_error
+
+  def __copy__(self):
+    return list(self)
+
+  def __deepcopy__(self, memo):
+    return thaw(self)
+
+  def __reduce__(self):
+    return (self.__class__, (list(self),))
+
+
+
+
+
+def freeze(object):
+  """
+  <Purpose>
+    Return a read-only copy of 'object', in which every dictionary and list is
+    replaced by a FrozenDict or FrozenList.  Objects that are already frozen
+    are returned as they are, without copying, so that a frozen record may be
+    shared safely by any number of readers.
+
+  <Arguments>
+    object:
+      A JSON-compatible object, such as a role or key record.
+
+  <Exceptions>
+    None.
+
+  <Side Effects>
+    None.
+
+  <Returns>
+    The frozen copy of 'object'.
+  """
+
+  if isinstance(object, (FrozenDict, FrozenList)):
+    return object
+
+  elif isinstance(object, dict):
+    return FrozenDict(
+        (key, freeze(value)) for key, value in six.iteritems(object))
+
+  elif isinstance(object, list):
+    return FrozenList(freeze(element) for element in object)
+
+  elif isinstance(object, tuple):
+    return tuple(freeze(element) for element in object)
+
+  else:
+    return object
+
+
+
+
+
+def thaw(object):
+  """
+  <Purpose>
+    Return a mutable deep copy of 'object', the reverse of freeze().  Every
+    dictionary and list in the copy is an ordinary 'dict' or 'list'.
+
+  <Arguments>
+    object:
+      A JSON-compatible object, frozen or not.
+
+  <Exceptions>
+    None.
+
+  <Side Effects>
+    None.
+
+  <Returns>
+    The mutable copy of 'object'.
+  """
+
+  if isinstance(object, dict):
+    return dict((key, thaw(value)) for key, value in six.iteritems(object))
+
+  elif isinstance(object, list):
+    return [thaw(element) for element in object]
+
+  elif isinstance(object, tuple):
+    return tuple(thaw(element) for element in object)
+
+  else:
+    return object
+
+
+
+
+
+def call_concurrently(function, arguments, max_threads):
+  """
+  <Purpose>
+    Call 'function' once with each of 'arguments', using up to 'max_threads'
+    threads at once, and wait for all of the calls to finish.  This is used to
+    overlap slow, independent operations, such as downloads.  If 'max_threads'
+    is 1, or there is only one argument, the calls are simply made in turn in
+    the calling thread.
+
+  <Arguments>
+    function:
+      A function that takes a single argument.
+
+    arguments:
+      A list of the arguments to call 'function' with.
+
+    max_threads:
+      The maximum number of calls to make at once.  A positive integer.
+
+  <Exceptions>
+    tuf.FormatError, if 'max_threads' is not a positive integer.
+
+  <Side Effects>
+    Whatever 'function' does, possibly in other threads.
+
+  <Returns>
+    A list with one (result, exception) tuple per argument, in the same order
+    as 'arguments'.  If the call returned, 'exception' is None; otherwise
+    'result' is None and 'exception' is the exception that the call raised.
+    Exceptions are never raised directly, so that the caller can decide how
+    to handle each one.
+  """
+
+  tuf.formats.THREAD_COUNT_SCHEMA.check_match(max_threads)
+
+  outcomes = [None] * len(arguments)
+  remaining_indices = six.moves.queue.Queue()
+  for index in range(len(arguments)):
+    remaining_indices.put(index)
+
+  def call_remaining():
+    while True:
+      try:
+        index = remaining_indices.get_nowait()
+
+      except six.moves.queue.Empty:
+        return
+
+      try:
+        outcomes[index] = (function(arguments[index]), None)
+
+      except Exception as e:
+        outcomes[index] = (None, e)
+
+  number_of_threads = min(max_threads, len(arguments))
+
+  if number_of_threads <= 1:
+    call_remaining()
+
+  else:
+    threads = [threading.Thread(target=call_remaining)
+        for i in range(number_of_threads)]
+    for thread in threads:
+      thread.daemon = True
+      thread.start()
+    for thread in threads:
+      thread.join()
+
+  return outcomes
@@ -337,6 +337,73 @@ class TestCommon(unittest.TestCase):
 
 
 
+  def test_verify_signatures_over_metadata(self):
+    """
+    Tests the batch signature verification function,
+    verify_signatures_over_metadata(), against single-signature verification.
+    """
+
+    # Load a sample ECU Manifest, in the current metadata format.
+    if tuf.conf.METADATA_FORMAT == 'json':
+      sample_ecu_manifest = json.load(open(os.path.join(SAMPLES_DIR,
+          'sample_ecu_manifest_TCUdemocar.json')))
+
+    else:
+      assert tuf.conf.METADATA_FORMAT == 'der' # Or test code is broken/old.
+      sample_ecu_manifest = \
+          asn1_codec.convert_signed_der_to_dersigned_json(open(os.path.join(
+          SAMPLES_DIR, 'sample_ecu_manifest_TCUdemocar.der'), 'rb').read(),
+          DATATYPE_ECU_MANIFEST)
+
+    signed = sample_ecu_manifest['signed']
+    good_signature = sample_ecu_manifest['signatures'][0]
+
+    # A different manifest, signed by a different key.
+    other_manifest = tuf.formats.make_signable(copy.deepcopy(signed))
+    other_manifest['signed']['attacks_detected'] = 'some attack detected'
+    common.sign_signable(
+        other_manifest, [keys_pri['primary']], DATATYPE_ECU_MANIFEST)
+
+    # A signature by the right key, over different data.
+    bad_signature = other_manifest['signatures'][0]
+
+    # A signature whose value has been corrupted.
+    corrupt_signature = copy.deepcopy(good_signature)
+    corrupt_signature['sig'] = '1234567890abcdef' + corrupt_signature['sig'][16:]
+
+    signatures_to_verify = [
+        (keys_pub['secondary'], good_signature, signed),
+        (keys_pub['primary'], bad_signature, signed),
+        (keys_pub['primary'], bad_signature, other_manifest['signed']),
+        (keys_pub['secondary'], corrupt_signature, signed),
+        # The key does not match the keyid listed in the signature.
+        (keys_pub['primary'], good_signature, signed),
+        (keys_pub['secondary'], good_signature, signed)]
+
+    expected = [common.verify_signature_over_metadata(key, signature, data,
+        DATATYPE_ECU_MANIFEST) for key, signature, data in signatures_to_verify]
+
+    self.assertEqual([True, False, True, False, False, True], expected)
+    self.assertEqual(expected, common.verify_signatures_over_metadata(
+        signatures_to_verify, DATATYPE_ECU_MANIFEST))
+
+    # An empty batch is fine.
+    self.assertEqual([], common.verify_signatures_over_metadata(
+        [], DATATYPE_ECU_MANIFEST))
+
+    # Improperly formatted keys or signatures are rejected.
+    with self.assertRaises(tuf.FormatError):
+      common.verify_signatures_over_metadata(
+          [('not a key', good_signature, signed)], DATATYPE_ECU_MANIFEST)
+    with self.assertRaises(tuf.FormatError):
+      common.verify_signatures_over_metadata(
+          [(keys_pub['secondary'], 'not a signature', signed)],
+          DATATYPE_ECU_MANIFEST)
+
+
+
+
+
   def test_canonical_key_funcs(self):
     """
     Tests:
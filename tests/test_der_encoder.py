@@ -12,6 +12,7 @@ from __future__ import unicode_literals
 import uptane # Import before TUF modules; may change tuf.conf values.
 import tuf.formats
 import tuf.keys
+import tuf.asn1_codec
 import tuf.repository_tool as repo_tool
 import uptane.formats
 import uptane.common
@@ -504,6 +505,168 @@ class TestASN1(unittest.TestCase):
 
 
 
+  def test_21_vehicle_manifest_signed_digests(self):
+    """
+    Decoding a DER Vehicle Manifest remembers the digests of the original DER
+    encodings of its 'signed' portion and of those of the ECU Manifests in it,
+    which are then used to check signatures over them.
+    """
+    # Sign an ECU Manifest and add it to a Vehicle Manifest, after another from
+    # the same ECU.
+    ecu_manifest = asn1_codec.convert_signed_der_to_dersigned_json(
+        asn1_codec.convert_signed_metadata_to_der(
+        SAMPLE_ECU_MANIFEST_SIGNABLE, DATATYPE_ECU_MANIFEST, resign=True,
+        private_key=test_signing_key), DATATYPE_ECU_MANIFEST)
+    vehicle_manifest = copy.deepcopy(SAMPLE_VEHICLE_MANIFEST_SIGNABLE)
+    vehicle_manifest['signed']['ecu_version_manifests'][
+        ecu_manifest['signed']['ecu_serial']].append(ecu_manifest)
+
+    vehicle_manifest_der = asn1_codec.convert_signed_metadata_to_der(
+        vehicle_manifest, DATATYPE_VEHICLE_MANIFEST)
+    vehicle_manifest = asn1_codec.convert_signed_der_to_dersigned_json(
+        vehicle_manifest_der, DATATYPE_VEHICLE_MANIFEST)
+
+    self.assertEqual(
+        hashlib.sha256(asn1_codec.convert_signed_metadata_to_der(
+        vehicle_manifest, DATATYPE_VEHICLE_MANIFEST, only_signed=True)).digest(),
+        tuf.asn1_codec.get_cached_signed_digest(vehicle_manifest['signed']))
+
+    ecu_manifests = [ecu_manifest for ecu_manifests in
+        vehicle_manifest['signed']['ecu_version_manifests'].values()
+        for ecu_manifest in ecu_manifests]
+    self.assertTrue(len(ecu_manifests) > 1)
+
+    for ecu_manifest in ecu_manifests:
+      self.assertEqual(
+          hashlib.sha256(asn1_codec.convert_signed_metadata_to_der(
+          ecu_manifest, DATATYPE_ECU_MANIFEST, only_signed=True)).digest(),
+          tuf.asn1_codec.get_cached_signed_digest(ecu_manifest['signed']))
+
+  # Signatures are checked the same way with or without the cached digests.
+    ecu_manifest = vehicle_manifest['signed']['ecu_version_manifests'][
+        SAMPLE_ECU_MANIFEST_SIGNABLE['signed']['ecu_serial']][-1]
+    other_key = demo.import_public_key('secondary')
+    ecu_manifest_copy = copy.deepcopy(ecu_manifest)
+    self.assertIsNone(
+        tuf.asn1_codec.get_cached_signed_digest(ecu_manifest_copy['signed']))
+
+    for manifest in [ecu_manifest, ecu_manifest_copy]:
+      self.assertEqual(
+          [True, False],
+          uptane.common.verify_signatures_over_metadata([
+          (test_signing_key, manifest['signatures'][0], manifest['signed']),
+          (other_key, manifest['signatures'][0], manifest['signed'])],
+          DATATYPE_ECU_MANIFEST, metadata_format='der'))
+
+    # A modified manifest is not checked using the cached digest.
+    ecu_manifest['signed']['attacks_detected'] = 'Modified after decoding'
+    self.assertIsNone(
+        tuf.asn1_codec.get_cached_signed_digest(ecu_manifest['signed']))
+    self.assertFalse(uptane.common.verify_signature_over_metadata(
+        test_signing_key, ecu_manifest['signatures'][0], ecu_manifest['signed'],
+        DATATYPE_ECU_MANIFEST, metadata_format='der'))
+
+
+
+
+
+  def test_22_der_coder_matches_pyasn1(self):
+    """
+    The hand-written DER coder (uptane.encoding.der_coder) produces the same
+    DER as pyasn1 does, and decodes DER to the same dictionaries.
+    """
+    attestation = {
+        'signed': {'nonces': [0, 1, 127, 128, 255, 256, 2**31 - 1],
+        'time': '2017-05-18T16:23:13Z'},
+        'signatures': SAMPLE_ECU_MANIFEST_SIGNABLE['signatures']}
+    ecu_manifest = copy.deepcopy(SAMPLE_ECU_MANIFEST_SIGNABLE)
+    ecu_manifest['signed']['attacks_detected'] = 'x' * 300
+    ecu_manifest['signed']['installed_image']['fileinfo']['hashes'][
+        'sha384'] = 'ab' * 48
+    vehicle_manifest = copy.deepcopy(SAMPLE_VEHICLE_MANIFEST_SIGNABLE)
+    other_ecu_manifest = copy.deepcopy(ecu_manifest)
+    other_ecu_manifest['signed']['ecu_serial'] = '33333'
+    vehicle_manifest['signed']['ecu_version_manifests']['33333'] = [
+        other_ecu_manifest, other_ecu_manifest]
+    vehicle_manifest['signatures'] = []
+
+    signables = [(attestation, DATATYPE_TIME_ATTESTATION),
+        (ecu_manifest, DATATYPE_ECU_MANIFEST),
+        (vehicle_manifest, DATATYPE_VEHICLE_MANIFEST)]
+
+    for datatype, name in [(DATATYPE_TIME_ATTESTATION, 'timeserver_attestation'),
+        (DATATYPE_ECU_MANIFEST, 'ecu_manifest'),
+        (DATATYPE_VEHICLE_MANIFEST, 'vehicle_manifest')]:
+      der_fname = os.path.join(uptane.WORKING_DIR, 'samples', 'sample_' + name +
+          '.der')
+      with open(der_fname, 'rb') as der_fileobj:
+        der_data = der_fileobj.read()
+      signables.append((asn1_codec.convert_signed_der_to_dersigned_json(
+          der_data, datatype), datatype))
+
+    try:
+      for signable, datatype in signables:
+        results = []
+        for use_pyasn1 in [True, False]:
+          asn1_codec.USE_PYASN1 = use_pyasn1
+          signed_der = asn1_codec.convert_signed_metadata_to_der(
+              signable, datatype, only_signed=True)
+          signable_der = asn1_codec.convert_signed_metadata_to_der(
+              signable, datatype)
+          results.append((signed_der, signable_der,
+              asn1_codec.convert_signed_der_to_dersigned_json(
+              signable_der, datatype)))
+
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(signable, results[1][2])
+
+    finally:
+      asn1_codec.USE_PYASN1 = False
+
+
+
+
+
+  def test_23_der_coder_errors(self):
+    """
+    The hand-written DER coder enforces the constraints in the ASN.1
+    definitions, and rejects malformed DER.
+    """
+    for field, value in [('ecu_serial', 'x' * 257),
+        ('attacks_detected', 'x' * 1025),
+        ('timeserver_time', '1970-01-01T00:00:00Z')]:
+      ecu_manifest = copy.deepcopy(SAMPLE_ECU_MANIFEST_SIGNABLE)
+      ecu_manifest['signed'][field] = value
+      with self.assertRaises(uptane.FailedToEncodeASN1DER):
+        asn1_codec.convert_signed_metadata_to_der(
+            ecu_manifest, DATATYPE_ECU_MANIFEST)
+
+    ecu_manifest = copy.deepcopy(SAMPLE_ECU_MANIFEST_SIGNABLE)
+    ecu_manifest['signed']['installed_image']['fileinfo']['hashes'] = {
+        'md5': 'ab'}
+    with self.assertRaises(uptane.FailedToEncodeASN1DER):
+      asn1_codec.convert_signed_metadata_to_der(
+          ecu_manifest, DATATYPE_ECU_MANIFEST)
+
+    der_data = asn1_codec.convert_signed_metadata_to_der(
+        SAMPLE_ECU_MANIFEST_SIGNABLE, DATATYPE_ECU_MANIFEST)
+
+    # Truncated data, a wrong tag, an indefinite length, and the wrong type of
+    # metadata
+    for bad_der_data in [der_data[:-1], b'\x31' + der_data[1:],
+        b'\x30\x80' + der_data[2:]]:
+      with self.assertRaises(uptane.FailedToDecodeASN1DER):
+        asn1_codec.convert_signed_der_to_dersigned_json(
+            bad_der_data, DATATYPE_ECU_MANIFEST)
+
+    with self.assertRaises(uptane.FailedToDecodeASN1DER):
+      asn1_codec.convert_signed_der_to_dersigned_json(
+          der_data, DATATYPE_VEHICLE_MANIFEST)
+
+
+
+
+
 
 def conversion_tester(signable_pydict, datatype, cls): # cls: clunky
   """
@@ -496,9 +496,25 @@ class TestDirector(unittest.TestCase):
 
 
 
-    # Try a normal vehicle manifest submission, expecting success.
-    TestDirector.instance.register_vehicle_manifest(
-        'democar', 'INFOdemocar', manifest)
+    # Try a normal vehicle manifest submission, expecting success. In DER
+    # mode, the signatures are checked using the digests of the original DER
+    # encodings, so the received manifest is never re-encoded.
+    convert_signed_metadata_to_der = asn1_codec.convert_signed_metadata_to_der
+    encoded_datatypes = []
+
+    def recording_convert_signed_metadata_to_der(signable, datatype, **kwargs):
+      encoded_datatypes.append(datatype)
+      return convert_signed_metadata_to_der(signable, datatype, **kwargs)
+
+    asn1_codec.convert_signed_metadata_to_der = \
+        recording_convert_signed_metadata_to_der
+    try:
+      TestDirector.instance.register_vehicle_manifest(
+          'democar', 'INFOdemocar', manifest)
+    finally:
+      asn1_codec.convert_signed_metadata_to_der = convert_signed_metadata_to_der
+
+    self.assertEqual([], encoded_datatypes)
 
     # Make sure that the vehicle manifest now shows up in the
     # inventorydb, that the various get functions return its data, and that
@@ -0,0 +1,319 @@
+"""
+<Program Name>
+  test_inventorydb.py
+
+<Purpose>
+  Unit testing for the storage backends of uptane/services/inventorydb.py.
+  (The module's public functions are exercised more broadly, through the
+  Director, in test_director.py.)
+
+<Copyright>
+  See LICENSE for licensing information.
+"""
+from __future__ import unicode_literals
+
+import uptane # Import before TUF modules; may change tuf.conf values.
+
+import unittest
+import os.path
+import shutil
+import copy
+import json
+import threading
+
+import tuf
+
+import uptane.services.inventorydb as inventory
+
+# For temporary convenience:
+import demo # for import_public_key
+
+TEST_DATA_DIR = os.path.join(uptane.WORKING_DIR, 'tests', 'test_data')
+TEST_INVENTORY_DIR = os.path.join(TEST_DATA_DIR, 'temp_test_inventorydb')
+SAMPLES_DIR = os.path.join(uptane.WORKING_DIR, 'samples')
+
+VIN = 'democar'
+PRIMARY_SERIAL = 'INFOdemocar'
+SECONDARY_SERIAL = 'TCUdemocar'
+
+
+def destroy_temp_dir():
+  # Clean up anything that may currently exist in the temp test directory.
+  if os.path.exists(TEST_INVENTORY_DIR):
+    shutil.rmtree(TEST_INVENTORY_DIR)
+
+
+
+
+
+class TestInventoryDB(unittest.TestCase):
+  """
+  "unittest"-style test class for the storage backends of the InventoryDB.
+
+  Each test is run against a fresh backend, which is restored to the module's
+  previous backend afterwards.
+  """
+
+  @classmethod
+  def setUpClass(cls):
+    destroy_temp_dir()
+    os.makedirs(TEST_INVENTORY_DIR)
+
+    cls.primary_key = demo.import_public_key('primary')
+    cls.secondary_key = demo.import_public_key('secondary')
+
+    with open(os.path.join(
+        SAMPLES_DIR, 'sample_vehicle_manifest.json')) as fobj:
+      cls.vehicle_manifest = json.load(fobj)
+
+    with open(os.path.join(
+        SAMPLES_DIR, 'sample_ecu_manifest_TCUdemocar.json')) as fobj:
+      cls.ecu_manifest = json.load(fobj)
+
+
+
+
+
+  @classmethod
+  def tearDownClass(cls):
+    destroy_temp_dir()
+
+
+
+
+
+  def setUp(self):
+    self.previous_backend = inventory.get_backend()
+
+
+
+
+
+  def tearDown(self):
+    backend = inventory.get_backend()
+    inventory.set_backend(self.previous_backend)
+    if isinstance(backend, inventory.SQLiteInventory):
+      backend.close()
+
+
+
+
+
+  def backends(self):
+    """
+    Returns a fresh backend of each type, in (name, backend) tuples.
+    """
+    db_fname = os.path.join(TEST_INVENTORY_DIR, 'inventory.sqlite')
+    if os.path.exists(db_fname):
+      os.remove(db_fname)
+
+    return [
+        ('InMemoryInventory', inventory.InMemoryInventory(use_globals=False)),
+        ('SQLiteInventory', inventory.SQLiteInventory(db_fname))]
+
+
+
+
+
+  def register_democar(self):
+    inventory.register_vehicle(VIN)
+    inventory.register_ecu(True, VIN, PRIMARY_SERIAL, self.primary_key)
+    inventory.register_ecu(False, VIN, SECONDARY_SERIAL, self.secondary_key)
+
+
+
+
+
+  def test_01_registration(self):
+
+    ecus_by_vin_before = copy.deepcopy(inventory.ecus_by_vin)
+
+    for name, backend in self.backends():
+      inventory.set_backend(backend)
+      self.assertIs(backend, inventory.get_backend())
+
+      with self.assertRaises(uptane.UnknownVehicle):
+        inventory.check_vin_registered(VIN)
+      with self.assertRaises(uptane.UnknownECU):
+        inventory.get_ecu_public_key(PRIMARY_SERIAL)
+
+      self.register_democar()
+
+      self.assertEqual([VIN], inventory.get_registered_vins(), name)
+      self.assertEqual([PRIMARY_SERIAL, SECONDARY_SERIAL],
+          inventory.get_ecus_in_vehicle(VIN), name)
+      self.assertEqual(PRIMARY_SERIAL, inventory.get_primary_ecu(VIN), name)
+      self.assertEqual(self.primary_key,
+          inventory.get_ecu_public_key(PRIMARY_SERIAL), name)
+      self.assertEqual(self.secondary_key,
+          inventory.get_ecu_public_key(SECONDARY_SERIAL), name)
+
+      # Registering again without overwriting is refused.
+      with self.assertRaises(uptane.Spoofing):
+        inventory.register_vehicle(VIN, overwrite=False)
+      with self.assertRaises(uptane.Spoofing):
+        inventory.register_ecu(True, VIN, 'ecu00000', self.primary_key,
+            overwrite=False)
+      with self.assertRaises(uptane.Spoofing):
+        inventory.register_ecu(False, VIN, SECONDARY_SERIAL,
+            self.primary_key, overwrite=False)
+
+      # An ECU is never listed twice for the same vehicle.
+      inventory.register_ecu(False, VIN, SECONDARY_SERIAL, self.primary_key)
+      self.assertEqual([PRIMARY_SERIAL, SECONDARY_SERIAL],
+          inventory.get_ecus_in_vehicle(VIN), name)
+      self.assertEqual(self.primary_key,
+          inventory.get_ecu_public_key(SECONDARY_SERIAL), name)
+
+    # The in-memory reference backend was not using the module's globals.
+    self.assertEqual(ecus_by_vin_before, inventory.ecus_by_vin)
+
+
+
+
+
+  def test_02_save_and_get_manifests(self):
+
+    for name, backend in self.backends():
+      inventory.set_backend(backend)
+      self.register_democar()
+
+      self.assertIsNone(inventory.get_last_vehicle_manifest(VIN))
+      self.assertIsNone(inventory.get_last_ecu_manifest(SECONDARY_SERIAL))
+
+      inventory.save_vehicle_manifest(VIN, self.vehicle_manifest)
+      inventory.save_ecu_manifests(VIN, [
+          (SECONDARY_SERIAL, self.ecu_manifest),
+          (SECONDARY_SERIAL, self.ecu_manifest)])
+      inventory.save_ecu_manifest(VIN, SECONDARY_SERIAL, self.ecu_manifest)
+
+      self.assertEqual([self.vehicle_manifest],
+          inventory.get_vehicle_manifests(VIN), name)
+      self.assertEqual(self.vehicle_manifest,
+          inventory.get_last_vehicle_manifest(VIN), name)
+      self.assertEqual([self.ecu_manifest] * 3,
+          inventory.get_ecu_manifests(SECONDARY_SERIAL), name)
+      self.assertEqual(self.ecu_manifest,
+          inventory.get_last_ecu_manifest(SECONDARY_SERIAL), name)
+      self.assertEqual(
+          {PRIMARY_SERIAL: [], SECONDARY_SERIAL: [self.ecu_manifest] * 3},
+          inventory.get_all_ecu_manifests_from_vehicle(VIN))
+
+      # Nothing in a batch is saved if any of it is invalid.
+      with self.assertRaises(uptane.UnknownECU):
+        inventory.save_ecu_manifests(VIN, [
+            (SECONDARY_SERIAL, self.ecu_manifest),
+            ('ecu00000', self.ecu_manifest)])
+      with self.assertRaises(tuf.FormatError):
+        inventory.save_ecu_manifests(VIN, [
+            (SECONDARY_SERIAL, self.ecu_manifest),
+            (SECONDARY_SERIAL, self.vehicle_manifest)])
+      self.assertEqual(3,
+          len(inventory.get_ecu_manifests(SECONDARY_SERIAL)), name)
+
+      # Re-registering an ECU discards its manifests.
+      inventory.register_ecu(False, VIN, SECONDARY_SERIAL, self.secondary_key)
+      self.assertEqual([], inventory.get_ecu_manifests(SECONDARY_SERIAL))
+
+
+
+
+
+  def test_03_manifest_retention(self):
+
+    for name, backend in self.backends():
+      backend.max_manifests_per_vehicle = 2
+      backend.max_manifests_per_ecu = 3
+      inventory.set_backend(backend)
+      self.register_democar()
+
+      # Tell the manifests apart by a field the schemas do not restrict.
+      for i in range(5):
+        vehicle_manifest = dict(self.vehicle_manifest, number=i)
+        inventory.save_vehicle_manifest(VIN, vehicle_manifest)
+        ecu_manifest = dict(self.ecu_manifest, number=i)
+        inventory.save_ecu_manifests(VIN,
+            [(SECONDARY_SERIAL, ecu_manifest), (SECONDARY_SERIAL, ecu_manifest)])
+
+      self.assertEqual([3, 4], [m['number'] for m in
+          inventory.get_vehicle_manifests(VIN)], name)
+      self.assertEqual([3, 4, 4], [m['number'] for m in
+          inventory.get_ecu_manifests(SECONDARY_SERIAL)], name)
+      self.assertEqual(4,
+          inventory.get_last_ecu_manifest(SECONDARY_SERIAL)['number'], name)
+
+
+
+
+
+  def test_04_sqlite_persistence(self):
+
+    db_fname = os.path.join(TEST_INVENTORY_DIR, 'persistent.sqlite')
+
+    backend = inventory.SQLiteInventory(db_fname)
+    inventory.set_backend(backend)
+    self.register_democar()
+    inventory.save_vehicle_manifest(VIN, self.vehicle_manifest)
+    inventory.save_ecu_manifest(VIN, SECONDARY_SERIAL, self.ecu_manifest)
+    backend.close()
+
+    # Everything is still there when the database is opened again.
+    inventory.set_backend(inventory.SQLiteInventory(db_fname))
+    self.assertEqual([VIN], inventory.get_registered_vins())
+    self.assertEqual(PRIMARY_SERIAL, inventory.get_primary_ecu(VIN))
+    self.assertEqual(self.secondary_key,
+        inventory.get_ecu_public_key(SECONDARY_SERIAL))
+    self.assertEqual([self.vehicle_manifest],
+        inventory.get_vehicle_manifests(VIN))
+    self.assertEqual([self.ecu_manifest],
+        inventory.get_ecu_manifests(SECONDARY_SERIAL))
+
+
+
+
+
+  def test_05_concurrent_use(self):
+
+    for name, backend in self.backends():
+      backend.max_manifests_per_ecu = 10
+      inventory.set_backend(backend)
+      self.register_democar()
+
+      errors = []
+
+      def save_manifests(thread_number):
+        try:
+          # Each thread also registers (and re-registers) an ECU of its own.
+          ecu_serial = 'ecu' + str(thread_number)
+          for i in range(20):
+            inventory.register_ecu(False, VIN, ecu_serial, self.secondary_key)
+            inventory.save_vehicle_manifest(VIN, self.vehicle_manifest)
+            inventory.save_ecu_manifests(VIN, [
+                (SECONDARY_SERIAL, self.ecu_manifest),
+                (ecu_serial, self.ecu_manifest)])
+            inventory.get_all_ecu_manifests_from_vehicle(VIN)
+        except Exception as e:
+          errors.append(e)
+
+      threads = [threading.Thread(target=save_manifests, args=(i,))
+          for i in range(8)]
+      for thread in threads:
+        thread.start()
+      for thread in threads:
+        thread.join()
+
+      self.assertEqual([], errors, name)
+      self.assertEqual(160, len(inventory.get_vehicle_manifests(VIN)), name)
+      self.assertEqual(10,
+          len(inventory.get_ecu_manifests(SECONDARY_SERIAL)), name)
+      self.assertEqual(10, len(inventory.get_ecus_in_vehicle(VIN)), name)
+      for i in range(8):
+        # Each ECU was re-registered, discarding its manifests, just before
+        # its last manifest was saved.
+        self.assertEqual(1, len(inventory.get_ecu_manifests('ecu' + str(i))))
+
+
+
+
+if __name__ == '__main__':
+  unittest.main()
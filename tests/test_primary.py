@@ -18,6 +18,7 @@ import time
 import copy
 import shutil
 import hashlib
+import zipfile
 import iso8601
 
 from six.moves.urllib.error import URLError
@@ -673,8 +674,23 @@ class TestPrimary(unittest.TestCase):
 
   def test_25_generate_signed_vehicle_manifest(self):
 
+    # If the vehicle manifest cannot be signed, the ECU Manifests received are
+    # kept for the next attempt.
+    ecu_manifests = copy.deepcopy(TestPrimary.instance.ecu_manifests)
+    primary_key = TestPrimary.instance.primary_key
+    TestPrimary.instance.primary_key = 'not a key'
+    try:
+      with self.assertRaises(tuf.FormatError):
+        TestPrimary.instance.generate_signed_vehicle_manifest()
+    finally:
+      TestPrimary.instance.primary_key = primary_key
+    self.assertEqual(ecu_manifests, TestPrimary.instance.ecu_manifests)
+
     vehicle_manifest = TestPrimary.instance.generate_signed_vehicle_manifest()
 
+    # Once they are in a signed vehicle manifest, they are discarded.
+    self.assertEqual(dict(), TestPrimary.instance.ecu_manifests)
+
     # If the vehicle manifest is in DER format, check its format and then
     # convert back to JSON so that we can inspect it further.
     if tuf.conf.METADATA_FORMAT == 'der':
@@ -887,6 +903,142 @@ class TestPrimary(unittest.TestCase):
 
 
 
+  def test_63_save_distributable_metadata_files(self):
+
+    instance = TestPrimary.instance
+    instance.refresh_toplevel_metadata()
+    instance.save_distributable_metadata_files()
+
+    archive_fname = instance.get_full_metadata_archive_fname()
+    partial_fname = instance.get_partial_metadata_fname()
+    extension = '.' + tuf.conf.METADATA_FORMAT
+    imagerepo_dir = os.path.join(
+        TEMP_CLIENT_DIR, 'metadata', 'imagerepo', 'current')
+    director_targets_fname = os.path.join(
+        TEMP_CLIENT_DIR, 'metadata', 'director', 'current', 'targets' + extension)
+
+    def archive_contents():
+      with zipfile.ZipFile(archive_fname) as archive:
+        return dict((name, archive.read(name)) for name in archive.namelist())
+
+    # The archive contains all of the current metadata, and the partial
+    # metadata file is the Director's targets metadata.
+    contents = archive_contents()
+    for repo in ['director', 'imagerepo']:
+      repo_dir = os.path.join(TEMP_CLIENT_DIR, 'metadata', repo, 'current')
+      for role_fname in os.listdir(repo_dir):
+        with open(os.path.join(repo_dir, role_fname), 'rb') as fobj:
+          self.assertEqual(fobj.read(),
+              contents.pop(os.path.join(repo, 'metadata', role_fname)))
+    self.assertEqual({}, contents)
+
+    with open(director_targets_fname, 'rb') as fobj:
+      director_targets = fobj.read()
+    with open(partial_fname, 'rb') as fobj:
+      self.assertEqual(director_targets, fobj.read())
+
+    # If the metadata has not changed, neither file is rewritten, even by a
+    # Primary that has not saved them itself (e.g. after a restart).
+    # Mark the files with an old modification time to tell.
+    for fname in [archive_fname, partial_fname]:
+      os.utime(fname, (1, 1))
+    instance.save_distributable_metadata_files()
+    instance.distributable_metadata_fingerprint = None
+    instance.save_distributable_metadata_files()
+    for fname in [archive_fname, partial_fname]:
+      self.assertEqual(1, os.stat(fname).st_mtime)
+
+    # If the metadata changes, the files are rewritten.
+    extra_fname = os.path.join(imagerepo_dir, 'extra' + extension)
+    with open(extra_fname, 'wb') as fobj:
+      fobj.write(b'extra metadata')
+    instance.save_distributable_metadata_files()
+    self.assertNotEqual(1, os.stat(archive_fname).st_mtime)
+    self.assertEqual(b'extra metadata', archive_contents()[
+        os.path.join('imagerepo', 'metadata', 'extra' + extension)])
+
+    os.remove(extra_fname)
+    instance.save_distributable_metadata_files()
+    self.assertNotIn(os.path.join('imagerepo', 'metadata', 'extra' + extension),
+        archive_contents())
+
+    # Files of other types are not expected in the metadata directories.
+    junk_fname = os.path.join(imagerepo_dir, 'junk.txt')
+    with open(junk_fname, 'wb') as fobj:
+      fobj.write(b'junk')
+    try:
+      with self.assertRaises(uptane.Error):
+        instance.save_distributable_metadata_files()
+    finally:
+      os.remove(junk_fname)
+
+
+
+
+
+  def test_64_get_image_chunk_for_ecu(self):
+
+    instance = TestPrimary.instance
+    ecu_serial = 'secondary_with_large_image'
+    image_fname = 'large_image.img'
+    image = os.urandom(primary.IMAGE_CHUNK_SIZE * 2 + 100)
+
+    with self.assertRaises(uptane.UnknownECU):
+      instance.get_image_chunk_for_ecu(ecu_serial)
+
+    instance.register_new_secondary(ecu_serial)
+    self.assertIsNone(instance.get_image_chunk_for_ecu(ecu_serial))
+
+    targets_dir = os.path.join(TEMP_CLIENT_DIR, 'targets')
+    if not os.path.exists(targets_dir):
+      os.makedirs(targets_dir)
+    with open(os.path.join(targets_dir, image_fname), 'wb') as fobj:
+      fobj.write(image)
+    instance.assigned_targets[ecu_serial] = {'filepath': '/' + image_fname,
+        'fileinfo': {'length': len(image),
+        'hashes': {'sha256': hashlib.sha256(image).hexdigest()}}}
+
+    # Asking for no data gives the name and length of the image.
+    image_chunk = instance.get_image_chunk_for_ecu(ecu_serial, 0, 0)
+    uptane.formats.IMAGE_CHUNK_SCHEMA.check_match(image_chunk)
+    self.assertEqual(image_fname, image_chunk['filepath'])
+    self.assertEqual(len(image), image_chunk['length'])
+    self.assertEqual(b'', image_chunk['data'])
+
+    # Read the image back one chunk at a time.
+    received = b''
+    while len(received) < len(image):
+      image_chunk = instance.get_image_chunk_for_ecu(ecu_serial, len(received))
+      uptane.formats.IMAGE_CHUNK_SCHEMA.check_match(image_chunk)
+      self.assertEqual(len(received), image_chunk['offset'])
+      self.assertTrue(len(image_chunk['data']) <= primary.IMAGE_CHUNK_SIZE)
+      self.assertEqual(hashlib.sha256(image_chunk['data']).hexdigest(),
+          image_chunk['hashes']['sha256'])
+      received += image_chunk['data']
+    self.assertEqual(image, received)
+
+    # Ranges may start anywhere in the file, and are cut short at its end.
+    self.assertEqual(image[5:15],
+        instance.get_image_chunk_for_ecu(ecu_serial, 5, 10)['data'])
+    self.assertEqual(image[-3:],
+        instance.get_image_chunk_for_ecu(ecu_serial, len(image) - 3)['data'])
+    self.assertEqual(b'',
+        instance.get_image_chunk_for_ecu(ecu_serial, len(image))['data'])
+
+    with self.assertRaises(uptane.Error):
+      instance.get_image_chunk_for_ecu(ecu_serial, len(image) + 1)
+    with self.assertRaises(uptane.Error):
+      instance.get_image_chunk_for_ecu(
+          ecu_serial, 0, primary.MAX_IMAGE_CHUNK_SIZE + 1)
+    with self.assertRaises(tuf.FormatError):
+      instance.get_image_chunk_for_ecu(ecu_serial, -1)
+
+    del instance.assigned_targets[ecu_serial]
+
+
+
+
+
   def test_65_get_metadata_for_ecu(self):
     pass
 
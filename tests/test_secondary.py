@@ -16,15 +16,19 @@ import uptane # Import before TUF modules; may change tuf.conf values.
 import unittest
 import os.path
 import time
+import copy
 import shutil
 import hashlib
+import threading
 import iso8601
+import six
 
 from six.moves.urllib.error import URLError
 
 import tuf
 import tuf.formats
 import tuf.conf
+import tuf.util
 import tuf.client.updater
 
 import uptane.formats
@@ -727,6 +731,162 @@ class TestSecondary(unittest.TestCase):
 
 
 
+  def test_45_multi_repository_target(self):
+
+    updater = secondary_instances[0].updater
+
+    # Both required repositories provide matching target info.
+    target_info = updater.target('TCU1.1.txt', multi_custom=True)
+    self.assertEqual(['director', 'imagerepo'], sorted(target_info))
+    self.assertTrue(tuf.client.updater.target_info_is_equal(
+        target_info['director']['fileinfo'],
+        target_info['imagerepo']['fileinfo']))
+
+    with self.assertRaises(tuf.UnknownTargetError):
+      updater.target('some_target_that_does_not_exist.txt')
+
+    # As soon as one repository does not know the target, the pinning is
+    # abandoned without waiting for the other repository to answer.
+    image_repo_updater = updater.repositories['imagerepo']
+    image_repo_answered = threading.Event()
+
+    def slow_target(target_filepath):
+      image_repo_answered.wait(10)
+      return image_repo_updater.__class__.target(
+          image_repo_updater, target_filepath)
+
+    image_repo_updater.target = slow_target
+    try:
+      with self.assertRaises(tuf.UnknownTargetError):
+        updater.target('some_target_that_does_not_exist.txt')
+      self.assertFalse(image_repo_answered.is_set())
+
+    finally:
+      image_repo_answered.set()
+      del image_repo_updater.target
+
+    # The abandoned lookup finishes before the repository is used again.
+    self.assertEqual(target_info, updater.target('TCU1.1.txt',
+        multi_custom=True))
+
+
+
+
+
+  def test_46_multi_target_lookup(self):
+
+    updater = secondary_instances[0].updater
+
+    # targets() agrees with target() for each target, leaving out unknown ones.
+    target_filepaths = ['TCU1.1.txt', 'some_target_that_does_not_exist.txt']
+    validated_targets = updater.targets(target_filepaths, multi_custom=True)
+    self.assertEqual(['TCU1.1.txt'], list(validated_targets))
+    self.assertEqual(updater.target('TCU1.1.txt', multi_custom=True),
+        validated_targets['TCU1.1.txt'])
+    # Without multi_custom, the target info from any one of the repositories.
+    self.assertIn(updater.targets(target_filepaths)['TCU1.1.txt'],
+        list(validated_targets['TCU1.1.txt'].values()))
+
+    with self.assertRaises(tuf.FormatError):
+      updater.targets('TCU1.1.txt')
+
+    # Each repository is asked once for all the targets.
+    image_repo_updater = updater.repositories['imagerepo']
+    image_repo_lookups = []
+
+    def recording_targets(target_filepaths):
+      image_repo_lookups.append(sorted(target_filepaths))
+      return image_repo_updater.__class__.targets(
+          image_repo_updater, target_filepaths)
+
+    image_repo_updater.targets = recording_targets
+    try:
+      updater._validated_targets_snapshots = None
+      updater.targets(target_filepaths + ['TCU1.1.txt'])
+      self.assertEqual([sorted(target_filepaths)], image_repo_lookups)
+
+      # While the snapshot metadata is unchanged, the results are remembered.
+      self.assertEqual(validated_targets,
+          updater.targets(target_filepaths, multi_custom=True))
+      self.assertEqual(1, len(image_repo_lookups))
+
+      # New snapshot metadata means looking the targets up again.
+      current_metadata = image_repo_updater.metadata['current']
+      snapshot = current_metadata['snapshot']
+      current_metadata['snapshot'] = copy.deepcopy(snapshot)
+      try:
+        self.assertEqual(validated_targets,
+            updater.targets(target_filepaths, multi_custom=True))
+        self.assertEqual(2, len(image_repo_lookups))
+
+      finally:
+        current_metadata['snapshot'] = snapshot
+
+    finally:
+      del image_repo_updater.targets
+
+
+
+
+
+  def test_47_conditional_timestamp_request(self):
+
+    # Serve the first Secondary's unverified metadata over HTTP, recording the
+    # path and status of each response.
+    responses = []
+    unverified_dir = os.path.join(TEMP_CLIENT_DIRS[0], 'unverified')
+
+    class RecordingHandler(
+        six.moves.SimpleHTTPServer.SimpleHTTPRequestHandler):
+      protocol_version = 'HTTP/1.1'
+
+      def translate_path(self, path):
+        return os.path.join(unverified_dir, path.lstrip('/'))
+
+      def log_request(self, code='-', size='-'):
+        responses.append((self.path, int(code)))
+
+    class ThreadingServer(six.moves.socketserver.ThreadingMixIn,
+        six.moves.BaseHTTPServer.HTTPServer):
+      daemon_threads = True
+
+    server = ThreadingServer(('localhost', 0), RecordingHandler)
+    server_thread = threading.Thread(target=server.serve_forever)
+    server_thread.daemon = True
+    server_thread.start()
+
+    director_updater = secondary_instances[0].updater.repositories['director']
+    file_mirrors = director_updater.mirrors
+    director_updater.mirrors = [
+        'http://localhost:' + str(server.server_address[1]) + '/director']
+    timestamp_path = '/director/metadata/timestamp.' + tuf.conf.METADATA_FORMAT
+
+    try:
+      # The first request is unconditional, and its validators are saved.
+      secondary_instances[0].updater.refresh(repo_name='director')
+      self.assertIn((timestamp_path, 200), responses)
+      self.assertEqual([director_updater.mirrors[0] + '/metadata/timestamp.' +
+          tuf.conf.METADATA_FORMAT], list(director_updater.http_validators))
+      self.assertEqual(director_updater.http_validators,
+          tuf.util.load_json_file(director_updater.http_validators_filepath))
+
+      # Afterwards, the unchanged timestamp metadata is not downloaded again.
+      del responses[:]
+      timestamp = director_updater.metadata['current']['timestamp']
+      secondary_instances[0].updater.refresh(repo_name='director')
+      self.assertEqual([(timestamp_path, 304)], responses)
+      self.assertIs(timestamp,
+          director_updater.metadata['current']['timestamp'])
+
+    finally:
+      director_updater.mirrors = file_mirrors
+      server.shutdown()
+      server.server_close()
+
+
+
+
+
   def test_50_validate_image(self):
 
     image_fname = 'TCU1.1.txt'
@@ -752,6 +912,92 @@ class TestSecondary(unittest.TestCase):
 
 
 
+  def test_55_image_transfer(self):
+
+    image_fname = 'TCU1.1.txt'
+    with open(os.path.join(demo.DEMO_DIR, 'images', image_fname), 'rb') as fobj:
+      image = fobj.read()
+    instance = secondary_instances[0]
+    client_unverified_targets_dir = TEMP_CLIENT_DIRS[0] + '/unverified_targets'
+    full_image_fname = os.path.join(client_unverified_targets_dir, image_fname)
+    partial_image_fname = full_image_fname + '.partial'
+
+    if os.path.exists(client_unverified_targets_dir):
+      shutil.rmtree(client_unverified_targets_dir)
+
+    def image_chunk(offset, data, hashed_data=None):
+      # As Primary.get_image_chunk_for_ecu() would provide it.
+      if hashed_data is None:
+        hashed_data = data
+      return {'filepath': image_fname, 'length': len(image), 'offset': offset,
+          'data': data, 'hashes': {'sha256': hashlib.sha256(hashed_data).hexdigest()}}
+
+    # No transfer has begun.
+    with self.assertRaises(uptane.Error):
+      instance.receive_image_chunk(image_chunk(0, image[:10]))
+    with self.assertRaises(uptane.Error):
+      instance.finish_image_transfer()
+
+    # There is no validated target info for this image for other ECUs.
+    with self.assertRaises(uptane.Error):
+      secondary_instances[1].begin_image_transfer(image_fname)
+
+    self.assertEqual(0, instance.begin_image_transfer(image_fname))
+    self.assertEqual(10, instance.receive_image_chunk(image_chunk(0, image[:10])))
+
+    # Chunks must arrive in order, and match the hashes provided with them.
+    with self.assertRaises(uptane.Error):
+      instance.receive_image_chunk(image_chunk(20, image[20:30]))
+    with self.assertRaises(tuf.BadHashError):
+      instance.receive_image_chunk(image_chunk(10, image[10:20], b'other data'))
+    with self.assertRaises(tuf.FormatError):
+      instance.receive_image_chunk({'offset': 10, 'data': image[10:20]})
+    unsupported_chunk = image_chunk(10, image[10:20])
+    unsupported_chunk['hashes']['md4096'] = '0123456789abcdef'
+    with self.assertRaises(tuf.FormatError):
+      instance.receive_image_chunk(unsupported_chunk)
+
+    # An interrupted transfer is resumed.
+    self.assertEqual(10, instance.begin_image_transfer(image_fname))
+    offset = 10
+    while offset < len(image):
+      offset = instance.receive_image_chunk(
+          image_chunk(offset, image[offset:offset + 7]))
+    self.assertEqual(len(image), offset)
+
+    instance.finish_image_transfer()
+    self.assertIsNone(instance.image_transfer)
+    self.assertFalse(os.path.exists(partial_image_fname))
+    with open(full_image_fname, 'rb') as fobj:
+      self.assertEqual(image, fobj.read())
+    instance.validate_image(image_fname)
+
+    # No more data is accepted than the validated target info allows.
+    self.assertEqual(0, instance.begin_image_transfer(image_fname))
+    instance.receive_image_chunk(image_chunk(0, image))
+    with self.assertRaises(tuf.DownloadLengthMismatchError):
+      instance.receive_image_chunk(image_chunk(len(image), b'x'))
+    self.assertIsNone(instance.image_transfer)
+    self.assertFalse(os.path.exists(partial_image_fname))
+
+    # An image that is too short or does not match the validated hashes is
+    # rejected and discarded.
+    instance.begin_image_transfer(image_fname)
+    instance.receive_image_chunk(image_chunk(0, image[:-1]))
+    with self.assertRaises(tuf.DownloadLengthMismatchError):
+      instance.finish_image_transfer()
+    self.assertFalse(os.path.exists(partial_image_fname))
+
+    instance.begin_image_transfer(image_fname)
+    instance.receive_image_chunk(image_chunk(0, image[:-1] + b'!'))
+    with self.assertRaises(tuf.BadHashError):
+      instance.finish_image_transfer()
+    self.assertFalse(os.path.exists(partial_image_fname))
+
+
+
+
+
 # Run unit tests.
 if __name__ == '__main__':
   unittest.main()
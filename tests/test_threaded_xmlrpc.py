@@ -0,0 +1,156 @@
+"""
+<Program Name>
+  test_threaded_xmlrpc.py
+
+<Purpose>
+  Unit testing for demo/threaded_xmlrpc.py, the XML-RPC server with a pool of
+  worker threads that serves the demo Director and Primary.
+
+<Copyright>
+  See LICENSE for licensing information.
+"""
+from __future__ import unicode_literals
+
+import uptane # Import before TUF modules; may change tuf.conf values.
+
+import unittest
+import threading
+import time
+
+from six.moves import xmlrpc_client
+
+import demo.threaded_xmlrpc as threaded_xmlrpc
+
+NUM_WORKERS = 3
+NUM_CLIENTS = 5
+
+
+def wait_until(condition, timeout=10):
+  """
+  Wait for condition() to be true, for up to timeout seconds, and return the
+  last result.
+  """
+  deadline = time.time() + timeout
+  while not condition() and time.time() < deadline:
+    time.sleep(0.01)
+  return condition()
+
+
+
+class TestThreadPoolXMLRPCServer(unittest.TestCase):
+
+  def setUp(self):
+    # A function that blocks until released, tracking how many calls to it are
+    # running at once.
+    self.lock = threading.Lock()
+    self.release = threading.Event()
+    self.running_calls = 0
+    self.max_running_calls = 0
+
+    def wait_for_release(value):
+      with self.lock:
+        self.running_calls += 1
+        self.max_running_calls = max(
+            self.max_running_calls, self.running_calls)
+      try:
+        self.release.wait(30)
+        return value
+      finally:
+        with self.lock:
+          self.running_calls -= 1
+
+    self.server = threaded_xmlrpc.ThreadPoolXMLRPCServer(
+        ('localhost', 0), num_workers=NUM_WORKERS, max_queued_requests=10,
+        logRequests=False)
+    self.server.register_function(wait_for_release)
+    self.server.register_function(self.server.get_metrics, 'get_metrics')
+    self.workers = list(self.server._workers)
+
+    self.server_thread = threading.Thread(target=self.server.serve_forever)
+    self.server_thread.daemon = True
+    self.server_thread.start()
+
+    self.url = 'http://localhost:' + str(self.server.server_address[1])
+
+
+
+
+
+  def tearDown(self):
+    self.release.set()
+    self.server.shutdown()
+    self.server.server_close()
+
+
+
+
+
+  def test_concurrent_calls(self):
+    results = {}
+
+    def call(value):
+      results[value] = xmlrpc_client.ServerProxy(self.url).wait_for_release(
+          value)
+
+    clients = [threading.Thread(target=call, args=(i,))
+        for i in range(NUM_CLIENTS)]
+    for client in clients:
+      client.daemon = True
+      client.start()
+
+    # As many calls as there are workers run at once, and the rest wait in the
+    # queue.
+    self.assertTrue(wait_until(lambda: self.running_calls == NUM_WORKERS))
+    self.assertTrue(wait_until(
+        lambda: self.server.get_metrics()['queue_depth'] ==
+        NUM_CLIENTS - NUM_WORKERS))
+
+    metrics = self.server.get_metrics()
+    self.assertEqual(NUM_WORKERS, metrics['active_workers'])
+    self.assertEqual(NUM_WORKERS, metrics['num_workers'])
+    # Requests may also have been queued briefly before a worker took them.
+    self.assertTrue(NUM_CLIENTS - NUM_WORKERS <= metrics['max_queue_depth'] <=
+        NUM_CLIENTS)
+    self.assertEqual(0, metrics['requests_handled'])
+
+    self.release.set()
+    for client in clients:
+      client.join(10)
+
+    self.assertEqual(dict((i, i) for i in range(NUM_CLIENTS)), results)
+    self.assertEqual(NUM_WORKERS, self.max_running_calls)
+
+    # A worker counts a request as handled after responding to it.
+    self.assertTrue(wait_until(
+        lambda: self.server.get_metrics()['requests_handled'] == NUM_CLIENTS))
+
+    metrics = xmlrpc_client.ServerProxy(self.url).get_metrics()
+    self.assertEqual(0, metrics['queue_depth'])
+    self.assertEqual(1, metrics['active_workers'])
+    self.assertEqual(NUM_CLIENTS, metrics['requests_handled'])
+    self.assertEqual(0, metrics['requests_failed'])
+
+
+
+
+
+  def test_server_close(self):
+    self.assertEqual(NUM_WORKERS, len(self.workers))
+    self.assertTrue(all(worker.is_alive() for worker in self.workers))
+
+    self.server.shutdown()
+    self.server.server_close()
+
+    for worker in self.workers:
+      worker.join(10)
+      self.assertFalse(worker.is_alive())
+
+    self.assertEqual([], self.server._workers)
+
+
+
+
+
+# Run unit tests.
+if __name__ == '__main__':
+  unittest.main()
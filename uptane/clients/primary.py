@@ -23,6 +23,7 @@ import uptane # Import before TUF modules; may change tuf.conf values.
 import os # For paths and makedirs
 import shutil # For copyfile
 import random # for nonces
+import threading # to lock the ECU Manifests and nonces
 import zipfile
 import hashlib # if we're using DER encoding
 import iso8601
@@ -30,6 +31,7 @@ import iso8601
 import tuf.formats
 import tuf.conf
 import tuf.keys
+import tuf.util
 import tuf.client.updater
 import tuf.repository_tool as rt
 
@@ -53,6 +55,16 @@ import time
 from demo.uptane_banners import *
 
 
+# The default and maximum number of bytes of an image file to provide to a
+# Secondary at once. See Primary.get_image_chunk_for_ecu().
+IMAGE_CHUNK_SIZE = 65536
+MAX_IMAGE_CHUNK_SIZE = 1048576
+
+# The maximum number of target files to download at once in
+# Primary.primary_update_cycle(). tuf.conf.MAX_CONCURRENT_DOWNLOADS_PER_REPOSITORY
+# further limits the number downloaded from any one repository at once.
+MAX_CONCURRENT_TARGET_DOWNLOADS = 4
+
 log = uptane.logging.getLogger('primary')
 log.addHandler(uptane.file_handler)
 log.addHandler(uptane.console_handler)
@@ -141,6 +153,11 @@ class Primary(object): # Consider inheriting from Secondary and refactoring.
       have already sent to the Timeserver. Will be checked against the
       Timeserver's response.
 
+    self.manifest_lock:
+      A lock held while self.ecu_manifests, self.nonces_to_send,
+      self.nonces_sent or self.my_secondaries are modified, since Secondaries'
+      requests may be handled concurrently (as by the demo's Primary).
+
     # TODO: Rename these two variables, valid -> verified, along with the
     #       verification functions.  Do likewise in Secondary.
     self.all_valid_timeserver_attestations:
@@ -164,6 +181,13 @@ class Primary(object): # Consider inheriting from Secondary and refactoring.
       each update cycle, once it is safe to use. This is atomically moved into
       place (renamed) after it has been fully written, to avoid race conditions.
 
+    self.distributable_metadata_fingerprint:
+      A dictionary mapping the name of each file in the full metadata archive
+      to the SHA256 hash of its contents, describing the metadata currently
+      available for distribution, or None if that is not yet known. Used by
+      save_distributable_metadata_files() to avoid rewriting the distributable
+      metadata files when the metadata has not changed.
+
 
   Methods organized by purpose: ("self" arguments excluded)
 
@@ -186,12 +210,15 @@ class Primary(object): # Consider inheriting from Secondary and refactoring.
       get_last_timeserver_attestation()
       update_exists_for_ecu(ecu_serial)
       get_image_fname_for_ecu(ecu_serial)
+      get_image_chunk_for_ecu(ecu_serial, offset, length)
       get_full_metadata_archive_fname()
       get_partial_metadata_fname()
       register_new_secondary(ecu_serial)
 
     Private methods:
       _check_ecu_serial(ecu_serial)
+      _get_distributable_metadata(metadata_base_dir)
+      _get_distributable_metadata_fingerprint(director_targets_arcname)
 
 
   Use:
@@ -307,11 +334,13 @@ class Primary(object): # Consider inheriting from Secondary and refactoring.
     self.distributable_partial_metadata_fname = os.path.join(
         full_client_dir, 'metadata', 'director_targets.' +
         tuf.conf.METADATA_FORMAT)
+    self.distributable_metadata_fingerprint = None
 
     # Initializations not directly related to arguments.
     self.nonces_to_send = []
     self.nonces_sent = []
     self.assigned_targets = dict()
+    self.manifest_lock = threading.RLock()
 
     # Initialize the dictionary of manifests. This is a dictionary indexed
     # by ECU serial and with value being a list of manifests from that ECU, to
@@ -425,7 +454,7 @@ class Primary(object): # Consider inheriting from Secondary and refactoring.
         required parties.
 
       tuf.NoWorkingMirrorError
-        will be raised by the updater.target() call here if we are unable to
+        will be raised by the updater.targets() call here if we are unable to
         validate reliable target info for the target file specified (if the
         repositories do not agree, or we could not reach them, or so on).
 
@@ -438,8 +467,13 @@ class Primary(object): # Consider inheriting from Secondary and refactoring.
     """
     tuf.formats.RELPATH_SCHEMA.check_match(target_filepath)
 
-    validated_target_info = self.updater.target(
-        target_filepath, multi_custom=True)
+    # targets() remembers the target info it validates until the metadata
+    # changes, so this is cheap for targets already validated in this cycle.
+    validated_target_info = self.updater.targets(
+        [target_filepath], multi_custom=True).get(target_filepath)
+
+    if validated_target_info is None:
+      raise tuf.UnknownTargetError(target_filepath + ' not found.')
 
     # validated_target_info will now look something like this:
     # {
@@ -542,6 +576,14 @@ class Primary(object): # Consider inheriting from Secondary and refactoring.
     # field need not match, and should not, since the Director will include
     # ECU IDs in this field, and the Image Repository cannot.
 
+    # Validate all of the directed targets at once, so that each repository's
+    # metadata is refreshed and searched once for all of them rather than once
+    # per target. get_validated_target_info() below then finds each target's
+    # validated info already remembered by the updater.
+    self.updater.targets(
+        [targetinfo['filepath'] for targetinfo in directed_targets],
+        multi_custom=True)
+
     # This will contain a list of tuf.formats.TARGETFILE_SCHEMA objects.
     verified_targets = []
     for targetinfo in directed_targets:
@@ -593,6 +635,16 @@ class Primary(object): # Consider inheriting from Secondary and refactoring.
         repr(verified_target_filepaths))
 
 
+    # Make sure the resulting filenames are actually in the client directory.
+    # (In other words, enforce a jail.)
+    # TODO: Do a proper review of this, and determine if it's necessary and
+    # how to do it properly.
+    full_targets_directory = os.path.abspath(os.path.join(
+        self.full_client_dir, 'targets'))
+
+    # This will contain the targets to download.
+    targets_to_download = []
+
     # For each target for which we have verified metadata:
     for target in verified_targets:
 
@@ -617,38 +669,47 @@ class Primary(object): # Consider inheriting from Secondary and refactoring.
       # Save the target info as an update assigned to that ECU.
       self.assigned_targets[assigned_ecu_serial] = target
 
-
-      # Make sure the resulting filename is actually in the client directory.
-      # (In other words, enforce a jail.)
-      # TODO: Do a proper review of this, and determine if it's necessary and
-      # how to do it properly.
-      full_targets_directory = os.path.abspath(os.path.join(
-          self.full_client_dir, 'targets'))
       filepath = target['filepath']
       if filepath[0] == '/':
         filepath = filepath[1:]
-      full_fname = os.path.join(full_targets_directory, filepath)
       enforce_jail(filepath, full_targets_directory)
 
-      # Download each target.
-      # Now that we have fileinfo for all targets listed by both the Director and
-      # the Image Repository -- which should include file2.txt in this test --
-      # we can download the target files and only keep each if it matches the
-      # verified fileinfo. This call will try every mirror on every repository
-      # within the appropriate delegation in pinned.json until one of them works.
-      # In this case, both the Director and Image Repo are hosting the
-      # file, just for my convenience in setup. If you remove the file from the
-      # Director before calling this, it will still work (assuming Image Repo
-      # still has it). (The second argument here is just where to put the
-      # files.)
-      try:
-        self.updater.download_target(target, full_targets_directory)
+      targets_to_download.append(target)
+
+
+    # Download each target.
+    # Now that we have fileinfo for all targets listed by both the Director and
+    # the Image Repository -- which should include file2.txt in this test --
+    # we can download the target files and only keep each if it matches the
+    # verified fileinfo. Each call will try every mirror on every repository
+    # within the appropriate delegation in pinned.json until one of them works.
+    # In this case, both the Director and Image Repo are hosting the
+    # file, just for my convenience in setup. If you remove the file from the
+    # Director before calling this, it will still work (assuming Image Repo
+    # still has it). (The second argument here is just where to put the
+    # files.)
+    # To avoid waiting on each download in turn, up to
+    # MAX_CONCURRENT_TARGET_DOWNLOADS targets are downloaded at once (and the
+    # updater limits how many of those come from any one repository). Each
+    # download is still checked against its own validated length and hashes.
+    download_results = tuf.util.call_concurrently(
+        lambda target: self.updater.download_target(
+        target, full_targets_directory),
+        targets_to_download, MAX_CONCURRENT_TARGET_DOWNLOADS)
+
+    # Report on each download, in order.
+    for target, (result, error) in zip(targets_to_download, download_results):
 
-      except tuf.NoWorkingMirrorError as e:
+      filepath = target['filepath']
+      if filepath[0] == '/':
+        filepath = filepath[1:]
+      full_fname = os.path.join(full_targets_directory, filepath)
+
+      if isinstance(error, tuf.NoWorkingMirrorError):
         error_report = ''
-        for mirror in e.mirror_errors:
-          error_report += \
-              type(e.mirror_errors[mirror]).__name__ + ' from ' + mirror + '; '
+        for mirror in error.mirror_errors:
+          error_report += type(error.mirror_errors[mirror]).__name__ + \
+              ' from ' + mirror + '; '
         log.info(YELLOW + 'In downloading target ' + repr(filepath) +
             ', am unable to find a mirror providing a trustworthy file. '
             'Checking the mirrors resulted in these errors:  ' + error_report +
@@ -661,7 +722,7 @@ class Primary(object): # Consider inheriting from Secondary and refactoring.
           print_banner(BANNER_DEFENDED, color=WHITE+DARK_BLUE_BG,
               text='No image was found that exactly matches the signed metadata '
               'from the Director and Image Repositories. Not keeping '
-              'untrustworthy files. ' + repr(target_filepath), sound=TADA)
+              'untrustworthy files. ' + repr(target['filepath']), sound=TADA)
           time.sleep(3)
 
 
@@ -674,6 +735,11 @@ class Primary(object): # Consider inheriting from Secondary and refactoring.
             'provided only untrustworthy images, which have been ' + GREEN +
             'rejected' + ENDCOLORS + ' Firmware not updated.')
 
+      elif error is not None:
+        # Anything other than a failure to find a trustworthy file is
+        # unexpected, so stop here as we would have without concurrency.
+        raise error
+
       else:
         assert(os.path.exists(full_fname)), 'Programming error: no ' + \
             'download error, but file still does not exist.'
@@ -691,6 +757,8 @@ class Primary(object): # Consider inheriting from Secondary and refactoring.
         # mistake, but... we will still potentially have disrupted one of them
         # if it receives an update that wasn't right in the first place.... It
         # may perhaps end up in limp-home mode or something....)
+        # (With concurrent downloads, two such files could also be written at
+        # the same time; each is moved into place whole, so one simply wins.)
 
         # In any case, there may also be race conditions. The point is that
         # we are storing a downloaded file and we are also, separately storing
@@ -748,6 +816,85 @@ class Primary(object): # Consider inheriting from Secondary and refactoring.
 
 
 
+  def get_image_chunk_for_ecu(
+      self, ecu_serial, offset=0, length=IMAGE_CHUNK_SIZE):
+    """
+    <Purpose>
+      Provides part of the image file to distribute to the given Secondary ECU,
+      so that the image can be transferred in pieces, without either side
+      having to hold all of it in memory. A Secondary can resume an
+      interrupted transfer by asking for the rest of the file, starting at the
+      offset it has reached. (See Secondary.begin_image_transfer().)
+
+    <Arguments>
+      ecu_serial
+        The ECU Serial of the Secondary ECU requesting the image.
+
+      offset
+        The position in the image file of the first byte to provide.
+
+      length
+        The maximum number of bytes to provide, at most MAX_IMAGE_CHUNK_SIZE.
+        Fewer are provided at the end of the file. If this is 0, no data is
+        provided, which can be used to find out the name and length of the
+        image file.
+
+    <Exceptions>
+      uptane.UnknownECU
+        if the ecu_serial specified is not one known to this Primary.
+
+      uptane.Error
+        if offset is beyond the end of the image file, or length is greater
+        than MAX_IMAGE_CHUNK_SIZE.
+
+      tuf.FormatError
+        if the arguments are not correctly formatted.
+
+    <Returns>
+      None if there is no image file to be distributed to the given ECU, else
+      a dictionary conforming to uptane.formats.IMAGE_CHUNK_SCHEMA, containing
+      the image's filename relative to the targets directory, the length of
+      the full image file, and the requested bytes and their hash.
+    """
+    tuf.formats.LENGTH_SCHEMA.check_match(offset)
+    tuf.formats.LENGTH_SCHEMA.check_match(length)
+
+    if length > MAX_IMAGE_CHUNK_SIZE:
+      raise uptane.Error('Requested ' + repr(length) + ' bytes of an image at '
+          'once; the most that can be requested is ' +
+          repr(MAX_IMAGE_CHUNK_SIZE))
+
+    # This checks ecu_serial.
+    image_fname = self.get_image_fname_for_ecu(ecu_serial)
+
+    if image_fname is None:
+      return None
+
+    with open(image_fname, 'rb') as fobj:
+      image_length = os.fstat(fobj.fileno()).st_size
+
+      if offset > image_length:
+        raise uptane.Error('Requested data at offset ' + repr(offset) + ' in '
+            'an image file of length ' + repr(image_length))
+
+      fobj.seek(offset)
+      data = fobj.read(length)
+
+    # Provide the filename relative to the client targets directory so that it
+    # can be used as a TUF-style filepath within the targets namespace by the
+    # Secondary.
+    return {
+        'filepath': os.path.relpath(
+            image_fname, os.path.join(self.full_client_dir, 'targets')),
+        'length': image_length,
+        'offset': offset,
+        'data': data,
+        'hashes': {'sha256': hashlib.sha256(data).hexdigest()}}
+
+
+
+
+
   def get_full_metadata_archive_fname(self):
     """
     Returns the absolute-path filename of an archive file (currently zip)
@@ -872,11 +1019,19 @@ class Primary(object): # Consider inheriting from Secondary and refactoring.
     Output will comply with uptane.formats.VEHICLE_VERSION_MANIFEST_SCHEMA.
     """
 
+    # Take a copy of the ECU Manifests received so far, so that more can
+    # arrive while this vehicle manifest is being made. (Once they have been
+    # incorporated into a signed vehicle manifest, they are discarded below.)
+    with self.manifest_lock:
+      ecu_manifests = dict(
+          (ecu_serial, list(manifests))
+          for ecu_serial, manifests in self.ecu_manifests.items())
+
     # Create the vv manifest:
     vehicle_manifest = {
         'vin': self.vin,
         'primary_ecu_serial': self.ecu_serial,
-        'ecu_version_manifests': self.ecu_manifests
+        'ecu_version_manifests': ecu_manifests
     }
 
     uptane.formats.VEHICLE_VERSION_MANIFEST_SCHEMA.check_match(vehicle_manifest)
@@ -907,11 +1062,20 @@ class Primary(object): # Consider inheriting from Secondary and refactoring.
       uptane.formats.SIGNABLE_VEHICLE_VERSION_MANIFEST_SCHEMA.check_match(
           signable_vehicle_manifest)
 
+    # Now that the vehicle manifest has been signed, discard the ECU Manifests
+    # it includes, keeping any that arrived in the meantime.
+    with self.manifest_lock:
+      for ecu_serial, manifests in ecu_manifests.items():
+        included = set(id(manifest) for manifest in manifests)
+        remaining = [manifest for manifest in
+            self.ecu_manifests.get(ecu_serial, [])
+            if id(manifest) not in included]
 
-    # Now that the ECU manifests have been incorporated into a vehicle manifest,
-    # discard the ECU manifests.
+        if remaining:
+          self.ecu_manifests[ecu_serial] = remaining
+        else:
+          self.ecu_manifests.pop(ecu_serial, None)
 
-    self.ecu_manifests = dict()
 
     return signable_vehicle_manifest
 
@@ -927,12 +1091,14 @@ class Primary(object): # Consider inheriting from Secondary and refactoring.
     """
     uptane.formats.ECU_SERIAL_SCHEMA.check_match(ecu_serial)
 
-    if ecu_serial in self.my_secondaries:
-      log.info('ECU Serial ' + repr(ecu_serial) + ' already registered with '
-          'this Primary.')
-      return
+    with self.manifest_lock:
+      if ecu_serial in self.my_secondaries:
+        log.info('ECU Serial ' + repr(ecu_serial) + ' already registered with '
+            'this Primary.')
+        return
+
+      self.my_secondaries.append(ecu_serial)
 
-    self.my_secondaries.append(ecu_serial)
     log.debug('ECU Serial ' + repr(ecu_serial) + ' has been registered as '
         'a Secondary with this Primary.')
 
@@ -1070,17 +1236,18 @@ class Primary(object): # Consider inheriting from Secondary and refactoring.
           'signed in the manifest itself (' +
           repr(signed_ecu_manifest['signed']['ecu_serial']) + ').')
 
-    # If we haven't errored out above, then the format is correct, so save
-    # the manifest to the Primary's dictionary of manifests.
-    if ecu_serial in self.ecu_manifests:
-      self.ecu_manifests[ecu_serial].append(signed_ecu_manifest)
-    else:
-      self.ecu_manifests[ecu_serial] = [signed_ecu_manifest]
+    with self.manifest_lock:
+      # If we haven't errored out above, then the format is correct, so save
+      # the manifest to the Primary's dictionary of manifests.
+      if ecu_serial in self.ecu_manifests:
+        self.ecu_manifests[ecu_serial].append(signed_ecu_manifest)
+      else:
+        self.ecu_manifests[ecu_serial] = [signed_ecu_manifest]
 
-    # And add the nonce the Secondary provided to the list of nonces to send
-    # in the next Timeserver request.
-    if nonce not in self.nonces_to_send:
-      self.nonces_to_send.append(nonce)
+      # And add the nonce the Secondary provided to the list of nonces to send
+      # in the next Timeserver request.
+      if nonce not in self.nonces_to_send:
+        self.nonces_to_send.append(nonce)
 
 
     log.debug(GREEN + ' Primary received an ECU manifest from ECU ' +
@@ -1106,9 +1273,10 @@ class Primary(object): # Consider inheriting from Secondary and refactoring.
      - empties self.nonces_to_send, to be populated from new messages from
        Secondaries.
     """
-    self.nonces_sent = self.nonces_to_send
-    self.nonces_to_send = []
-    return self.nonces_sent
+    with self.manifest_lock:
+      self.nonces_sent = self.nonces_to_send
+      self.nonces_to_send = []
+      return self.nonces_sent
 
 
 
@@ -1220,64 +1388,68 @@ class Primary(object): # Consider inheriting from Secondary and refactoring.
 
     The files here are each moved into place atomically to help avoid race
     conditions.
+
+    If the metadata has not changed since the files were last saved (comparing
+    the hash of each metadata file), they are left as they are, and are not
+    rewritten.
     """
 
     metadata_base_dir = os.path.join(self.full_client_dir, 'metadata')
 
     # Full Verification Metadata Preparation
 
-    # Save a zipped version of all of the metadata.
+    # Read all of the metadata, noting the hash of each file.
     # Note that some stale metadata may be retained, but should never affect
     # security. Worth confirming.
     # What we want here, basically, is:
     #  <full_client_dir>/metadata/*/current/*.json or *.der
+    archive_members = self._get_distributable_metadata(metadata_base_dir)
+
+    fingerprint = dict(
+        (arcname, hashlib.sha256(data).hexdigest())
+        for arcname, (role_abs_fname, data) in archive_members.items())
+
+    # The Director's targets metadata, as it appears in the archive.
+    director_targets_arcname = os.path.join(self.director_repo_name,
+        'metadata', 'targets.' + tuf.conf.METADATA_FORMAT)
+
+    if self.distributable_metadata_fingerprint is None:
+      # This is our first time here (e.g. after a restart). If there are
+      # already distributable files from a previous run, find out what they
+      # contain.
+      self.distributable_metadata_fingerprint = \
+          self._get_distributable_metadata_fingerprint(director_targets_arcname)
+
+    if fingerprint == self.distributable_metadata_fingerprint and \
+        os.path.exists(self.distributable_full_metadata_archive_fname) and \
+        os.path.exists(self.distributable_partial_metadata_fname):
+      log.debug('Metadata unchanged; distributable metadata files are current.')
+      return
+
+    # Save a zipped version of all of the metadata.
     with zipfile.ZipFile(self.temp_full_metadata_archive_fname, 'w') \
         as archive:
-      # For each repository directory within the client metadata directory
-      for repo_dir in os.listdir(metadata_base_dir):
-        # Construct path to "current" metadata directory for that repository in
-        # the client metadata directory, relative to Uptane working directory.
-        abs_repo_dir = os.path.join(metadata_base_dir, repo_dir, 'current')
-        if not os.path.isdir(abs_repo_dir):
-          continue
-
-        # Add each role metadata file to the archive.
-        for role_fname in os.listdir(abs_repo_dir):
-          # Reconstruct file path relative to Uptane working directory.
-          role_abs_fname = os.path.join(abs_repo_dir, role_fname)
-
-          # Make sure it's the right type of file. Should be a file, not a
-          # directory. Symlinks are OK. Should end in an extension matching
-          # tuf.conf.METADATA_FORMAT (presumably .json or .der, depending on
-          # that setting).
-          if not os.path.isfile(role_abs_fname) or not role_abs_fname.endswith(
-              '.' + tuf.conf.METADATA_FORMAT):
-            # Consider special error type.
-            raise uptane.Error('Unexpected file type in a metadata '
-                'directory: ' + repr(role_abs_fname) + ' Expecting only ' +
-                tuf.conf.METADATA_FORMAT + 'files.')
-
-          # Write the file to the archive, adjusting the path in the archive so
-          # that when expanded, it resembles repository structure rather than
-          # a client directory structure.
-          archive.write(
-              role_abs_fname,
-              os.path.join(repo_dir, 'metadata', role_fname))
+      for arcname in sorted(archive_members):
+        role_abs_fname, data = archive_members[arcname]
+
+        # Keep the file's timestamp and permissions, as ZipFile.write() would.
+        stat = os.stat(role_abs_fname)
+        zip_info = zipfile.ZipInfo(
+            arcname, time.localtime(stat.st_mtime)[:6])
+        zip_info.external_attr = (stat.st_mode & 0xFFFF) << 16
+        archive.writestr(zip_info, data)
 
 
     # Partial Verification Metadata Preparation
 
-    # Copy the Director's targets file to a temp location for partial-verifying
-    # Secondaries.
-    director_targets_file = os.path.join(
-        self.full_client_dir,
-        'metadata',
-        self.director_repo_name,
-        'current',
-        'targets.' + tuf.conf.METADATA_FORMAT)
-    if os.path.exists(self.temp_partial_metadata_fname):
-      os.remove(self.temp_partial_metadata_fname)
-    shutil.copyfile(director_targets_file, self.temp_partial_metadata_fname)
+    # Write the Director's targets file to a temp location for
+    # partial-verifying Secondaries.
+    if director_targets_arcname not in archive_members:
+      raise uptane.Error('Expected the Director\'s targets metadata file in ' +
+          repr(os.path.join(metadata_base_dir, self.director_repo_name,
+          'current')))
+    with open(self.temp_partial_metadata_fname, 'wb') as fobj:
+      fobj.write(archive_members[director_targets_arcname][1])
 
 
     # Now move both Full and Partial metadata files into place. For each file,
@@ -1290,6 +1462,89 @@ class Primary(object): # Consider inheriting from Secondary and refactoring.
         self.temp_full_metadata_archive_fname,
         self.distributable_full_metadata_archive_fname)
 
+    self.distributable_metadata_fingerprint = fingerprint
+
+
+
+
+
+  def _get_distributable_metadata(self, metadata_base_dir):
+    """
+    Reads the current metadata from each repository in the client metadata
+    directory, returning a dictionary that maps the name that each file should
+    have in the full metadata archive to a (filename, contents) tuple.
+
+    Raises uptane.Error if there is anything other than metadata files of the
+    format set in tuf.conf.METADATA_FORMAT in a current metadata directory.
+    """
+    archive_members = {}
+
+    # For each repository directory within the client metadata directory
+    for repo_dir in os.listdir(metadata_base_dir):
+      # Construct path to "current" metadata directory for that repository in
+      # the client metadata directory, relative to Uptane working directory.
+      abs_repo_dir = os.path.join(metadata_base_dir, repo_dir, 'current')
+      if not os.path.isdir(abs_repo_dir):
+        continue
+
+      # Add each role metadata file to the archive.
+      for role_fname in os.listdir(abs_repo_dir):
+        # Reconstruct file path relative to Uptane working directory.
+        role_abs_fname = os.path.join(abs_repo_dir, role_fname)
+
+        # Make sure it's the right type of file. Should be a file, not a
+        # directory. Symlinks are OK. Should end in an extension matching
+        # tuf.conf.METADATA_FORMAT (presumably .json or .der, depending on
+        # that setting).
+        if not os.path.isfile(role_abs_fname) or not role_abs_fname.endswith(
+            '.' + tuf.conf.METADATA_FORMAT):
+          # Consider special error type.
+          raise uptane.Error('Unexpected file type in a metadata '
+              'directory: ' + repr(role_abs_fname) + ' Expecting only ' +
+              tuf.conf.METADATA_FORMAT + 'files.')
+
+        with open(role_abs_fname, 'rb') as fobj:
+          data = fobj.read()
+
+        # Adjust the path in the archive so that when expanded, it resembles
+        # repository structure rather than a client directory structure.
+        archive_members[os.path.join(repo_dir, 'metadata', role_fname)] = (
+            role_abs_fname, data)
+
+    return archive_members
+
+
+
+
+
+  def _get_distributable_metadata_fingerprint(self, director_targets_arcname):
+    """
+    Returns the fingerprint (see the class docstring) of the metadata in the
+    existing distributable metadata files, or None if they do not both exist
+    or do not agree with each other.
+    """
+    if not os.path.exists(self.distributable_full_metadata_archive_fname) or \
+        not os.path.exists(self.distributable_partial_metadata_fname):
+      return None
+
+    try:
+      with zipfile.ZipFile(self.distributable_full_metadata_archive_fname) \
+          as archive:
+        fingerprint = dict(
+            (arcname, hashlib.sha256(archive.read(arcname)).hexdigest())
+            for arcname in archive.namelist())
+
+    except (zipfile.BadZipfile, IOError, OSError):
+      return None
+
+    with open(self.distributable_partial_metadata_fname, 'rb') as fobj:
+      partial_metadata_hash = hashlib.sha256(fobj.read()).hexdigest()
+
+    if fingerprint.get(director_targets_arcname) != partial_metadata_hash:
+      return None
+
+    return fingerprint
+
 
 
 
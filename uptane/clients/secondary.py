@@ -30,9 +30,12 @@ import random # for nonces
 import zipfile # to expand the metadata archive retrieved from the Primary
 import hashlib
 import iso8601
+import six
 
 import tuf.formats
 import tuf.keys
+import tuf.hash
+import tuf.conf
 import tuf.client.updater
 import tuf.repository_tool as rt
 
@@ -143,6 +146,14 @@ class Secondary(object):
       # TODO: Since this is now expected to always be one target, this should
       # just be a single value rather than a list....
 
+    self.image_transfer:
+      None, or, while an image is being received from the Primary one chunk at
+      a time (see begin_image_transfer()), a dictionary describing the
+      transfer: the image filepath, the validated target info for it, the
+      temporary file the image is being written to, the number of bytes
+      received so far, and hash objects (one per hash algorithm in the target
+      info) that have been updated with those bytes.
+
 
   Methods, as called: ("self" arguments excluded):
 
@@ -164,6 +175,11 @@ class Secondary(object):
       get_validated_target_info(target_filepath)
       validate_image(image_fname)
 
+    Image transfer from the Primary
+      begin_image_transfer(image_fname)
+      receive_image_chunk(image_chunk)
+      finish_image_transfer()
+
 
 
   """
@@ -277,6 +293,7 @@ class Secondary(object):
     self.last_nonce_sent = None
     self.nonce_next = self._create_nonce()
     self.validated_targets_for_this_ecu = []
+    self.image_transfer = None
 
 
 
@@ -546,6 +563,7 @@ class Secondary(object):
 
     # Comb through the Director's direct instructions, picking out only the
     # target(s) earmarked for this ECU (by ECU Serial)
+    targets_for_this_ecu = []
     for target in self.updater.targets_of_role(
         rolename='targets', repo_name=self.director_repo_name):
 
@@ -555,6 +573,15 @@ class Secondary(object):
           self.ecu_serial != target['fileinfo']['custom']['ecu_serial']:
         continue
 
+      targets_for_this_ecu.append(target)
+
+    # Validate our target(s) all at once (see Primary.primary_update_cycle()).
+    self.updater.targets(
+        [target['filepath'] for target in targets_for_this_ecu],
+        multi_custom=True)
+
+    for target in targets_for_this_ecu:
+
       # Fully validate the target info for our target(s).
       try:
         validated_targets_for_this_ecu.append(
@@ -581,8 +608,11 @@ class Secondary(object):
     """
     tuf.formats.RELPATH_SCHEMA.check_match(target_filepath)
 
-    validated_target_info = self.updater.target(
-        target_filepath, multi_custom=True)
+    validated_target_info = self.updater.targets(
+        [target_filepath], multi_custom=True).get(target_filepath)
+
+    if validated_target_info is None:
+      raise tuf.UnknownTargetError(target_filepath + ' not found.')
 
     if self.director_repo_name not in validated_target_info:
 
@@ -698,6 +728,36 @@ class Secondary(object):
     full_image_fname = os.path.join(
         self.full_client_dir, 'unverified_targets', image_fname)
 
+    relevant_targetinfo = self._get_validated_target_info_for_image(image_fname)
+
+
+    # Check file length and hashes against trusted target info. The length
+    # check does not read the image, and all of its hashes are computed in a
+    # single pass, so the image is only read once.
+    with open(full_image_fname, 'rb') as fobj:
+      tuf.client.updater.hard_check_file_length(
+          fobj,
+          relevant_targetinfo['fileinfo']['length'])
+
+      tuf.client.updater.check_hashes(
+          fobj,
+          relevant_targetinfo['fileinfo']['hashes'])
+
+
+    # If no error has been raised at this point, the image file is fully
+    # validated and we can return.
+    log.debug('Delivered target file has been fully validated: ' +
+        repr(full_image_fname))
+
+
+
+
+
+  def _get_validated_target_info_for_image(self, image_fname):
+    """
+    Returns the validated target info for the image with the filename
+    provided (see validate_image()), or raises uptane.Error if there is none.
+    """
     # Get target info by looking up fname (filepath).
 
     relevant_targetinfo = None
@@ -719,23 +779,238 @@ class Secondary(object):
           'for this is extremely small between two individually-atomic '
           'renames), or there has been a programming error....')
 
+    return relevant_targetinfo
 
-    # Check file length against trusted target info.
-    with open(full_image_fname, 'rb') as fobj:
-      tuf.client.updater.hard_check_file_length(
-          fobj,
-          relevant_targetinfo['fileinfo']['length'])
 
-    # Check file hashes against trusted target info.
-    with open(full_image_fname, 'rb') as fobj:
-      tuf.client.updater.check_hashes(
-          fobj, # FIX
-          relevant_targetinfo['fileinfo']['hashes'],
-          reset_fpointer=True) # Important for multiple hashes
 
 
-    # If no error has been raised at this point, the image file is fully
-    # validated and we can return.
+
+  def begin_image_transfer(self, image_fname):
+    """
+    <Purpose>
+      Prepares to receive the image with the filename provided from the
+      Primary, one chunk at a time (see Primary.get_image_chunk_for_ecu()),
+      with receive_image_chunk() and then finish_image_transfer(). The image
+      is written to a temporary file in the 'unverified_targets' subdirectory
+      of the client directory and hashed as it arrives, so that it never has
+      to be held in memory or read again to be validated.
+
+      If part of the same image was already received by a transfer that was
+      interrupted, the transfer resumes where that one stopped.
+
+    <Arguments>
+      image_fname
+        The filename of the image, as in validate_image().
+
+    <Exceptions>
+      uptane.Error
+        if there is no validated target info for this ECU matching the given
+        filename (as in validate_image()).
+
+      tuf.FormatError
+        if the given image_fname is not a path.
+
+    <Returns>
+      The number of bytes of the image already received: the offset of the
+      first byte that should be requested from the Primary.
+
+    <Side-Effects>
+      Sets self.image_transfer, discarding any transfer in progress.
+    """
+    tuf.formats.PATH_SCHEMA.check_match(image_fname)
+
+    targetinfo = self._get_validated_target_info_for_image(image_fname)
+
+    partial_image_fname = os.path.join(self.full_client_dir,
+        'unverified_targets', image_fname + '.partial')
+    if not os.path.exists(os.path.dirname(partial_image_fname)):
+      os.makedirs(os.path.dirname(partial_image_fname))
+
+    hash_objects = dict((algorithm, tuf.hash.digest(algorithm))
+        for algorithm in targetinfo['fileinfo']['hashes'])
+    length_received = 0
+
+    # If part of the image has already been received, catch the hashes up on
+    # it, unless there is somehow more of it than there should be.
+    if os.path.exists(partial_image_fname):
+      if os.path.getsize(partial_image_fname) > \
+          targetinfo['fileinfo']['length']:
+        os.remove(partial_image_fname)
+
+      else:
+        with open(partial_image_fname, 'rb') as fobj:
+          while True:
+            data = fobj.read(tuf.conf.CHUNK_SIZE)
+            if not data:
+              break
+            for hash_object in hash_objects.values():
+              hash_object.update(data)
+            length_received += len(data)
+
+        log.debug('Resuming transfer of image ' + repr(image_fname) + ' at '
+            'byte ' + repr(length_received))
+
+    self.image_transfer = {
+        'filepath': image_fname,
+        'targetinfo': targetinfo,
+        'partial_fname': partial_image_fname,
+        'length': length_received,
+        'hash_objects': hash_objects}
+
+    return length_received
+
+
+
+
+
+  def receive_image_chunk(self, image_chunk):
+    """
+    <Purpose>
+      Writes the next chunk of the image being received from the Primary to
+      disk (see begin_image_transfer()), after checking it against the hashes
+      the Primary provided with it.
+
+    <Arguments>
+      image_chunk
+        A dictionary conforming to uptane.formats.IMAGE_CHUNK_SCHEMA, as
+        returned by Primary.get_image_chunk_for_ecu(). Its offset must be the
+        number of bytes received so far.
+
+    <Exceptions>
+      uptane.Error
+        if no image transfer has begun, or the chunk is of a different image
+        file or at the wrong offset. The chunk is not written.
+
+      tuf.BadHashError
+        if the chunk does not match the hashes provided with it (e.g. because
+        it was corrupted in transit). The chunk is not written, and may be
+        requested again.
+
+      tuf.DownloadLengthMismatchError
+        if the chunk would make the image longer than its validated target
+        info says it is. The transfer is abandoned.
+
+      tuf.FormatError
+        if image_chunk is not correctly formatted, or its hashes were computed
+        with an unsupported algorithm.
+
+    <Returns>
+      The number of bytes of the image received so far, including this chunk.
+
+    <Side-Effects>
+      Appends the chunk to the temporary image file.
+    """
+    uptane.formats.IMAGE_CHUNK_SCHEMA.check_match(image_chunk)
+
+    transfer = self.image_transfer
+    filepath = image_chunk['filepath']
+    if filepath[0] == '/':
+      filepath = filepath[1:]
+
+    hash_objects = {}
+    for algorithm in image_chunk['hashes']:
+      try:
+        hash_objects[algorithm] = tuf.hash.digest(algorithm)
+      except tuf.UnsupportedAlgorithmError:
+        raise tuf.FormatError('Received part of image ' + repr(filepath) +
+            ' with a hash computed by an unsupported algorithm: ' +
+            repr(algorithm))
+
+    if transfer is None or filepath != transfer['filepath']:
+      raise uptane.Error('Received part of image ' + repr(filepath) + ', but '
+          'no transfer of that image has begun.')
+
+    elif image_chunk['offset'] != transfer['length']:
+      raise uptane.Error('Received part of image ' + repr(filepath) + ' at '
+          'offset ' + repr(image_chunk['offset']) + '; expected offset ' +
+          repr(transfer['length']))
+
+    data = image_chunk['data']
+
+    for algorithm, expected_hash in six.iteritems(image_chunk['hashes']):
+      hash_object = hash_objects[algorithm]
+      hash_object.update(data)
+      if hash_object.hexdigest() != expected_hash:
+        raise tuf.BadHashError(expected_hash, hash_object.hexdigest())
+
+    # Never write more than the trusted length of the image, which protects
+    # against endless data attacks.
+    length_received = transfer['length'] + len(data)
+    expected_length = transfer['targetinfo']['fileinfo']['length']
+
+    if length_received > expected_length:
+      self.image_transfer = None
+      os.remove(transfer['partial_fname'])
+      raise tuf.DownloadLengthMismatchError(expected_length, length_received)
+
+    with open(transfer['partial_fname'], 'ab') as fobj:
+      fobj.write(data)
+
+    for hash_object in transfer['hash_objects'].values():
+      hash_object.update(data)
+    transfer['length'] = length_received
+
+    return length_received
+
+
+
+
+
+  def finish_image_transfer(self):
+    """
+    <Purpose>
+      Completes the transfer of an image from the Primary (see
+      begin_image_transfer()), validating the received image against the
+      validated target info for it, as validate_image() would, and moving it
+      into place in the 'unverified_targets' subdirectory of the client
+      directory under its own filename.
+
+    <Exceptions>
+      uptane.Error
+        if no image transfer has begun.
+
+      tuf.DownloadLengthMismatchError
+        if the image does not have the expected length based on validated
+        target info.
+
+      tuf.BadHashError
+        if the image does not have the expected hash based on validated target
+        info.
+
+      In either of the last two cases, the received data is discarded.
+
+    <Returns>
+      None.
+
+    <Side-Effects>
+      Ends the transfer, setting self.image_transfer to None.
+    """
+    transfer = self.image_transfer
+
+    if transfer is None:
+      raise uptane.Error('No transfer of an image from the Primary has begun.')
+
+    self.image_transfer = None
+    fileinfo = transfer['targetinfo']['fileinfo']
+
+    try:
+      if transfer['length'] != fileinfo['length']:
+        raise tuf.DownloadLengthMismatchError(
+            fileinfo['length'], transfer['length'])
+
+      for algorithm, expected_hash in six.iteritems(fileinfo['hashes']):
+        observed_hash = transfer['hash_objects'][algorithm].hexdigest()
+        if observed_hash != expected_hash:
+          raise tuf.BadHashError(expected_hash, observed_hash)
+
+    except (tuf.DownloadLengthMismatchError, tuf.BadHashError):
+      os.remove(transfer['partial_fname'])
+      raise
+
+    full_image_fname = os.path.join(
+        self.full_client_dir, 'unverified_targets', transfer['filepath'])
+    os.rename(transfer['partial_fname'], full_image_fname)
+
     log.debug('Delivered target file has been fully validated: ' +
         repr(full_image_fname))
 
@@ -8,11 +8,15 @@ from __future__ import unicode_literals
 import uptane # Import before TUF modules; may change tuf.conf values.
 import tuf
 import tuf.formats
+import tuf.keys
+import tuf.ed25519_keys
+import tuf.asn1_codec
 import json
 import os
 import shutil
 import copy
 import hashlib
+import binascii
 
 # TODO: This import is not ideal at this level. Common should probably not
 # import anything from other Uptane modules. Consider putting the
@@ -387,28 +391,150 @@ def verify_signature_over_metadata(
 
   tuf.formats.ANYKEY_SCHEMA.check_match(key_dict)
   tuf.formats.SIGNATURE_SCHEMA.check_match(signature)
+
+  data = _encode_metadata_for_signature(data, datatype, metadata_format)
+
+  return tuf.keys.verify_signature(key_dict, signature, data)
+
+
+
+
+
+def verify_signatures_over_metadata(
+    signatures_to_verify, datatype, metadata_format=tuf.conf.METADATA_FORMAT):
+  """
+  <Purpose>
+    Batch version of verify_signature_over_metadata(): determine, for each of
+    many (key, signature, data) triples, whether the private key belonging to
+    the key produced the signature over the data.
+
+    Each distinct key is format-checked only once, and each distinct data
+    object is encoded (canonical JSON, or ASN.1/DER and hashed) only once,
+    no matter how many signatures are checked over it.  All ed25519 signatures
+    are then handed to tuf.ed25519_keys.verify_signatures() together, so that
+    a verification backend that supports batch verification can use it.
+
+    This is used by the Director to check all of the ECU Manifests in a
+    Vehicle Manifest in a single pass.
+
+  <Arguments>
+    signatures_to_verify:
+      A list of (key_dict, signature, data) tuples, each with the same meaning
+      as the corresponding arguments of verify_signature_over_metadata().
+      Triples may share key and data objects.
+
+    datatype:
+      As in verify_signature_over_metadata(). All data in
+      signatures_to_verify must be of this type.
+
+    metadata_format: (optional; default based on tuf.conf.METADATA_FORMAT)
+      As in verify_signature_over_metadata().
+
+  <Exceptions>
+    tuf.FormatError, raised if any key or signature is improperly formatted.
+
+    tuf.UnsupportedLibraryError, if an unsupported or unavailable library is
+    detected.
+
+    tuf.UnknownMethodError.  Raised if the signing method used by any
+    signature is not one supported.
+
+    uptane.Error, if tuf.conf.METADATA_FORMAT is neither 'json' nor 'der'.
+
+  <Side Effects>
+    The cryptography library specified in 'tuf.conf' is called to do the actual
+    verification. When in 'der' mode, argument data is converted into ASN.1/DER
+    in order to verify it. (Argument objects are unchanged.)
+
+  <Returns>
+    A list of Booleans, one per triple in signatures_to_verify and in the same
+    order: True if that signature is valid, False otherwise.
+  """
+
+  # The triples keep every key and data object alive for the duration of this
+  # call, so their ids can safely be used to recognize repeated objects.
+  checked_key_ids = set()
+  encoded_data_by_id = {}
+
+  results = [False] * len(signatures_to_verify)
+  ed25519_indices = []
+  ed25519_signatures = []
+
+  for index, (key_dict, signature, data) in enumerate(signatures_to_verify):
+
+    if id(key_dict) not in checked_key_ids:
+      tuf.formats.ANYKEY_SCHEMA.check_match(key_dict)
+      checked_key_ids.add(id(key_dict))
+
+    tuf.formats.SIGNATURE_SCHEMA.check_match(signature)
+
+    if id(data) not in encoded_data_by_id:
+      encoded_data_by_id[id(data)] = _encode_metadata_for_signature(
+          data, datatype, metadata_format)
+
+    encoded_data = encoded_data_by_id[id(data)]
+
+    # As in tuf.keys.verify_signature(), a signature that claims to be from a
+    # different key than the provided key is invalid.
+    if key_dict['keyid'] != signature['keyid']:
+      continue
+
+    if key_dict['keytype'] == 'ed25519':
+      ed25519_indices.append(index)
+      ed25519_signatures.append((
+          binascii.unhexlify(key_dict['keyval']['public'].encode('utf-8')),
+          signature['method'],
+          binascii.unhexlify(signature['sig'].encode('utf-8')),
+          encoded_data))
+
+    else:
+      results[index] = tuf.keys.verify_signature(
+          key_dict, signature, encoded_data)
+
+  if ed25519_signatures:
+    for index, valid in zip(ed25519_indices,
+        tuf.ed25519_keys.verify_signatures(ed25519_signatures)):
+      results[index] = valid
+
+  return results
+
+
+
+
+
+def _encode_metadata_for_signature(data, datatype, metadata_format):
+  """
+  Return the bytes over which a signature on 'data' is made: the utf-8
+  encoded canonical JSON of 'data' if metadata_format is 'json', or the SHA256
+  digest of the ASN.1/DER encoding of 'data' if metadata_format is 'der'.
+  (If 'data' was decoded from DER and is unchanged, the digest of its original
+  encoding is reused.)
+  """
   # TODO: Check format of data, based on metadata_format.
   # TODO: Consider checking metadata_format redundantly. It's checked below.
 
   if metadata_format == 'json':
-    data = tuf.formats.encode_canonical(data).encode('utf-8')
+    return tuf.formats.encode_canonical(data).encode('utf-8')
 
   elif metadata_format == 'der':
 
+    # If data was decoded from DER, use the digest of its original encoding
+    # rather than converting it to ASN.1 and encoding it as DER again.
+    digest = tuf.asn1_codec.get_cached_signed_digest(data)
+    if digest is not None:
+      return digest
+
     # TODO: Have convert_signed_metadata_to_der take just the 'signed' element
     # so we don't have to do this silly wrapping in an empty signable.
     data = asn1_codec.convert_signed_metadata_to_der(
         {'signed': data, 'signatures': []}, datatype, only_signed=True)
-    data = hashlib.sha256(data).digest()
+    return hashlib.sha256(data).digest()
 
   else: # pragma: no cover
     raise uptane.Error('Unsupported metadata format: ' + repr(metadata_format) +
         '; the supported formats are: "der" and "json".')
 
 
-  return tuf.keys.verify_signature(key_dict, signature, data)
-
-
 
 
 
@@ -21,7 +21,9 @@ import uptane # Import before TUF modules; may change tuf.conf values.
 import tuf
 import tuf.conf
 import tuf.formats
+import tuf.asn1_codec
 import uptane.formats
+import uptane.encoding.der_coder
 import logging
 import hashlib
 
@@ -31,6 +33,12 @@ DATATYPE_TIME_ATTESTATION = 'type__time_attestation'
 DATATYPE_ECU_MANIFEST = 'type__ecu_manifest'
 DATATYPE_VEHICLE_MANIFEST = 'type__vehicle_manifest'
 
+# If True, metadata is converted using pyasn1 and the *_asn1_coder modules
+# rather than the faster, hand-written uptane.encoding.der_coder module. Both
+# produce the same DER. This exists mainly so that the tests can check the one
+# against the other.
+USE_PYASN1 = False
+
 try:
   # pyasn1 modules
   import pyasn1.codec.der.encoder as p_der_encoder
@@ -62,6 +70,20 @@ except ImportError: # pragma: no cover
 else:
   PYASN1_EXISTS = True
 
+# The functions of uptane.encoding.der_coder that encode the 'signed' portion
+# of each type of metadata, and that decode the full DER-encoded metadata.
+FAST_DER_ENCODERS = {
+    DATATYPE_TIME_ATTESTATION:
+        uptane.encoding.der_coder.encode_time_attestation_signed,
+    DATATYPE_ECU_MANIFEST: uptane.encoding.der_coder.encode_ecu_manifest_signed,
+    DATATYPE_VEHICLE_MANIFEST:
+        uptane.encoding.der_coder.encode_vehicle_manifest_signed}
+
+FAST_DER_DECODERS = {
+    DATATYPE_TIME_ATTESTATION: uptane.encoding.der_coder.decode_time_attestation,
+    DATATYPE_ECU_MANIFEST: uptane.encoding.der_coder.decode_ecu_manifest,
+    DATATYPE_VEHICLE_MANIFEST: uptane.encoding.der_coder.decode_vehicle_manifest}
+
 
 
 
@@ -159,6 +181,21 @@ def convert_signed_der_to_dersigned_json(der_data, datatype):
   # I can't seem to figure out why I need to do this this way.
   # Why can't I just use Metadata() by adding TokensAndTimestamp as an optional
   # component of SignedBody()? Anyway, this seems to work.......
+  if not USE_PYASN1:
+    try:
+      signable, signed_ders = FAST_DER_DECODERS[datatype](der_data)
+    except tuf.Error as e:
+      raise uptane.FailedToDecodeASN1DER('Unable to decode the provided '
+          'der_data as datatype ' + repr(datatype) + '. The error follows: ' +
+          repr(e))
+
+    # Remember the digests of the original DER encodings of the 'signed'
+    # portions. See _cache_signed_digests().
+    for json_signed, der_signed in signed_ders:
+      tuf.asn1_codec.cache_signed_digest(json_signed, der_signed)
+
+    return signable
+
   # Handle for the corresponding module.
   relevant_asn_module = SUPPORTED_ASN1_METADATA_MODULES[datatype]
   if datatype == DATATYPE_TIME_ATTESTATION:
@@ -187,13 +224,10 @@ def convert_signed_der_to_dersigned_json(der_data, datatype):
 
   asn_signed_metadata = asn_metadata[0]
 
-  # TODO: The 'signed' component here should probably already be DER, since
-  # that is what the signature is over. Because this would entail some changes
-  # changes to the ASN.1 data specifications in metadataverificationmodule.py,
-  # I'm not doing this yet (though I expect to).
-  # So, for the time being, if we wanted to check the signature, we'd have to
-  # encode this thing into DER again.
-  # der_signed_metadata = p_der_encoder.encode(asn_signed)
+  # The signatures are over the DER encoding of the 'signed' component, which
+  # is the first element of the outer SEQUENCE in der_data. Rather than
+  # encoding the 'signed' component into DER again whenever a signature over
+  # it is checked, we remember the digest of those original bytes below.
 
 
   # Now we have to figure out what type of metadata the ASN.1 metadata is
@@ -219,12 +253,57 @@ def convert_signed_der_to_dersigned_json(der_data, datatype):
   asn_signatures = asn_metadata[2]
   json_signatures = convert_signatures_to_json(asn_signatures)
 
+  _cache_signed_digests(der_data, datatype, asn_metadata, json_signed)
+
   return {'signatures': json_signatures, 'signed': json_signed}
 
 
 
 
 
+def _cache_signed_digests(der_data, datatype, asn_metadata, json_signed):
+  """
+  Remember the digest of the original DER encoding of json_signed, the
+  decoded 'signed' portion of der_data, and for a Vehicle Manifest, also that
+  of the 'signed' portion of each ECU Manifest in it, so that signatures over
+  them can be checked without encoding them into DER again.
+  See tuf.asn1_codec.get_cached_signed_digest().
+  """
+  try:
+    der_signed = tuf.asn1_codec.split_der_sequence(der_data)[0]
+    tuf.asn1_codec.cache_signed_digest(json_signed, der_signed)
+
+    if datatype != DATATYPE_VEHICLE_MANIFEST:
+      return
+
+    # The ECU Manifests are the fourth element of the Vehicle Manifest's
+    # 'signed' portion. get_json_signed() groups them by ECU Serial, keeping
+    # their order, so count how many we've seen for each ECU Serial so far.
+    der_ecu_manifests = tuf.asn1_codec.split_der_sequence(
+        tuf.asn1_codec.split_der_sequence(der_signed)[3])
+    asn_ecu_manifests = asn_metadata['signed']['ecuVersionManifests']
+    json_ecu_manifests = json_signed['ecu_version_manifests']
+    seen_by_ecu_serial = {}
+
+    for i in range(
+        int(asn_metadata['signed']['numberOfECUVersionManifests'])):
+      ecu_serial = str(asn_ecu_manifests[i]['signed']['ecuIdentifier'])
+      index = seen_by_ecu_serial.get(ecu_serial, 0)
+      seen_by_ecu_serial[ecu_serial] = index + 1
+
+      tuf.asn1_codec.cache_signed_digest(
+          json_ecu_manifests[ecu_serial][index]['signed'],
+          tuf.asn1_codec.split_der_sequence(der_ecu_manifests[i])[0])
+
+  except (tuf.Error, IndexError, KeyError): # pragma: no cover
+    # The data decoded fine, so this should not happen; if it does, the
+    # signatures are simply checked over a new encoding of the data instead.
+    logger.debug('Unable to find the signed portion of the given DER data.')
+
+
+
+
+
 def convert_signed_metadata_to_der(signed_metadata, datatype,
     private_key=None, resign=False, only_signed=False):
   """
@@ -337,6 +416,10 @@ def convert_signed_metadata_to_der(signed_metadata, datatype,
   # a module exists that translates it to and from an ASN.1 format.
   ensure_valid_metadata_type_for_asn1(datatype)
 
+  if not USE_PYASN1:
+    return _convert_signed_metadata_to_der_fast(
+        signed_metadata, datatype, private_key, only_signed)
+
   # Handle for the corresponding module.
   relevant_asn_module = SUPPORTED_ASN1_METADATA_MODULES[datatype]
 
@@ -410,6 +493,36 @@ def convert_signed_metadata_to_der(signed_metadata, datatype,
 
 
 
+def _convert_signed_metadata_to_der_fast(
+    signed_metadata, datatype, private_key, only_signed):
+  """
+  Does the work of convert_signed_metadata_to_der() (after its argument
+  checks) using uptane.encoding.der_coder instead of pyasn1.
+  """
+  try:
+    der_signed = FAST_DER_ENCODERS[datatype](signed_metadata['signed'])
+
+    if only_signed:
+      return der_signed
+
+    if private_key is not None:
+      # As above, sign a hash of the DER encoding of the 'signed' portion.
+      signatures = [tuf.keys.create_signature(
+          private_key, hashlib.sha256(der_signed).digest())]
+    else:
+      signatures = signed_metadata['signatures']
+
+    return uptane.encoding.der_coder.encode_signable(der_signed, signatures)
+
+  except tuf.Error as e:
+    raise uptane.FailedToEncodeASN1DER('Unable to encode the provided '
+        'metadata as datatype ' + repr(datatype) + '. The error follows: ' +
+        repr(e))
+
+
+
+
+
 def convert_signatures_to_json(asn_signatures):
   """
   Given an object compliant with uptane.encoding.asn1_definitions.Signatures()
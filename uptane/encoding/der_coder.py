@@ -0,0 +1,331 @@
+"""
+<Name>
+  uptane/encoding/der_coder.py
+
+<Purpose>
+  This module contains hand-written DER encoding and decoding functions for
+  Time Attestations, ECU Version Manifests, and Vehicle Version Manifests.
+  They convert directly between Uptane's standard Python dictionary metadata
+  format (usually serialized as JSON) and DER bytes that conform to Uptane's
+  ASN.1 definitions (uptane/encoding/asn1_definitions.py), without building
+  pyasn1 objects in between, which is much faster.
+
+  The DER produced is identical to that produced by pyasn1 from the
+  corresponding *_asn1_coder module, and the same constraints on sizes and
+  values are enforced. uptane.encoding.asn1_codec uses this module unless
+  asn1_codec.USE_PYASN1 is set.
+
+  All functions raise tuf.Error if the given data cannot be encoded or
+  decoded.
+
+<Functions>
+  encode_time_attestation_signed(json_signed)
+  encode_ecu_manifest_signed(json_signed)
+  encode_vehicle_manifest_signed(json_signed)
+  encode_signable(der_signed, signatures)
+  decode_time_attestation(der_data)
+  decode_ecu_manifest(der_data)
+  decode_vehicle_manifest(der_data)
+
+"""
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import tuf
+import tuf.encoding.der as der
+
+# The names of the values of the HashFunction and SignatureMethod
+# enumerations, indexed by value.
+HASH_FUNCTIONS = [
+    'sha224', 'sha256', 'sha384', 'sha512', 'sha512-224', 'sha512-256']
+SIGNATURE_METHODS = ['rsassa-pss', 'ed25519']
+
+
+def encode_time_attestation_signed(json_signed):
+  """
+  Return the DER encoding of the 'signed' portion of a Time Attestation, a
+  TokensAndTimestamp.
+  """
+  nonces = json_signed['nonces']
+  return der.encode_sequence([
+      der.encode_integer(len(nonces)),
+      der.encode_sequence([der.encode_integer(nonce) for nonce in nonces]),
+      der.encode_time(json_signed['time'])])
+
+
+def encode_ecu_manifest_signed(json_signed):
+  """
+  Return the DER encoding of the 'signed' portion of an ECU Version Manifest,
+  an ECUVersionManifestSigned.
+  """
+  elements = [
+      der.encode_visible_string(json_signed['ecu_serial'], max_length=256),
+      der.encode_time(json_signed['previous_timeserver_time']),
+      der.encode_time(json_signed['timeserver_time'])]
+
+  if json_signed.get('attacks_detected'):
+    elements.append(der.encode_visible_string(
+        json_signed['attacks_detected'], max_length=1024))
+
+  filemeta = json_signed['installed_image']['fileinfo']
+  hashes = filemeta['hashes']
+
+  elements.append(der.encode_sequence([
+      der.encode_visible_string(
+          json_signed['installed_image']['filepath'], max_length=256),
+      der.encode_natural(filemeta['length']),
+      der.encode_integer(len(hashes)),
+      der.encode_sequence([der.encode_sequence([
+          der.encode_enumerated(HASH_FUNCTIONS, hash_function),
+          _encode_octet_string(hashes[hash_function])])
+          for hash_function in sorted(hashes)])]))
+
+  return der.encode_sequence(elements)
+
+
+def encode_vehicle_manifest_signed(json_signed):
+  """
+  Return the DER encoding of the 'signed' portion of a Vehicle Version
+  Manifest, a VehicleVersionManifestSigned. The ECU Version Manifests in it
+  are ordered by ECU Serial.
+  """
+  ecu_manifests = []
+  for ecu_serial in sorted(json_signed['ecu_version_manifests']):
+    for manifest in json_signed['ecu_version_manifests'][ecu_serial]:
+      ecu_manifests.append(encode_signable(
+          encode_ecu_manifest_signed(manifest['signed']),
+          manifest['signatures']))
+
+  return der.encode_sequence([
+      der.encode_visible_string(json_signed['vin'], max_length=256),
+      der.encode_visible_string(
+          json_signed['primary_ecu_serial'], max_length=256),
+      der.encode_integer(len(ecu_manifests)),
+      der.encode_sequence(ecu_manifests)])
+
+
+def encode_signable(der_signed, signatures):
+  """
+  Return the DER encoding of the full signable object (e.g. an
+  ECUVersionManifest), given the DER encoding of its 'signed' portion and its
+  signatures, a list conforming to tuf.formats.SIGNATURES_SCHEMA.
+  """
+  return der.encode_sequence([
+      der_signed,
+      der.encode_integer(len(signatures)),
+      der.encode_sequence([der.encode_sequence([
+          _encode_octet_string(signature['keyid']),
+          der.encode_enumerated(SIGNATURE_METHODS, signature['method']),
+          _encode_octet_string(signature['sig'])])
+          for signature in signatures])])
+
+
+def decode_time_attestation(der_data):
+  """
+  Decode the given DER encoding of a TokensAndTimestampSignable.
+
+  Returns a tuple (signable, signed_ders): the Time Attestation as a
+  dictionary with 'signed' and 'signatures' entries, and a list of
+  (json_signed, der_signed) pairs, each giving a decoded 'signed' portion and
+  the DER bytes it was decoded from.
+  """
+  return _decode_signable(bytearray(der_data), 0, len(der_data),
+      _decode_time_attestation_signed)
+
+
+def decode_ecu_manifest(der_data):
+  """
+  Decode the given DER encoding of an ECUVersionManifest.
+  Returns a tuple (signable, signed_ders), as decode_time_attestation() does.
+  """
+  return _decode_signable(bytearray(der_data), 0, len(der_data),
+      _decode_ecu_manifest_signed)
+
+
+def decode_vehicle_manifest(der_data):
+  """
+  Decode the given DER encoding of a VehicleVersionManifest.
+  Returns a tuple (signable, signed_ders), as decode_time_attestation() does;
+  signed_ders also includes the 'signed' portion of each ECU Version Manifest
+  in the Vehicle Version Manifest.
+  """
+  return _decode_signable(bytearray(der_data), 0, len(der_data),
+      _decode_vehicle_manifest_signed)
+
+
+def _decode_signable(der_bytes, index, end, decode_signed):
+  """
+  Decode the signable object (SEQUENCE of 'signed', numberOfSignatures, and
+  signatures) starting at der_bytes[index], using decode_signed to decode its
+  'signed' portion. Bytes after the signable object are ignored.
+  Returns (signable, signed_ders), as decode_time_attestation() does.
+  """
+  start, end = der.read_element(der_bytes, index, end, der.TAG_SEQUENCE)
+
+  signed_start = start
+  index, signed_end = der.read_element(
+      der_bytes, signed_start, end, der.TAG_SEQUENCE)
+  signed_ders = []
+  json_signed = decode_signed(der_bytes, index, signed_end, signed_ders)
+  signed_ders.append((json_signed, bytes(der_bytes[signed_start:signed_end])))
+
+  # numberOfSignatures is not needed: all of the signatures are used.
+  index, number_end = der.read_element(
+      der_bytes, signed_end, end, der.TAG_INTEGER)
+  der.decode_natural(der_bytes, index, number_end)
+
+  index, signatures_end = der.read_element(
+      der_bytes, number_end, end, der.TAG_SEQUENCE)
+  der.expect_end(signatures_end, end)
+
+  json_signatures = []
+  for start, signature_end in der.read_sequence_elements(
+      der_bytes, index, signatures_end, der.TAG_SEQUENCE):
+    index, keyid_end = der.read_element(
+        der_bytes, start, signature_end, der.TAG_OCTET_STRING)
+    keyid = _decode_octet_string(der_bytes, index, keyid_end)
+    index, method_end = der.read_element(
+        der_bytes, keyid_end, signature_end, der.TAG_ENUMERATED)
+    method = der.decode_enumerated(
+        SIGNATURE_METHODS, der_bytes, index, method_end)
+    index, value_end = der.read_element(
+        der_bytes, method_end, signature_end, der.TAG_OCTET_STRING)
+    value = _decode_octet_string(der_bytes, index, value_end)
+    der.expect_end(value_end, signature_end)
+    json_signatures.append({'keyid': keyid, 'method': method, 'sig': value})
+
+  return {'signatures': json_signatures, 'signed': json_signed}, signed_ders
+
+
+def _decode_time_attestation_signed(der_bytes, index, end, signed_ders):
+  start, number_end = der.read_element(der_bytes, index, end, der.TAG_INTEGER)
+  number_of_tokens = der.decode_natural(der_bytes, start, number_end)
+
+  start, tokens_end = der.read_element(
+      der_bytes, number_end, end, der.TAG_SEQUENCE)
+  tokens = [der.decode_integer(der_bytes, token_start, token_end)
+      for token_start, token_end in der.read_sequence_elements(
+      der_bytes, start, tokens_end, der.TAG_INTEGER)]
+
+  start, timestamp_end = der.read_element(
+      der_bytes, tokens_end, end, der.TAG_INTEGER)
+  time = der.decode_time(der_bytes, start, timestamp_end)
+  der.expect_end(timestamp_end, end)
+
+  return {
+      'time': time, 'nonces': der.first_elements(tokens, number_of_tokens)}
+
+
+def _decode_ecu_manifest_signed(der_bytes, index, end, signed_ders):
+  start, index = der.read_element(
+      der_bytes, index, end, der.TAG_VISIBLE_STRING)
+  ecu_serial = der.decode_visible_string(der_bytes, start, index, 256)
+
+  start, index = der.read_element(der_bytes, index, end, der.TAG_INTEGER)
+  previous_timeserver_time = der.decode_time(der_bytes, start, index)
+  start, index = der.read_element(der_bytes, index, end, der.TAG_INTEGER)
+  timeserver_time = der.decode_time(der_bytes, start, index)
+
+  attacks_detected = ''
+  if der.peek_tag(der_bytes, index, end) == der.TAG_VISIBLE_STRING:
+    start, index = der.read_element(
+        der_bytes, index, end, der.TAG_VISIBLE_STRING)
+    attacks_detected = der.decode_visible_string(der_bytes, start, index, 1024)
+
+  # The installed image, a Target
+  index, target_end = der.read_element(
+      der_bytes, index, end, der.TAG_SEQUENCE)
+  der.expect_end(target_end, end)
+
+  start, index = der.read_element(
+      der_bytes, index, target_end, der.TAG_VISIBLE_STRING)
+  filepath = der.decode_visible_string(der_bytes, start, index, 256)
+  start, index = der.read_element(
+      der_bytes, index, target_end, der.TAG_INTEGER)
+  length = der.decode_natural(der_bytes, start, index)
+  start, index = der.read_element(
+      der_bytes, index, target_end, der.TAG_INTEGER)
+  number_of_hashes = der.decode_natural(der_bytes, start, index)
+  start, index = der.read_element(
+      der_bytes, index, target_end, der.TAG_SEQUENCE)
+  der.expect_end(index, target_end)
+
+  json_hashes = {}
+  for hash_start, hash_end in der.first_elements(der.read_sequence_elements(
+      der_bytes, start, index, der.TAG_SEQUENCE), number_of_hashes):
+    start, function_end = der.read_element(
+        der_bytes, hash_start, hash_end, der.TAG_ENUMERATED)
+    hash_function = der.decode_enumerated(
+        HASH_FUNCTIONS, der_bytes, start, function_end)
+    start, digest_end = der.read_element(
+        der_bytes, function_end, hash_end, der.TAG_OCTET_STRING)
+    der.expect_end(digest_end, hash_end)
+    json_hashes[hash_function] = _decode_octet_string(
+        der_bytes, start, digest_end)
+
+  return {
+      'ecu_serial': ecu_serial,
+      'installed_image': {
+          'filepath': filepath,
+          'fileinfo': {'length': length, 'hashes': json_hashes}},
+      'previous_timeserver_time': previous_timeserver_time,
+      'timeserver_time': timeserver_time,
+      'attacks_detected': attacks_detected}
+
+
+def _decode_vehicle_manifest_signed(der_bytes, index, end, signed_ders):
+  start, index = der.read_element(
+      der_bytes, index, end, der.TAG_VISIBLE_STRING)
+  vin = der.decode_visible_string(der_bytes, start, index, 256)
+  start, index = der.read_element(
+      der_bytes, index, end, der.TAG_VISIBLE_STRING)
+  primary_ecu_serial = der.decode_visible_string(der_bytes, start, index, 256)
+
+  start, index = der.read_element(der_bytes, index, end, der.TAG_INTEGER)
+  number_of_manifests = der.decode_natural(der_bytes, start, index)
+  start, index = der.read_element(der_bytes, index, end, der.TAG_SEQUENCE)
+
+  # The optional securityAttack of the Vehicle Version Manifest is not part of
+  # the dictionary format, so it is only checked.
+  if der.peek_tag(der_bytes, index, end) is not None:
+    attack_start, attack_end = der.read_element(
+        der_bytes, index, end, der.TAG_VISIBLE_STRING)
+    der.decode_visible_string(der_bytes, attack_start, attack_end, 1024)
+    der.expect_end(attack_end, end)
+
+  json_manifests = {}
+  manifests_end = index
+  index = start
+
+  for _ in range(number_of_manifests):
+    if index >= manifests_end:
+      raise tuf.Error('numberOfECUVersionManifests is ' +
+          repr(number_of_manifests) + ', but there are fewer ECU Version '
+          'Manifests.')
+
+    manifest, manifest_signed_ders = _decode_signable(
+        der_bytes, index, manifests_end, _decode_ecu_manifest_signed)
+    signed_ders.extend(manifest_signed_ders)
+    json_manifests.setdefault(
+        manifest['signed']['ecu_serial'], []).append(manifest)
+    index = der.read_element(
+        der_bytes, index, manifests_end, der.TAG_SEQUENCE)[1]
+
+  # Any further ECU Version Manifests are ignored, as they are by
+  # vehicle_manifest_asn1_coder, but they must still be well-formed.
+  der.read_sequence_elements(
+      der_bytes, index, manifests_end, der.TAG_SEQUENCE)
+
+  return {
+      'vin': vin,
+      'primary_ecu_serial': primary_ecu_serial,
+      'ecu_version_manifests': json_manifests}
+
+
+def _encode_octet_string(hex_string):
+  """Encode an OctetString, which must be 1 to 2048 octets long."""
+  return der.encode_octet_string_from_hex(hex_string, max_length=2048)
+
+
+def _decode_octet_string(der_bytes, start, end):
+  return der.decode_hex(der_bytes, start, end, 2048)
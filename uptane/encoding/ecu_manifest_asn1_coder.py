@@ -85,8 +85,12 @@ def get_json_signed(asn_metadata):
   numberOfHashes = int(target['numberOfHashes'])
   # Quick workaround for now.
   hashenum_to_hashfunction = {
+    0: 'sha224',
     1: 'sha256',
-    3: 'sha512'
+    2: 'sha384',
+    3: 'sha512',
+    4: 'sha512-224',
+    5: 'sha512-256'
   }
   hashes = target['hashes']
   json_hashes = {}
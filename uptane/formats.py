@@ -115,6 +115,20 @@ SIGNABLE_TIMESERVER_ATTESTATION_SCHEMA = SCHEMA.Object(
     signatures = SCHEMA.ListOf(SIGNATURE_SCHEMA))
 
 
+# A range of the bytes of an image file, as distributed by a Primary to a
+# Secondary one piece at a time (see Primary.get_image_chunk_for_ecu()).
+# 'length' is the length of the full image file, and 'hashes' are over 'data'
+# alone. The hashes only catch errors in transit; the full image is still
+# validated against the trusted target file info once it has all arrived.
+IMAGE_CHUNK_SCHEMA = SCHEMA.Object(
+    object_name = 'IMAGE_CHUNK_SCHEMA',
+    filepath = RELPATH_SCHEMA,
+    length = LENGTH_SCHEMA,
+    offset = LENGTH_SCHEMA,
+    data = SCHEMA.AnyBytes(),
+    hashes = HASHDICT_SCHEMA)
+
+
 ANY_UPTANE_METADATA_SCHEMA = SCHEMA.OneOf([
     TIMESERVER_ATTESTATION_SCHEMA,
     VEHICLE_VERSION_MANIFEST_SCHEMA,
@@ -37,12 +37,12 @@ import uptane.services.inventorydb as inventory
 import uptane.encoding.asn1_codec as asn1_codec
 import tuf
 import tuf.formats
+import tuf.schema
 import tuf.repository_tool as rt
 #import uptane.ber_encoder as ber_encoder
 from uptane import GREEN, RED, YELLOW, ENDCOLORS
 
 import os
-import hashlib
 
 from uptane.encoding.asn1_codec import DATATYPE_TIME_ATTESTATION
 from uptane.encoding.asn1_codec import DATATYPE_ECU_MANIFEST
@@ -167,6 +167,36 @@ class Director:
       ecuid: uptane.formats.ECU_SERIAL_SCHEMA
       manifest: uptane.formats.SIGNABLE_ECU_VERSION_MANIFEST_SCHEMA
     """
+    ecu_public_key = self._get_key_for_ecu_manifest(
+        ecu_serial, signed_ecu_manifest)
+
+    valid = uptane.common.verify_signature_over_metadata(
+        ecu_public_key,
+        signed_ecu_manifest['signatures'][0], # TODO: Fix single-signature assumption
+        signed_ecu_manifest['signed'],
+        DATATYPE_ECU_MANIFEST)
+
+    if not valid:
+      log.info(
+          'Validation failed on an ECU Manifest: signature is not valid. '
+          'It must be correctly signed by the expected key for that ECU.')
+      raise tuf.BadSignatureError('Sender supplied an invalid signature. '
+          'ECU Manifest is unacceptable. If you see this persistently, it is '
+          'possible that the Primary is compromised or that there is a man in '
+          'the middle attack or misconfiguration.')
+
+
+
+
+
+  def _get_key_for_ecu_manifest(self, ecu_serial, signed_ecu_manifest):
+    """
+    Performs every check of validate_ecu_manifest except the signature check,
+    and returns the public key registered for the ECU, against which the
+    signature on the ECU Manifest should then be checked.
+
+    Raises uptane.Spoofing or uptane.UnknownECU as validate_ecu_manifest does.
+    """
     uptane.formats.ECU_SERIAL_SCHEMA.check_match(ecu_serial)
     uptane.formats.SIGNABLE_ECU_VERSION_MANIFEST_SCHEMA.check_match(
         signed_ecu_manifest)
@@ -179,7 +209,10 @@ class Director:
           'signed in the manifest itself (' +
           repr(signed_ecu_manifest['signed']['ecu_serial']) + ').')
 
-    if ecu_serial not in inventory.ecu_public_keys:
+    try:
+      return inventory.get_ecu_public_key(ecu_serial)
+
+    except uptane.UnknownECU:
       log.info(
           'Validation failed on an ECU Manifest: ECU ' + repr(ecu_serial) +
           ' is not registered.')
@@ -188,24 +221,6 @@ class Director:
           'new, Register the new ECU with its key in order to be able to '
           'submit its manifests.')
 
-    ecu_public_key = inventory.ecu_public_keys[ecu_serial]
-
-
-    valid = uptane.common.verify_signature_over_metadata(
-        ecu_public_key,
-        signed_ecu_manifest['signatures'][0], # TODO: Fix single-signature assumption
-        signed_ecu_manifest['signed'],
-        DATATYPE_ECU_MANIFEST)
-
-    if not valid:
-      log.info(
-          'Validation failed on an ECU Manifest: signature is not valid. '
-          'It must be correctly signed by the expected key for that ECU.')
-      raise tuf.BadSignatureError('Sender supplied an invalid signature. '
-          'ECU Manifest is unacceptable. If you see this persistently, it is '
-          'possible that the Primary is compromised or that there is a man in '
-          'the middle attack or misconfiguration.')
-
 
 
 
@@ -261,6 +276,22 @@ class Director:
         uptane.UnknownVehicle
           if the VIN provided is not known to this Director
 
+    """
+    # The Vehicle Manifest, and each ECU Manifest, key and signature in it, is
+    # checked against its schema once, however many of the layers below check
+    # it again.
+    with tuf.schema.ValidationScope():
+      self._register_vehicle_manifest(
+          vin, primary_ecu_serial, signed_vehicle_manifest)
+
+
+
+
+
+  def _register_vehicle_manifest(
+      self, vin, primary_ecu_serial, signed_vehicle_manifest):
+    """
+    Performs register_vehicle_manifest, within a tuf.schema.ValidationScope.
     """
     uptane.formats.VIN_SCHEMA.check_match(vin)
     uptane.formats.ECU_SERIAL_SCHEMA.check_match(primary_ecu_serial)
@@ -274,7 +305,9 @@ class Director:
     uptane.formats.SIGNABLE_VEHICLE_VERSION_MANIFEST_SCHEMA.check_match(
         signed_vehicle_manifest)
 
-    if vin not in inventory.ecus_by_vin:
+    try:
+      inventory.check_vin_registered(vin)
+    except uptane.UnknownVehicle:
       raise uptane.UnknownVehicle('Received a vehicle manifest purportedly '
           'from a vehicle with a VIN that is not known to this Director.')
 
@@ -295,17 +328,21 @@ class Director:
 
 
     # Validate signatures on and register all individual ECU manifests for each
-    # ECU (may have multiple manifests per ECU).
+    # ECU (may have multiple manifests per ECU). The signatures on all of the
+    # ECU Manifests are checked together in one batch, after each ECU
+    # Manifest's other checks have been done.
     all_ecu_manifests = \
         signed_vehicle_manifest['signed']['ecu_version_manifests']
 
+    # A list of (ecu_serial, ECU Manifest, expected ECU public key) tuples,
+    # for the ECU Manifests whose signatures remain to be checked.
+    manifests_to_verify = []
+
     for ecu_serial in all_ecu_manifests:
       ecu_manifests = all_ecu_manifests[ecu_serial]
       for manifest in ecu_manifests:
         try:
-          # This calls validate_ecu_manifest, which can raise the errors
-          # caught below.
-          self.register_ecu_manifest(vin, ecu_serial, manifest)
+          ecu_public_key = self._get_key_for_ecu_manifest(ecu_serial, manifest)
         except uptane.Spoofing as e:
           log.warning(
               RED + 'Discarding a spoofed or malformed ECU Manifest. Error '
@@ -315,11 +352,32 @@ class Director:
           log.warning(
               RED + 'Discarding an ECU Manifest from unknown ECU. Error from '
               'validation attempt follows:\n' + ENDCOLORS + repr(e))
-        except tuf.BadSignatureError as e:
-          log.warning(
-              RED + 'Rejecting an ECU Manifest whose signature is invalid, '
-              'from within an otherwise valid Vehicle Manifest. Error from '
-              'validation attempt follows:\n' + ENDCOLORS + repr(e))
+        else:
+          manifests_to_verify.append((ecu_serial, manifest, ecu_public_key))
+
+    signatures_valid = uptane.common.verify_signatures_over_metadata(
+        [(ecu_public_key,
+          manifest['signatures'][0], # TODO: Fix single-signature assumption
+          manifest['signed'])
+          for ecu_serial, manifest, ecu_public_key in manifests_to_verify],
+        DATATYPE_ECU_MANIFEST)
+
+    # The valid ECU Manifests are saved together, in a single write to the
+    # inventory.
+    valid_ecu_manifests = []
+
+    for (ecu_serial, manifest, ecu_public_key), valid in zip(
+        manifests_to_verify, signatures_valid):
+      if valid:
+        valid_ecu_manifests.append((ecu_serial, manifest))
+      else:
+        log.warning(
+            RED + 'Rejecting an ECU Manifest whose signature is invalid, '
+            'from within an otherwise valid Vehicle Manifest. The ECU Manifest '
+            'from ECU ' + repr(ecu_serial) + ' must be correctly signed by the '
+            'expected key for that ECU.' + ENDCOLORS)
+
+    self._save_ecu_manifests(vin, valid_ecu_manifests)
 
 
 
@@ -351,7 +409,10 @@ class Director:
 
     # TODO: Consider mechanism for fetching keys from inventorydb itself,
     # rather than always registering them after Director svc starts up.
-    if primary_ecu_serial not in inventory.ecu_public_keys:
+    try:
+      ecu_public_key = inventory.get_ecu_public_key(primary_ecu_serial)
+
+    except uptane.UnknownECU:
       log.debug(
           'Rejecting a vehicle manifest from a Primary ECU whose '
           'key is not registered.')
@@ -360,8 +421,6 @@ class Director:
           'the ECU is new, Register the new ECU with its key in order to be '
           'able to submit its manifests.')
 
-    ecu_public_key = inventory.ecu_public_keys[primary_ecu_serial]
-
     # Here, we check to see if the key that signed the Vehicle Manifest is the
     # same key as ecu_public_key (the one the director expects), so that we can
     # generate a more informative error, allowing user/debugger to distinguish
@@ -384,22 +443,9 @@ class Director:
           'in signature: ' + repr(keyid_used_in_signature))
 
 
-    if tuf.conf.METADATA_FORMAT == 'der':
-      # To check the signature, we have to make sure to encode the data as it
-      # was when the signature was made. If we're using ASN.1/DER as the
-      # data format/encoding, then we convert the 'signed' portion of the data
-      # back to ASN.1/DER to check it.
-      # Further, since for ASN.1/DER, a SHA256 hash is taken of the data and
-      # *that* is what is signed, we perform that hashing as well and retrieve
-      # the raw binary digest.
-      data_to_check = asn1_codec.convert_signed_metadata_to_der(
-          vehicle_manifest, DATATYPE_VEHICLE_MANIFEST, only_signed=True)
-      data_to_check = hashlib.sha256(data_to_check).digest()
-
-    else:
-      data_to_check = vehicle_manifest['signed']
-
-
+    # In DER mode, the signature is checked over the digest of the 'signed'
+    # portion's original DER encoding, remembered when the manifest was
+    # decoded, rather than over a re-encoding of it.
     valid = uptane.common.verify_signature_over_metadata(
         ecu_public_key,
         vehicle_manifest['signatures'][0], # TODO: Fix assumptions.
@@ -423,21 +469,37 @@ class Director:
   def register_ecu_manifest(self, vin, ecu_serial, signed_ecu_manifest):
     """
     """
-    # Error out if the signature isn't valid and from the expected party.
-    # Also checks argument format.
-    self.validate_ecu_manifest(ecu_serial, signed_ecu_manifest)
+    # The ECU Manifest is checked against its schema only once.
+    with tuf.schema.ValidationScope():
+      # Error out if the signature isn't valid and from the expected party.
+      # Also checks argument format.
+      self.validate_ecu_manifest(ecu_serial, signed_ecu_manifest)
+
+      # Otherwise, we save it:
+      self._save_ecu_manifests(vin, [(ecu_serial, signed_ecu_manifest)])
+
+
+
+
+
+  def _save_ecu_manifests(self, vin, ecu_serials_and_manifests):
+    """
+    Saves ECU Manifests that have already been validated, given as a list of
+    (ecu_serial, signed_ecu_manifest) tuples, alerting if any of them report
+    detected attacks.
+    """
+    inventory.save_ecu_manifests(vin, ecu_serials_and_manifests)
 
-    # Otherwise, we save it:
-    inventory.save_ecu_manifest(vin, ecu_serial, signed_ecu_manifest)
+    for ecu_serial, signed_ecu_manifest in ecu_serials_and_manifests:
 
-    log.debug('Stored a valid ECU manifest from ECU ' + repr(ecu_serial))
+      log.debug('Stored a valid ECU manifest from ECU ' + repr(ecu_serial))
 
-    # Alert if there's been a detected attack.
-    if signed_ecu_manifest['signed']['attacks_detected']:
-      log.warning(
-          YELLOW + 'Attacks have been reported by the Secondary ECU ' +
-          repr(ecu_serial) + ':\n' +
-          signed_ecu_manifest['signed']['attacks_detected'] + ENDCOLORS)
+      # Alert if there's been a detected attack.
+      if signed_ecu_manifest['signed']['attacks_detected']:
+        log.warning(
+            YELLOW + 'Attacks have been reported by the Secondary ECU ' +
+            repr(ecu_serial) + ':\n' +
+            signed_ecu_manifest['signed']['attacks_detected'] + ENDCOLORS)
 
 
 
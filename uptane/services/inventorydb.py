@@ -7,19 +7,39 @@
   by the Director.
 
 
-  # TODO: <~> This is not properly thread-safe: there may be race conditions if
-  Primaries are being switched frequently. The windows are extremely small, but
-  assertions related to VIN registration in _check_registration_is_sane() are
-  likely to fail if such a race   condition is encountered. Similar race
-  conditions may exist. Cautious use of mutexes or a queue is probably
-  necessary.
+  The public functions of this module may be called from several threads at
+  once (e.g. by a Director handling several Vehicle Manifests concurrently).
+  Each holds a module-wide lock while it uses the backend, so that its checks
+  (e.g. of registration) and its changes happen together.
 
 
 
+<Storage Backends>
+  The data is kept by a storage backend, selected with set_backend(). The
+  public functions of this module check their arguments and the registration
+  of VINs and ECU Serials, and then read from or write to the active backend.
+  Two backends are provided:
+
+    InMemoryInventory (the default)
+      The reference backend, keeping everything in the global dictionaries
+      described below. Nothing survives a restart.
+
+    SQLiteInventory
+      A persistent backend storing everything in an SQLite database file,
+      using only the Python standard library. Lookups by VIN and by ECU
+      Serial are indexed.
+
+  Both backends accept an optional limit on the number of manifests retained
+  per vehicle and per ECU; when a limit is set, the oldest manifests are
+  discarded as new ones are saved. By default, all manifests are retained.
+
+
 <Globals>
   The following five global dictionaries store information about ECUs and
   vehicles, including their serials, keys, and manifests submitted from
-  (ostensibly) them to the Director.
+  (ostensibly) them to the Director. They are the storage of the default
+  InMemoryInventory backend: when another backend is active, they are not
+  used, and the public functions below should be used instead.
 
     vehicle_manifests
 
@@ -102,6 +122,7 @@
   Save Manifests:
     save_vehicle_manifest(vin, signed_vehicle_manifest)
     save_ecu_manifest(vin, ecu_serial, signed_ecu_manifest)
+    save_ecu_manifests(vin, ecu_serials_and_manifests)
 
   Get Manifests:
     get_vehicle_manifests(vin)
@@ -110,6 +131,15 @@
     get_last_ecu_manifest(ecu_serial)
     get_all_ecu_manifests_from_vehicle(vin)
 
+  Get Vehicles and ECUs:
+    get_registered_vins()
+    get_ecus_in_vehicle(vin)
+    get_primary_ecu(vin)
+
+  Storage Backend:
+    set_backend(backend)
+    get_backend()
+
 """
 from __future__ import print_function
 from __future__ import unicode_literals
@@ -119,6 +149,10 @@ import uptane # Import before TUF modules; may change tuf.conf values.
 import uptane.formats
 import tuf
 
+import json
+import sqlite3
+import threading
+
 # Global dictionaries
 vehicle_manifests = {}
 ecu_manifests = {}
@@ -127,6 +161,414 @@ ecus_by_vin = {}
 ecu_public_keys = {}
 
 
+
+
+
+class InMemoryInventory(object):
+  """
+  The reference storage backend for the inventory, keeping all data in
+  dictionaries (by default, the global dictionaries of this module).
+
+  Fields:
+
+    vehicle_manifests, ecu_manifests, primary_ecus_by_vin, ecus_by_vin,
+    ecu_public_keys
+      Dictionaries of the same structure as the globals of the same names
+      described in the module docstring.
+
+    max_manifests_per_vehicle, max_manifests_per_ecu
+      The number of most recent manifests retained for each vehicle and each
+      ECU, or None to retain all manifests.
+
+  The methods of this class (and of any other backend) do not check the format
+  of their arguments or the registration of VINs and ECU Serials; the public
+  functions of this module do that before calling them.
+  """
+
+  def __init__(self, max_manifests_per_vehicle=None,
+      max_manifests_per_ecu=None, use_globals=True):
+    """
+    If use_globals is True, the global dictionaries of this module are used
+    to store the data, so that they reflect the content of this backend.
+    """
+    if use_globals:
+      self.vehicle_manifests = vehicle_manifests
+      self.ecu_manifests = ecu_manifests
+      self.primary_ecus_by_vin = primary_ecus_by_vin
+      self.ecus_by_vin = ecus_by_vin
+      self.ecu_public_keys = ecu_public_keys
+    else:
+      self.vehicle_manifests = {}
+      self.ecu_manifests = {}
+      self.primary_ecus_by_vin = {}
+      self.ecus_by_vin = {}
+      self.ecu_public_keys = {}
+
+    self.max_manifests_per_vehicle = max_manifests_per_vehicle
+    self.max_manifests_per_ecu = max_manifests_per_ecu
+
+
+
+  def is_vin_registered(self, vin):
+    # A VIN may be in either none or all three of these dictionaries, and
+    # nowhere in between, or there is a bug.
+    assert (vin in self.vehicle_manifests) == (vin in self.ecus_by_vin) == (
+        vin in self.primary_ecus_by_vin), 'Programming error.'
+
+    return vin in self.vehicle_manifests
+
+
+
+  def get_registered_vins(self):
+    return list(self.ecus_by_vin)
+
+
+
+  def get_ecus_in_vehicle(self, vin):
+    return list(self.ecus_by_vin[vin])
+
+
+
+  def get_primary_ecu(self, vin):
+    return self.primary_ecus_by_vin[vin]
+
+
+
+  def get_ecu_public_key(self, ecu_serial):
+    assert (ecu_serial in self.ecu_public_keys) == (
+        ecu_serial in self.ecu_manifests), \
+        'Programming error: ECU registration is not consistent.'
+
+    return self.ecu_public_keys.get(ecu_serial)
+
+
+
+  def register_vehicle(self, vin, primary_ecu_serial):
+    self.ecus_by_vin[vin] = []
+    self.vehicle_manifests[vin] = []
+    self.primary_ecus_by_vin[vin] = primary_ecu_serial
+
+
+
+  def register_ecu(self, is_primary, vin, ecu_serial, public_key):
+    # Associate the ECU with the vehicle.
+    if ecu_serial not in self.ecus_by_vin[vin]:
+      self.ecus_by_vin[vin].append(ecu_serial)
+
+    if is_primary:
+      # Set the ECU as the vehicle's Primary ECU.
+      self.primary_ecus_by_vin[vin] = ecu_serial
+
+    # Save the ECU's public key.
+    self.ecu_public_keys[ecu_serial] = public_key
+
+    # Create an entry in the ecu_manifests dictionary for future manifests
+    # from the ECU.
+    self.ecu_manifests[ecu_serial] = []
+
+
+
+  def get_vehicle_manifests(self, vin):
+    return self.vehicle_manifests[vin]
+
+
+
+  def get_last_vehicle_manifest(self, vin):
+    if not self.vehicle_manifests[vin]:
+      return None
+    else:
+      return self.vehicle_manifests[vin][-1]
+
+
+
+  def get_ecu_manifests(self, ecu_serial):
+    return self.ecu_manifests[ecu_serial]
+
+
+
+  def get_last_ecu_manifest(self, ecu_serial):
+    if not self.ecu_manifests[ecu_serial]:
+      return None
+    else:
+      return self.ecu_manifests[ecu_serial][-1]
+
+
+
+  def add_vehicle_manifest(self, vin, signed_vehicle_manifest):
+    self.vehicle_manifests[vin].append(signed_vehicle_manifest)
+    _discard_oldest(
+        self.vehicle_manifests[vin], self.max_manifests_per_vehicle)
+
+
+
+  def add_ecu_manifests(self, ecu_serials_and_manifests):
+    for ecu_serial, signed_ecu_manifest in ecu_serials_and_manifests:
+      self.ecu_manifests[ecu_serial].append(signed_ecu_manifest)
+      _discard_oldest(
+          self.ecu_manifests[ecu_serial], self.max_manifests_per_ecu)
+
+
+
+
+
+class SQLiteInventory(object):
+  """
+  A persistent storage backend for the inventory, keeping all data in an
+  SQLite database. Manifests and keys are stored as JSON. All lookups are by
+  VIN or by ECU Serial, and are indexed.
+
+  Every write is done in a single transaction, so saving many ECU Manifests
+  at once (see save_ecu_manifests()) costs a single commit.
+
+  Fields:
+
+    db_fname
+      The filename of the SQLite database, created if it does not exist, or
+      ':memory:' for a temporary in-memory database.
+
+    max_manifests_per_vehicle, max_manifests_per_ecu
+      The number of most recent manifests retained for each vehicle and each
+      ECU, or None to retain all manifests.
+
+  The connection is shared by all threads, and access to it is serialized by
+  a lock.
+  """
+
+  def __init__(self, db_fname, max_manifests_per_vehicle=None,
+      max_manifests_per_ecu=None):
+
+    self.db_fname = db_fname
+    self.max_manifests_per_vehicle = max_manifests_per_vehicle
+    self.max_manifests_per_ecu = max_manifests_per_ecu
+
+    self._lock = threading.Lock()
+    self._connection = sqlite3.connect(db_fname, check_same_thread=False)
+
+    with self._lock, self._connection:
+      self._connection.executescript("""
+          CREATE TABLE IF NOT EXISTS vehicles (
+              vin TEXT PRIMARY KEY,
+              primary_ecu_serial TEXT);
+
+          CREATE TABLE IF NOT EXISTS vehicle_ecus (
+              id INTEGER PRIMARY KEY AUTOINCREMENT,
+              vin TEXT NOT NULL,
+              ecu_serial TEXT NOT NULL,
+              UNIQUE (vin, ecu_serial));
+
+          CREATE TABLE IF NOT EXISTS ecu_public_keys (
+              ecu_serial TEXT PRIMARY KEY,
+              public_key TEXT NOT NULL);
+
+          CREATE TABLE IF NOT EXISTS vehicle_manifests (
+              id INTEGER PRIMARY KEY AUTOINCREMENT,
+              vin TEXT NOT NULL,
+              manifest TEXT NOT NULL);
+
+          CREATE INDEX IF NOT EXISTS vehicle_manifests_by_vin
+              ON vehicle_manifests (vin, id);
+
+          CREATE TABLE IF NOT EXISTS ecu_manifests (
+              id INTEGER PRIMARY KEY AUTOINCREMENT,
+              ecu_serial TEXT NOT NULL,
+              manifest TEXT NOT NULL);
+
+          CREATE INDEX IF NOT EXISTS ecu_manifests_by_ecu_serial
+              ON ecu_manifests (ecu_serial, id);
+          """)
+
+
+
+  def _query(self, statement, parameters=()):
+    with self._lock:
+      return self._connection.execute(statement, parameters).fetchall()
+
+
+
+  def is_vin_registered(self, vin):
+    return bool(self._query('SELECT 1 FROM vehicles WHERE vin = ?', (vin,)))
+
+
+
+  def get_registered_vins(self):
+    return [row[0] for row in self._query('SELECT vin FROM vehicles')]
+
+
+
+  def get_ecus_in_vehicle(self, vin):
+    return [row[0] for row in self._query(
+        'SELECT ecu_serial FROM vehicle_ecus WHERE vin = ? ORDER BY id',
+        (vin,))]
+
+
+
+  def get_primary_ecu(self, vin):
+    return self._query('SELECT primary_ecu_serial FROM vehicles '
+        'WHERE vin = ?', (vin,))[0][0]
+
+
+
+  def get_ecu_public_key(self, ecu_serial):
+    rows = self._query('SELECT public_key FROM ecu_public_keys '
+        'WHERE ecu_serial = ?', (ecu_serial,))
+    if not rows:
+      return None
+    return json.loads(rows[0][0])
+
+
+
+  def register_vehicle(self, vin, primary_ecu_serial):
+    with self._lock, self._connection:
+      self._connection.execute('DELETE FROM vehicle_ecus WHERE vin = ?', (vin,))
+      self._connection.execute(
+          'DELETE FROM vehicle_manifests WHERE vin = ?', (vin,))
+      self._connection.execute('INSERT OR REPLACE INTO vehicles '
+          '(vin, primary_ecu_serial) VALUES (?, ?)', (vin, primary_ecu_serial))
+
+
+
+  def register_ecu(self, is_primary, vin, ecu_serial, public_key):
+    with self._lock, self._connection:
+      self._connection.execute('INSERT OR IGNORE INTO vehicle_ecus '
+          '(vin, ecu_serial) VALUES (?, ?)', (vin, ecu_serial))
+      if is_primary:
+        self._connection.execute('UPDATE vehicles SET primary_ecu_serial = ? '
+            'WHERE vin = ?', (ecu_serial, vin))
+      self._connection.execute('INSERT OR REPLACE INTO ecu_public_keys '
+          '(ecu_serial, public_key) VALUES (?, ?)',
+          (ecu_serial, json.dumps(public_key)))
+      self._connection.execute(
+          'DELETE FROM ecu_manifests WHERE ecu_serial = ?', (ecu_serial,))
+
+
+
+  def get_vehicle_manifests(self, vin):
+    return [json.loads(row[0]) for row in self._query('SELECT manifest FROM '
+        'vehicle_manifests WHERE vin = ? ORDER BY id', (vin,))]
+
+
+
+  def get_last_vehicle_manifest(self, vin):
+    rows = self._query('SELECT manifest FROM vehicle_manifests WHERE vin = ? '
+        'ORDER BY id DESC LIMIT 1', (vin,))
+    if not rows:
+      return None
+    return json.loads(rows[0][0])
+
+
+
+  def get_ecu_manifests(self, ecu_serial):
+    return [json.loads(row[0]) for row in self._query('SELECT manifest FROM '
+        'ecu_manifests WHERE ecu_serial = ? ORDER BY id', (ecu_serial,))]
+
+
+
+  def get_last_ecu_manifest(self, ecu_serial):
+    rows = self._query('SELECT manifest FROM ecu_manifests '
+        'WHERE ecu_serial = ? ORDER BY id DESC LIMIT 1', (ecu_serial,))
+    if not rows:
+      return None
+    return json.loads(rows[0][0])
+
+
+
+  def add_vehicle_manifest(self, vin, signed_vehicle_manifest):
+    with self._lock, self._connection:
+      self._connection.execute('INSERT INTO vehicle_manifests (vin, manifest) '
+          'VALUES (?, ?)', (vin, json.dumps(signed_vehicle_manifest)))
+      self._discard_oldest('vehicle_manifests', 'vin', vin,
+          self.max_manifests_per_vehicle)
+
+
+
+  def add_ecu_manifests(self, ecu_serials_and_manifests):
+    with self._lock, self._connection:
+      self._connection.executemany('INSERT INTO ecu_manifests '
+          '(ecu_serial, manifest) VALUES (?, ?)',
+          [(ecu_serial, json.dumps(manifest))
+          for ecu_serial, manifest in ecu_serials_and_manifests])
+      for ecu_serial in set(
+          ecu_serial for ecu_serial, manifest in ecu_serials_and_manifests):
+        self._discard_oldest('ecu_manifests', 'ecu_serial', ecu_serial,
+            self.max_manifests_per_ecu)
+
+
+
+  def _discard_oldest(self, table, column, value, max_manifests):
+    """
+    Within the current transaction, delete all but the newest max_manifests
+    rows of the given table (vehicle_manifests or ecu_manifests) for the given
+    VIN or ECU Serial.
+    """
+    if max_manifests is None:
+      return
+
+    self._connection.execute(
+        'DELETE FROM ' + table + ' WHERE ' + column + ' = ? AND id NOT IN '
+        '(SELECT id FROM ' + table + ' WHERE ' + column + ' = ? '
+        'ORDER BY id DESC LIMIT ?)', (value, value, max_manifests))
+
+
+
+  def close(self):
+    with self._lock:
+      self._connection.close()
+
+
+
+
+
+def _discard_oldest(manifests, max_manifests):
+  """
+  Delete, in place, all but the last max_manifests elements of the given list
+  of manifests. If max_manifests is None, keep them all.
+  """
+  if max_manifests is not None and len(manifests) > max_manifests:
+    del manifests[:len(manifests) - max_manifests]
+
+
+
+
+
+# The storage backend currently in use. See set_backend().
+_backend = InMemoryInventory()
+
+# Held by the public functions below while they use the backend. (Reentrant,
+# since some of them call others.)
+_lock = threading.RLock()
+
+
+
+
+
+def set_backend(backend):
+  """
+  Sets the storage backend used by this module's functions, e.g.
+
+    inventorydb.set_backend(inventorydb.SQLiteInventory(
+        'inventory.sqlite', max_manifests_per_vehicle=100))
+
+  The data already stored by the previous backend is not carried over.
+
+  Arguments:
+    backend: an InMemoryInventory or SQLiteInventory object, or any object
+             providing the same methods.
+  """
+  global _backend
+  _backend = backend
+
+
+
+
+
+def get_backend():
+  """Returns the storage backend currently used by this module's functions."""
+  return _backend
+
+
+
+
+
 def get_ecu_public_key(ecu_serial):
   """
   Returns the public key that a particular ECU was registered with.
@@ -142,49 +584,86 @@ def get_ecu_public_key(ecu_serial):
 
   uptane.formats.ECU_SERIAL_SCHEMA.check_match(ecu_serial)
 
-  if ecu_serial not in ecu_public_keys:
+  with _lock:
+    public_key = _backend.get_ecu_public_key(ecu_serial)
+
+  if public_key is None:
     raise uptane.UnknownECU('The given ECU Serial, ' + repr(ecu_serial) +
         ' is not known. It must be registered.')
 
-  return ecu_public_keys[ecu_serial]
+  return public_key
+
+
+
+
+
+def get_registered_vins():
+  """
+  Returns a list of the VINs of all registered vehicles.
+  """
+  with _lock:
+    return _backend.get_registered_vins()
+
+
+
+
+
+def get_ecus_in_vehicle(vin):
+  """
+  Returns a list of the ECU Serials of all ECUs associated with the given VIN.
+  """
+  with _lock:
+    check_vin_registered(vin)
+    return _backend.get_ecus_in_vehicle(vin)
+
+
+
+
+
+def get_primary_ecu(vin):
+  """
+  Returns the ECU Serial of the Primary ECU of the vehicle with the given VIN,
+  or None if the vehicle has no registered Primary ECU.
+  """
+  with _lock:
+    check_vin_registered(vin)
+    return _backend.get_primary_ecu(vin)
 
 
 
 
 
 def get_vehicle_manifests(vin):
-  check_vin_registered(vin)
-  return vehicle_manifests[vin]
+  with _lock:
+    check_vin_registered(vin)
+    return _backend.get_vehicle_manifests(vin)
 
 
 
 
 
 def get_last_vehicle_manifest(vin):
-  check_vin_registered(vin)
-  if not vehicle_manifests[vin]:
-    return None
-  else:
-    return vehicle_manifests[vin][-1]
+  with _lock:
+    check_vin_registered(vin)
+    return _backend.get_last_vehicle_manifest(vin)
 
 
 
 
 
 def get_ecu_manifests(ecu_serial):
-  check_ecu_registered(ecu_serial)
-  return ecu_manifests[ecu_serial]
+  with _lock:
+    check_ecu_registered(ecu_serial)
+    return _backend.get_ecu_manifests(ecu_serial)
 
 
 
 
 
 def get_last_ecu_manifest(ecu_serial):
-  check_ecu_registered(ecu_serial)
-  if not ecu_manifests[ecu_serial]:
-    return None
-  else:
-    return ecu_manifests[ecu_serial][-1]
+  with _lock:
+    check_ecu_registered(ecu_serial)
+    return _backend.get_last_ecu_manifest(ecu_serial)
 
 
 
@@ -195,18 +674,19 @@ def save_vehicle_manifest(vin, signed_vehicle_manifest):
   uptane.formats.SIGNABLE_VEHICLE_VERSION_MANIFEST_SCHEMA, save it in an index
   by vin, and save the individual ecu attestations in an index by ecu serial.
   """
-  check_vin_registered(vin) # check arg format and registration
+  with _lock:
+    check_vin_registered(vin) # check arg format and registration
 
-  uptane.formats.SIGNABLE_VEHICLE_VERSION_MANIFEST_SCHEMA.check_match(
-       signed_vehicle_manifest)
+    uptane.formats.SIGNABLE_VEHICLE_VERSION_MANIFEST_SCHEMA.check_match(
+         signed_vehicle_manifest)
 
-  vehicle_manifests[vin].append(signed_vehicle_manifest)
+    _backend.add_vehicle_manifest(vin, signed_vehicle_manifest)
 
 
   # Not doing it this way because the Director is going to pass through a
   # correctly-signed vehicle manifest even if some of the ECU Manifests within
   # it are *not* correctly signed. The Director will instead issue a
-  # save_ecu_manifest call for each validly-signed ECU Manifest.
+  # save_ecu_manifests call for the validly-signed ECU Manifests.
   # # Save all the contained ECU manifests.
   # all_contained_ecu_manifests = signed_vehicle_manifest['signed'][
   #     'ecu_version_manifests']
@@ -231,11 +711,13 @@ def get_all_ecu_manifests_from_vehicle(vin):
      'ecuserial9': []}
   """
 
-  check_vin_registered(vin) # check arg format and registration
+  with _lock:
+    check_vin_registered(vin) # check arg format and registration
 
-  ecus_in_vehicle = ecus_by_vin[vin]
+    ecus_in_vehicle = _backend.get_ecus_in_vehicle(vin)
 
-  return {serial: ecu_manifests[serial] for serial in ecus_in_vehicle}
+    return {serial: _backend.get_ecu_manifests(serial)
+        for serial in ecus_in_vehicle}
 
 
 
@@ -243,12 +725,35 @@ def get_all_ecu_manifests_from_vehicle(vin):
 
 def save_ecu_manifest(vin, ecu_serial, signed_ecu_manifest):
 
-  check_ecu_registered(ecu_serial) # check format and registration
+  save_ecu_manifests(vin, [(ecu_serial, signed_ecu_manifest)])
+
+
+
+
+
+def save_ecu_manifests(vin, ecu_serials_and_manifests):
+  """
+  Saves many ECU Manifests at once, e.g. all of the valid ECU Manifests from a
+  Vehicle Manifest. Every argument is checked before anything is saved, and
+  the backend saves them all in a single transaction.
+
+  Arguments:
+    vin: the VIN of the vehicle the ECU Manifests came from
+    ecu_serials_and_manifests: a list of (ecu_serial, signed_ecu_manifest)
+        tuples, each ECU Manifest complying with
+        uptane.formats.SIGNABLE_ECU_VERSION_MANIFEST_SCHEMA
+  """
+
+  with _lock:
+    for ecu_serial, signed_ecu_manifest in ecu_serials_and_manifests:
 
-  uptane.formats.SIGNABLE_ECU_VERSION_MANIFEST_SCHEMA.check_match(
-       signed_ecu_manifest)
+      check_ecu_registered(ecu_serial) # check format and registration
 
-  ecu_manifests[ecu_serial].append(signed_ecu_manifest)
+      uptane.formats.SIGNABLE_ECU_VERSION_MANIFEST_SCHEMA.check_match(
+           signed_ecu_manifest)
+
+    if ecu_serials_and_manifests:
+      _backend.add_ecu_manifests(ecu_serials_and_manifests)
 
 
 
@@ -289,44 +794,29 @@ def register_ecu(is_primary, vin, ecu_serial, public_key, overwrite=True):
   tuf.formats.ANYKEY_SCHEMA.check_match(public_key)
   tuf.formats.BOOLEAN_SCHEMA.check_match(overwrite)
 
-  assert (ecu_serial in ecu_public_keys) == (ecu_serial in ecu_manifests), \
-      'Programming error: ECU registration is not consistent.'
-
-  if not overwrite:
-
-    # If we aren't supposed to be overwriting public keys or Primary
-    # associations, make sure we don't.
-
-    if is_primary and vin in primary_ecus_by_vin and \
-        primary_ecus_by_vin[vin] is not None:
-      raise uptane.Spoofing('The given VIN, ' + repr(vin) + ', is already '
-          'associated with a Primary ECU.')
-
-    if ecu_serial in ecu_public_keys:
-      raise uptane.Spoofing('The given ECU Serial, ' + repr(ecu_serial) +
-          ', is already associated with a public key.')
-
-  # It is expected that the vehicle to which this ECU belongs is already
-  # registered.
-  check_vin_registered(vin)
+  with _lock:
 
+    ecu_is_registered = _backend.get_ecu_public_key(ecu_serial) is not None
 
-  # Associate the ECU with the vehicle.
-  if ecu_serial not in ecus_by_vin[vin]:
-    ecus_by_vin[vin].append(ecu_serial)
+    if not overwrite:
 
-  if is_primary:
-    # Set the ECU as the vehicle's Primary ECU.
-    primary_ecus_by_vin[vin] = ecu_serial
+      # If we aren't supposed to be overwriting public keys or Primary
+      # associations, make sure we don't.
 
+      if is_primary and _backend.is_vin_registered(vin) and \
+          _backend.get_primary_ecu(vin) is not None:
+        raise uptane.Spoofing('The given VIN, ' + repr(vin) + ', is already '
+            'associated with a Primary ECU.')
 
-  # Save the ECU's public key.
-  ecu_public_keys[ecu_serial] = public_key
+      if ecu_is_registered:
+        raise uptane.Spoofing('The given ECU Serial, ' + repr(ecu_serial) +
+            ', is already associated with a public key.')
 
+    # It is expected that the vehicle to which this ECU belongs is already
+    # registered.
+    check_vin_registered(vin)
 
-  # Create an entry in the ecu_manifests dictionary for future manifests from
-  # the ECU.
-  ecu_manifests[ecu_serial] = []
+    _backend.register_ecu(is_primary, vin, ecu_serial, public_key)
 
 
 
@@ -334,20 +824,19 @@ def register_ecu(is_primary, vin, ecu_serial, public_key, overwrite=True):
 
 def register_vehicle(vin, primary_ecu_serial=None, overwrite=True):
 
-  _check_registration_is_sane(vin)
+  uptane.formats.VIN_SCHEMA.check_match(vin)
 
   if primary_ecu_serial is not None:
     uptane.formats.ECU_SERIAL_SCHEMA.check_match(primary_ecu_serial)
 
   tuf.formats.BOOLEAN_SCHEMA.check_match(overwrite)
 
-  if not overwrite and vin in ecus_by_vin:
-    raise uptane.Spoofing('The given VIN, ' + repr(vin) + ', is already '
-        'registered.')
+  with _lock:
+    if not overwrite and _check_registration_is_sane(vin):
+      raise uptane.Spoofing('The given VIN, ' + repr(vin) + ', is already '
+          'registered.')
 
-  ecus_by_vin[vin] = []
-  vehicle_manifests[vin] = []
-  primary_ecus_by_vin[vin] = primary_ecu_serial
+    _backend.register_vehicle(vin, primary_ecu_serial)
 
 
 
@@ -356,9 +845,7 @@ def register_vehicle(vin, primary_ecu_serial=None, overwrite=True):
 
 def check_vin_registered(vin):
 
-  _check_registration_is_sane(vin)
-
-  if vin not in vehicle_manifests:
+  if not _check_registration_is_sane(vin):
     # TODO: Should we also log here? Review logging before exceptions
     # throughout the reference implementation.
     raise uptane.UnknownVehicle('The given VIN, ' + repr(vin) + ', is not '
@@ -370,17 +857,19 @@ def check_vin_registered(vin):
 
 def _check_registration_is_sane(vin):
   """
-  Asserts that a data structure invariant remains correct. A vehicle must be
-  in all three of the relevant global dictionaries if it is registered, and in
-  none of them if it is not.
+  Checks the format of the given VIN and returns True if it is registered,
+  False otherwise.
+
+  The backend asserts that a data structure invariant remains correct where
+  applicable: in the in-memory backend, a vehicle must be in all three of the
+  relevant global dictionaries if it is registered, and in none of them if it
+  is not.
   """
 
   uptane.formats.VIN_SCHEMA.check_match(vin)
 
-  # A VIN may be in either none or all three of these dictionaries, and nowhere
-  # in between, or there is a bug.
-  assert (vin in vehicle_manifests) == (vin in ecus_by_vin) == (
-      vin in primary_ecus_by_vin), 'Programming error.'
+  with _lock:
+    return _backend.is_vin_registered(vin)
 
 
 
@@ -390,6 +879,9 @@ def check_ecu_registered(ecu_serial):
 
   uptane.formats.ECU_SERIAL_SCHEMA.check_match(ecu_serial)
 
-  if ecu_serial not in ecu_public_keys:
+  with _lock:
+    ecu_is_registered = _backend.get_ecu_public_key(ecu_serial) is not None
+
+  if not ecu_is_registered:
     raise uptane.UnknownECU('The given ECU serial, ' + repr(ecu_serial) +
         ', is not known.')